@@ -0,0 +1,65 @@
+"""Add direct-upload staging fields to patient_photos
+
+Revision ID: 202602160000
+Revises: 202602150000
+Create Date: 2026-02-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602160000'
+down_revision: Union[str, None] = '202602150000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'patient_photos' not in inspector.get_table_names():
+        return
+
+    columns = [c['name'] for c in inspector.get_columns('patient_photos')]
+
+    if 'staging_key' not in columns:
+        op.add_column('patient_photos', sa.Column('staging_key', sa.String(length=512), nullable=True))
+
+    if 'upload_status' not in columns:
+        # Existing rows were processed synchronously and are already ready
+        op.add_column(
+            'patient_photos',
+            sa.Column('upload_status', sa.String(length=20), server_default='ready', nullable=False)
+        )
+        op.create_check_constraint(
+            'check_patient_photos_upload_status',
+            'patient_photos',
+            "upload_status IN ('awaiting_upload', 'processing', 'ready', 'failed')"
+        )
+        # Partial index: the processing worker only ever scans the (small) queue
+        op.create_index(
+            'idx_patient_photos_upload_queue',
+            'patient_photos',
+            ['upload_status', 'id'],
+            postgresql_where=sa.text("upload_status = 'processing'")
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'patient_photos' not in inspector.get_table_names():
+        return
+    columns = [c['name'] for c in inspector.get_columns('patient_photos')]
+
+    if 'upload_status' in columns:
+        op.drop_index('idx_patient_photos_upload_queue', table_name='patient_photos')
+        op.drop_constraint('check_patient_photos_upload_status', 'patient_photos', type_='check')
+        op.drop_column('patient_photos', 'upload_status')
+
+    if 'staging_key' in columns:
+        op.drop_column('patient_photos', 'staging_key')
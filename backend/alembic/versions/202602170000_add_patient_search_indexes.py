@@ -0,0 +1,76 @@
+"""Add normalized phone column and trigram search indexes
+
+Revision ID: 202602170000
+Revises: 202602160000
+Create Date: 2026-02-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602170000'
+down_revision: Union[str, None] = '202602160000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column) for every '%term%' search column
+TRIGRAM_INDEXES = [
+    ('idx_patients_full_name_trgm', 'patients', 'full_name'),
+    ('idx_patients_phone_digits_trgm', 'patients', 'phone_number_digits'),
+    ('idx_line_users_display_name_trgm', 'line_users', 'display_name'),
+    ('idx_line_users_clinic_display_name_trgm', 'line_users', 'clinic_display_name'),
+]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    if 'patients' not in tables or 'line_users' not in tables:
+        return
+
+    columns = [c['name'] for c in inspector.get_columns('patients')]
+    if 'phone_number_digits' not in columns:
+        # Stored generated column: kept in sync by PostgreSQL on every write
+        op.add_column(
+            'patients',
+            sa.Column(
+                'phone_number_digits',
+                sa.String(length=50),
+                sa.Computed("regexp_replace(phone_number, '[^0-9]', '', 'g')", persisted=True),
+                nullable=True
+            )
+        )
+
+    # pg_trgm ships with PostgreSQL's contrib package; skip the indexes (search
+    # still works, just without index support) where it is not installed
+    trgm_available = conn.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).first() is not None
+    if not trgm_available:
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, table, column in TRIGRAM_INDEXES:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'patients' not in inspector.get_table_names():
+        return
+
+    for index_name, _, _ in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    columns = [c['name'] for c in inspector.get_columns('patients')]
+    if 'phone_number_digits' in columns:
+        op.drop_column('patients', 'phone_number_digits')
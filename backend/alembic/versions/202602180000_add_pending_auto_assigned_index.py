@@ -0,0 +1,37 @@
+"""Add partial index for pending auto-assigned appointments
+
+Revision ID: 202602180000
+Revises: 202602170000
+Create Date: 2026-02-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602180000'
+down_revision: Union[str, None] = '202602170000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'appointments' not in inspector.get_table_names():
+        return
+
+    # The auto-assignment job only ever looks at confirmed appointments that are
+    # still hidden; keep that small set in its own index
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_pending_auto_assigned "
+        "ON appointments (calendar_event_id) "
+        "WHERE is_auto_assigned = true AND status = 'confirmed'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_appointments_pending_auto_assigned")
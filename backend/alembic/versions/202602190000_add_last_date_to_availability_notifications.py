@@ -0,0 +1,58 @@
+"""Add last_date to availability_notifications
+
+Revision ID: 202602190000
+Revises: 202602180000
+Create Date: 2026-02-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602190000'
+down_revision: Union[str, None] = '202602180000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'availability_notifications' not in inspector.get_table_names():
+        return
+
+    columns = [c['name'] for c in inspector.get_columns('availability_notifications')]
+
+    if 'last_date' not in columns:
+        op.add_column('availability_notifications', sa.Column('last_date', sa.Date(), nullable=True))
+        # Backfill from the latest date in each notification's time windows
+        op.execute(
+            "UPDATE availability_notifications SET last_date = ("
+            "SELECT max((tw->>'date')::date) FROM json_array_elements(time_windows) AS tw"
+            ")"
+        )
+        # Partial index: the scheduler only looks at active notifications
+        op.create_index(
+            'idx_availability_notifications_active_last_date',
+            'availability_notifications',
+            ['last_date'],
+            postgresql_where=sa.text("is_active = true")
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'availability_notifications' not in inspector.get_table_names():
+        return
+    columns = [c['name'] for c in inspector.get_columns('availability_notifications')]
+
+    if 'last_date' in columns:
+        op.drop_index(
+            'idx_availability_notifications_active_last_date',
+            table_name='availability_notifications'
+        )
+        op.drop_column('availability_notifications', 'last_date')
@@ -0,0 +1,44 @@
+"""Add profile_refreshed_at to line_users
+
+Revision ID: 202602200000
+Revises: 202602190000
+Create Date: 2026-02-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602200000'
+down_revision: Union[str, None] = '202602190000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'line_users' not in inspector.get_table_names():
+        return
+
+    columns = [c['name'] for c in inspector.get_columns('line_users')]
+
+    if 'profile_refreshed_at' not in columns:
+        op.add_column(
+            'line_users',
+            sa.Column('profile_refreshed_at', sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'line_users' not in inspector.get_table_names():
+        return
+    columns = [c['name'] for c in inspector.get_columns('line_users')]
+
+    if 'profile_refreshed_at' in columns:
+        op.drop_column('line_users', 'profile_refreshed_at')
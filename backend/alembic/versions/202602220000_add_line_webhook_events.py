@@ -0,0 +1,48 @@
+"""Add line_webhook_events for webhook redelivery deduplication
+
+Revision ID: 202602220000
+Revises: 202602200000
+Create Date: 2026-02-22 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602220000'
+down_revision: Union[str, None] = '202602200000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'line_webhook_events' in inspector.get_table_names():
+        return
+
+    op.create_table(
+        'line_webhook_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('clinic_id', sa.Integer(), nullable=False),
+        sa.Column('webhook_event_id', sa.String(length=64), nullable=False),
+        sa.Column('received_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['clinic_id'], ['clinics.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('clinic_id', 'webhook_event_id', name='uq_line_webhook_events_clinic_event')
+    )
+    # Retention cleanup deletes by age
+    op.create_index('ix_line_webhook_events_received_at', 'line_webhook_events', ['received_at'])
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'line_webhook_events' not in inspector.get_table_names():
+        return
+
+    op.drop_index('ix_line_webhook_events_received_at', table_name='line_webhook_events')
+    op.drop_table('line_webhook_events')
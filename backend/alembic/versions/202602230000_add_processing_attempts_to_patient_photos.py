@@ -0,0 +1,44 @@
+"""Add processing_attempts to patient_photos
+
+Revision ID: 202602230000
+Revises: 202602220000
+Create Date: 2026-02-23 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '202602230000'
+down_revision: Union[str, None] = '202602220000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'patient_photos' not in inspector.get_table_names():
+        return
+
+    columns = [c['name'] for c in inspector.get_columns('patient_photos')]
+
+    if 'processing_attempts' not in columns:
+        op.add_column(
+            'patient_photos',
+            sa.Column('processing_attempts', sa.Integer(), server_default='0', nullable=False)
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'patient_photos' not in inspector.get_table_names():
+        return
+    columns = [c['name'] for c in inspector.get_columns('patient_photos')]
+
+    if 'processing_attempts' in columns:
+        op.drop_column('patient_photos', 'processing_attempts')
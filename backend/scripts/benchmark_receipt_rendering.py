@@ -0,0 +1,103 @@
+"""
+Benchmark receipt PDF rendering: cold (per-request PDFService) vs warm (render pool).
+
+Cold is how receipts used to be rendered: a new PDFService per request, so the
+Jinja environment, template and fonts are set up from scratch every time.
+Warm sends the same renders through the PDF render pool, whose workers keep a
+warmed PDFService. The render cache is bypassed in both cases.
+
+Usage:
+    python scripts/benchmark_receipt_rendering.py [--renders 50] [--workers 2]
+
+Requires WeasyPrint and its system libraries (pango).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the parent directory to sys.path to allow imports from src
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from services.pdf_render_pool import PDFRenderPool
+from services.pdf_service import PDFService
+
+
+def build_receipt_data(index: int) -> Dict[str, Any]:
+    """Representative receipt with a few line items (varied so nothing is memoized)."""
+    return {
+        "receipt_number": f"2026-{index:05d}",
+        "issue_date": "2026-03-01T10:30:00+08:00",
+        "visit_date": "2026-03-01T10:00:00+08:00",
+        "clinic": {"display_name": "測試物理治療所"},
+        "patient": {"name": f"王小明{index}"},
+        "items": [
+            {
+                "item_type": "service_item",
+                "service_item": {"receipt_name": "徒手治療"},
+                "practitioner": {"name": "陳治療師", "title": "物理治療師"},
+                "amount": 1200,
+                "quantity": 1,
+            },
+            {"item_type": "other", "item_name": "護具", "amount": 350, "quantity": 2},
+        ],
+        "totals": {"total_amount": 1900},
+        "payment_method": "cash",
+        "custom_notes": "感謝您的光臨\n請保留收據",
+    }
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def report(label: str, samples: List[float]) -> None:
+    print(
+        f"{label:<6} n={len(samples):<4} "
+        f"p50={percentile(samples, 50) * 1000:8.1f} ms  "
+        f"p99={percentile(samples, 99) * 1000:8.1f} ms  "
+        f"mean={statistics.mean(samples) * 1000:8.1f} ms"
+    )
+
+
+def benchmark_cold(renders: int) -> List[float]:
+    samples: List[float] = []
+    for i in range(renders):
+        start = time.perf_counter()
+        PDFService().generate_receipt_pdf(receipt_data=build_receipt_data(i))
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def benchmark_warm(renders: int, workers: int) -> List[float]:
+    pool = PDFRenderPool(workers=workers, max_queue=renders, timeout_seconds=120)
+    try:
+        # Start and warm every worker before measuring
+        await asyncio.gather(*(pool.render_receipt_pdf(build_receipt_data(i)) for i in range(workers * 2)))
+
+        samples: List[float] = []
+        for i in range(renders):
+            start = time.perf_counter()
+            await pool.render_receipt_pdf(build_receipt_data(i))
+            samples.append(time.perf_counter() - start)
+        return samples
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=50, help="Renders per mode")
+    parser.add_argument("--workers", type=int, default=2, help="Render pool worker processes")
+    args = parser.parse_args()
+
+    print(f"Rendering {args.renders} receipts per mode...")
+    report("cold", benchmark_cold(args.renders))
+    report("warm", asyncio.run(benchmark_warm(args.renders, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Appointment Management API endpoints.
 
 import logging
 from datetime import datetime, time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi import status as http_status
@@ -524,22 +524,35 @@ async def check_recurring_conflicts(
                     detail=f"無效的日期時間格式: {occ_str}"
                 )
         
-        # Check for duplicates within the list
+        # Check for duplicates within the list (each duplicate points at the first other
+        # occurrence with the same datetime)
+        indices_by_datetime: Dict[datetime, List[int]] = {}
+        for i, dt in enumerate(parsed_occurrences):
+            indices_by_datetime.setdefault(dt, []).append(i)
         duplicate_indices: Dict[int, Optional[int]] = {}
-        for i, dt1 in enumerate(parsed_occurrences):
-            for j, dt2 in enumerate(parsed_occurrences):
-                if i != j and dt1 == dt2:
-                    duplicate_indices[i] = j
-                    break
-        
-        # Check conflicts for each occurrence using the same service method as single conflict endpoint
-        # This ensures consistent conflict detection format across single and recurring appointments
+        for indices in indices_by_datetime.values():
+            if len(indices) > 1:
+                for i in indices:
+                    duplicate_indices[i] = indices[1] if i == indices[0] else indices[0]
+        
+        # Check all non-duplicate occurrences in one batch; this applies the same checks and
+        # priority ordering as the single conflict endpoint
+        # check_past_appointment=True for clinic users (this endpoint is clinic-only)
+        checked_indices = [idx for idx in range(len(parsed_occurrences)) if idx not in duplicate_indices]
+        batch_conflicts = AvailabilityService.check_recurring_scheduling_conflicts(
+            db=db,
+            practitioner_id=request.practitioner_id,
+            occurrences=[(parsed_occurrences[idx].date(), parsed_occurrences[idx].time()) for idx in checked_indices],
+            appointment_type_id=request.appointment_type_id,
+            clinic_id=clinic_id,
+            selected_resource_ids=request.selected_resource_ids,
+            check_past_appointment=True
+        )
+        conflicts_by_index = dict(zip(checked_indices, batch_conflicts))
+        
         results: List[OccurrenceConflictStatus] = []
         
-        for idx, dt in enumerate(parsed_occurrences):
-            date_key = dt.date()
-            start_time_obj = dt.time()
-            
+        for idx in range(len(parsed_occurrences)):
             # Check if duplicate
             is_duplicate = idx in duplicate_indices
             duplicate_idx = duplicate_indices.get(idx)
@@ -563,19 +576,7 @@ async def check_recurring_conflicts(
                     duplicate_index=duplicate_idx
                 ))
             else:
-                # Use the same service method as single conflict endpoint for consistency
-                # check_past_appointment=True for clinic users (this endpoint is clinic-only)
-                conflict_data = AvailabilityService.check_scheduling_conflicts(
-                    db=db,
-                    practitioner_id=request.practitioner_id,
-                    date=date_key,
-                    start_time=start_time_obj,
-                    appointment_type_id=request.appointment_type_id,
-                    clinic_id=clinic_id,
-                    selected_resource_ids=request.selected_resource_ids,
-                    exclude_calendar_event_id=None,
-                    check_past_appointment=True
-                )
+                conflict_data = conflicts_by_index[idx]
                 
                 # Convert to response models (types already imported at top level)
                 appointment_conflict = None
@@ -693,6 +694,26 @@ class RecurringAppointmentCreateResponse(BaseModel):
     failed_occurrences: List[FailedOccurrence]
 
 
+def _failed_occurrence(start_time: str, error_message: str) -> FailedOccurrence:
+    """Build a FailedOccurrence, deriving the error code from the message."""
+    error_code = "unknown"
+    
+    if "時段不可用" in error_message or "衝突" in error_message:
+        error_code = "conflict"
+    elif "提前" in error_message:
+        error_code = "booking_restriction"
+    elif "過去" in error_message:
+        error_code = "past_date"
+    elif "範圍" in error_message or "天內" in error_message:
+        error_code = "max_window"
+    
+    return FailedOccurrence(
+        start_time=start_time,
+        error_code=error_code,
+        error_message=error_message
+    )
+
+
 @router.post("/appointments/recurring", summary="Create recurring appointments")
 async def create_recurring_appointments(
     request: RecurringAppointmentCreateRequest,
@@ -702,7 +723,8 @@ async def create_recurring_appointments(
     """
     Create multiple recurring appointments for a patient.
     
-    Each occurrence is created in a separate transaction to allow partial success.
+    All occurrences are created in one transaction; an occurrence whose
+    resources cannot be allocated is reported as failed and the rest are created.
     Clinic notes are replicated to all successfully created appointments.
     """
     try:
@@ -716,79 +738,43 @@ async def create_recurring_appointments(
             )
         
         # Parse occurrences
-        parsed_occurrences: List[datetime] = []
+        parsed_occurrences: List[Tuple[datetime, Optional[List[int]]]] = []
         for occ in request.occurrences:
             try:
                 from utils.datetime_utils import parse_datetime_to_taiwan
                 dt = parse_datetime_to_taiwan(occ.start_time)
-                parsed_occurrences.append(dt)
+                parsed_occurrences.append((dt, occ.selected_resource_ids))  # Per-occurrence resource selection
             except Exception as e:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"無效的日期時間格式: {occ.start_time}"
                 )
         
-        # Create appointments one by one (separate transactions)
-        created_appointments: List[Dict[str, Any]] = []
-        failed_occurrences: List[FailedOccurrence] = []
-        
-        # Determine if we should skip individual notifications
-        # We'll skip notifications during creation and handle them after based on actual count
-        # This prevents duplicate notifications
-        skip_individual_notifications = True  # Always skip during creation, handle after
+        # Create all occurrences in one transaction; occurrences that cannot be
+        # created are reported individually. Notifications are handled after
+        # based on the actual count, so none are sent during creation.
+        created, failed = AppointmentService.create_recurring_appointments(
+            db=db,
+            clinic_id=clinic_id,
+            patient_id=request.patient_id,
+            appointment_type_id=request.appointment_type_id,
+            practitioner_id=request.practitioner_id,
+            occurrences=parsed_occurrences,
+            clinic_notes=request.clinic_notes
+        )
         
-        for occ in request.occurrences:
-            try:
-                start_time = parse_dt(occ.start_time)
-                
-                # Create appointment using existing service
-                # Skip notifications if we're creating multiple appointments (will send consolidated)
-                result = AppointmentService.create_appointment(
-                    db=db,
-                    clinic_id=clinic_id,
-                    patient_id=request.patient_id,
-                    appointment_type_id=request.appointment_type_id,
-                    start_time=start_time,
-                    practitioner_id=request.practitioner_id,
-                    notes=None,  # Clinic users cannot set patient notes
-                    clinic_notes=request.clinic_notes,
-                    line_user_id=None,  # No LINE validation for clinic users
-                    skip_notifications=skip_individual_notifications,
-                    selected_resource_ids=occ.selected_resource_ids  # Per-occurrence resource selection
-                )
-                
-                created_appointments.append({
-                    "appointment_id": result['appointment_id'],
-                    "start_time": result['start_time'].isoformat() if isinstance(result['start_time'], datetime) else str(result['start_time']),
-                    "end_time": result['end_time'].isoformat() if isinstance(result['end_time'], datetime) else str(result['end_time'])
-                })
-                
-            except HTTPException as e:
-                # Extract error code from detail message
-                error_code = "unknown"
-                error_message = e.detail
-                
-                if "時段不可用" in error_message or "衝突" in error_message:
-                    error_code = "conflict"
-                elif "提前" in error_message:
-                    error_code = "booking_restriction"
-                elif "過去" in error_message:
-                    error_code = "past_date"
-                elif "範圍" in error_message or "天內" in error_message:
-                    error_code = "max_window"
-                
-                failed_occurrences.append(FailedOccurrence(
-                    start_time=occ.start_time,
-                    error_code=error_code,
-                    error_message=error_message
-                ))
-            except Exception as e:
-                logger.exception(f"Failed to create occurrence {occ.start_time}: {e}")
-                failed_occurrences.append(FailedOccurrence(
-                    start_time=occ.start_time,
-                    error_code="unknown",
-                    error_message="建立預約失敗"
-                ))
+        created_appointments: List[Dict[str, Any]] = [
+            {
+                "appointment_id": result['appointment_id'],
+                "start_time": result['start_time'].isoformat(),
+                "end_time": result['end_time'].isoformat()
+            }
+            for result in created
+        ]
+        failed_occurrences: List[FailedOccurrence] = [
+            _failed_occurrence(request.occurrences[index].start_time, error_message)
+            for index, error_message in failed
+        ]
         
         # Send notifications based on count
         # If only 1 appointment created, send normal individual notification
@@ -21,8 +21,13 @@ from services import AppointmentTypeService
 from services.availability_service import AvailabilityService
 from services.receipt_service import ReceiptService
 from services.resource_service import ResourceService
+from services.slot_release_events import publish_slots_freed
+from utils.clinic_directory import ClinicDirectory
 from utils.datetime_utils import parse_date_string
-from utils.practitioner_helpers import verify_practitioner_in_clinic, get_practitioner_display_name_for_appointment
+from utils.practitioner_helpers import (
+    verify_practitioner_in_clinic,
+    get_practitioner_display_name_for_appointment,
+)
 from api.responses import (
     AvailableSlotsResponse, AvailableSlotResponse, ConflictWarningResponse, ConflictDetail,
     BatchSchedulingConflictResponse
@@ -325,6 +330,52 @@ def _get_default_schedule_for_day(db: Session, user_id: int, day_of_week: int, c
     ]
 
 
+def _get_weekly_default_schedules(
+    db: Session,
+    user_ids: List[int],
+    clinic_id: int
+) -> Dict[int, Dict[int, List[TimeInterval]]]:
+    """
+    Get the weekly default schedule template for multiple practitioners in one query.
+    
+    Returns a mapping of user_id -> day_of_week -> intervals (sorted by start time).
+    Days without availability are absent; use .get(day_of_week, []) when expanding
+    the template over a date range.
+    """
+    schedules: Dict[int, Dict[int, List[TimeInterval]]] = {user_id: {} for user_id in user_ids}
+    if not user_ids:
+        return schedules
+    
+    availability = db.query(PractitionerAvailability).filter(
+        PractitionerAvailability.user_id.in_(user_ids),
+        PractitionerAvailability.clinic_id == clinic_id
+    ).order_by(
+        PractitionerAvailability.user_id,
+        PractitionerAvailability.day_of_week,
+        PractitionerAvailability.start_time
+    ).all()
+    
+    for av in availability:
+        schedules[av.user_id].setdefault(av.day_of_week, []).append(
+            TimeInterval(
+                start_time=_format_time(av.start_time),
+                end_time=_format_time(av.end_time)
+            )
+        )
+    
+    return schedules
+
+
+def _build_default_schedule_response(db: Session, user_id: int, clinic_id: int) -> DefaultScheduleResponse:
+    """Build the seven-day default schedule response for a practitioner."""
+    weekly_schedule = _get_weekly_default_schedules(db, [user_id], clinic_id)[user_id]
+    schedule: Dict[str, List[TimeInterval]] = {
+        _get_day_name(day_of_week): weekly_schedule.get(day_of_week, [])
+        for day_of_week in range(7)
+    }
+    return DefaultScheduleResponse(**schedule)
+
+
 def _check_appointment_conflicts(
     db: Session, 
     user_id: int, 
@@ -389,13 +440,7 @@ async def get_default_schedule(
         # Verify user exists, is active, and is a practitioner
         verify_practitioner_in_clinic(db, user_id, clinic_id)
         
-        # Get schedule for each day
-        schedule: Dict[str, List[TimeInterval]] = {}
-        for day_of_week in range(7):
-            day_name = _get_day_name(day_of_week)
-            schedule[day_name] = _get_default_schedule_for_day(db, user_id, day_of_week, clinic_id)
-        
-        return DefaultScheduleResponse(**schedule)
+        return _build_default_schedule_response(db, user_id, clinic_id)
         
     except HTTPException:
         raise
@@ -504,13 +549,11 @@ async def update_default_schedule(
         
         db.commit()
         
-        # Return updated schedule
-        schedule: Dict[str, List[TimeInterval]] = {}
-        for day_of_week in range(7):
-            day_name = _get_day_name(day_of_week)
-            schedule[day_name] = _get_default_schedule_for_day(db, user_id, day_of_week, clinic_id)
+        # The weekly schedule may have opened slots on any date
+        publish_slots_freed(clinic_id, user_id)
         
-        return DefaultScheduleResponse(**schedule)
+        # Return updated schedule
+        return _build_default_schedule_response(db, user_id, clinic_id)
         
     except HTTPException:
         raise
@@ -852,6 +895,9 @@ async def get_batch_calendar(
         # Bulk load all resources for all appointments (optimized)
         all_resources_map = ResourceService.get_all_resources_for_appointments(db, appointment_ids)
         
+        # Load every practitioner's weekly template once and expand it per date in memory
+        weekly_schedules = _get_weekly_default_schedules(db, request.practitioner_ids, clinic_id)
+        
         # Build response for each practitioner and date
         results: List[BatchCalendarDayResponse] = []
         current_date = start_date
@@ -860,7 +906,7 @@ async def get_batch_calendar(
             for practitioner_id in request.practitioner_ids:
                 # Get default schedule for this day of week
                 day_of_week = current_date.weekday()
-                default_schedule = _get_default_schedule_for_day(db, practitioner_id, day_of_week, clinic_id)
+                default_schedule = weekly_schedules[practitioner_id].get(day_of_week, [])
                 
                 # Get practitioner name
                 association = association_map.get(practitioner_id)
@@ -1212,6 +1258,9 @@ async def get_batch_resource_calendar(
         # Bulk load all resources for all appointments (optimized)
         all_resources_map = ResourceService.get_all_resources_for_appointments(db, appointment_ids)
         
+        # Practitioner display names are loaded once for the clinic (avoids a lookup per appointment)
+        directory = ClinicDirectory(db, clinic_id)
+        
         # Build response for each resource and date
         results: List[ResourceCalendarDayResponse] = []
         current_date = start_date
@@ -1238,10 +1287,10 @@ async def get_batch_resource_calendar(
                         if appointment.patient and appointment.patient.birthday:
                             patient_birthday_str = appointment.patient.birthday.strftime('%Y-%m-%d')
                         
-                        # Get practitioner name
+                        # Get practitioner name from the clinic directory
                         practitioner_name = None
                         if event.user_id:
-                            practitioner_name = get_practitioner_display_name_for_appointment(db, appointment, clinic_id)
+                            practitioner_name = directory.practitioner_display_name_for_appointment(appointment)
                         
                         # Get receipt status
                         receipts = all_receipts_map.get(appointment.calendar_event_id, [])
@@ -1621,10 +1670,14 @@ async def delete_availability_exception(
         
         # Delete the calendar event first, then the exception
         calendar_event = exception.calendar_event
+        freed_date = calendar_event.date
         db.delete(exception)
         db.delete(calendar_event)
         db.commit()
         
+        # The practitioner is available again on that date
+        publish_slots_freed(clinic_id, user_id, on=freed_date)
+        
     except HTTPException:
         raise
     except Exception as e:
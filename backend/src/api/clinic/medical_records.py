@@ -9,9 +9,10 @@ from auth.dependencies import require_authenticated, UserContext, ensure_clinic_
 from services.medical_record_service import MedicalRecordService, RecordVersionConflictError
 from core.sentinels import MISSING
 from services.patient_photo_service import PatientPhotoService
+from models.patient_photo import PHOTO_UPLOAD_STATUS_READY
 from models.user_clinic_association import UserClinicAssociation
 from utils.datetime_utils import ensure_taiwan
-from api.clinic.patient_photos import PatientPhotoResponse
+from api.clinic.patient_photos import PatientPhotoResponse, build_photo_responses
 
 if TYPE_CHECKING:
     from models.medical_record import MedicalRecord
@@ -34,6 +35,13 @@ class MedicalRecordUpdate(BaseModel):
     photo_ids: Optional[List[int]] = None
     appointment_id: Optional[int] = None
 
+class MedicalRecordPatch(BaseModel):
+    """Partial update: values_patch is a JSON Merge Patch (RFC 7396) against the stored values"""
+    version: int
+    values_patch: Dict[str, Any] = Field(default_factory=dict)
+    photo_ids: Optional[List[int]] = None
+    appointment_id: Optional[int] = None
+
 class AppointmentInfo(BaseModel):
     """Appointment information for medical record display"""
     id: int
@@ -74,6 +82,34 @@ class MedicalRecordsListResponse(BaseModel):
     records: List[MedicalRecordResponse]
     total: int
 
+class MedicalRecordSummaryResponse(BaseModel):
+    """List-view projection of a record: metadata only, no template snapshot or values"""
+    id: int
+    clinic_id: int
+    patient_id: int
+    template_id: int
+    template_name: str
+    appointment_id: Optional[int]
+    patient_last_edited_at: Optional[datetime] = None
+    is_submitted: bool = False
+    version: int
+    is_deleted: bool
+    deleted_at: Optional[Any]
+    created_at: Any
+    updated_at: Any
+    created_by_user_id: Optional[int] = None
+    updated_by_user_id: Optional[int] = None
+    is_patient_form: bool
+    photo_count: int = 0
+
+    appointment: Optional[AppointmentInfo] = None
+    created_by_user_name: Optional[str] = None
+    updated_by_user_name: Optional[str] = None
+
+class MedicalRecordSummariesListResponse(BaseModel):
+    records: List[MedicalRecordSummaryResponse]
+    total: int
+
 def _batch_fetch_user_names(db: Session, clinic_id: int, user_ids: List[int]) -> Dict[int, str]:
     """Batch fetch user names for the given user IDs in the clinic context."""
     if not user_ids:
@@ -86,6 +122,25 @@ def _batch_fetch_user_names(db: Session, clinic_id: int, user_ids: List[int]) ->
     
     return {assoc.user_id: assoc.full_name for assoc in user_assocs}
 
+def _build_appointment_info(record: "MedicalRecord") -> Optional[AppointmentInfo]:
+    """Build appointment details for a record, if it is linked to one."""
+    if record.appointment_id and hasattr(record, 'appointment') and record.appointment:
+        appointment = record.appointment
+        calendar_event = getattr(appointment, 'calendar_event', None)
+        
+        if calendar_event and calendar_event.date and calendar_event.start_time and calendar_event.end_time:
+            # Combine date and time to create datetime objects, then ensure Taiwan timezone
+            start_datetime = ensure_taiwan(datetime.combine(calendar_event.date, calendar_event.start_time))
+            end_datetime = ensure_taiwan(datetime.combine(calendar_event.date, calendar_event.end_time))
+            
+            return AppointmentInfo(
+                id=appointment.calendar_event_id,
+                start_time=start_datetime.isoformat() if start_datetime else "",
+                end_time=end_datetime.isoformat() if end_datetime else "",
+                appointment_type_name=appointment.appointment_type.name if hasattr(appointment, 'appointment_type') and appointment.appointment_type else None,
+            )
+    return None
+
 def _enrich_record_with_photos(
     record: "MedicalRecord",  # SQLAlchemy model with proper typing
     photo_service: PatientPhotoService,
@@ -116,36 +171,18 @@ def _enrich_record_with_photos(
     # Process photos
     photo_responses: List[PatientPhotoResponse] = []
     if hasattr(record, 'photos') and record.photos:
-        photos_list: List["PatientPhoto"] = list(record.photos)
-        for photo in photos_list:
-            # Skip deleted photos if they happen to be in the relationship (should be filtered by DB usually but safe to check)
-            if getattr(photo, 'is_deleted', False):
-                continue
-                
-            p_res: PatientPhotoResponse = PatientPhotoResponse.model_validate(photo)
-            p_res.url = photo_service.get_photo_url(photo.storage_key)
-            if photo.thumbnail_key:
-                p_res.thumbnail_url = photo_service.get_photo_url(photo.thumbnail_key)
-            photo_responses.append(p_res)
+        # Skip deleted photos if they happen to be in the relationship (should be filtered by DB usually but safe to check),
+        # and direct uploads the processing worker has not finished
+        photos_list: List["PatientPhoto"] = [
+            photo for photo in record.photos
+            if not getattr(photo, 'is_deleted', False) and photo.upload_status == PHOTO_UPLOAD_STATUS_READY
+        ]
+        photo_responses = build_photo_responses(photos_list, photo_service)
     
     response_data['photos'] = photo_responses
     
     # Add appointment details if linked
-    if record.appointment_id and hasattr(record, 'appointment') and record.appointment:
-        appointment = record.appointment
-        calendar_event = getattr(appointment, 'calendar_event', None)
-        
-        if calendar_event and calendar_event.date and calendar_event.start_time and calendar_event.end_time:
-            # Combine date and time to create datetime objects, then ensure Taiwan timezone
-            start_datetime = ensure_taiwan(datetime.combine(calendar_event.date, calendar_event.start_time))
-            end_datetime = ensure_taiwan(datetime.combine(calendar_event.date, calendar_event.end_time))
-            
-            response_data['appointment'] = AppointmentInfo(
-                id=appointment.calendar_event_id,
-                start_time=start_datetime.isoformat() if start_datetime else "",
-                end_time=end_datetime.isoformat() if end_datetime else "",
-                appointment_type_name=appointment.appointment_type.name if hasattr(appointment, 'appointment_type') and appointment.appointment_type else None,
-            )
+    response_data['appointment'] = _build_appointment_info(record)
     
     # Populate user names from pre-fetched map
     if record.created_by_user_id:
@@ -286,6 +323,84 @@ def list_records(
         total=total
     )
 
+@router.get("/patients/{patient_id}/medical-records/summary", response_model=MedicalRecordSummariesListResponse)
+def list_record_summaries(
+    patient_id: int,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    include_deleted: bool = False,
+    status: Optional[str] = None
+):
+    """
+    List medical record summaries for a patient (records tab).
+
+    Same filters as the full list, but without template snapshots, values, or
+    photo URLs; open a record via GET /medical-records/{record_id} for those.
+    """
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+    clinic_id = user.active_clinic_id
+    
+    if status is not None and status not in ['active', 'deleted', 'all']:
+        raise HTTPException(status_code=400, detail="Invalid status. Must be 'active', 'deleted', or 'all'")
+    
+    total = MedicalRecordService.count_patient_records(
+        db=db,
+        clinic_id=clinic_id,
+        patient_id=patient_id,
+        include_deleted=include_deleted,
+        status=status
+    )
+    
+    rows = MedicalRecordService.list_patient_record_summaries(
+        db=db,
+        clinic_id=clinic_id,
+        patient_id=patient_id,
+        skip=skip,
+        limit=limit,
+        include_deleted=include_deleted,
+        status=status
+    )
+    
+    user_ids: set[int] = set()
+    for record, _ in rows:
+        if record.created_by_user_id:
+            user_ids.add(record.created_by_user_id)
+        if record.updated_by_user_id:
+            user_ids.add(record.updated_by_user_id)
+    user_names_map = _batch_fetch_user_names(db, clinic_id, list(user_ids))
+    
+    summaries = [
+        MedicalRecordSummaryResponse(
+            id=record.id,
+            clinic_id=record.clinic_id,
+            patient_id=record.patient_id,
+            template_id=record.template_id,
+            template_name=record.template_name,
+            appointment_id=record.appointment_id,
+            patient_last_edited_at=record.patient_last_edited_at,
+            is_submitted=record.is_submitted,
+            version=record.version,
+            is_deleted=record.is_deleted,
+            deleted_at=record.deleted_at,
+            created_at=record.created_at,
+            updated_at=record.updated_at,
+            created_by_user_id=record.created_by_user_id,
+            updated_by_user_id=record.updated_by_user_id,
+            is_patient_form=record.template.is_patient_form if record.template else False,
+            photo_count=photo_count,
+            appointment=_build_appointment_info(record),
+            created_by_user_name=user_names_map.get(record.created_by_user_id) if record.created_by_user_id else None,
+            updated_by_user_name=user_names_map.get(record.updated_by_user_id) if record.updated_by_user_id else None,
+        )
+        for record, photo_count in rows
+    ]
+    
+    return MedicalRecordSummariesListResponse(records=summaries, total=total)
+
 @router.get("/medical-records/{record_id}", response_model=MedicalRecordResponse)
 def get_record(
     record_id: int,
@@ -310,36 +425,22 @@ def get_record(
     
     return _enrich_record_with_photos(record, photo_service, user_names_map)
 
-@router.put("/medical-records/{record_id}", response_model=MedicalRecordResponse)
-def update_record(
+def _update_record_with_conflict_response(
+    db: Session,
     record_id: int,
-    update_data: MedicalRecordUpdate,
-    user: UserContext = Depends(require_authenticated),
-    db: Session = Depends(get_db),
-    photo_service: PatientPhotoService = Depends(get_photo_service)
-):
-    ensure_clinic_access(user)
-    if user.active_clinic_id is None:
-        raise HTTPException(status_code=400, detail="Clinic context required")
-    clinic_id = user.active_clinic_id
-    
+    clinic_id: int,
+    user_id: Optional[int],
+    photo_service: PatientPhotoService,
+    **changes: Any
+) -> MedicalRecordResponse:
+    """Run an update and translate version conflicts into a 409 with the current record."""
     try:
-        # Prepare arguments, using MISSING for fields not explicitly provided in the JSON body
-        # This allows us to distinguish between "field not provided" (no change) and 
-        # "field provided as null" (clear the association)
-        values = update_data.values if 'values' in update_data.model_fields_set else MISSING
-        photo_ids = update_data.photo_ids if 'photo_ids' in update_data.model_fields_set else MISSING
-        appointment_id = update_data.appointment_id if 'appointment_id' in update_data.model_fields_set else MISSING
-
         updated_record = MedicalRecordService.update_record(
             db=db,
             record_id=record_id,
             clinic_id=clinic_id,
-            version=update_data.version,
-            values=values,
-            photo_ids=photo_ids,
-            appointment_id=appointment_id,
-            updated_by_user_id=user.user_id
+            updated_by_user_id=user_id,
+            **changes
         )
         
         # Batch fetch user names
@@ -367,6 +468,64 @@ def update_record(
             }
         )
 
+@router.put("/medical-records/{record_id}", response_model=MedicalRecordResponse)
+def update_record(
+    record_id: int,
+    update_data: MedicalRecordUpdate,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service)
+):
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+    clinic_id = user.active_clinic_id
+    
+    # Prepare arguments, using MISSING for fields not explicitly provided in the JSON body
+    # This allows us to distinguish between "field not provided" (no change) and 
+    # "field provided as null" (clear the association)
+    values = update_data.values if 'values' in update_data.model_fields_set else MISSING
+    photo_ids = update_data.photo_ids if 'photo_ids' in update_data.model_fields_set else MISSING
+    appointment_id = update_data.appointment_id if 'appointment_id' in update_data.model_fields_set else MISSING
+
+    return _update_record_with_conflict_response(
+        db, record_id, clinic_id, user.user_id, photo_service,
+        version=update_data.version,
+        values=values,
+        photo_ids=photo_ids,
+        appointment_id=appointment_id
+    )
+
+@router.patch("/medical-records/{record_id}", response_model=MedicalRecordResponse)
+def patch_record(
+    record_id: int,
+    patch_data: MedicalRecordPatch,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service)
+):
+    """
+    Apply a JSON Merge Patch (RFC 7396) to a record's values.
+
+    Intended for autosave: only changed fields are sent, and a null value
+    removes the field. Uses the same version check as PUT.
+    """
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+    clinic_id = user.active_clinic_id
+
+    photo_ids = patch_data.photo_ids if 'photo_ids' in patch_data.model_fields_set else MISSING
+    appointment_id = patch_data.appointment_id if 'appointment_id' in patch_data.model_fields_set else MISSING
+
+    return _update_record_with_conflict_response(
+        db, record_id, clinic_id, user.user_id, photo_service,
+        version=patch_data.version,
+        values_patch=patch_data.values_patch,
+        photo_ids=photo_ids,
+        appointment_id=appointment_id
+    )
+
 @router.delete("/medical-records/{record_id}")
 def delete_record(
     record_id: int,
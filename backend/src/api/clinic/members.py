@@ -15,7 +15,13 @@ from sqlalchemy.orm import Session, joinedload
 
 from core.database import get_db
 from core.config import FRONTEND_URL
-from auth.dependencies import require_admin_role, require_authenticated, UserContext, ensure_clinic_access
+from auth.dependencies import (
+    require_admin_role,
+    require_authenticated,
+    UserContext,
+    ensure_clinic_access,
+    invalidate_auth_context,
+)
 from models import User, SignupToken, UserClinicAssociation
 from utils.datetime_utils import taiwan_now
 from api.responses import MemberResponse, MemberListResponse, PractitionerFullResponse
@@ -265,6 +271,8 @@ async def update_member_roles(
         association.roles = new_roles
         # updated_at will be set automatically by database event listener
         db.commit()
+        # New roles apply to the member's next request
+        invalidate_auth_context(user_id, clinic_id)
         db.refresh(association)
 
         # Prepare practitioner data if relevant
@@ -376,6 +384,8 @@ async def remove_member(
         association.is_active = False
         # updated_at will be set automatically by database event listener
         db.commit()
+        # Removed member loses access on their next request
+        invalidate_auth_context(user_id, clinic_id)
 
         return {"message": "成員已停用"}
 
@@ -433,6 +443,8 @@ async def reactivate_member(
         association.is_active = True
         # updated_at will be set automatically by database event listener
         db.commit()
+        # Reactivated member regains access on their next request
+        invalidate_auth_context(user_id, clinic_id)
 
         return {"message": "成員已重新啟用"}
 
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from core.database import get_db
 from auth.dependencies import require_authenticated, UserContext, ensure_clinic_access
+from models.patient_photo import PatientPhoto
 from services.patient_photo_service import PatientPhotoService
 
 router = APIRouter(prefix="/patient-photos", tags=["patient-photos"])
@@ -22,6 +23,7 @@ class PatientPhotoResponse(BaseModel):
     size_bytes: int
     description: Optional[str]
     is_pending: bool
+    upload_status: str = "ready"
     created_at: Any
     
     # URLs for accessing the photo
@@ -36,6 +38,27 @@ class PatientPhotosListResponse(BaseModel):
     items: List[PatientPhotoResponse]
     total: int
 
+def build_photo_responses(
+    photos: List[PatientPhoto],
+    photo_service: PatientPhotoService,
+    include_full_urls: bool = True
+) -> List[PatientPhotoResponse]:
+    """Build photo responses, signing all URLs in one batch."""
+    keys: List[Optional[str]] = [photo.thumbnail_key for photo in photos]
+    if include_full_urls:
+        keys.extend(photo.storage_key for photo in photos)
+    urls = photo_service.get_photo_urls(keys)
+
+    responses: List[PatientPhotoResponse] = []
+    for photo in photos:
+        response = PatientPhotoResponse.model_validate(photo)
+        if include_full_urls:
+            response.url = urls.get(photo.storage_key)
+        if photo.thumbnail_key:
+            response.thumbnail_url = urls.get(photo.thumbnail_key)
+        responses.append(response)
+    return responses
+
 @router.post("", response_model=PatientPhotoResponse)
 def upload_photo(
     patient_id: int = Form(...),
@@ -71,6 +94,69 @@ def upload_photo(
         
     return response
 
+class DirectUploadRequest(BaseModel):
+    """Request a presigned URL for uploading a photo directly to storage"""
+    patient_id: int
+    filename: str
+    content_type: str
+    description: Optional[str] = None
+    medical_record_id: Optional[int] = None
+    is_pending: Optional[bool] = None
+
+class DirectUploadResponse(BaseModel):
+    photo: PatientPhotoResponse
+    upload_url: str
+
+@router.post("/direct-uploads", response_model=DirectUploadResponse)
+def create_direct_upload(
+    request: DirectUploadRequest,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service)
+):
+    """
+    Start a direct upload. The client PUTs the file to `upload_url` (with the
+    same Content-Type), then calls POST /{photo_id}/complete.
+    """
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+
+    photo, upload_url = photo_service.create_direct_upload(
+        db=db,
+        clinic_id=user.active_clinic_id,
+        patient_id=request.patient_id,
+        filename=request.filename,
+        content_type=request.content_type,
+        uploaded_by_user_id=user.user_id,
+        description=request.description,
+        medical_record_id=request.medical_record_id,
+        is_pending=request.is_pending
+    )
+    return DirectUploadResponse(
+        photo=PatientPhotoResponse.model_validate(photo),
+        upload_url=upload_url
+    )
+
+@router.post("/{photo_id}/complete", response_model=PatientPhotoResponse)
+def complete_direct_upload(
+    photo_id: int,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service)
+):
+    """Confirm a direct upload; the photo is processed in the background."""
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+
+    photo = photo_service.complete_direct_upload(
+        db=db,
+        photo_id=photo_id,
+        clinic_id=user.active_clinic_id
+    )
+    return PatientPhotoResponse.model_validate(photo)
+
 @router.get("", response_model=PatientPhotosListResponse)
 def list_photos(
     patient_id: int,
@@ -96,17 +182,60 @@ def list_photos(
         limit=limit
     )
     
-    # Augment with URLs
-    items: List[PatientPhotoResponse] = []
-    for photo in photos:
-        response = PatientPhotoResponse.model_validate(photo)
-        response.url = photo_service.get_photo_url(photo.storage_key)
-        if photo.thumbnail_key:
-            response.thumbnail_url = photo_service.get_photo_url(photo.thumbnail_key)
-        items.append(response)
-        
+    items = build_photo_responses(photos, photo_service)
     return PatientPhotosListResponse(items=items, total=total)
 
+@router.get("/thumbnails", response_model=PatientPhotosListResponse)
+def list_photo_thumbnails(
+    patient_id: int,
+    medical_record_id: Optional[int] = None,
+    unlinked_only: bool = False,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service),
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    Gallery listing that only signs thumbnail URLs.
+
+    Full-size URLs are left empty; fetch them on demand via GET /{photo_id}/url.
+    """
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+
+    photos, total = photo_service.list_photos(
+        db=db,
+        clinic_id=user.active_clinic_id,
+        patient_id=patient_id,
+        medical_record_id=medical_record_id,
+        unlinked_only=unlinked_only,
+        skip=skip,
+        limit=limit
+    )
+
+    items = build_photo_responses(photos, photo_service, include_full_urls=False)
+    return PatientPhotosListResponse(items=items, total=total)
+
+@router.get("/{photo_id}/url", response_model=dict)
+def get_photo_url(
+    photo_id: int,
+    user: UserContext = Depends(require_authenticated),
+    db: Session = Depends(get_db),
+    photo_service: PatientPhotoService = Depends(get_photo_service)
+):
+    """Sign the full-size URL for a single photo"""
+    ensure_clinic_access(user)
+    if user.active_clinic_id is None:
+        raise HTTPException(status_code=400, detail="Clinic context required")
+
+    photo = photo_service.get_photo(db, photo_id, user.active_clinic_id)
+    if not photo:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    return {"url": photo_service.get_photo_url(photo.storage_key)}
+
 class PatientPhotoUpdate(BaseModel):
     description: Optional[str] = None
     medical_record_id: Optional[int] = None
@@ -207,13 +336,4 @@ def attach_photos(
         clinic_id=clinic_id
     )
     
-    # Augment with URLs
-    responses: List[PatientPhotoResponse] = []
-    for photo in photos:
-        response = PatientPhotoResponse.model_validate(photo)
-        response.url = photo_service.get_photo_url(photo.storage_key)
-        if photo.thumbnail_key:
-            response.thumbnail_url = photo_service.get_photo_url(photo.thumbnail_key)
-        responses.append(response)
-        
-    return responses
+    return build_photo_responses(photos, photo_service)
@@ -18,7 +18,7 @@ from fastapi import (
     APIRouter, Depends, HTTPException, status, Query, Form, File, UploadFile
 )
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from sqlalchemy.orm import Session, joinedload
 
 from core.database import get_db
@@ -29,12 +29,14 @@ from core.constants import (
     NOTIFICATION_DATE_RANGE_DAYS,
 )
 from models import (
-    LineUser, Clinic, Patient, AvailabilityNotification, AppointmentType, User, Appointment, CalendarEvent, MedicalRecord
+    LineUser, Clinic, Patient, AvailabilityNotification, AppointmentType, User, Appointment, CalendarEvent, MedicalRecord, PatientPhoto
 )
+from models.patient_photo import PHOTO_UPLOAD_STATUS_READY
 from models.receipt import Receipt
 from core.sentinels import MISSING
 from services import PatientService, AppointmentService, AvailabilityService, PractitionerService, AppointmentTypeService, MedicalRecordService, PatientPhotoService
 from services import PatientPractitionerAssignmentService
+from services.availability_notification_service import get_availability_notification_index
 from models import UserClinicAssociation
 from utils.phone_validator import validate_taiwanese_phone, validate_taiwanese_phone_optional
 from utils.datetime_utils import TAIWAN_TZ, taiwan_now, parse_datetime_to_taiwan, parse_date_string
@@ -255,6 +257,29 @@ class UpdatePatientMedicalRecordRequest(BaseModel):
     photo_ids: Optional[List[int]] = None
 
 
+class PatchPatientMedicalRecordRequest(BaseModel):
+    """Request model for a partial (merge-patch) medical record update in LIFF."""
+    values_patch: Dict[str, Any] = Field(default_factory=dict)
+    is_submitted: Optional[bool] = None
+    version: int  # For concurrency control
+    photo_ids: Optional[List[int]] = None
+
+
+class PatientPhotoDirectUploadRequest(BaseModel):
+    """Request model for starting a direct-to-storage photo upload in LIFF."""
+    patient_id: int
+    filename: str
+    content_type: str
+    description: Optional[str] = None
+    medical_record_id: Optional[int] = None
+
+
+class PatientPhotoDirectUploadResponse(BaseModel):
+    """Response model for a direct-to-storage photo upload in LIFF."""
+    photo: PatientPhotoResponse
+    upload_url: str
+
+
 class PatientPhotoUpdateRequest(BaseModel):
     """Request model for updating a patient photo in LIFF."""
     description: Optional[str] = None
@@ -482,79 +507,22 @@ async def liff_login(
                 detail="診所不存在或已停用"
             )
 
-        # Now get or create LINE user for this clinic using service method for race condition handling
+        # Get or create LINE user for this clinic (single upsert; safe under concurrent logins)
         from services.line_user_service import LineUserService
-        from services.line_service import LINEService
-        from sqlalchemy.exc import IntegrityError
-
-        # Create LINEService from clinic credentials (if available) for profile fetching
-        # If credentials are missing, service will use provided display_name
-        line_service = None
-        if clinic.line_channel_secret and clinic.line_channel_access_token:
-            try:
-                line_service = LINEService(
-                    channel_secret=clinic.line_channel_secret,
-                    channel_access_token=clinic.line_channel_access_token
-                )
-            except ValueError:
-                # Invalid credentials - will use provided display_name instead
-                logger.warning(f"Invalid LINE credentials for clinic {clinic.id}, using provided display_name")
-                line_service = None
 
-        # Use service method for proper race condition handling
         try:
-            if line_service:
-                line_user = LineUserService.get_or_create_line_user(
-                    db=db,
-                    line_user_id=request.line_user_id,
-                    clinic_id=clinic.id,
-                    line_service=line_service,
-                    display_name=request.display_name,
-                    picture_url=request.picture_url
-                )
-            else:
-                # Fallback: create directly if LINEService unavailable (shouldn't happen in normal flow)
-                # Still handle race condition with IntegrityError
-                line_user = db.query(LineUser).filter_by(
-                    line_user_id=request.line_user_id,
-                    clinic_id=clinic.id
-                ).first()
-
-                if not line_user:
-                    line_user = LineUser(
-                        line_user_id=request.line_user_id,
-                        clinic_id=clinic.id,
-                        display_name=request.display_name,
-                        picture_url=request.picture_url
-                    )
-                    db.add(line_user)
-                    try:
-                        db.commit()
-                        db.refresh(line_user)
-                    except IntegrityError:
-                        # Race condition: another request created it
-                        db.rollback()
-                        line_user = db.query(LineUser).filter_by(
-                            line_user_id=request.line_user_id,
-                            clinic_id=clinic.id
-                        ).first()
-                        if not line_user:
-                            raise HTTPException(
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                detail="建立 LINE 使用者失敗"
-                            )
-        except IntegrityError:
-            # Race condition: another request created it
-            db.rollback()
-            line_user = db.query(LineUser).filter_by(
+            line_user = LineUserService.get_or_create_line_user(
+                db=db,
                 line_user_id=request.line_user_id,
-                clinic_id=clinic.id
-            ).first()
-            if not line_user:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="建立 LINE 使用者失敗"
-                )
+                clinic_id=clinic.id,
+                display_name=request.display_name,
+                picture_url=request.picture_url
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="建立 LINE 使用者失敗"
+            ) from e
 
         # Check if patient exists for this clinic
         patient = db.query(Patient).filter_by(
@@ -1553,14 +1521,10 @@ async def get_appointment_receipt_html(
             "reason": None
         }
         
-        # Generate HTML using same template as PDF
-        from services.pdf_service import PDFService
+        # Generate HTML using same template as PDF (served from the render cache when possible)
+        from services.receipt_render_cache import get_receipt_html
         
-        pdf_service = PDFService()
-        html_content = pdf_service.generate_receipt_html(
-            receipt_data=receipt_data,
-            void_info=void_info
-        )
+        html_content = get_receipt_html(receipt_data=receipt_data, void_info=void_info)
         
         return HTMLResponse(content=html_content)
         
@@ -1912,6 +1876,8 @@ async def create_notification(
             db.rollback()
             raise
 
+        get_availability_notification_index().add(notification)
+
         # Calculate min/max dates from time_windows
         dates = [tw["date"] for tw in notification.time_windows]
 
@@ -2033,6 +1999,8 @@ async def delete_notification(
         notification.is_active = False
         db.commit()
 
+        get_availability_notification_index().remove(notification.id)
+
         return {"success": True, "message": "提醒已刪除"}
 
     except HTTPException:
@@ -2045,6 +2013,32 @@ async def delete_notification(
         )
 
 
+def _build_liff_photo_responses(photos: list[PatientPhoto]) -> list[PatientPhotoResponse]:
+    """Build LIFF photo responses for ready photos, signing all URLs in one batch."""
+    # Direct uploads stay hidden until the processing worker has finished
+    photos = [
+        photo for photo in photos
+        if not photo.is_deleted and photo.upload_status == PHOTO_UPLOAD_STATUS_READY
+    ]
+    photo_service = PatientPhotoService()
+    urls = photo_service.get_photo_urls(
+        [photo.storage_key for photo in photos] + [photo.thumbnail_key for photo in photos]
+    )
+    return [
+        PatientPhotoResponse(
+            id=photo.id,
+            filename=photo.filename,
+            content_type=photo.content_type,
+            size_bytes=photo.size_bytes,
+            description=photo.description,
+            created_at=photo.created_at,
+            url=urls.get(photo.storage_key),
+            thumbnail_url=urls.get(photo.thumbnail_key) if photo.thumbnail_key else None
+        )
+        for photo in photos
+    ]
+
+
 @router.get("/medical-records/{record_id}", response_model=PatientMedicalRecordResponse)
 async def get_patient_medical_record(
     record_id: int,
@@ -2073,20 +2067,7 @@ async def get_patient_medical_record(
             detail={"error_code": "ACCESS_DENIED", "message": "您沒有權限查看此紀錄"}
         )
         
-    photo_service = PatientPhotoService()
-    photos: list[PatientPhotoResponse] = []
-    for photo in record.photos:
-        photo_resp = PatientPhotoResponse(
-            id=photo.id,
-            filename=photo.filename,
-            content_type=photo.content_type,
-            size_bytes=photo.size_bytes,
-            description=photo.description,
-            created_at=photo.created_at,
-            url=photo_service.get_photo_url(photo.storage_key),
-            thumbnail_url=photo_service.get_photo_url(photo.thumbnail_key) if photo.thumbnail_key else None
-        )
-        photos.append(photo_resp)
+    photos = _build_liff_photo_responses(list(record.photos))
         
     return PatientMedicalRecordResponse(
         id=record.id,
@@ -2103,20 +2084,14 @@ async def get_patient_medical_record(
     )
 
 
-@router.put("/medical-records/{record_id}", response_model=PatientMedicalRecordResponse)
-async def update_patient_medical_record(
+def _update_liff_medical_record(
+    db: Session,
+    line_user: LineUser,
+    clinic: Clinic,
     record_id: int,
-    request: UpdatePatientMedicalRecordRequest,
-    line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
-    db: Session = Depends(get_db)
-):
-    """
-    Update a medical record (patient facing).
-    
-    Verifies permission and updates values, is_submitted, and patient_last_edited_at.
-    """
-    line_user, clinic = line_user_clinic
-    
+    **changes: Any
+) -> PatientMedicalRecordResponse:
+    """Verify the patient owns the record, apply the update and build the response."""
     # Get record first for security check
     record = MedicalRecordService.get_record(db, record_id, clinic.id)
     if not record:
@@ -2139,11 +2114,8 @@ async def update_patient_medical_record(
             db=db,
             record_id=record_id,
             clinic_id=clinic.id,
-            version=request.version,
-            values=request.values,
-            photo_ids=request.photo_ids if request.photo_ids is not None else MISSING,
-            is_submitted=request.is_submitted,
-            patient_last_edited_at=taiwan_now()
+            patient_last_edited_at=taiwan_now(),
+            **changes
         )
     except RecordVersionConflictError as e:
         raise HTTPException(
@@ -2151,20 +2123,7 @@ async def update_patient_medical_record(
             detail={"error_code": "RECORD_MODIFIED", "message": str(e)}
         )
     
-    photo_service = PatientPhotoService()
-    photos: list[PatientPhotoResponse] = []
-    for photo in updated_record.photos:
-        photo_resp = PatientPhotoResponse(
-            id=photo.id,
-            filename=photo.filename,
-            content_type=photo.content_type,
-            size_bytes=photo.size_bytes,
-            description=photo.description,
-            created_at=photo.created_at,
-            url=photo_service.get_photo_url(photo.storage_key),
-            thumbnail_url=photo_service.get_photo_url(photo.thumbnail_key) if photo.thumbnail_key else None
-        )
-        photos.append(photo_resp)
+    photos = _build_liff_photo_responses(list(updated_record.photos))
         
     return PatientMedicalRecordResponse(
         id=updated_record.id,
@@ -2181,22 +2140,59 @@ async def update_patient_medical_record(
     )
 
 
-@router.post("/patient-photos", response_model=PatientPhotoResponse)
-async def upload_patient_photo(
-    patient_id: int = Form(...),
-    medical_record_id: Optional[int] = Form(None),
-    description: Optional[str] = Form(None),
-    file: UploadFile = File(...),
+@router.put("/medical-records/{record_id}", response_model=PatientMedicalRecordResponse)
+async def update_patient_medical_record(
+    record_id: int,
+    request: UpdatePatientMedicalRecordRequest,
     line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
     db: Session = Depends(get_db)
 ):
     """
-    Upload a photo from LIFF.
+    Update a medical record (patient facing).
     
-    Verifies that the patient belongs to the LINE user.
+    Verifies permission and updates values, is_submitted, and patient_last_edited_at.
     """
     line_user, clinic = line_user_clinic
+    return _update_liff_medical_record(
+        db, line_user, clinic, record_id,
+        version=request.version,
+        values=request.values,
+        photo_ids=request.photo_ids if request.photo_ids is not None else MISSING,
+        is_submitted=request.is_submitted
+    )
+
+
+@router.patch("/medical-records/{record_id}", response_model=PatientMedicalRecordResponse)
+async def patch_patient_medical_record(
+    record_id: int,
+    request: PatchPatientMedicalRecordRequest,
+    line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
+    db: Session = Depends(get_db)
+):
+    """
+    Partially update a medical record (patient facing).
     
+    values_patch is a JSON Merge Patch (RFC 7396) applied to the stored values,
+    so form autosave only sends the fields that changed.
+    """
+    line_user, clinic = line_user_clinic
+    return _update_liff_medical_record(
+        db, line_user, clinic, record_id,
+        version=request.version,
+        values_patch=request.values_patch,
+        photo_ids=request.photo_ids if request.photo_ids is not None else MISSING,
+        is_submitted=request.is_submitted if request.is_submitted is not None else MISSING
+    )
+
+
+def _verify_liff_photo_upload_target(
+    db: Session,
+    line_user: LineUser,
+    clinic: Clinic,
+    patient_id: int,
+    medical_record_id: Optional[int]
+) -> None:
+    """Verify the patient (and optional record) a LIFF photo upload targets belongs to the LINE user."""
     # Security check: Does this patient belong to the Line user?
     patient = db.query(Patient).filter(
         Patient.id == patient_id,
@@ -2223,6 +2219,24 @@ async def upload_patient_photo(
                 detail={"error_code": "RECORD_NOT_FOUND", "message": "紀錄不存在"}
             )
 
+
+@router.post("/patient-photos", response_model=PatientPhotoResponse)
+async def upload_patient_photo(
+    patient_id: int = Form(...),
+    medical_record_id: Optional[int] = Form(None),
+    description: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a photo from LIFF.
+    
+    Verifies that the patient belongs to the LINE user.
+    """
+    line_user, clinic = line_user_clinic
+    _verify_liff_photo_upload_target(db, line_user, clinic, patient_id, medical_record_id)
+
     photo_service = PatientPhotoService()
     photo = photo_service.upload_photo(
         db=db,
@@ -2249,6 +2263,84 @@ async def upload_patient_photo(
     )
 
 
+@router.post("/patient-photos/direct-uploads", response_model=PatientPhotoDirectUploadResponse)
+async def create_patient_photo_direct_upload(
+    request: PatientPhotoDirectUploadRequest,
+    line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a direct-to-storage photo upload from LIFF.
+
+    The client PUTs the file to `upload_url`, then calls
+    POST /patient-photos/{photo_id}/complete.
+    """
+    line_user, clinic = line_user_clinic
+    _verify_liff_photo_upload_target(db, line_user, clinic, request.patient_id, request.medical_record_id)
+
+    photo_service = PatientPhotoService()
+    photo, upload_url = photo_service.create_direct_upload(
+        db=db,
+        clinic_id=clinic.id,
+        patient_id=request.patient_id,
+        filename=request.filename,
+        content_type=request.content_type,
+        description=request.description,
+        medical_record_id=request.medical_record_id,
+        # Same pending rule as the multipart upload endpoint
+        is_pending=True if request.medical_record_id else False
+    )
+
+    return PatientPhotoDirectUploadResponse(
+        photo=PatientPhotoResponse(
+            id=photo.id,
+            filename=photo.filename,
+            content_type=photo.content_type,
+            size_bytes=photo.size_bytes,
+            description=photo.description,
+            created_at=photo.created_at
+        ),
+        upload_url=upload_url
+    )
+
+
+@router.post("/patient-photos/{photo_id}/complete", response_model=PatientPhotoResponse)
+async def complete_patient_photo_direct_upload(
+    photo_id: int,
+    line_user_clinic: tuple[LineUser, Clinic] = Depends(get_current_line_user_with_clinic),
+    db: Session = Depends(get_db)
+):
+    """
+    Confirm a direct upload from LIFF; the photo is processed in the background.
+    """
+    line_user, clinic = line_user_clinic
+
+    photo_service = PatientPhotoService()
+    photo = photo_service.get_photo(db, photo_id, clinic.id)
+    if not photo:
+        raise HTTPException(
+            status_code=404,
+            detail={"error_code": "PHOTO_NOT_FOUND", "message": "照片不存在"}
+        )
+
+    # Security check: Photo belongs to a patient owned by the line user
+    if photo.patient.line_user_id != line_user.id:
+        raise HTTPException(
+            status_code=403,
+            detail={"error_code": "ACCESS_DENIED", "message": "您沒有權限修改此照片"}
+        )
+
+    photo = photo_service.complete_direct_upload(db, photo_id, clinic.id)
+    return PatientPhotoResponse(
+        id=photo.id,
+        filename=photo.filename,
+        content_type=photo.content_type,
+        size_bytes=photo.size_bytes,
+        description=photo.description,
+        created_at=photo.created_at
+    )
+
+
 @router.delete("/patient-photos/{photo_id}")
 async def delete_patient_photo(
     photo_id: int,
@@ -23,6 +23,7 @@ from models.clinic import AIWeeklySchedule
 from services.line_service import LINEService
 from utils.datetime_utils import taiwan_now
 from services.line_user_service import LineUserService
+from services.line_webhook_dedup import get_webhook_event_deduplicator
 from services.clinic_agent import ClinicAgentService
 from services.line_message_service import LineMessageService, QUOTE_ATTEMPTED_BUT_NOT_AVAILABLE
 from services.line_user_ai_disabled_service import is_ai_disabled
@@ -147,13 +148,11 @@ def _handle_follow_event(
     Creates LineUser entry proactively so clinic can manage AI settings.
     """
     try:
-        # Create or get LINE user (will fetch profile if needed)
+        # Create or get LINE user (profile is fetched in the background)
         LineUserService.get_or_create_line_user(
             db=db,
             line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=line_service,
-            display_name=None  # Will be fetched from LINE API
+            clinic_id=clinic.id
         )
         
         logger.info(
@@ -591,6 +590,23 @@ async def line_webhook(
         )
         clinic_id = clinic.id
 
+        # Suppress redeliveries of events we already processed (before any processing,
+        # so a slow first response can't cause a second AI run or reply)
+        delivery_data = line_service.extract_delivery_data(payload)
+        if delivery_data:
+            webhook_event_id, is_redelivery = delivery_data
+            try:
+                is_new_event = get_webhook_event_deduplicator().claim(
+                    db, clinic.id, webhook_event_id, is_redelivery=is_redelivery
+                )
+            except Exception as e:
+                # Dedup is best effort - process the event rather than drop it
+                db.rollback()
+                logger.warning(f"Webhook event dedup failed for {webhook_event_id}: {e}")
+                is_new_event = True
+            if not is_new_event:
+                return {"status": "ok", "message": "Event ignored (duplicate delivery)"}
+
         # Extract event data to determine event type
         event_data = line_service.extract_event_data(payload)
         
@@ -638,9 +654,7 @@ async def line_webhook(
             line_user = LineUserService.get_or_create_line_user(
                 db=db,
                 line_user_id=line_user_id,
-                clinic_id=clinic.id,
-                line_service=line_service,
-                display_name=None  # Will be fetched from LINE API if needed
+                clinic_id=clinic.id
             )
             logger.debug(
                 f"LineUser ready: id={line_user.id}, "
@@ -7,11 +7,11 @@ Handles checkout, receipt viewing, voiding, and billing scenario management.
 import logging
 from typing import List, Optional, Dict, Any
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi import status as http_status
-from fastapi.responses import Response, HTMLResponse
+from fastapi.responses import FileResponse, Response, HTMLResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
@@ -22,6 +22,14 @@ from models.receipt import Receipt
 from models.user_clinic_association import UserClinicAssociation
 from services import ReceiptService, BillingScenarioService
 from services.receipt_service import ConcurrentCheckoutError
+from services.pdf_render_pool import PDFRenderQueueFullError, PDFRenderTimeoutError
+from services.receipt_export_service import ReceiptExportJob, ReceiptExportService
+from services.receipt_render_cache import (
+    get_receipt_html as render_receipt_html,
+    get_receipt_pdf,
+    invalidate_receipt_renders,
+    warm_receipt_render_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -104,11 +112,37 @@ class VoidReceiptResponse(BaseModel):
     reason: Optional[str] = None
 
 
+# Longest date range a single export may cover
+MAX_RECEIPT_EXPORT_DAYS = 366
+
+
+class ReceiptExportRequest(BaseModel):
+    """Request model for a bulk receipt export (date range or explicit receipt IDs)."""
+    start_date: Optional[date] = Field(None, description="First issue date (Taiwan time), inclusive")
+    end_date: Optional[date] = Field(None, description="Last issue date (Taiwan time), inclusive")
+    receipt_ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    include_voided: bool = Field(True, description="Include voided receipts")
+
+
+class ReceiptExportJobResponse(BaseModel):
+    """Response model for a bulk receipt export job."""
+    job_id: str
+    status: str
+    total: int
+    processed: int
+    failed_receipt_numbers: List[str]
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+
 # Endpoints
 @router.post("/appointments/{appointment_id}/checkout", response_model=CheckoutResponse)
 async def checkout_appointment(
     appointment_id: int,
     request: CheckoutRequest,
+    background_tasks: BackgroundTasks,
     current_user: UserContext = Depends(require_clinic_user),
     db: Session = Depends(get_db)
 ):
@@ -238,6 +272,9 @@ async def checkout_appointment(
         
         db.commit()
         
+        # Pre-render so the first download is served from the render cache
+        background_tasks.add_task(warm_receipt_render_cache, receipt.id, receipt.receipt_data)
+        
         return CheckoutResponse(
             receipt_id=receipt.id,
             receipt_number=receipt.receipt_number,
@@ -427,6 +464,9 @@ async def void_receipt(
         
         db.commit()
         
+        # Not-voided renders of this receipt must never be served again
+        invalidate_receipt_renders(receipt.receipt_data)
+        
         # Get voided by user info
         voided_by_user = db.query(User).filter(User.id == current_user.user_id).first()
         if not voided_by_user:
@@ -801,42 +841,10 @@ async def download_receipt_pdf(
         receipt_data = receipt.receipt_data
         
         # Build void_info from database columns (void_info is not stored in JSONB)
-        void_info: Dict[str, Any] = {}
-        if receipt.is_voided:
-            void_info["voided"] = True
-            void_info["voided_at"] = receipt.voided_at.isoformat() if receipt.voided_at else None
-            void_info["reason"] = receipt.void_reason
-            if receipt.voided_by_user_id:
-                voided_by_user = db.query(User).filter(User.id == receipt.voided_by_user_id).first()
-                if voided_by_user:
-                    from models import UserClinicAssociation
-                    association = db.query(UserClinicAssociation).filter(
-                        UserClinicAssociation.user_id == receipt.voided_by_user_id,
-                        UserClinicAssociation.clinic_id == clinic_id
-                    ).first()
-                    void_info["voided_by"] = {
-                        "id": voided_by_user.id,
-                        "name": association.full_name if association else voided_by_user.email,
-                        "email": voided_by_user.email
-                    }
-                else:
-                    void_info["voided_by"] = None
-            else:
-                void_info["voided_by"] = None
-        else:
-            void_info["voided"] = False
-            void_info["voided_at"] = None
-            void_info["voided_by"] = None
-            void_info["reason"] = None
+        void_info = ReceiptService.build_render_void_info(db, receipt)
         
-        # Generate PDF using WeasyPrint
-        from services.pdf_service import PDFService
-        
-        pdf_service = PDFService()
-        pdf_bytes = pdf_service.generate_receipt_pdf(
-            receipt_data=receipt_data,
-            void_info=void_info
-        )
+        # Generate PDF on the render pool (served from the render cache when possible)
+        pdf_bytes = await get_receipt_pdf(receipt_data=receipt_data, void_info=void_info)
         
         return Response(
             content=pdf_bytes,
@@ -848,6 +856,18 @@ async def download_receipt_pdf(
         
     except HTTPException:
         raise
+    except PDFRenderQueueFullError:
+        logger.warning(f"PDF render pool saturated, rejecting download of receipt {receipt_id}")
+        raise HTTPException(
+            status_code=http_status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="系統忙碌中，請稍後再試"
+        )
+    except PDFRenderTimeoutError:
+        logger.error(f"PDF render timed out for receipt {receipt_id}")
+        raise HTTPException(
+            status_code=http_status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="生成PDF逾時，請稍後再試"
+        )
     except Exception as e:
         logger.exception(f"Error generating PDF for receipt {receipt_id}: {e}")
         raise HTTPException(
@@ -890,42 +910,10 @@ async def get_receipt_html(
         receipt_data = receipt.receipt_data
         
         # Build void_info from database columns (void_info is not stored in JSONB)
-        void_info: Dict[str, Any] = {}
-        if receipt.is_voided:
-            void_info["voided"] = True
-            void_info["voided_at"] = receipt.voided_at.isoformat() if receipt.voided_at else None
-            void_info["reason"] = receipt.void_reason
-            if receipt.voided_by_user_id:
-                voided_by_user = db.query(User).filter(User.id == receipt.voided_by_user_id).first()
-                if voided_by_user:
-                    from models import UserClinicAssociation
-                    association = db.query(UserClinicAssociation).filter(
-                        UserClinicAssociation.user_id == receipt.voided_by_user_id,
-                        UserClinicAssociation.clinic_id == clinic_id
-                    ).first()
-                    void_info["voided_by"] = {
-                        "id": voided_by_user.id,
-                        "name": association.full_name if association else voided_by_user.email,
-                        "email": voided_by_user.email
-                    }
-                else:
-                    void_info["voided_by"] = None
-            else:
-                void_info["voided_by"] = None
-        else:
-            void_info["voided"] = False
-            void_info["voided_at"] = None
-            void_info["voided_by"] = None
-            void_info["reason"] = None
+        void_info = ReceiptService.build_render_void_info(db, receipt)
         
-        # Generate HTML using same template as PDF
-        from services.pdf_service import PDFService
-        
-        pdf_service = PDFService()
-        html_content = pdf_service.generate_receipt_html(
-            receipt_data=receipt_data,
-            void_info=void_info
-        )
+        # Generate HTML using same template as PDF (served from the render cache when possible)
+        html_content = render_receipt_html(receipt_data=receipt_data, void_info=void_info)
         
         return HTMLResponse(content=html_content)
         
@@ -1031,3 +1019,124 @@ async def get_receipt_by_id(
         )
 
 
+def _export_job_response(job: ReceiptExportJob) -> ReceiptExportJobResponse:
+    return ReceiptExportJobResponse(
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        processed=job.processed,
+        failed_receipt_numbers=job.failed_receipt_numbers,
+        error="匯出失敗" if job.status == 'failed' else None,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        download_url=f"/api/receipt-exports/{job.id}/download" if job.status == 'completed' else None
+    )
+
+
+def _get_clinic_export_job(job_id: str, clinic_id: int) -> ReceiptExportJob:
+    job = ReceiptExportService.get_job(job_id)
+    if not job or job.clinic_id != clinic_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到匯出工作"
+        )
+    return job
+
+
+@router.post("/receipt-exports", response_model=ReceiptExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_receipt_export(
+    request: ReceiptExportRequest,
+    background_tasks: BackgroundTasks,
+    current_user: UserContext = Depends(require_admin_role)
+):
+    """
+    Start a bulk receipt export.
+    
+    Admin only. Renders the selected receipts into a ZIP of PDFs in the
+    background; poll the returned job for progress and the download link.
+    Receipts are selected by issue date range or by explicit receipt IDs.
+    """
+    clinic_id = ensure_clinic_access(current_user)
+    
+    if current_user.user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="找不到使用者 ID"
+        )
+    
+    if request.receipt_ids is None:
+        if request.start_date is None or request.end_date is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="請提供日期範圍或收據清單"
+            )
+        if request.start_date > request.end_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="開始日期不可晚於結束日期"
+            )
+        if (request.end_date - request.start_date).days >= MAX_RECEIPT_EXPORT_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"日期範圍不可超過 {MAX_RECEIPT_EXPORT_DAYS} 天"
+            )
+    
+    try:
+        job = ReceiptExportService.create_job(
+            clinic_id=clinic_id,
+            requested_by_user_id=current_user.user_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            receipt_ids=request.receipt_ids,
+            include_voided=request.include_voided
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="已有收據匯出進行中，請稍後再試"
+        )
+    
+    background_tasks.add_task(ReceiptExportService.run_export_job, job.id)
+    
+    return _export_job_response(job)
+
+
+@router.get("/receipt-exports/{job_id}", response_model=ReceiptExportJobResponse)
+async def get_receipt_export(
+    job_id: str,
+    current_user: UserContext = Depends(require_admin_role)
+):
+    """
+    Get the progress of a bulk receipt export.
+    
+    Admin only.
+    """
+    clinic_id = ensure_clinic_access(current_user)
+    job = _get_clinic_export_job(job_id, clinic_id)
+    return _export_job_response(job)
+
+
+@router.get("/receipt-exports/{job_id}/download")
+async def download_receipt_export(
+    job_id: str,
+    current_user: UserContext = Depends(require_admin_role)
+):
+    """
+    Download a completed bulk receipt export as a ZIP file.
+    
+    Admin only. The file is streamed from disk.
+    """
+    clinic_id = ensure_clinic_access(current_user)
+    job = _get_clinic_export_job(job_id, clinic_id)
+    
+    if job.status != 'completed' or job.file_path is None or not job.file_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="匯出尚未完成"
+        )
+    
+    return FileResponse(
+        path=job.file_path,
+        media_type="application/zip",
+        filename=job.download_filename
+    )
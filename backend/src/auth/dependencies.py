@@ -14,7 +14,7 @@ MIGRATION NOTE (2025-01-27):
 
 import logging
 # datetime and timezone imports removed - using taiwan_now() from utils.datetime_utils instead
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -22,10 +22,11 @@ from sqlalchemy.orm import Session
 import jwt
 
 from core.database import get_db
-from core.config import SYSTEM_ADMIN_EMAILS
+from core.config import SYSTEM_ADMIN_EMAILS, AUTH_CONTEXT_CACHE_TTL_SECONDS
 from services.jwt_service import jwt_service, TokenPayload
 from models import User, LineUser, Clinic, UserClinicAssociation
 from utils.datetime_utils import taiwan_now
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -94,11 +95,73 @@ def get_token_payload(
     return payload
 
 
+# Auth context cache
+#
+# Resolving a token to a UserContext costs two or three queries (user,
+# association, clinic) plus a last_accessed_at write. Successful resolutions
+# are reused for AUTH_CONTEXT_CACHE_TTL_SECONDS, keyed by the token's identity
+# claims and issue time, so a re-issued token (e.g. after a clinic switch)
+# never sees another token's context. Membership changes call
+# invalidate_auth_context; anything else (e.g. clinic deactivation) takes
+# effect within the TTL. The cache is per process.
+AUTH_CONTEXT_CACHE_MAX_ENTRIES = 10000
+
+AuthContextCacheKey = Tuple[str, str, str, Optional[int], Optional[int]]
+
+_auth_context_cache: TTLCache[AuthContextCacheKey, UserContext] = TTLCache(
+    max_entries=AUTH_CONTEXT_CACHE_MAX_ENTRIES,
+    ttl_seconds=AUTH_CONTEXT_CACHE_TTL_SECONDS
+)
+
+
+def _auth_context_cache_key(payload: TokenPayload) -> AuthContextCacheKey:
+    return (payload.user_type, payload.sub, payload.email, payload.active_clinic_id, payload.iat)
+
+
+def _copy_user_context(user_context: UserContext) -> UserContext:
+    """Copy a user context, so cached entries are never mutated by a request."""
+    return UserContext(
+        user_type=user_context.user_type,
+        email=user_context.email,
+        roles=list(user_context.roles),
+        google_subject_id=user_context.google_subject_id,
+        name=user_context.name,
+        user_id=user_context.user_id,
+        active_clinic_id=user_context.active_clinic_id
+    )
+
+
+def invalidate_auth_context(user_id: int, clinic_id: Optional[int] = None) -> None:
+    """
+    Drop cached auth contexts for a user.
+
+    Call after changing a user's roles or clinic membership so the next request
+    re-reads them from the database.
+
+    Args:
+        user_id: User whose contexts to drop
+        clinic_id: Only drop contexts for this active clinic (all clinics if None)
+    """
+    _auth_context_cache.delete_where(
+        lambda _, cached: cached.user_id == user_id
+        and (clinic_id is None or cached.active_clinic_id == clinic_id)
+    )
+
+
+def clear_auth_context_cache() -> None:
+    """Drop every cached auth context."""
+    _auth_context_cache.clear()
+
+
 def get_current_user(
     payload: Optional[TokenPayload] = Depends(get_token_payload),
     db: Session = Depends(get_db)
 ) -> UserContext:
-    """Get authenticated user context from JWT token."""
+    """
+    Get authenticated user context from JWT token.
+
+    Recently resolved tokens are served from the auth context cache.
+    """
     if not payload:
         logger.warning("[AUTH] No payload provided - authentication failed")
         raise HTTPException(
@@ -106,6 +169,21 @@ def get_current_user(
             detail=get_localized_message("Authentication credentials not provided", "未提供認證憑證")
         )
 
+    if AUTH_CONTEXT_CACHE_TTL_SECONDS <= 0:
+        return _resolve_user_context(payload, db)
+
+    cache_key = _auth_context_cache_key(payload)
+    cached = _auth_context_cache.get(cache_key)
+    if cached is not None:
+        return _copy_user_context(cached)
+
+    user_context = _resolve_user_context(payload, db)
+    _auth_context_cache.set(cache_key, _copy_user_context(user_context))
+    return user_context
+
+
+def _resolve_user_context(payload: TokenPayload, db: Session) -> UserContext:
+    """Resolve a verified token payload to a user context from the database."""
     # Handle system admin authentication
     if payload.user_type == "system_admin":
         # Verify email is in system admin whitelist
@@ -570,45 +648,25 @@ def get_current_line_user_with_clinic(
         ).first()
         if not line_user:
             # This shouldn't happen in normal flow, but handle gracefully
-            # Create LineUser for this clinic using service method for race condition handling
+            # Create LineUser for this clinic (single upsert; safe under concurrent requests)
             from services.line_user_service import LineUserService
-            from services.line_service import LINEService
-            from sqlalchemy.exc import IntegrityError
-            
-            display_name = payload.get('display_name')
-            
-            # Create LINEService from clinic credentials for profile fetching if needed
-            line_service = LINEService(
-                channel_secret=clinic.line_channel_secret or "",
-                channel_access_token=clinic.line_channel_access_token or ""
-            )
-            
+
             try:
                 line_user = LineUserService.get_or_create_line_user(
                     db=db,
                     line_user_id=line_user_id,
                     clinic_id=clinic_id,
-                    line_service=line_service,
-                    display_name=display_name
+                    display_name=payload.get('display_name')
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to create LineUser: "
+                    f"line_user_id={line_user_id}, clinic_id={clinic_id}: {e}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to create LINE user"
                 )
-            except IntegrityError:
-                # Race condition: another request created the LineUser
-                # Retry query to get the existing one
-                db.rollback()
-                line_user = db.query(LineUser).filter(
-                    LineUser.line_user_id == line_user_id,
-                    LineUser.clinic_id == clinic_id
-                ).first()
-                if not line_user:
-                    # Still not found after retry - unexpected error
-                    logger.error(
-                        f"Failed to create or retrieve LineUser after race condition: "
-                        f"line_user_id={line_user_id}, clinic_id={clinic_id}"
-                    )
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Failed to create LINE user"
-                    )
 
         return line_user, clinic
 
@@ -7,6 +7,7 @@ for use throughout the application.
 
 import os
 import pathlib
+import tempfile
 from dotenv import load_dotenv
 
 
@@ -85,4 +86,47 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID", "")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "")
 AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-1")
 
-
+# Retention cleanup of soft-deleted medical records and photos
+# Rows hard-deleted per transaction, and pause between chunks to limit lock and I/O pressure
+CLEANUP_DELETE_CHUNK_SIZE = int(os.getenv("CLEANUP_DELETE_CHUNK_SIZE", "500"))
+CLEANUP_CHUNK_PAUSE_SECONDS = float(os.getenv("CLEANUP_CHUNK_PAUSE_SECONDS", "0.1"))
+
+# Receipt render cache (rendered receipt PDFs/HTML keyed by snapshot hash)
+# Set RECEIPT_RENDER_CACHE_DIR to an empty string to disable the cache
+RECEIPT_RENDER_CACHE_DIR = os.getenv(
+    "RECEIPT_RENDER_CACHE_DIR",
+    str(pathlib.Path(tempfile.gettempdir()) / "clinic-bot-receipt-cache")
+)
+RECEIPT_RENDER_CACHE_MAX_MB = int(os.getenv("RECEIPT_RENDER_CACHE_MAX_MB", "512"))
+
+# Receipt PDF render pool (long-lived WeasyPrint worker processes)
+# Set PDF_RENDER_WORKERS to 0 to render in-process on a thread instead
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_MAX_QUEUE = int(os.getenv("PDF_RENDER_MAX_QUEUE", "16"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "30"))
+
+# Bulk receipt export (ZIP files of receipt PDFs, built by background jobs)
+RECEIPT_EXPORT_DIR = os.getenv(
+    "RECEIPT_EXPORT_DIR",
+    str(pathlib.Path(tempfile.gettempdir()) / "clinic-bot-receipt-exports")
+)
+RECEIPT_EXPORT_RETENTION_HOURS = int(os.getenv("RECEIPT_EXPORT_RETENTION_HOURS", "24"))
+
+# Authenticated user context cache (skips per-request user/association lookups)
+# Set AUTH_CONTEXT_CACHE_TTL_SECONDS to 0 to disable the cache
+AUTH_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CONTEXT_CACHE_TTL_SECONDS", "30"))
+
+# Daily digest notifications (admin and practitioner schedules sent each hour)
+# Number of clinics/practitioners whose messages are built and pushed at once
+DAILY_NOTIFICATION_CONCURRENCY = int(os.getenv("DAILY_NOTIFICATION_CONCURRENCY", "8"))
+# Pushes per second per LINE channel (LINE allows 2,000; 0 disables the limit)
+LINE_PUSH_RATE_LIMIT_PER_CHANNEL = float(os.getenv("LINE_PUSH_RATE_LIMIT_PER_CHANNEL", "100"))
+
+# Availability notifications (waitlist)
+# Batch availability queries run at once during the scheduled sweep
+AVAILABILITY_SWEEP_CONCURRENCY = int(os.getenv("AVAILABILITY_SWEEP_CONCURRENCY", "4"))
+
+# LINE webhook redelivery deduplication
+# "memory": per-process store (single-worker deployments)
+# "database": line_webhook_events table shared by every worker
+LINE_WEBHOOK_DEDUP_STORE = os.getenv("LINE_WEBHOOK_DEDUP_STORE", "memory")
@@ -62,6 +62,11 @@ CHAT_TEST_SESSION_EXPIRY_HOURS = 12  # Test sessions expire after 12 hour
 # LINE message metadata retention
 LINE_MESSAGE_RETENTION_HOURS = 240  # 10 days (longer than CHAT_SESSION_EXPIRY_HOURS for safety)
 
+# LINE profile enrichment (display name / picture of LINE users)
+LINE_PROFILE_REFRESH_INTERVAL_SECONDS = 10  # How often queued profile refreshes are processed
+LINE_PROFILE_REFRESH_RETRY_HOURS = 24  # Users with an incomplete profile are re-fetched at most this often
+MAX_PENDING_LINE_PROFILE_REFRESHES = 10000  # Further requests are dropped until the queue drains
+
 # AI fallback message settings
 AI_FALLBACK_EXPIRY_MINUTES = 20  # Only send fallback message if AI has replied within this window
 AI_LABEL_LONG_THRESHOLD = 30    # Responses longer than this get a newline after the AI label
@@ -74,6 +79,7 @@ NOTIFICATION_DATE_RANGE_DAYS = 30
 # Notification Check Times (Taiwan time)
 NOTIFICATION_CHECK_HOURS = [9, 15, 21]  # 9am, 3pm, 9pm
 NOTIFICATION_CLEANUP_HOUR = 3  # 3 AM
+SLOTS_FREED_CHECK_INTERVAL_SECONDS = 10  # How often freed slots are matched to notifications
 
 # Dashboard settings
 DASHBOARD_PAST_MONTHS_COUNT = 3  # Number of past months to display (in addition to current month)
@@ -85,3 +91,14 @@ TEMPORARY_ID_THRESHOLD = 1000000000000
 
 # Recurrent appointment notification settings
 RECURRENT_APPOINTMENT_NOTIF_MAX_ITEMS = 100
+
+# Patient photo uploads
+PHOTO_UPLOAD_MAX_SIZE_BYTES = 20 * 1024 * 1024  # Hard cap, matches the 20MB frontend validation
+PHOTO_UPLOAD_CHUNK_SIZE_BYTES = 64 * 1024  # Read/hash uploads in 64KB chunks
+PHOTO_UPLOAD_SPOOL_MAX_MEMORY_BYTES = 1024 * 1024  # Spooled uploads roll over to disk beyond 1MB
+PHOTO_DIRECT_UPLOAD_URL_EXPIRY_SECONDS = 900  # Presigned PUT URLs for direct uploads are valid for 15 minutes
+PHOTO_PROCESSING_INTERVAL_SECONDS = 5  # How often the worker drains the direct-upload processing queue
+PHOTO_PROCESSING_BATCH_SIZE = 20  # Max staged uploads processed per worker run
+PHOTO_PROCESSING_MAX_ATTEMPTS = 5  # Failed processing attempts before a direct upload is marked failed
+PHOTO_URL_CACHE_MAX_ENTRIES = 20000  # Presigned URLs kept in the per-process signing cache
+PHOTO_URL_CACHE_BUCKET_FRACTION = 4  # Cached URLs are reused for 1/4 of their expiry, so >=75% validity remains
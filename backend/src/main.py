@@ -62,6 +62,15 @@ from services.cleanup_scheduler import (
     start_cleanup_scheduler,
     stop_cleanup_scheduler
 )
+from services.photo_processing_scheduler import (
+    start_photo_processing_scheduler,
+    stop_photo_processing_scheduler
+)
+from services.line_profile_refresh_scheduler import (
+    start_line_profile_refresh_scheduler,
+    stop_line_profile_refresh_scheduler
+)
+from services.pdf_render_pool import shutdown_pdf_render_pool
 
 # Configure logging
 logging.basicConfig(
@@ -119,6 +128,8 @@ async def lifespan(app: FastAPI):
         start_scheduler_safely("Practitioner daily notification scheduler", start_practitioner_daily_notification_scheduler),
         start_scheduler_safely("Scheduled message scheduler (handles reminders, follow-ups)", start_scheduled_message_scheduler),
         start_scheduler_safely("Medical record cleanup scheduler", start_cleanup_scheduler),
+        start_scheduler_safely("Photo processing scheduler", start_photo_processing_scheduler),
+        start_scheduler_safely("LINE profile refresh scheduler", start_line_profile_refresh_scheduler),
         return_exceptions=True  # Don't fail if any scheduler fails
     )
     
@@ -195,6 +206,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.exception(f"❌ Error stopping medical record cleanup scheduler: {e}")
 
+    # Stop photo processing scheduler
+    try:
+        await stop_photo_processing_scheduler()
+        logger.info("🛑 Photo processing scheduler stopped")
+    except Exception as e:
+        logger.exception(f"❌ Error stopping photo processing scheduler: {e}")
+
+    # Stop LINE profile refresh scheduler
+    try:
+        await stop_line_profile_refresh_scheduler()
+        logger.info("🛑 LINE profile refresh scheduler stopped")
+    except Exception as e:
+        logger.exception(f"❌ Error stopping LINE profile refresh scheduler: {e}")
+
+    # Stop receipt PDF render workers
+    try:
+        shutdown_pdf_render_pool()
+    except Exception as e:
+        logger.exception(f"❌ Error stopping PDF render pool: {e}")
+
     logger.info("🛑 Shutting down Clinic Bot Backend API")
 
 
@@ -16,6 +16,7 @@ from .practitioner_appointment_types import PractitionerAppointmentTypes
 from .line_message import LineMessage
 from .line_push_message import LinePushMessage
 from .line_ai_reply import LineAiReply
+from .line_webhook_event import LineWebhookEvent
 from .availability_notification import AvailabilityNotification
 from .practitioner_link_code import PractitionerLinkCode
 from .billing_scenario import BillingScenario
@@ -50,6 +51,7 @@ __all__ = [
     "LineMessage",
     "LinePushMessage",
     "LineAiReply",
+    "LineWebhookEvent",
     "AvailabilityNotification",
     "PractitionerLinkCode",
     "BillingScenario",
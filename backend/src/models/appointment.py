@@ -10,7 +10,7 @@ calendar management while maintaining specialized appointment-specific data.
 from datetime import date as date_type, datetime
 from typing import Optional, List
 import sqlalchemy as sa
-from sqlalchemy import String, ForeignKey, Index, TIMESTAMP, Boolean
+from sqlalchemy import String, ForeignKey, Index, TIMESTAMP, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
@@ -185,6 +185,13 @@ class Appointment(Base):
         Index('idx_appointments_status_calendar_event', 'status', 'calendar_event_id'),
         # Index for querying auto-assigned appointments
         Index('idx_appointments_is_auto_assigned', 'is_auto_assigned'),
+        # Partial index for the hourly auto-assignment visibility job: only the
+        # (few) confirmed appointments still hidden from practitioners
+        Index(
+            'idx_appointments_pending_auto_assigned',
+            'calendar_event_id',
+            postgresql_where=text("is_auto_assigned = true AND status = 'confirmed'")
+        ),
         Index('idx_appointments_originally_auto_assigned', 'originally_auto_assigned'),
         # Index for reminder service queries (status + reminder_sent_at)
         Index('idx_appointments_status_reminder', 'status', 'reminder_sent_at'),
@@ -8,8 +8,8 @@ for specific appointment types, practitioners, and time windows.
 from datetime import date, datetime
 from typing import Optional, List, Dict, TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Index, JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, JSON, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from core.database import Base
 from utils.datetime_utils import TAIWAN_TZ
@@ -50,6 +50,9 @@ class AvailabilityNotification(Base):
     time_windows: Mapped[List[Dict[str, str]]] = mapped_column(JSON)
     """List of time window entries: [{"date": "YYYY-MM-DD", "time_window": "morning|afternoon|evening"}, ...]"""
     
+    last_date: Mapped[Optional[date]] = mapped_column(nullable=True)
+    """Latest date in time_windows, kept in sync when time_windows is assigned. NULL if there are none."""
+    
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(TAIWAN_TZ))
     """When this notification was created."""
     
@@ -79,5 +82,17 @@ class AvailabilityNotification(Base):
         # Order: line_user_id first (most selective), then clinic_id, then is_active
         # PostgreSQL can use left-prefix: queries filtering by (line_user_id) or (line_user_id, clinic_id) also benefit
         Index("idx_line_user_clinic_active", "line_user_id", "clinic_id", "is_active"),
+        # Partial index for the scheduler: expiring and sweeping active notifications by last date
+        Index(
+            "idx_availability_notifications_active_last_date", "last_date",
+            postgresql_where=text("is_active = true")
+        ),
     )
 
+    @validates("time_windows")
+    def _sync_last_date(self, key: str, time_windows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Keep last_date in sync whenever time_windows is assigned (it is never mutated in place)."""
+        dates = [datetime.strptime(entry["date"], "%Y-%m-%d").date() for entry in time_windows or []]
+        self.last_date = max(dates) if dates else None
+        return time_windows
+
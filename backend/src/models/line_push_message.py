@@ -83,6 +83,25 @@ class LinePushMessage(Base):
         Index('idx_push_messages_labels', 'clinic_id', 'recipient_type', 'event_type', 'trigger_source'),
     )
 
+    @classmethod
+    def from_labels(
+        cls,
+        line_user_id: str,
+        clinic_id: int,
+        line_message_id: Optional[str],
+        labels: Dict[str, str]
+    ) -> "LinePushMessage":
+        """Build a tracking record, taking the core labels from the labels dictionary."""
+        return cls(
+            line_user_id=line_user_id,
+            clinic_id=clinic_id,
+            line_message_id=line_message_id,
+            recipient_type=labels.get('recipient_type', ''),
+            event_type=labels.get('event_type', ''),
+            trigger_source=labels.get('trigger_source', ''),
+            labels=labels  # Store all labels including flexible ones
+        )
+
     def __repr__(self) -> str:
         """String representation for debugging."""
         return (
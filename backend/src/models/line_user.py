@@ -71,8 +71,18 @@ class LineUser(Base):
     """
     Profile picture URL from LINE API.
     
-    This URL is fetched when creating new users or when missing for existing users.
-    May be None if user hasn't added account as friend or profile is private.
+    Filled in from the LINE profile in the background when missing (see
+    profile_refreshed_at). May be None if user hasn't added account as friend
+    or profile is private.
+    """
+
+    profile_refreshed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    """
+    When the LINE profile was last fetched (or attempted) for this user.
+    
+    Users without a display name or picture are refreshed at most once per
+    LINE_PROFILE_REFRESH_RETRY_HOURS, so users without a profile picture
+    don't cause a LINE API call on every message.
     """
 
     preferred_language: Mapped[Optional[str]] = mapped_column(
@@ -140,4 +150,6 @@ class LineUser(Base):
         # UniqueConstraint('line_user_id', 'clinic_id', name='uq_line_users_line_user_clinic'),
         # Index for efficient queries (clinic_id first for better selectivity)
         Index('idx_line_users_clinic_line_user', 'clinic_id', 'line_user_id'),
+        # Trigram GIN indexes on display_name and clinic_display_name (for '%term%' search)
+        # are created by migration 202602170000 when the pg_trgm extension is available
     )
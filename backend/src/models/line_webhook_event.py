@@ -0,0 +1,55 @@
+"""
+LINE webhook event model for deduplicating redelivered webhook events.
+
+LINE redelivers a webhook event when our response is slow or fails, marking it
+with deliveryContext.isRedelivery. Each processed event's webhookEventId is
+recorded here so a redelivery is recognized and not processed (and replied to)
+a second time. Rows are cleaned up after LINE_MESSAGE_RETENTION_HOURS.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import String, ForeignKey, TIMESTAMP, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from core.database import Base
+
+
+class LineWebhookEvent(Base):
+    """
+    A webhook event received from LINE for a clinic.
+
+    Used by the database-backed webhook deduplication store, which is shared
+    by every worker of a multi-worker deployment.
+    """
+
+    __tablename__ = "line_webhook_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    """Unique identifier for the event record."""
+
+    clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id", ondelete="CASCADE"), nullable=False)
+    """Clinic whose official account received the event."""
+
+    webhook_event_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    """LINE's webhookEventId (the same for every delivery of an event)."""
+
+    received_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        index=True
+    )
+    """Timestamp when the event was first received."""
+
+    __table_args__ = (
+        UniqueConstraint('clinic_id', 'webhook_event_id', name='uq_line_webhook_events_clinic_event'),
+    )
+
+    def __repr__(self) -> str:
+        """String representation for debugging."""
+        return (
+            f"<LineWebhookEvent(id={self.id}, clinic_id={self.clinic_id}, "
+            f"webhook_event_id={self.webhook_event_id})>"
+        )
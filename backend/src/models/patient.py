@@ -7,7 +7,7 @@ and can optionally be linked to a LINE user account for communication and appoin
 management through the LIFF app.
 """
 
-from sqlalchemy import String, Text, ForeignKey, TIMESTAMP, Date, Index
+from sqlalchemy import String, Text, ForeignKey, TIMESTAMP, Date, Index, Computed
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, date
 from typing import Optional
@@ -39,6 +39,13 @@ class Patient(Base):
     phone_number: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     """Contact phone number for the patient, used for appointment confirmations and reminders. Optional for clinic-created patients."""
 
+    phone_number_digits: Mapped[Optional[str]] = mapped_column(
+        String(50),
+        Computed("regexp_replace(phone_number, '[^0-9]', '', 'g')", persisted=True),
+        nullable=True
+    )
+    """Digits of phone_number, maintained by the database. Used for formatting-insensitive phone search."""
+
     birthday: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     """Optional birthday of the patient (date only, no time)."""
 
@@ -84,4 +91,6 @@ class Patient(Base):
         Index('idx_patients_line_user', 'line_user_id'),
         # Removed idx_patients_clinic as it's redundant with idx_patients_clinic_phone
         Index('idx_patients_created_at', 'created_at'),
+        # Trigram GIN indexes on full_name and phone_number_digits (for '%term%' search)
+        # are created by migration 202602170000 when the pg_trgm extension is available
     )
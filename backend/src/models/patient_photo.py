@@ -4,11 +4,17 @@ Patient Photo model.
 
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Integer, Boolean, TIMESTAMP, ForeignKey, Text, Index
+from sqlalchemy import String, Integer, Boolean, TIMESTAMP, ForeignKey, Text, Index, CheckConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
 
+# Upload processing states (see PatientPhoto.upload_status)
+PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD = 'awaiting_upload'  # Presigned URL issued, client has not confirmed the PUT
+PHOTO_UPLOAD_STATUS_PROCESSING = 'processing'  # Raw object staged, queued for the processing worker
+PHOTO_UPLOAD_STATUS_READY = 'ready'  # Processed image and thumbnail are in place
+PHOTO_UPLOAD_STATUS_FAILED = 'failed'  # Staged object missing or could not be processed (after retries)
+
 class PatientPhoto(Base):
     """
     Patient photo entity representing an image uploaded for a patient.
@@ -32,6 +38,13 @@ class PatientPhoto(Base):
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     is_pending: Mapped[bool] = mapped_column(Boolean, server_default='true', nullable=False) # Staged state
+
+    # Direct-to-storage uploads: raw object written by the client, awaiting processing
+    staging_key: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    upload_status: Mapped[str] = mapped_column(String(20), server_default='ready', nullable=False)
+    """Processing state. Valid values: 'awaiting_upload', 'processing', 'ready', 'failed'."""
+    processing_attempts: Mapped[int] = mapped_column(Integer, server_default='0', nullable=False)
+    """Failed processing attempts; the upload is marked failed after PHOTO_PROCESSING_MAX_ATTEMPTS."""
     is_deleted: Mapped[bool] = mapped_column(Boolean, server_default='false', nullable=False)
     deleted_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     
@@ -55,4 +68,12 @@ class PatientPhoto(Base):
         Index("idx_patient_photos_deleted", "clinic_id", "is_deleted"),
         Index("idx_patient_photos_dedup", "clinic_id", "content_hash"),
         Index("idx_patient_photos_created", "created_at"),
+        Index(
+            "idx_patient_photos_upload_queue", "upload_status", "id",
+            postgresql_where=text("upload_status = 'processing'")
+        ),
+        CheckConstraint(
+            "upload_status IN ('awaiting_upload', 'processing', 'ready', 'failed')",
+            name="check_patient_photos_upload_status"
+        ),
     )
@@ -7,15 +7,17 @@ Notifications are sent via LINE messaging and scheduled using APScheduler.
 Uses next_day_notification_time setting (same as practitioners).
 """
 
+import asyncio
 import logging
 from datetime import timedelta, date
 from typing import List, Optional, Dict
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 from apscheduler.triggers.cron import CronTrigger  # type: ignore
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Date, Integer, column, or_, values
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
+from core.config import DAILY_NOTIFICATION_CONCURRENCY
 from core.database import get_db_context
 from core.constants import MISFIRE_GRACE_TIME_SECONDS
 from models.appointment import Appointment
@@ -26,6 +28,11 @@ from models.user_clinic_association import UserClinicAssociation
 from services.notification_service import NotificationService
 from utils.datetime_utils import taiwan_now, TAIWAN_TZ
 from utils.daily_notification_message_builder import DailyNotificationMessageBuilder
+from utils.clinic_directory import ClinicDirectory
+from utils.daily_notification_schedule import (
+    get_next_day_notification_config,
+    next_day_notification_hour_condition,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +40,13 @@ logger = logging.getLogger(__name__)
 LINE_MESSAGE_MAX_CHARS = 5000
 LINE_MESSAGE_TARGET_CHARS = 4500  # Target with buffer
 
+ADMIN_DAILY_REMINDER_LABELS = {
+    'recipient_type': 'admin',
+    'event_type': 'daily_appointment_reminder',
+    'trigger_source': 'system_triggered',
+    'notification_context': 'daily_reminder'
+}
+
 
 class AdminDailyNotificationService:
     """
@@ -99,8 +113,11 @@ class AdminDailyNotificationService:
         """
         Check for and send daily reminders to clinic admins about appointments for the next day.
         
-        This method is called by the scheduler every hour to check for
-        clinics that should receive reminders at this time.
+        This method is called by the scheduler every hour. The admins due this
+        hour are selected with one query and the appointments of all their
+        clinics with another, so a run costs about the same however many
+        clinics exist. Each clinic's digest is then built and sent on a worker
+        thread, DAILY_NOTIFICATION_CONCURRENCY clinics at a time.
         
         Uses a fresh database session for each run to avoid stale session issues.
         """
@@ -110,7 +127,6 @@ class AdminDailyNotificationService:
                 # Get current time in Taiwan timezone (UTC+8)
                 # All time comparisons are done in Taiwan time
                 current_time = taiwan_now()
-                current_hour = current_time.hour
                 today = current_time.date()
                 
                 logger.info(
@@ -118,110 +134,52 @@ class AdminDailyNotificationService:
                     f"{current_time.strftime('%H:%M')}"
                 )
 
-                # Get all clinics
-                clinics = db.query(Clinic).all()
-
-                total_sent = 0
-                total_skipped = 0
-
-                for clinic in clinics:
-                    # Check if clinic has LINE credentials
-                    if not clinic.line_channel_secret or not clinic.line_channel_access_token:
-                        logger.debug(f"Clinic {clinic.id} has no LINE credentials, skipping")
-                        continue
-
-                    # Get all clinic admins (auto-enabled, no opt-in check)
-                    all_admins = self._get_clinic_admins_with_daily_reminder(db, clinic.id)
-
-                    if not all_admins:
-                        logger.debug(f"No admins found for clinic {clinic.id}")
-                        continue
-
-                    # Group admins by their notification time and reminder_days_ahead
-                    admins_by_config: Dict[tuple[int, int], List[UserClinicAssociation]] = {}
-                    for admin_association in all_admins:
-                        # Get admin's notification time setting (same as practitioners)
-                        try:
-                            admin_settings = admin_association.get_validated_settings()
-                            notification_time_str = admin_settings.next_day_notification_time
-                            reminder_days_ahead = admin_settings.reminder_days_ahead
-                        except Exception as e:
-                            logger.warning(
-                                f"Error getting notification settings for admin {admin_association.user_id} "
-                                f"in clinic {clinic.id}: {e}, using defaults (21:00, 1 day)"
-                            )
-                            notification_time_str = "21:00"
-                            reminder_days_ahead = 1
-
-                        # Parse notification time (interpreted as Taiwan time, e.g., "21:00" = 9 PM)
-                        try:
-                            notification_hour, _ = map(int, notification_time_str.split(':'))
-                        except (ValueError, AttributeError):
-                            logger.warning(
-                                f"Invalid notification time format '{notification_time_str}' for admin "
-                                f"{admin_association.user_id} in clinic {clinic.id}, using default 21:00"
-                            )
-                            notification_hour = 21
-
-                        # Only process admins whose notification time matches current hour
-                        if notification_hour != current_hour:
-                            continue
-
-                        config_key = (notification_hour, reminder_days_ahead)
-                        if config_key not in admins_by_config:
-                            admins_by_config[config_key] = []
-                        admins_by_config[config_key].append(admin_association)
-
-                    # If no admins match current hour, skip this clinic
-                    if not admins_by_config:
-                        continue
-
-                    # Process each unique configuration
-                    for (notification_hour, reminder_days_ahead), admins in admins_by_config.items():
-                        # Get appointments for the date range
-                        start_date = today + timedelta(days=1)
-                        end_date = today + timedelta(days=reminder_days_ahead)
-                        
-                        appointments = self._get_appointments_for_date_range(db, clinic.id, start_date, end_date)
-
-                        if not appointments:
-                            logger.debug(
-                                f"No appointments found for clinic {clinic.id} from {start_date} to {end_date}"
-                            )
-                            continue
-
-                        # Group appointments by date, then by practitioner
-                        from itertools import groupby
-                        # Ensure appointments are sorted by date for groupby
-                        appointments.sort(key=lambda a: a.calendar_event.date)
-                        appointments_by_date = {
-                            d: list(g) for d, g in groupby(appointments, key=lambda a: a.calendar_event.date)
-                        }
-
-                        # Build message(s) with splitting
-                        messages = self._build_clinic_wide_message_for_range(
-                            db, appointments_by_date, start_date, end_date, clinic.id
+                admins_by_config = self._get_due_admins_by_config(db, current_time.hour)
+                if not admins_by_config:
+                    logger.debug("No clinics found needing admin daily reminders at this time")
+                    return
+
+                # One appointment range per clinic, long enough for its furthest-looking admins
+                start_date = today + timedelta(days=1)
+                end_dates: Dict[int, date] = {}
+                for clinic_id, reminder_days_ahead in admins_by_config:
+                    end_date = today + timedelta(days=reminder_days_ahead)
+                    end_dates[clinic_id] = max(end_date, end_dates.get(clinic_id, end_date))
+
+                appointments_by_clinic = self._get_appointments_for_clinics(db, start_date, end_dates)
+                directories = ClinicDirectory.for_clinics(db, appointments_by_clinic.keys())
+
+                semaphore = asyncio.Semaphore(DAILY_NOTIFICATION_CONCURRENCY)
+
+                async def send_digest(
+                    clinic_id: int,
+                    reminder_days_ahead: int,
+                    admins: List[UserClinicAssociation]
+                ) -> tuple[int, int]:
+                    end_date = today + timedelta(days=reminder_days_ahead)
+                    appointments = [
+                        appointment for appointment in appointments_by_clinic.get(clinic_id, [])
+                        if appointment.calendar_event.date <= end_date
+                    ]
+                    if not appointments:
+                        logger.debug(
+                            f"No appointments found for clinic {clinic_id} from {start_date} to {end_date}"
+                        )
+                        return 0, 0
+
+                    async with semaphore:
+                        return await asyncio.to_thread(
+                            self._send_clinic_digest,
+                            admins[0].clinic, admins, appointments, start_date, end_date, directories[clinic_id]
                         )
 
-                        if not messages:
-                            logger.warning(f"Failed to build messages for clinic {clinic.id}")
-                            continue
-
-                        # Send to all admins who match this configuration
-                        labels = {
-                            'recipient_type': 'admin',
-                            'event_type': 'daily_appointment_reminder',
-                            'trigger_source': 'system_triggered',
-                            'notification_context': 'daily_reminder'
-                        }
-
-                        # Send each message part to all admins
-                        for message in messages:
-                            success_count = NotificationService._send_notification_to_recipients(  # type: ignore[reportPrivateUsage]
-                                db, clinic, message, admins, labels
-                            )
-                            total_sent += success_count
-                            total_skipped += (len(admins) - success_count)
+                results = await asyncio.gather(*(
+                    send_digest(clinic_id, reminder_days_ahead, admins)
+                    for (clinic_id, reminder_days_ahead), admins in admins_by_config.items()
+                ))
+
+                total_sent = sum(sent for sent, _ in results)
+                total_skipped = sum(skipped for _, skipped in results)
 
                 if total_sent == 0 and total_skipped == 0:
                     logger.debug("No clinics found needing admin daily reminders at this time")
@@ -231,6 +189,154 @@ class AdminDailyNotificationService:
             except Exception as e:
                 logger.exception(f"Error sending admin daily reminders: {e}")
 
+    def _get_due_admins_by_config(
+        self,
+        db: Session,
+        current_hour: int
+    ) -> Dict[tuple[int, int], List[UserClinicAssociation]]:
+        """
+        Get the admins whose notification time falls in the current hour, across all clinics.
+        
+        Only admins with LINE accounts in clinics with LINE credentials are
+        included (daily reminder is auto-enabled for all admins).
+        
+        Args:
+            db: Database session
+            current_hour: Current hour in Taiwan time
+            
+        Returns:
+            Admin associations grouped by (clinic_id, reminder_days_ahead), with
+            each association's clinic loaded
+        """
+        candidates = db.query(UserClinicAssociation).join(
+            Clinic, UserClinicAssociation.clinic_id == Clinic.id
+        ).filter(
+            UserClinicAssociation.is_active == True,
+            UserClinicAssociation.roles.contains(['admin']),
+            UserClinicAssociation.line_user_id.isnot(None),
+            Clinic.line_channel_secret.isnot(None),
+            Clinic.line_channel_secret != '',
+            Clinic.line_channel_access_token.isnot(None),
+            Clinic.line_channel_access_token != '',
+            next_day_notification_hour_condition(current_hour)
+        ).options(
+            contains_eager(UserClinicAssociation.clinic)
+        ).order_by(UserClinicAssociation.clinic_id, UserClinicAssociation.id).all()
+
+        admins_by_config: Dict[tuple[int, int], List[UserClinicAssociation]] = {}
+        for admin_association in candidates:
+            notification_hour, reminder_days_ahead = get_next_day_notification_config(admin_association)
+            if notification_hour != current_hour:
+                continue
+            config_key = (admin_association.clinic_id, reminder_days_ahead)
+            admins_by_config.setdefault(config_key, []).append(admin_association)
+
+        return admins_by_config
+
+    def _get_appointments_for_clinics(
+        self,
+        db: Session,
+        start_date: date,
+        end_dates: Dict[int, date]
+    ) -> Dict[int, List[Appointment]]:
+        """
+        Get confirmed appointments for several clinics' date ranges with one query.
+        
+        Same filtering as _get_appointments_for_date_range; each clinic's range
+        runs from start_date to its own end date (inclusive).
+        
+        Args:
+            db: Database session
+            start_date: Start date shared by all ranges
+            end_dates: End date of the range for each clinic ID
+            
+        Returns:
+            Dictionary mapping clinic ID to its appointments, ordered by date and start time
+        """
+        if not end_dates:
+            return {}
+
+        ranges = values(
+            column('clinic_id', Integer),
+            column('end_date', Date),
+            name='digest_ranges'
+        ).data(list(end_dates.items()))
+
+        appointments = db.query(Appointment).join(
+            CalendarEvent, Appointment.calendar_event_id == CalendarEvent.id
+        ).join(
+            ranges, CalendarEvent.clinic_id == ranges.c.clinic_id
+        ).outerjoin(
+            AppointmentType, Appointment.appointment_type_id == AppointmentType.id
+        ).filter(
+            Appointment.status == 'confirmed',
+            CalendarEvent.date >= start_date,
+            CalendarEvent.date <= ranges.c.end_date,
+            CalendarEvent.start_time.isnot(None),
+            or_(
+                Appointment.appointment_type_id.is_(None),
+                AppointmentType.is_deleted == False
+            )
+        ).options(
+            joinedload(Appointment.patient),
+            joinedload(Appointment.appointment_type),
+            joinedload(Appointment.calendar_event).joinedload(CalendarEvent.user)
+        ).order_by(CalendarEvent.date, CalendarEvent.start_time).all()
+
+        appointments_by_clinic: Dict[int, List[Appointment]] = {}
+        for appointment in appointments:
+            appointments_by_clinic.setdefault(appointment.calendar_event.clinic_id, []).append(appointment)
+        return appointments_by_clinic
+
+    def _send_clinic_digest(
+        self,
+        clinic: Clinic,
+        admins: List[UserClinicAssociation],
+        appointments: List[Appointment],
+        start_date: date,
+        end_date: date,
+        directory: ClinicDirectory
+    ) -> tuple[int, int]:
+        """
+        Build one clinic's digest and send it to the given admins.
+        
+        Runs on a worker thread with its own database session (for push
+        message tracking). Appointments and the directory are preloaded, so
+        building the message does not query the database.
+        
+        Returns:
+            (sent, skipped) counts; a failure is logged and counted as skipped
+        """
+        try:
+            # Group appointments by date (already ordered by date)
+            appointments_by_date: Dict[date, List[Appointment]] = {}
+            for appointment in appointments:
+                appointments_by_date.setdefault(appointment.calendar_event.date, []).append(appointment)
+
+            # Build message(s) with splitting
+            messages = self._build_clinic_wide_message_for_range(
+                directory.db, appointments_by_date, start_date, end_date, clinic.id, directory=directory
+            )
+
+            if not messages:
+                logger.warning(f"Failed to build messages for clinic {clinic.id}")
+                return 0, 0
+
+            total_sent = 0
+            total_skipped = 0
+            with get_db_context() as db:
+                # Send each message part to all admins who match this configuration
+                for message in messages:
+                    success_count = NotificationService._send_notification_to_recipients(  # type: ignore[reportPrivateUsage]
+                        db, clinic, message, admins, ADMIN_DAILY_REMINDER_LABELS
+                    )
+                    total_sent += success_count
+                    total_skipped += (len(admins) - success_count)
+            return total_sent, total_skipped
+        except Exception as e:
+            logger.exception(f"Error sending admin daily reminder for clinic {clinic.id}: {e}")
+            return 0, len(admins)
+
     def _get_appointments_for_date_range(
         self,
         db: Session,
@@ -363,7 +469,8 @@ class AdminDailyNotificationService:
         appointments_by_date: Dict[date, List[Appointment]],
         start_date: date,
         end_date: date,
-        clinic_id: int
+        clinic_id: int,
+        directory: Optional[ClinicDirectory] = None
     ) -> List[str]:
         """
         Build clinic-wide reminder message(s) for a date range with splitting if needed.
@@ -374,6 +481,7 @@ class AdminDailyNotificationService:
             start_date: Start date of the range
             end_date: End date of the range
             clinic_id: ID of the clinic
+            directory: Preloaded directory for the clinic (loaded from db if omitted)
             
         Returns:
             List of message strings (may be multiple if splitting occurred)
@@ -382,6 +490,10 @@ class AdminDailyNotificationService:
         current_message_parts: List[str] = []
         current_length = 0
         
+        # Practitioner names are served from one bulk load for the whole range
+        if directory is None:
+            directory = ClinicDirectory(db, clinic_id)
+        
         # Sort dates for consistent ordering
         sorted_dates = sorted(appointments_by_date.keys())
         
@@ -422,10 +534,7 @@ class AdminDailyNotificationService:
                 if practitioner_id is None:
                     practitioner_name = "不指定"
                 else:
-                    from utils.practitioner_helpers import get_practitioner_display_name_with_title
-                    practitioner_name = get_practitioner_display_name_with_title(
-                        db, practitioner_id, clinic_id
-                    )
+                    practitioner_name = directory.practitioner_display_name_with_title(practitioner_id)
                 
                 # Build practitioner section
                 practitioner_section = DailyNotificationMessageBuilder.build_practitioner_section(
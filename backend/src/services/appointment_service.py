@@ -30,7 +30,13 @@ from services.patient_form_scheduler_service import PatientFormSchedulerService
 from utils.datetime_utils import taiwan_now, TAIWAN_TZ
 from utils.appointment_type_queries import get_appointment_type_by_id_with_soft_delete_check
 from utils.appointment_queries import filter_future_appointments
+from utils.clinic_directory import (
+    ClinicDirectory,
+    DELETED_APPOINTMENT_TYPE_NAME,
+    UNKNOWN_APPOINTMENT_TYPE_NAME,
+)
 from services.resource_service import ResourceService
+from services.slot_release_events import publish_slots_freed
 
 logger = logging.getLogger(__name__)
 
@@ -58,10 +64,10 @@ def get_appointment_type_name_safe(appointment_type_id: int, db: Session) -> str
             db, appointment_type_id, include_deleted=True
         )
         if appointment_type.is_deleted:
-            return "已刪除服務類型"
+            return DELETED_APPOINTMENT_TYPE_NAME
         return appointment_type.name
     except ValueError:
-        return "未知服務類型"
+        return UNKNOWN_APPOINTMENT_TYPE_NAME
 
 
 class AppointmentService:
@@ -439,6 +445,214 @@ class AppointmentService:
                 detail="建立預約失敗"
             )
 
+    @staticmethod
+    def create_recurring_appointments(
+        db: Session,
+        clinic_id: int,
+        patient_id: int,
+        appointment_type_id: int,
+        practitioner_id: int,
+        occurrences: List[Tuple[datetime, Optional[List[int]]]],
+        clinic_notes: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+        """
+        Create a series of clinic-scheduled appointments in one transaction.
+
+        Equivalent to calling create_appointment once per occurrence with
+        line_user_id=None and skip_notifications=True, but the clinic, patient,
+        appointment type and practitioner are validated once, calendar events,
+        appointments and resource allocations are written with multi-row inserts,
+        and reminders, follow-ups and patient forms are scheduled in one batch.
+        The number of round-trips does not grow with the number of occurrences.
+
+        Like other clinic-created appointments, occurrences may be outside the
+        practitioner's normal hours or overlap other appointments. An occurrence
+        fails only when its resource requirements cannot be met; the others are
+        still created. Notifications are left to the caller.
+
+        Args:
+            db: Database session
+            clinic_id: Clinic ID
+            patient_id: Patient ID
+            appointment_type_id: Appointment type ID
+            practitioner_id: Practitioner for every occurrence
+            occurrences: (start time, selected resource IDs or None for auto-allocation) pairs
+            clinic_notes: Clinic internal notes copied to every appointment
+
+        Returns:
+            (created, failed): created holds one dict per created appointment (in
+            occurrence order, with an 'index' into occurrences); failed holds
+            (index, error message) pairs
+
+        Raises:
+            HTTPException: If validation fails for the whole series or the transaction fails
+        """
+        try:
+            clinic = db.query(Clinic).filter(Clinic.id == clinic_id).first()
+            if not clinic:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="診所不存在"
+                )
+
+            appointment_type = AppointmentTypeService.get_appointment_type_by_id(
+                db, appointment_type_id, clinic_id=clinic_id
+            )
+
+            from models.user_clinic_association import UserClinicAssociation
+            association = db.query(UserClinicAssociation).filter(
+                UserClinicAssociation.user_id == practitioner_id,
+                UserClinicAssociation.clinic_id == clinic_id,
+                UserClinicAssociation.is_active == True
+            ).first()
+            if not association:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="找不到治療師"
+                )
+
+            patient = db.query(Patient).options(
+                joinedload(Patient.line_user)
+            ).filter(
+                Patient.id == patient_id,
+                Patient.clinic_id == clinic_id
+            ).first()
+            if not patient:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="病患不存在"
+                )
+
+            duration = timedelta(minutes=appointment_type.duration_minutes)
+            time_slots = [(start_time, start_time + duration) for start_time, _ in occurrences]
+            resource_plans = ResourceService.plan_resource_allocations_batch(
+                db, appointment_type_id, clinic_id, time_slots,
+                [resource_ids for _, resource_ids in occurrences]
+            )
+
+            failed: List[Tuple[int, str]] = []
+            pending: List[Tuple[int, Appointment, List[int]]] = []
+            for index, ((start_time, end_time), resource_ids) in enumerate(zip(time_slots, resource_plans)):
+                if resource_ids is None:
+                    failed.append((index, "所需資源不足"))
+                    continue
+
+                calendar_event = CalendarEvent(
+                    user_id=practitioner_id,
+                    clinic_id=clinic_id,
+                    event_type='appointment',
+                    date=start_time.date(),
+                    start_time=start_time.time(),
+                    end_time=end_time.time()
+                )
+                appointment = Appointment(
+                    calendar_event=calendar_event,
+                    patient=patient,
+                    appointment_type=appointment_type,
+                    status='confirmed',
+                    notes=None,
+                    clinic_notes=clinic_notes,
+                    is_auto_assigned=False,
+                    originally_auto_assigned=False,
+                    pending_time_confirmation=False
+                )
+                pending.append((index, appointment, resource_ids))
+
+            # One flush inserts all calendar events, then all appointments
+            db.add_all([appointment for _, appointment, _ in pending])
+            db.flush()
+
+            db.add_all([
+                AppointmentResourceAllocation(
+                    appointment_id=appointment.calendar_event_id,
+                    resource_id=resource_id
+                )
+                for _, appointment, resource_ids in pending
+                for resource_id in resource_ids
+            ])
+
+            appointments = [appointment for _, appointment, _ in pending]
+
+            # Build results before commit so no attribute reloads are needed afterwards
+            created: List[Dict[str, Any]] = []
+            for index, appointment, _ in pending:
+                start_time, end_time = time_slots[index]
+                created.append({
+                    'index': index,
+                    'appointment_id': appointment.calendar_event_id,
+                    'calendar_event_id': appointment.calendar_event_id,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'status': appointment.status,
+                    'clinic_notes': appointment.clinic_notes,
+                    'practitioner_id': practitioner_id,
+                    'is_auto_assigned': False
+                })
+
+            db.commit()
+
+            # Scheduling failures must not prevent appointment creation, so it runs
+            # after the appointments are committed. Each batch gets its own savepoint
+            # and is flushed inside it (autoflush off, so its messages are inserted
+            # in one batch); a failing batch is rolled back on its own.
+            immediate_patient_forms: List[Any] = []
+            try:
+                with db.begin_nested(), db.no_autoflush:
+                    FollowUpMessageService.schedule_follow_up_messages_batch(db, appointments)
+                    db.flush()
+            except Exception as e:
+                logger.exception(f"Failed to schedule follow-up messages for recurring appointments: {e}")
+
+            try:
+                with db.begin_nested(), db.no_autoflush:
+                    immediate_patient_forms = PatientFormSchedulerService.schedule_patient_forms_batch(db, appointments)
+                    db.flush()
+            except Exception as e:
+                immediate_patient_forms = []
+                logger.exception(f"Failed to schedule patient forms for recurring appointments: {e}")
+
+            try:
+                from services.reminder_scheduling_service import ReminderSchedulingService
+                with db.begin_nested(), db.no_autoflush:
+                    ReminderSchedulingService.schedule_reminders_batch(db, appointments)
+                    db.flush()
+            except Exception as e:
+                logger.exception(f"Failed to schedule reminders for recurring appointments: {e}")
+
+            try:
+                db.commit()
+            except Exception as e:
+                immediate_patient_forms = []
+                logger.exception(f"Failed to commit scheduled messages for recurring appointments: {e}")
+                db.rollback()
+
+            if immediate_patient_forms:
+                for warning in PatientFormSchedulerService.send_patient_forms_immediately(db, immediate_patient_forms):
+                    logger.warning(f"Patient form scheduling warning for recurring appointments: {warning}")
+
+            logger.info(
+                f"Created {len(created)} recurring appointments for patient {patient_id} "
+                f"({len(failed)} failed)"
+            )
+            return created, failed
+
+        except HTTPException:
+            raise
+        except IntegrityError as e:
+            logger.warning(f"Recurring appointment booking conflict: {e}")
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="此時段已被預約，請選擇其他時間"
+            )
+        except Exception as e:
+            logger.exception(f"Failed to create recurring appointments: {e}")
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="建立預約失敗"
+            )
+
     @staticmethod
     def _is_practitioner_available_at_slot(
         schedule_data: Dict[int, Dict[str, Any]],
@@ -662,6 +876,9 @@ class AppointmentService:
         from services.resource_service import ResourceService
         all_resources_map = ResourceService.get_all_resources_for_appointments(db, appointment_ids)
 
+        # Practitioner and appointment type names are served from one bulk load per clinic
+        directory = ClinicDirectory(db, clinic_id)
+
         # Format response
         result: List[Dict[str, Any]] = []
 
@@ -681,10 +898,7 @@ class AppointmentService:
 
             # Get practitioner name from association
             # For auto-assigned appointments, return "不指定" instead of actual practitioner name
-            from utils.practitioner_helpers import get_practitioner_display_name_for_appointment
-            practitioner_name = get_practitioner_display_name_for_appointment(
-                db, appointment, clinic_id
-            )
+            practitioner_name = directory.practitioner_display_name_for_appointment(appointment)
 
             # Combine date and time into full datetime strings (Taiwan timezone)
             event_date = appointment.calendar_event.date
@@ -708,7 +922,7 @@ class AppointmentService:
                 event_name = calendar_event.custom_event_name
             else:
                 # Default format: "{patient_name} - {appointment_type_name}"
-                appointment_type_name = get_appointment_type_name_safe(appointment.appointment_type_id, db)
+                appointment_type_name = directory.appointment_type_name(appointment.appointment_type_id)
                 event_name = f"{patient.full_name} - {appointment_type_name or '未設定'}"
 
             # Get receipt status from bulk-loaded map (all receipts)
@@ -728,7 +942,7 @@ class AppointmentService:
                 "practitioner_id": practitioner.id,
                 "practitioner_name": practitioner_name,
                 "appointment_type_id": appointment.appointment_type_id,
-                "appointment_type_name": get_appointment_type_name_safe(appointment.appointment_type_id, db),
+                "appointment_type_name": directory.appointment_type_name(appointment.appointment_type_id),
                 "event_name": event_name,  # Effective calendar event name
                 "start_time": start_datetime.isoformat() if start_datetime else "",
                 "end_time": end_datetime.isoformat() if end_datetime else "",
@@ -822,6 +1036,9 @@ class AppointmentService:
         from services.resource_service import ResourceService
         all_resources_map = ResourceService.get_all_resources_for_appointments(db, appointment_ids)
 
+        # Practitioner and appointment type names are served from one bulk load per clinic
+        directory = ClinicDirectory(db, clinic_id)
+
         # Format response
         result: List[Dict[str, Any]] = []
 
@@ -840,10 +1057,7 @@ class AppointmentService:
             assert patient_obj is not None
 
             # Get practitioner name from association
-            from utils.practitioner_helpers import get_practitioner_display_name_for_appointment
-            practitioner_name = get_practitioner_display_name_for_appointment(
-                db, appointment, clinic_id
-            )
+            practitioner_name = directory.practitioner_display_name_for_appointment(appointment)
 
             # Combine date and time into full datetime strings (Taiwan timezone)
             event_date = appointment.calendar_event.date
@@ -867,7 +1081,7 @@ class AppointmentService:
                 event_name = calendar_event.custom_event_name
             else:
                 # Default format: "{patient_name} - {appointment_type_name}"
-                appointment_type_name = get_appointment_type_name_safe(appointment.appointment_type_id, db)
+                appointment_type_name = directory.appointment_type_name(appointment.appointment_type_id)
                 event_name = f"{patient_obj.full_name} - {appointment_type_name or '未設定'}"
 
             # Hide practitioner_id for auto-assigned appointments if requested
@@ -893,7 +1107,7 @@ class AppointmentService:
                 "practitioner_id": practitioner_id,
                 "practitioner_name": practitioner_name,
                 "appointment_type_id": appointment.appointment_type_id,
-                "appointment_type_name": get_appointment_type_name_safe(appointment.appointment_type_id, db),
+                "appointment_type_name": directory.appointment_type_name(appointment.appointment_type_id),
                 "event_name": event_name,  # Effective calendar event name
                 "start_time": start_datetime.isoformat() if start_datetime else "",
                 "end_time": end_datetime.isoformat() if end_datetime else "",
@@ -1047,6 +1261,14 @@ class AppointmentService:
         appointment.canceled_at = taiwan_now()
         db.commit()
 
+        # Let waitlisted patients know the slot is free again
+        calendar_event = appointment.calendar_event
+        if calendar_event:
+            publish_slots_freed(
+                calendar_event.clinic_id, calendar_event.user_id,
+                appointment.appointment_type_id, calendar_event.date
+            )
+
         # Cancel pending follow-up messages, reminders, and practitioner notifications for this appointment
         # Note: This happens after appointment cancellation commit, so if cancellation fails,
         # the appointment is still canceled (intentional - we don't want message cancellation
@@ -1411,6 +1633,7 @@ class AppointmentService:
         """
         # Calculate if practitioner actually changed
         practitioner_actually_changed = (practitioner_id_to_use != old_practitioner_id)
+        old_appointment_type_id = appointment.appointment_type_id
         
         # Calculate if time actually changed (if not provided)
         if time_actually_changed is None:
@@ -1556,6 +1779,12 @@ class AppointmentService:
         
         db.commit()
         db.refresh(appointment)
+
+        # Moving the appointment frees its old slot for waitlisted patients
+        if time_actually_changed or practitioner_actually_changed:
+            publish_slots_freed(
+                clinic_id, old_practitioner_id, old_appointment_type_id, old_start_time.date()
+            )
         
         # Detect re-activation: if appointment status changed from cancelled → confirmed
         # This handles the design doc requirement: "If appointment is re-activated (canceled → confirmed), reschedule messages"
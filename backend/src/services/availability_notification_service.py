@@ -5,27 +5,34 @@ Handles sending notifications to LINE users when appointment slots become availa
 for their configured notification preferences.
 """
 
+import asyncio
 import logging
+import threading
+import time
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 from apscheduler.triggers.cron import CronTrigger  # type: ignore
-from sqlalchemy.orm import Session, joinedload
+from apscheduler.triggers.interval import IntervalTrigger  # type: ignore
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from core.config import AVAILABILITY_SWEEP_CONCURRENCY
 from core.constants import (
     NOTIFICATION_CHECK_HOURS,
     NOTIFICATION_CLEANUP_HOUR,
     MISFIRE_GRACE_TIME_SECONDS,
+    SLOTS_FREED_CHECK_INTERVAL_SECONDS,
 )
 from utils.liff_token import generate_liff_url
 from core.database import get_db_context
 from models.availability_notification import AvailabilityNotification
 from models.clinic import Clinic
-from models.line_user import LineUser
 from services.availability_service import AvailabilityService
 from services.line_service import LINEService
+from services.slot_release_events import SlotsFreedEvent, drain_slots_freed_events
 from shared_types.availability import SlotData
 from utils.datetime_utils import TAIWAN_TZ, taiwan_now
 
@@ -66,6 +73,129 @@ class NotificationProcessingResult:
     error: Optional[str] = None
 
 
+# Dates per batch availability call (AvailabilityService.validate_batch_dates limit)
+MAX_DATES_PER_AVAILABILITY_BATCH = 31
+
+
+@dataclass
+class AvailabilitySweepStats:
+    """Counts and timings of one scheduled availability sweep."""
+    notifications: int = 0
+    availability_keys: int = 0
+    availability_batches: int = 0
+    sent: int = 0
+    errors: int = 0
+    fetch_seconds: float = 0.0
+    availability_seconds: float = 0.0
+    send_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.notifications} notifications, {self.availability_keys} availability keys "
+            f"in {self.availability_batches} batches, {self.sent} sent, {self.errors} errors; "
+            f"fetch {self.fetch_seconds:.2f}s, availability {self.availability_seconds:.2f}s, "
+            f"send {self.send_seconds:.2f}s, total {self.total_seconds:.2f}s"
+        )
+
+
+class AvailabilityNotificationIndex:
+    """
+    Reverse index of active notifications by the clinic and dates they watch.
+
+    Lets a slots-freed event find the notifications it may satisfy without
+    loading every active notification. The index is rebuilt by every
+    scheduled sweep and updated when notifications are created or deleted;
+    entries that went stale in between are filtered out when the matched
+    notifications are loaded.
+    """
+
+    def __init__(self):
+        # clinic_id -> date_str -> notification_id -> practitioner_id (None for "不指定")
+        self._windows: Dict[int, Dict[str, Dict[int, Optional[int]]]] = {}
+        # notification_id -> (clinic_id, date_strs), for removal
+        self._entries: Dict[int, Tuple[int, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _add_locked(self, notification: AvailabilityNotification) -> None:
+        date_strs = sorted({entry["date"] for entry in notification.time_windows})
+        clinic_windows = self._windows.setdefault(notification.clinic_id, {})
+        for date_str in date_strs:
+            clinic_windows.setdefault(date_str, {})[notification.id] = notification.practitioner_id
+        self._entries[notification.id] = (notification.clinic_id, date_strs)
+
+    def _remove_locked(self, notification_id: int) -> None:
+        entry = self._entries.pop(notification_id, None)
+        if entry is None:
+            return
+        clinic_id, date_strs = entry
+        clinic_windows = self._windows.get(clinic_id, {})
+        for date_str in date_strs:
+            watchers = clinic_windows.get(date_str)
+            if watchers is not None:
+                watchers.pop(notification_id, None)
+                if not watchers:
+                    del clinic_windows[date_str]
+
+    def rebuild(self, notifications: Iterable[AvailabilityNotification]) -> None:
+        """Replace the index with the given active notifications."""
+        with self._lock:
+            self._windows = {}
+            self._entries = {}
+            for notification in notifications:
+                self._add_locked(notification)
+
+    def add(self, notification: AvailabilityNotification) -> None:
+        """Index a new (or updated) active notification."""
+        with self._lock:
+            self._remove_locked(notification.id)
+            self._add_locked(notification)
+
+    def remove(self, notification_id: int) -> None:
+        """Drop a deleted or deactivated notification."""
+        with self._lock:
+            self._remove_locked(notification_id)
+
+    def match(self, event: SlotsFreedEvent, today: date) -> Dict[int, Set[str]]:
+        """
+        Find the notifications a slots-freed event may satisfy.
+
+        A notification matches when it watches the event's date (any date from
+        today on if the event has none) and either side leaves the
+        practitioner unspecified or both name the same practitioner. The
+        appointment type is not compared: freed time can fit other types.
+
+        Returns:
+            Dictionary mapping notification ID to the matched date strings
+        """
+        today_str = today.isoformat()
+        matches: Dict[int, Set[str]] = {}
+        with self._lock:
+            clinic_windows = self._windows.get(event.clinic_id, {})
+            if event.date is not None:
+                date_strs = [event.date.isoformat()] if event.date >= today else []
+            else:
+                date_strs = [d for d in clinic_windows if d >= today_str]
+
+            for date_str in date_strs:
+                for notification_id, practitioner_id in clinic_windows.get(date_str, {}).items():
+                    if (
+                        event.practitioner_id is None
+                        or practitioner_id is None
+                        or practitioner_id == event.practitioner_id
+                    ):
+                        matches.setdefault(notification_id, set()).add(date_str)
+        return matches
+
+
+_notification_index = AvailabilityNotificationIndex()
+
+
+def get_availability_notification_index() -> AvailabilityNotificationIndex:
+    """Get the process-wide reverse index of active availability notifications."""
+    return _notification_index
+
+
 class AvailabilityNotificationService:
     """
     Service for managing availability notifications.
@@ -78,6 +208,8 @@ class AvailabilityNotificationService:
         """Initialize the notification service."""
         self.scheduler = AsyncIOScheduler(timezone=TAIWAN_TZ)
         self._is_started = False
+        self.index = get_availability_notification_index()
+        self.last_sweep_stats: Optional[AvailabilitySweepStats] = None
     
     async def start_scheduler(self) -> None:
         """Start the notification scheduler."""
@@ -95,6 +227,19 @@ class AvailabilityNotificationService:
             misfire_grace_time=MISFIRE_GRACE_TIME_SECONDS  # Allow jobs to run up to 15 minutes late
         )
 
+        # Match slots freed by cancellations, reschedules and availability edits
+        # within seconds; the fixed-hour sweep above remains the safety net
+        self.scheduler.add_job(  # type: ignore[attr-defined]
+            self._process_slots_freed_events,
+            IntervalTrigger(seconds=SLOTS_FREED_CHECK_INTERVAL_SECONDS),
+            id="process_slots_freed_events",
+            name="Match freed slots to availability notifications",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+            misfire_grace_time=MISFIRE_GRACE_TIME_SECONDS
+        )
+
         # Schedule cleanup job at 3 AM Taiwan time
         self.scheduler.add_job(  # type: ignore[attr-defined]
             self._cleanup_expired_notifications,
@@ -127,8 +272,11 @@ class AvailabilityNotificationService:
         """
         Main job function: Check all active notifications and send alerts.
         
-        Called by scheduler at 9am, 3pm, 9pm Taiwan time.
+        Called by scheduler at 9am, 3pm, 9pm Taiwan time. Counts and timings
+        of every sweep are logged and kept in last_sweep_stats.
         """
+        stats = AvailabilitySweepStats()
+        sweep_started = time.perf_counter()
         with get_db_context() as db:
             try:
                 logger.info("Checking availability notifications...")
@@ -137,6 +285,8 @@ class AvailabilityNotificationService:
                 
                 # Fetch and filter eligible notifications
                 eligible_notifications = self._fetch_and_filter_notifications(db, today)
+                stats.notifications = len(eligible_notifications)
+                stats.fetch_seconds = time.perf_counter() - sweep_started
                 
                 if not eligible_notifications:
                     logger.info("No eligible notifications to process")
@@ -144,55 +294,124 @@ class AvailabilityNotificationService:
                 
                 logger.info(f"Processing {len(eligible_notifications)} eligible notifications")
                 
-                # Build availability cache (batch queries)
-                availability_cache = self._build_availability_cache(
-                    db, eligible_notifications, today
+                # Build availability cache (batched, concurrent queries)
+                availability_started = time.perf_counter()
+                availability_cache = await self._build_availability_cache(
+                    db, eligible_notifications, today, stats=stats
                 )
+                stats.availability_seconds = time.perf_counter() - availability_started
                 
                 # Process each notification
+                send_started = time.perf_counter()
                 results: List[NotificationProcessingResult] = []
                 for notification in eligible_notifications:
                     result = await self._process_notification(
                         db, notification, today, availability_cache
                     )
                     results.append(result)
+                stats.send_seconds = time.perf_counter() - send_started
                 
-                # Log summary
-                sent_count = sum(1 for r in results if r.success)
-                errors_count = sum(1 for r in results if r.error)
-                logger.info(
-                    f"Notification check complete: "
-                    f"processed={len(results)}, "
-                    f"sent={sent_count}, "
-                    f"errors={errors_count}"
-                )
+                stats.sent = sum(1 for r in results if r.success)
+                stats.errors = sum(1 for r in results if r.error)
             
             except Exception as e:
                 logger.exception(f"Error in notification scheduler: {e}")
+            finally:
+                stats.total_seconds = time.perf_counter() - sweep_started
+                self.last_sweep_stats = stats
+                logger.info(f"Notification check complete: {stats.summary()}")
     
+    async def _process_slots_freed_events(self) -> None:
+        """
+        Evaluate the notifications affected by recently freed slots.
+        
+        Called by the scheduler every SLOTS_FREED_CHECK_INTERVAL_SECONDS.
+        Pending slots-freed events are matched against the reverse index, and
+        only the matched notifications are loaded and checked, for the matched
+        dates only.
+        """
+        events = drain_slots_freed_events()
+        if not events:
+            return
+
+        today = taiwan_now().date()
+        dates_by_notification: Dict[int, Set[str]] = {}
+        for event in events:
+            for notification_id, date_strs in self.index.match(event, today).items():
+                dates_by_notification.setdefault(notification_id, set()).update(date_strs)
+
+        if not dates_by_notification:
+            logger.debug(f"No availability notifications affected by {len(events)} slots-freed event(s)")
+            return
+
+        with get_db_context() as db:
+            try:
+                notifications = self._fetch_and_filter_notifications(
+                    db, today, notification_ids=list(dates_by_notification)
+                )
+                if not notifications:
+                    return
+
+                availability_cache = await self._build_availability_cache(
+                    db, notifications, today, dates_by_notification
+                )
+
+                results: List[NotificationProcessingResult] = []
+                for notification in notifications:
+                    result = await self._process_notification(
+                        db, notification, today, availability_cache,
+                        dates=dates_by_notification[notification.id]
+                    )
+                    results.append(result)
+
+                logger.info(
+                    f"Slots-freed check complete: "
+                    f"events={len(events)}, "
+                    f"processed={len(results)}, "
+                    f"sent={sum(1 for r in results if r.success)}, "
+                    f"errors={sum(1 for r in results if r.error)}"
+                )
+
+            except Exception as e:
+                logger.exception(f"Error processing slots-freed events: {e}")
+
     def _fetch_and_filter_notifications(
-        self, db: Session, today: date
+        self,
+        db: Session,
+        today: date,
+        notification_ids: Optional[List[int]] = None
     ) -> List[AvailabilityNotification]:
         """
         Fetch active notifications and filter eligible ones.
         
         Filters by:
         - is_active = True
+        - last_date >= today (has at least one date from today on)
         - last_notified_date != today (deduplication)
-        - Has at least one future date in time_windows
+        
+        Without notification_ids every active notification is fetched and the
+        reverse index is rebuilt from them; with notification_ids only those
+        notifications are fetched.
         """
-        # Fetch all active notifications with relationships pre-loaded
-        active_notifications = db.query(AvailabilityNotification).filter(
-            AvailabilityNotification.is_active == True
-        ).options(
+        # Fetch active notifications with relationships pre-loaded
+        query = db.query(AvailabilityNotification).filter(
+            AvailabilityNotification.is_active == True,
+            AvailabilityNotification.last_date >= today
+        )
+        if notification_ids is not None:
+            query = query.filter(AvailabilityNotification.id.in_(notification_ids))
+        active_notifications = query.options(
             # Pre-load relationships to avoid N+1 queries
             joinedload(AvailabilityNotification.appointment_type),
             joinedload(AvailabilityNotification.practitioner, innerjoin=False),
-            joinedload(AvailabilityNotification.clinic),
-            joinedload(AvailabilityNotification.line_user)
+            # Clinics and LINE users are shared by many notifications: one query each
+            selectinload(AvailabilityNotification.clinic),
+            selectinload(AvailabilityNotification.line_user)
         ).all()
         
-        logger.info(f"Found {len(active_notifications)} active notifications")
+        if notification_ids is None:
+            self.index.rebuild(active_notifications)
+            logger.info(f"Found {len(active_notifications)} active notifications with future dates")
         
         eligible_notifications: List[AvailabilityNotification] = []
         for notification in active_notifications:
@@ -204,45 +423,30 @@ class AvailabilityNotificationService:
                 )
                 continue
             
-            # Check if notification has any future dates
-            if not self._has_future_dates(notification, today):
-                logger.debug(
-                    f"Skipping notification {notification.id}: "
-                    f"all dates are in the past"
-                )
-                continue
-            
             eligible_notifications.append(notification)
         
         return eligible_notifications
     
-    def _has_future_dates(
-        self, notification: AvailabilityNotification, today: date
-    ) -> bool:
-        """Check if notification has any time windows with future dates."""
-        for time_window_entry in notification.time_windows:
-            window_date = datetime.strptime(
-                time_window_entry["date"],
-                "%Y-%m-%d"
-            ).date()
-            if window_date >= today:
-                return True
-        return False
-    
-    def _build_availability_cache(
+    async def _build_availability_cache(
         self,
         db: Session,
         notifications: List[AvailabilityNotification],
-        today: date
+        today: date,
+        dates_by_notification: Optional[Dict[int, Set[str]]] = None,
+        stats: Optional[AvailabilitySweepStats] = None
     ) -> Dict[AvailabilityCacheKey, List[SlotData]]:
         """
         Build cache of availability data by batching queries.
         
         Groups notifications by (clinic_id, appointment_type_id, practitioner_id, date)
-        to avoid redundant availability queries.
+        to avoid redundant availability queries, then fetches all dates of each
+        (clinic_id, appointment_type_id, practitioner_id) with one batch call.
+        Batches run in worker threads, AVAILABILITY_SWEEP_CONCURRENCY at a time.
+        If dates_by_notification is given, only those dates are fetched for
+        each notification.
         """
-        # Collect unique cache keys
-        cache_keys: Dict[AvailabilityCacheKey, List[int]] = {}  # notification_ids per key
+        # Collect unique dates per (clinic, appointment type, practitioner)
+        dates_by_batch: Dict[Tuple[int, int, Optional[int]], Set[str]] = {}
         
         for notification in notifications:
             for time_window_entry in notification.time_windows:
@@ -251,64 +455,91 @@ class AvailabilityNotificationService:
                 
                 if window_date < today:
                     continue
+                if dates_by_notification is not None and date_str not in dates_by_notification.get(notification.id, ()):
+                    continue
                 
-                cache_key = AvailabilityCacheKey(
-                    clinic_id=notification.clinic_id,
-                    appointment_type_id=notification.appointment_type_id,
-                    practitioner_id=notification.practitioner_id,
-                    date_str=date_str
+                batch_key = (
+                    notification.clinic_id,
+                    notification.appointment_type_id,
+                    notification.practitioner_id
                 )
-                
-                if cache_key not in cache_keys:
-                    cache_keys[cache_key] = []
-                cache_keys[cache_key].append(notification.id)
-        
+                dates_by_batch.setdefault(batch_key, set()).add(date_str)
+        
+        batches: List[Tuple[Tuple[int, int, Optional[int]], List[str]]] = []
+        for batch_key, date_strs in dates_by_batch.items():
+            sorted_dates = sorted(date_strs)
+            for i in range(0, len(sorted_dates), MAX_DATES_PER_AVAILABILITY_BATCH):
+                batches.append((batch_key, sorted_dates[i:i + MAX_DATES_PER_AVAILABILITY_BATCH]))
+        
+        key_count = sum(len(date_strs) for date_strs in dates_by_batch.values())
+        if stats is not None:
+            stats.availability_keys = key_count
+            stats.availability_batches = len(batches)
         logger.info(
-            f"Need to check {len(cache_keys)} unique availability queries "
+            f"Need to check {key_count} unique availability keys in {len(batches)} batches "
             f"for {len(notifications)} notifications"
         )
         
-        # Batch fetch availability for all unique combinations
-        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]] = {}
+        # Fetch batches concurrently; each worker uses its own session
+        semaphore = asyncio.Semaphore(max(1, AVAILABILITY_SWEEP_CONCURRENCY))
+        
+        async def fetch(
+            batch_key: Tuple[int, int, Optional[int]], date_strs: List[str]
+        ) -> Dict[AvailabilityCacheKey, List[SlotData]]:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(self._fetch_availability_batch, batch_key, date_strs)
+                except Exception as e:
+                    logger.error(
+                        f"Error checking availability for {batch_key} on {date_strs}: {e}"
+                    )
+                    # Continue with other batches
+                    return {}
         
-        for cache_key in cache_keys:
-            try:
-                slots_data = self._fetch_availability_for_key(db, cache_key)
-                availability_cache[cache_key] = slots_data
-            except Exception as e:
-                logger.error(
-                    f"Error checking availability for cache_key {cache_key}: {e}"
-                )
-                # Continue with other queries
-                continue
+        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]] = {}
+        for batch_cache in await asyncio.gather(*(fetch(key, dates) for key, dates in batches)):
+            availability_cache.update(batch_cache)
         
         return availability_cache
     
-    def _fetch_availability_for_key(
-        self, db: Session, cache_key: AvailabilityCacheKey
-    ) -> List[SlotData]:
+    def _fetch_availability_batch(
+        self, batch_key: Tuple[int, int, Optional[int]], date_strs: List[str]
+    ) -> Dict[AvailabilityCacheKey, List[SlotData]]:
         """
-        Fetch availability slots for a cache key.
+        Fetch availability slots for several dates of one (clinic, type, practitioner).
         
-        Returns list of SlotData objects.
+        Runs in a worker thread with its own database session.
         """
-        if cache_key.practitioner_id:
-            slots_dicts = AvailabilityService.get_available_slots_for_practitioner(
-                db=db,
-                practitioner_id=cache_key.practitioner_id,
-                date=cache_key.date_str,
-                appointment_type_id=cache_key.appointment_type_id,
-                clinic_id=cache_key.clinic_id
-            )
-        else:
-            slots_dicts = AvailabilityService.get_available_slots_for_clinic(
-                db=db,
-                clinic_id=cache_key.clinic_id,
-                date=cache_key.date_str,
-                appointment_type_id=cache_key.appointment_type_id
-            )
+        clinic_id, appointment_type_id, practitioner_id = batch_key
+        with get_db_context() as db:
+            if practitioner_id:
+                results = AvailabilityService.get_batch_available_slots_for_practitioner(
+                    db=db,
+                    practitioner_id=practitioner_id,
+                    dates=date_strs,
+                    appointment_type_id=appointment_type_id,
+                    clinic_id=clinic_id
+                )
+            else:
+                results = AvailabilityService.get_batch_available_slots_for_clinic(
+                    db=db,
+                    clinic_id=clinic_id,
+                    dates=date_strs,
+                    appointment_type_id=appointment_type_id
+                )
         
-        # Convert dicts to SlotData objects with error handling
+        return {
+            AvailabilityCacheKey(
+                clinic_id=clinic_id,
+                appointment_type_id=appointment_type_id,
+                practitioner_id=practitioner_id,
+                date_str=result['date']
+            ): self._to_slot_data(result['slots'])
+            for result in results
+        }
+    
+    def _to_slot_data(self, slots_dicts: List[Dict[str, Any]]) -> List[SlotData]:
+        """Convert slot dicts to SlotData objects, skipping invalid ones."""
         slots: List[SlotData] = []
         for slot_dict in slots_dicts:
             try:
@@ -323,17 +554,20 @@ class AvailabilityNotificationService:
         db: Session,
         notification: AvailabilityNotification,
         today: date,
-        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]]
+        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]],
+        dates: Optional[Set[str]] = None
     ) -> NotificationProcessingResult:
         """
         Process a single notification: collect slots and send if found.
         
+        If dates is given, only slots on those dates are collected.
+        
         Returns result with success status and error message if failed.
         """
         try:
             # Collect slots for this notification using cached data
             slots_by_date = self._collect_slots_for_notification(
-                notification, today, availability_cache
+                notification, today, availability_cache, dates
             )
             
             if not slots_by_date:
@@ -391,11 +625,14 @@ class AvailabilityNotificationService:
         self,
         notification: AvailabilityNotification,
         today: date,
-        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]]
+        availability_cache: Dict[AvailabilityCacheKey, List[SlotData]],
+        dates: Optional[Set[str]] = None
     ) -> Dict[str, List[str]]:
         """
         Collect all available slots for a notification using cached availability data.
         
+        If dates is given, other dates of the notification are ignored.
+        
         Returns dict mapping date strings to list of slot time strings.
         Example: {"2024-01-15": ["09:00", "10:00", "14:00"], ...}
         """
@@ -412,6 +649,8 @@ class AvailabilityNotificationService:
             window_date = datetime.strptime(date_str, "%Y-%m-%d").date()
             if window_date < today:
                 continue
+            if dates is not None and date_str not in dates:
+                continue
             
             if date_str not in date_windows:
                 date_windows[date_str] = []
@@ -500,14 +739,14 @@ class AvailabilityNotificationService:
             True if sent successfully, False otherwise
         """
         try:
-            # Get clinic for LINE service credentials
-            clinic = db.query(Clinic).filter(Clinic.id == notification.clinic_id).first()
+            # Clinic (for LINE service credentials) and LINE user are prefetched
+            # with the notifications
+            clinic = notification.clinic
             if not clinic or not clinic.line_channel_secret or not clinic.line_channel_access_token:
                 logger.error(f"Clinic {notification.clinic_id} missing LINE credentials")
                 return False
             
-            # Get LINE user
-            line_user = db.query(LineUser).filter(LineUser.id == notification.line_user_id).first()
+            line_user = notification.line_user
             if not line_user:
                 logger.error(f"LINE user {notification.line_user_id} not found")
                 return False
@@ -684,27 +923,14 @@ class AvailabilityNotificationService:
             try:
                 today = taiwan_now().date()
                 
-                # Get all active notifications
-                active_notifications = db.query(AvailabilityNotification).filter(
-                    AvailabilityNotification.is_active == True
-                ).all()
-                
-                expired_count = 0
-                for notification in active_notifications:
-                    # Check if all dates are in the past
-                    all_past = True
-                    for time_window_entry in notification.time_windows:
-                        window_date = datetime.strptime(
-                            time_window_entry["date"],
-                            "%Y-%m-%d"
-                        ).date()
-                        if window_date >= today:
-                            all_past = False
-                            break
-                    
-                    if all_past:
-                        notification.is_active = False
-                        expired_count += 1
+                # Notifications without any dates have nothing left to watch either
+                expired_count = db.query(AvailabilityNotification).filter(
+                    AvailabilityNotification.is_active == True,
+                    or_(
+                        AvailabilityNotification.last_date < today,
+                        AvailabilityNotification.last_date.is_(None)
+                    )
+                ).update({AvailabilityNotification.is_active: False}, synchronize_session=False)
                 
                 if expired_count > 0:
                     db.commit()
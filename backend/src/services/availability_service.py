@@ -7,15 +7,15 @@ between different API endpoints (LIFF, clinic admin, practitioner calendar).
 
 import logging
 from datetime import datetime, date as date_type, time, timedelta
-from typing import List, Dict, Any, cast, Optional
+from typing import List, Dict, Any, cast, Optional, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy import or_, and_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from models import (
     User, PractitionerAvailability, CalendarEvent,
-    PractitionerAppointmentTypes, Appointment, Clinic, UserClinicAssociation
+    PractitionerAppointmentTypes, Appointment, AppointmentType, Clinic, UserClinicAssociation
 )
 from services.appointment_type_service import AppointmentTypeService
 from services.settings_service import SettingsService
@@ -1628,7 +1628,6 @@ class AvailabilityService:
             }
         """
         from services.appointment_type_service import AppointmentTypeService
-        from models import Appointment
         
         # Get appointment type for duration
         # Note: get_appointment_type_by_id raises HTTPException if not found, so no need for None check
@@ -1636,7 +1635,156 @@ class AvailabilityService:
             db, appointment_type_id, clinic_id=clinic_id
         )
         
-        # Calculate end_time = start_time + duration_minutes + scheduling_buffer_minutes
+        end_time = AvailabilityService._calculate_slot_end_time(start_time, appointment_type)
+        
+        # Fetch schedule data for this practitioner and date
+        schedule_data = AvailabilityService.fetch_practitioner_schedule_data(
+            db, [practitioner_id], date, clinic_id, exclude_calendar_event_id
+        )
+        
+        practitioner_data = schedule_data.get(practitioner_id, {
+            'default_intervals': [],
+            'events': []
+        })
+        
+        # Check if practitioner offers this appointment type
+        is_type_mismatch = not AvailabilityService.validate_practitioner_offers_appointment_type(
+            db, practitioner_id, appointment_type_id, clinic_id
+        )
+        
+        # Load confirmed appointments for overlapping events in one query
+        confirmed_appointments = AvailabilityService._load_confirmed_appointments(
+            db, AvailabilityService._overlapping_appointment_event_ids(
+                practitioner_data['events'], start_time, end_time
+            )
+        )
+        
+        # Check resource conflicts
+        from services.resource_service import ResourceService
+        resource_result = ResourceService.check_resource_availability(
+            db=db,
+            appointment_type_id=appointment_type_id,
+            clinic_id=clinic_id,
+            start_time=datetime.combine(date, start_time),
+            end_time=datetime.combine(date, end_time),
+            selected_resource_ids=selected_resource_ids,
+            exclude_calendar_event_id=exclude_calendar_event_id
+        )
+        
+        return AvailabilityService._evaluate_scheduling_conflicts(
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            default_intervals=practitioner_data['default_intervals'],
+            events=practitioner_data['events'],
+            confirmed_appointments=confirmed_appointments,
+            is_type_mismatch=is_type_mismatch,
+            resource_result=resource_result,
+            check_past_appointment=check_past_appointment
+        )
+
+    @staticmethod
+    def check_recurring_scheduling_conflicts(
+        db: Session,
+        practitioner_id: int,
+        occurrences: List[Tuple[date_type, time]],
+        appointment_type_id: int,
+        clinic_id: int,
+        selected_resource_ids: Optional[List[int]] = None,
+        check_past_appointment: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Check scheduling conflicts for many occurrences of the same appointment.
+        
+        Batch counterpart of check_scheduling_conflicts for recurring series:
+        the appointment type, practitioner/type check, schedule data for every
+        occurrence date, conflicting appointments and resource allocations are
+        each loaded once, and every occurrence is evaluated in memory with the
+        same priority ordering as the single check.
+        
+        Args:
+            db: Database session
+            practitioner_id: Practitioner user ID
+            occurrences: List of (date, start_time) pairs
+            appointment_type_id: Appointment type ID (for duration calculation)
+            clinic_id: Clinic ID
+            selected_resource_ids: Optional list of selected resource IDs
+            check_past_appointment: Whether to check if appointment is in the past
+            
+        Returns:
+            One result per occurrence, in order, shaped like check_scheduling_conflicts' result
+        """
+        from services.appointment_type_service import AppointmentTypeService
+        from services.resource_service import ResourceService
+        
+        if not occurrences:
+            return []
+        
+        appointment_type = AppointmentTypeService.get_appointment_type_by_id(
+            db, appointment_type_id, clinic_id=clinic_id
+        )
+        
+        is_type_mismatch = not AvailabilityService.validate_practitioner_offers_appointment_type(
+            db, practitioner_id, appointment_type_id, clinic_id
+        )
+        
+        slots = [
+            (occ_date, occ_start, AvailabilityService._calculate_slot_end_time(occ_start, appointment_type))
+            for occ_date, occ_start in occurrences
+        ]
+        
+        # Schedule data for every distinct date in one batch
+        unique_dates = sorted({occ_date for occ_date, _, _ in slots})
+        schedule_by_date = AvailabilityService.fetch_practitioner_schedule_data_batch(
+            db, [practitioner_id], unique_dates, clinic_id
+        )
+        empty_schedule: Dict[str, Any] = {'default_intervals': [], 'events': []}
+        
+        def schedule_for(occ_date: date_type) -> Dict[str, Any]:
+            return schedule_by_date.get(occ_date, {}).get(practitioner_id, empty_schedule)
+        
+        # Confirmed appointments behind any overlapping event, across all occurrences
+        overlapping_event_ids: set[int] = set()
+        for occ_date, occ_start, occ_end in slots:
+            overlapping_event_ids.update(AvailabilityService._overlapping_appointment_event_ids(
+                schedule_for(occ_date)['events'], occ_start, occ_end
+            ))
+        confirmed_appointments = AvailabilityService._load_confirmed_appointments(
+            db, list(overlapping_event_ids)
+        )
+        
+        # Resource availability for all slots (allocations preloaded for all dates)
+        resource_results = ResourceService.check_resource_availability_batch(
+            db=db,
+            appointment_type_id=appointment_type_id,
+            clinic_id=clinic_id,
+            time_slots=[
+                (datetime.combine(occ_date, occ_start), datetime.combine(occ_date, occ_end))
+                for occ_date, occ_start, occ_end in slots
+            ],
+            selected_resource_ids=selected_resource_ids
+        )
+        
+        results: List[Dict[str, Any]] = []
+        for (occ_date, occ_start, occ_end), resource_result in zip(slots, resource_results):
+            practitioner_data = schedule_for(occ_date)
+            results.append(AvailabilityService._evaluate_scheduling_conflicts(
+                date=occ_date,
+                start_time=occ_start,
+                end_time=occ_end,
+                default_intervals=practitioner_data['default_intervals'],
+                events=practitioner_data['events'],
+                confirmed_appointments=confirmed_appointments,
+                is_type_mismatch=is_type_mismatch,
+                resource_result=resource_result,
+                check_past_appointment=check_past_appointment
+            ))
+        
+        return results
+
+    @staticmethod
+    def _calculate_slot_end_time(start_time: time, appointment_type: Any) -> time:
+        """Calculate end_time = start_time + duration_minutes + scheduling_buffer_minutes (capped at 23:59)."""
         total_minutes = start_time.hour * 60 + start_time.minute
         total_minutes += appointment_type.duration_minutes
         total_minutes += (appointment_type.scheduling_buffer_minutes or 0)
@@ -1655,21 +1803,54 @@ class AvailabilityService:
             end_hour = 23
             end_minute = 59
         
-        end_time = time(end_hour, end_minute)
-        
-        # Fetch schedule data for this practitioner and date
-        schedule_data = AvailabilityService.fetch_practitioner_schedule_data(
-            db, [practitioner_id], date, clinic_id, exclude_calendar_event_id
-        )
-        
-        practitioner_data = schedule_data.get(practitioner_id, {
-            'default_intervals': [],
-            'events': []
-        })
+        return time(end_hour, end_minute)
+
+    @staticmethod
+    def _overlapping_appointment_event_ids(
+        events: List[CalendarEvent],
+        start_time: time,
+        end_time: time
+    ) -> List[int]:
+        """IDs of appointment events overlapping the given slot."""
+        return [
+            event.id for event in events
+            if event.event_type == 'appointment'
+            and AvailabilityService._is_event_overlapping(event, start_time, end_time)
+        ]
+
+    @staticmethod
+    def _load_confirmed_appointments(db: Session, event_ids: List[int]) -> Dict[int, Appointment]:
+        """Load confirmed appointments (with patient and type) keyed by calendar_event_id."""
+        if not event_ids:
+            return {}
         
-        default_intervals = practitioner_data['default_intervals']
-        events = practitioner_data['events']
+        appointments = db.query(Appointment).filter(
+            Appointment.calendar_event_id.in_(event_ids),
+            Appointment.status == 'confirmed'
+        ).options(
+            joinedload(Appointment.patient),
+            joinedload(Appointment.appointment_type)
+        ).all()
+        return {a.calendar_event_id: a for a in appointments}
+
+    @staticmethod
+    def _evaluate_scheduling_conflicts(
+        date: date_type,
+        start_time: time,
+        end_time: time,
+        default_intervals: List[PractitionerAvailability],
+        events: List[CalendarEvent],
+        confirmed_appointments: Dict[int, Appointment],
+        is_type_mismatch: bool,
+        resource_result: Dict[str, Any],
+        check_past_appointment: bool
+    ) -> Dict[str, Any]:
+        """
+        Evaluate conflicts for one slot from pre-loaded data.
         
+        Shared by the single and recurring checks so both apply the same
+        priority ordering (see check_scheduling_conflicts).
+        """
         # Check all conflict types and collect all conflicts found
         # conflict_type will still indicate the highest priority conflict for backward compatibility
         
@@ -1683,11 +1864,6 @@ class AvailabilityService:
             default_intervals, start_time, end_time
         )
         normal_hours = AvailabilityService._format_normal_hours(date, default_intervals)
-
-        # Check if practitioner offers this appointment type
-        is_type_mismatch = not AvailabilityService.validate_practitioner_offers_appointment_type(
-            db, practitioner_id, appointment_type_id, clinic_id
-        )
         
         # 0. Check if appointment is in the past (highest priority, only for clinic users)
         if check_past_appointment:
@@ -1703,10 +1879,7 @@ class AvailabilityService:
             # Check for conflict using shared helper
             if AvailabilityService._is_event_overlapping(event, start_time, end_time) and event.event_type == 'appointment':
                 # Get appointment details
-                appointment = db.query(Appointment).filter(
-                    Appointment.calendar_event_id == event.id,
-                    Appointment.status == 'confirmed'
-                ).first()
+                appointment = confirmed_appointments.get(event.id)
                 
                 if appointment:
                     # Get appointment type name
@@ -1743,20 +1916,7 @@ class AvailabilityService:
         # Set first conflict for backward compatibility
         exception_conflict = exception_conflicts[0] if exception_conflicts else None
         
-        # 3. Check for resource conflicts
-        from services.resource_service import ResourceService
-        start_datetime = datetime.combine(date, start_time)
-        end_datetime = datetime.combine(date, end_time)
-        resource_result = ResourceService.check_resource_availability(
-            db=db,
-            appointment_type_id=appointment_type_id,
-            clinic_id=clinic_id,
-            start_time=start_datetime,
-            end_time=end_datetime,
-            selected_resource_ids=selected_resource_ids,
-            exclude_calendar_event_id=exclude_calendar_event_id
-        )
-        
+        # 3. Resource conflicts (pre-computed by caller)
         selection_insufficient_warnings = resource_result.get('selection_insufficient_warnings', [])
         resource_conflict_warnings = resource_result.get('resource_conflict_warnings', [])
         unavailable_resource_ids = resource_result.get('unavailable_resource_ids', [])
@@ -2145,6 +2305,13 @@ class AvailabilityService:
             # For clinic admin endpoints, don't filter dates by booking window
             valid_dates = validated_dates
         
+        if not practitioner_id:
+            # All practitioners in clinic: fetch schedules for every date at once
+            return AvailabilityService._get_batch_available_slots_for_all_practitioners(
+                db, clinic_id, valid_dates, appointment_type, exclude_calendar_event_id,
+                apply_booking_restrictions, for_patient_display
+            )
+        
         # Fetch availability for all valid dates
         results: List[Dict[str, Any]] = []
         
@@ -2204,3 +2371,70 @@ class AvailabilityService:
                 })
         
         return results
+
+    @staticmethod
+    def _get_batch_available_slots_for_all_practitioners(
+        db: Session,
+        clinic_id: int,
+        dates: List[str],
+        appointment_type: AppointmentType,
+        exclude_calendar_event_id: int | None,
+        apply_booking_restrictions: bool,
+        for_patient_display: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Get clinic-wide available slots for several dates with one schedule fetch.
+        
+        Same per-date result as get_available_slots_for_clinic, but the clinic,
+        practitioners and their schedules for all dates are loaded once.
+        Past dates get no slots.
+        """
+        if not dates:
+            return []
+
+        practitioners = AvailabilityService.get_practitioners_for_appointment_type(
+            db, appointment_type.id, clinic_id
+        )
+        if not practitioners:
+            return [{'date': d, 'slots': []} for d in dates]
+
+        clinic = db.query(Clinic).filter(
+            Clinic.id == clinic_id,
+            Clinic.is_active == True
+        ).first()
+        if not clinic:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="診所不存在或已停用"
+            )
+
+        today = taiwan_now().date()
+        bookable_dates = [d for d in (parse_date_string(d) for d in dates) if d >= today]
+        schedule_data_batch = AvailabilityService.fetch_practitioner_schedule_data_batch(
+            db, [p.id for p in practitioners], bookable_dates, clinic_id, exclude_calendar_event_id
+        )
+
+        total_duration = appointment_type.duration_minutes + (appointment_type.scheduling_buffer_minutes or 0)
+        results: List[Dict[str, Any]] = []
+        for date_str in dates:
+            requested_date = parse_date_string(date_str)
+            if requested_date < today:
+                results.append({'date': date_str, 'slots': []})
+                continue
+            try:
+                all_slots = AvailabilityService._calculate_available_slots(
+                    db, requested_date, practitioners, total_duration, clinic, clinic_id,
+                    exclude_calendar_event_id=exclude_calendar_event_id,
+                    schedule_data=schedule_data_batch.get(requested_date, {}),
+                    apply_booking_restrictions=apply_booking_restrictions,
+                    for_patient_display=for_patient_display,
+                    appointment_type_id=appointment_type.id
+                )
+                slots = AvailabilityService._deduplicate_slots_by_time(all_slots)
+                slots.sort(key=lambda s: s.get('start_time', ''))
+            except Exception as e:
+                logger.warning(f"Error fetching availability for date {date_str}: {e}")
+                slots = []
+            results.append({'date': date_str, 'slots': slots})
+
+        return results
@@ -1,12 +1,47 @@
+import logging
+import time
 import boto3 # type: ignore
 from datetime import datetime, timedelta, timezone
-from typing import Set, Any
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Set, Any, Optional
+from sqlalchemy import delete, or_, select, union
 from sqlalchemy.orm import Session
 
-from core.config import S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION
+from core.config import (
+    S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION,
+    CLEANUP_DELETE_CHUNK_SIZE, CLEANUP_CHUNK_PAUSE_SECONDS,
+)
 from models.medical_record import MedicalRecord
-from models.patient_photo import PatientPhoto
-from services.medical_record_service import MedicalRecordService
+from models.patient_photo import PatientPhoto, PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD, PHOTO_UPLOAD_STATUS_FAILED
+
+logger = logging.getLogger(__name__)
+
+# Unreferenced objects are only removed once they are this old, giving a grace
+# period for eventual consistency, recovery, and re-uploads of deduplicated content
+S3_GC_GRACE_DAYS = 31
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+
+
+@dataclass
+class GarbageCollectionStats:
+    """Counts of one S3 garbage collection run."""
+    dry_run: bool = False
+    scanned: int = 0
+    referenced: int = 0
+    too_recent: int = 0
+    deleted: int = 0
+    bytes_reclaimed: int = 0
+
+    def summary(self) -> str:
+        action = "would delete" if self.dry_run else "deleted"
+        return (
+            f"{self.scanned} objects scanned, {self.referenced} referenced, "
+            f"{self.too_recent} orphans within grace period, {action} {self.deleted} "
+            f"({self.bytes_reclaimed} bytes)"
+        )
+
 
 class CleanupService:
     def __init__(self, db: Session):
@@ -18,109 +53,258 @@ class CleanupService:
             region_name=AWS_REGION
         )
         self.bucket = S3_BUCKET
+        # Storage keys of photo rows hard-deleted by cleanup_soft_deleted_data
+        self.released_keys: Set[str] = set()
+        self.last_gc_stats: Optional[GarbageCollectionStats] = None
 
-    def cleanup_soft_deleted_data(self, retention_days: int = 30) -> int:
+    def cleanup_soft_deleted_data(
+        self,
+        retention_days: int = 30,
+        chunk_size: int = CLEANUP_DELETE_CHUNK_SIZE,
+        pause_seconds: float = CLEANUP_CHUNK_PAUSE_SECONDS
+    ) -> int:
         """
         Hard delete records and photos that have been soft-deleted for more than `retention_days`.
-        Also cleans up abandoned uploads (is_pending=True) that were never committed.
-        Returns the number of items deleted.
+        Also cleans up abandoned uploads (is_pending=True) that were never committed,
+        and direct uploads that were never completed or failed processing.
+
+        Rows are deleted in chunks of `chunk_size`, each in its own short
+        transaction, sleeping `pause_seconds` between chunks. Rows locked by
+        other transactions are skipped and picked up by the next run, so the
+        job can be interrupted and rerun at any time. Storage keys of the
+        deleted photos are collected in `released_keys` and their objects
+        removed once nothing references them.
+
+        Returns the number of rows deleted (records and photos).
         """
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=retention_days)
         count = 0
 
-        # 1. Find and hard delete expired medical records
-        # This will also delete associated photos if they are linked (based on our hard_delete logic)
-        expired_records = self.db.query(MedicalRecord).filter(
-            MedicalRecord.is_deleted == True,
-            MedicalRecord.deleted_at <= cutoff_date
-        ).all()
-
-        for record in expired_records:
-            # We use the service's hard_delete to ensure consistent logic (e.g. cascading to photos)
-            MedicalRecordService.hard_delete_record(self.db, record.id, record.clinic_id)
-            count += 1
-
-        # 2. Find and hard delete expired standalone photos (not linked to a record, or linked to a non-deleted record but deleted themselves)
-        # Note: Photos linked to the records we just deleted are already gone.
-        expired_photos = self.db.query(PatientPhoto).filter(
-            PatientPhoto.is_deleted == True,
-            PatientPhoto.deleted_at <= cutoff_date
-        ).all()
-
-        for photo in expired_photos:
-            self.db.delete(photo)
-            count += 1
-        
-        # 3. Clean up abandoned uploads (is_pending=True for >retention_days)
-        # These are photos uploaded but never committed (user abandoned the record creation/edit)
-        abandoned_photos = self.db.query(PatientPhoto).filter(
-            PatientPhoto.is_pending == True,
-            PatientPhoto.created_at <= cutoff_date
-        ).all()
-
-        for photo in abandoned_photos:
-            self.db.delete(photo)
-            count += 1
-        
-        self.db.commit()
+        # 1. Hard delete expired medical records together with their photos
+        while True:
+            record_ids = self.db.execute(
+                select(MedicalRecord.id).where(
+                    MedicalRecord.is_deleted == True,
+                    MedicalRecord.deleted_at <= cutoff_date
+                ).order_by(MedicalRecord.id).limit(chunk_size).with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not record_ids:
+                break
+
+            photo_keys = self.db.execute(
+                delete(PatientPhoto).where(
+                    PatientPhoto.medical_record_id.in_(record_ids)
+                ).returning(PatientPhoto.storage_key, PatientPhoto.thumbnail_key, PatientPhoto.staging_key),
+                execution_options={"synchronize_session": False}
+            ).all()
+            self.db.execute(
+                delete(MedicalRecord).where(MedicalRecord.id.in_(record_ids)),
+                execution_options={"synchronize_session": False}
+            )
+            self.db.commit()
+
+            self._release_keys(photo_keys)
+            count += len(record_ids) + len(photo_keys)
+            self._pause_between_chunks(pause_seconds)
+
+        # 2. Hard delete expired standalone photos, abandoned uploads (is_pending=True
+        # for >retention_days), and direct uploads that were never completed or failed
+        expired_photo = or_(
+            (PatientPhoto.is_deleted == True) & (PatientPhoto.deleted_at <= cutoff_date),
+            (PatientPhoto.is_pending == True) & (PatientPhoto.created_at <= cutoff_date),
+            PatientPhoto.upload_status.in_([PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD, PHOTO_UPLOAD_STATUS_FAILED])
+            & (PatientPhoto.created_at <= cutoff_date)
+        )
+        while True:
+            chunk = select(PatientPhoto.id).where(expired_photo).order_by(
+                PatientPhoto.id
+            ).limit(chunk_size).with_for_update(skip_locked=True)
+            photo_keys = self.db.execute(
+                delete(PatientPhoto).where(
+                    PatientPhoto.id.in_(chunk.scalar_subquery())
+                ).returning(PatientPhoto.storage_key, PatientPhoto.thumbnail_key, PatientPhoto.staging_key),
+                execution_options={"synchronize_session": False}
+            ).all()
+            self.db.commit()
+            if not photo_keys:
+                break
+
+            self._release_keys(photo_keys)
+            count += len(photo_keys)
+            self._pause_between_chunks(pause_seconds)
+
+        if count:
+            logger.info(f"Cleanup: hard-deleted {count} rows, {len(self.released_keys)} storage keys released")
+
+        # 3. Remove the released objects that no other photo still references
+        if self.released_keys:
+            self.remove_unreferenced_objects(self.released_keys)
+
         return count
 
-    def garbage_collect_s3(self, dry_run: bool = False, prefix: str = "clinic_assets/") -> int:
+    def _release_keys(self, key_rows: Iterable[Any]) -> None:
+        for row in key_rows:
+            self.released_keys.update(key for key in row if key)
+
+    def _pause_between_chunks(self, pause_seconds: float) -> None:
+        if pause_seconds > 0:
+            time.sleep(pause_seconds)
+
+    def _get_referenced_keys(self, keys: Iterable[str]) -> Set[str]:
+        """Return the subset of keys still referenced by any PatientPhoto row."""
+        referenced: Set[str] = set()
+        key_list = list(keys)
+        for i in range(0, len(key_list), S3_DELETE_BATCH_SIZE):
+            batch = key_list[i:i + S3_DELETE_BATCH_SIZE]
+            rows = self.db.query(
+                PatientPhoto.storage_key, PatientPhoto.thumbnail_key, PatientPhoto.staging_key
+            ).filter(
+                or_(
+                    PatientPhoto.storage_key.in_(batch),
+                    PatientPhoto.thumbnail_key.in_(batch),
+                    PatientPhoto.staging_key.in_(batch)
+                )
+            ).all()
+            for row in rows:
+                referenced.update(key for key in row if key)
+        return referenced
+
+    def remove_unreferenced_objects(self, keys: Iterable[str]) -> int:
+        """
+        Delete the given objects if no PatientPhoto row references them any more.
+
+        Deduplicated photos share storage keys, so a released key may still be
+        in use; such keys, and objects written within the GC grace period
+        (e.g. identical content re-uploaded meanwhile), are left in place.
+
+        Returns the number of objects deleted.
+        """
+        candidates = set(keys) - self._get_referenced_keys(keys)
+        grace_cutoff = datetime.now(timezone.utc) - timedelta(days=S3_GC_GRACE_DAYS)
+
+        expired: List[str] = []
+        for key in sorted(candidates):
+            try:
+                head: Any = self.s3_client.head_object(Bucket=self.bucket, Key=key) # type: ignore
+            except Exception:
+                # Already gone (or unreadable): nothing to remove
+                continue
+            if head['LastModified'] <= grace_cutoff:
+                expired.append(key)
+
+        return self._delete_objects(expired)
+
+    def _delete_objects(self, keys: List[str]) -> int:
+        """Delete objects with batched DeleteObjects requests. Returns the number deleted."""
+        deleted = 0
+        for i in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[i:i + S3_DELETE_BATCH_SIZE]
+            response: Any = self.s3_client.delete_objects( # type: ignore
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            errors = response.get('Errors', [])
+            for error in errors:
+                logger.warning(f"Cleanup: failed to delete {error.get('Key')}: {error.get('Message')}")
+            deleted += len(batch) - len(errors)
+        return deleted
+
+    def _referenced_keys_sorted(self, prefix: str) -> Iterator[str]:
+        """
+        Stream every key under prefix referenced by a PatientPhoto row, in S3 listing order.
+
+        Includes soft-deleted rows that have not expired yet. Keys are
+        sorted by byte value (COLLATE "C"), the order S3 lists objects in.
+        """
+        key_columns = (PatientPhoto.storage_key, PatientPhoto.thumbnail_key, PatientPhoto.staging_key)
+        keys = union(*(
+            select(column.label('key')).where(column.startswith(prefix, autoescape=True))
+            for column in key_columns
+        )).subquery()
+        query = select(keys.c.key).order_by(keys.c.key.collate('C'))
+
+        for key in self.db.execute(query.execution_options(yield_per=1000)).scalars():
+            yield key
+
+    def garbage_collect_s3(
+        self,
+        dry_run: bool = False,
+        prefix: str = "clinic_assets/",
+        clinic_id: Optional[int] = None,
+        grace_days: int = S3_GC_GRACE_DAYS
+    ) -> int:
         """
         Delete S3 objects that are not referenced by any PatientPhoto row in the database.
+
+        The sorted S3 listing is merged against the sorted stream of referenced
+        keys, so memory use does not grow with the number of photos. Orphans
+        are removed with DeleteObjects requests of up to 1000 keys. Counts and
+        bytes reclaimed are logged and kept in last_gc_stats.
         
         Args:
             dry_run: If True, only report what would be deleted without actually deleting
             prefix: S3 key prefix to limit the scope of garbage collection (default: "clinic_assets/")
                    This prevents accidental deletion of non-photo assets in shared buckets
+            clinic_id: If given, only collect that clinic's objects (under prefix + "{clinic_id}/")
+            grace_days: Only delete orphans at least this old (eventual consistency and recovery)
         
         Returns:
             The number of objects deleted (or found, if dry_run)
         """
-        # 1. Get all referenced keys from DB
-        # We need ALL rows, including soft-deleted ones (if they are not expired yet)
-        # Optimization: Only fetch necessary columns and use yield_per to avoid loading everything into memory
-        referenced_keys: Set[str] = set()
-        
-        # Query tuples of (storage_key, thumbnail_key)
-        query = self.db.query(PatientPhoto.storage_key, PatientPhoto.thumbnail_key).execution_options(yield_per=1000)
-        
-        for storage_key, thumbnail_key in query:
-            if storage_key:
-                referenced_keys.add(storage_key)
-            if thumbnail_key:
-                referenced_keys.add(thumbnail_key)
-
-        # 2. List all objects in S3 with prefix filter
-        # Note: For large buckets, this needs pagination. using get_paginator is safer.
+        if clinic_id is not None:
+            prefix = f"{prefix}{clinic_id}/"
+        grace_cutoff = datetime.now(timezone.utc) - timedelta(days=grace_days)
+        stats = GarbageCollectionStats(dry_run=dry_run)
+
+        referenced = self._referenced_keys_sorted(prefix)
+        next_referenced: Optional[str] = next(referenced, None)
+
+        pending: List[str] = []
+        pending_bytes = 0
+
+        def flush() -> None:
+            nonlocal pending, pending_bytes
+            if not pending:
+                return
+            if dry_run:
+                deleted = len(pending)
+            else:
+                deleted = self._delete_objects(pending)
+            stats.deleted += deleted
+            # Bytes are attributed per batch; a partially failed batch counts its share
+            stats.bytes_reclaimed += pending_bytes * deleted // len(pending)
+            pending, pending_bytes = [], 0
+
         paginator: Any = self.s3_client.get_paginator('list_objects_v2') # type: ignore
         pages: Any = paginator.paginate(Bucket=self.bucket, Prefix=prefix) # type: ignore
 
-        deleted_count = 0
-        
         for page in pages: # type: ignore
-            if 'Contents' not in page: # type: ignore
-                continue
-                
-            for obj in page['Contents']: # type: ignore
+            for obj in page.get('Contents', []): # type: ignore
                 key: str = obj['Key'] # type: ignore
                 # Skip if key is a "folder" placeholder (ends with /)
                 if key.endswith('/'):
                     continue
-                
-                # Check if referenced
-                if key not in referenced_keys:
-                    # SAFETY CHECK: Only delete if older than 31 days
-                    # This provides a grace period for eventual consistency and recovery
-                    last_modified = obj['LastModified']
-                    if last_modified > datetime.now(timezone.utc) - timedelta(days=31):
-                        continue
-
-                    if not dry_run:
-                        self.s3_client.delete_object(Bucket=self.bucket, Key=key) # type: ignore
-                        print(f"GC: Deleted unreferenced object {key}")
-                    else:
-                        print(f"GC: [Dry Run] Would delete {key}")
-                    deleted_count += 1
-
-        return deleted_count
+                stats.scanned += 1
+
+                # Advance the referenced stream up to this key
+                while next_referenced is not None and next_referenced.encode() < key.encode():
+                    next_referenced = next(referenced, None)
+                if next_referenced == key:
+                    stats.referenced += 1
+                    continue
+
+                # SAFETY CHECK: Only delete orphans older than the grace period
+                if obj['LastModified'] > grace_cutoff:
+                    stats.too_recent += 1
+                    continue
+
+                logger.debug(f"GC: {'[Dry Run] would delete' if dry_run else 'deleting'} {key}")
+                pending.append(key)
+                pending_bytes += obj.get('Size', 0)
+                if len(pending) >= S3_DELETE_BATCH_SIZE:
+                    flush()
+
+        flush()
+        self.last_gc_stats = stats
+        logger.info(f"GC {prefix}: {stats.summary()}")
+        return stats.deleted
@@ -7,7 +7,7 @@ and managing follow-up message configurations.
 
 import logging
 from datetime import datetime, timedelta, time as time_type
-from typing import Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import cast, String
 
@@ -78,6 +78,42 @@ class FollowUpMessageService:
         if not follow_up_messages:
             return
         
+        # Check if patient has LINE user
+        patient = appointment.patient
+        line_user = patient.line_user
+        
+        if not line_user:
+            logger.debug(f"Patient {patient.id} has no LINE user, skipping follow-up message scheduling")
+            return
+        
+        for scheduled in FollowUpMessageService._build_follow_up_messages(
+            appointment, follow_up_messages, line_user.line_user_id, taiwan_now()
+        ):
+            db.add(scheduled)
+        
+        # Commit all successfully scheduled messages
+        # If commit fails, log error but don't raise - appointment is already created
+        try:
+            db.commit()
+        except Exception as e:
+            logger.exception(f"Failed to commit scheduled follow-up messages for appointment {appointment.calendar_event_id}: {e}")
+            db.rollback()
+            # Don't raise - appointment is already committed, we just failed to schedule messages
+
+    @staticmethod
+    def _build_follow_up_messages(
+        appointment: Appointment,
+        follow_up_messages: List[FollowUpMessage],
+        recipient_line_user_id: str,
+        current_time: datetime
+    ) -> List[ScheduledLineMessage]:
+        """
+        Build (but do not add) the scheduled follow-up messages for one appointment.
+        
+        Messages whose send time is already in the past are skipped.
+        """
+        appointment_type = appointment.appointment_type
+        
         # Calculate appointment end time: start_time + duration_minutes
         start_datetime = datetime.combine(
             appointment.calendar_event.date,
@@ -90,15 +126,7 @@ class FollowUpMessageService:
             minutes=appointment_type.duration_minutes
         )
         
-        # Check if patient has LINE user
-        patient = appointment.patient
-        line_user = patient.line_user
-        
-        if not line_user:
-            logger.debug(f"Patient {patient.id} has no LINE user, skipping follow-up message scheduling")
-            return
-        
-        # Schedule each follow-up message
+        scheduled_messages: List[ScheduledLineMessage] = []
         for follow_up in follow_up_messages:
             try:
                 scheduled_time = FollowUpMessageService.calculate_scheduled_time(
@@ -110,17 +138,15 @@ class FollowUpMessageService:
                 )
                 
                 # Validate scheduled time is not in past
-                current_time = taiwan_now()
                 if scheduled_time < current_time:
                     logger.warning(
                         f"Skipping follow-up message {follow_up.id} - scheduled time {scheduled_time} is in past"
                     )
                     continue
                 
-                # Create scheduled message record
-                scheduled = ScheduledLineMessage(
+                scheduled_messages.append(ScheduledLineMessage(
                     recipient_type='patient',
-                    recipient_line_user_id=line_user.line_user_id,
+                    recipient_line_user_id=recipient_line_user_id,
                     clinic_id=appointment.patient.clinic_id,
                     message_type='follow_up',
                     message_template=follow_up.message_template,
@@ -130,8 +156,7 @@ class FollowUpMessageService:
                     },
                     scheduled_send_time=scheduled_time,
                     status='pending'
-                )
-                db.add(scheduled)
+                ))
                 logger.debug(
                     f"Scheduled follow-up message {follow_up.id} for appointment {appointment.calendar_event_id} "
                     f"at {scheduled_time}"
@@ -143,14 +168,44 @@ class FollowUpMessageService:
                 )
                 # Continue with other messages even if one fails
         
-        # Commit all successfully scheduled messages
-        # If commit fails, log error but don't raise - appointment is already created
-        try:
-            db.commit()
-        except Exception as e:
-            logger.exception(f"Failed to commit scheduled follow-up messages for appointment {appointment.calendar_event_id}: {e}")
-            db.rollback()
-            # Don't raise - appointment is already committed, we just failed to schedule messages
+        return scheduled_messages
+
+    @staticmethod
+    def schedule_follow_up_messages_batch(db: Session, appointments: List[Appointment]) -> None:
+        """
+        Schedule follow-up messages for several new appointments at once.
+        
+        Follow-up configurations are loaded with one query per appointment type
+        and every message row is added to the session in a single batch.
+        Nothing is committed; the caller owns the transaction.
+        
+        Args:
+            db: Database session
+            appointments: Newly created appointments (calendar_event and patient loaded)
+        """
+        if not appointments:
+            return
+        
+        appointment_type_ids = {a.appointment_type_id for a in appointments}
+        follow_ups_by_type: Dict[int, List[FollowUpMessage]] = {type_id: [] for type_id in appointment_type_ids}
+        for follow_up in db.query(FollowUpMessage).filter(
+            FollowUpMessage.appointment_type_id.in_(appointment_type_ids),
+            FollowUpMessage.is_enabled == True
+        ).order_by(FollowUpMessage.display_order).all():
+            follow_ups_by_type[follow_up.appointment_type_id].append(follow_up)
+        
+        current_time = taiwan_now()
+        scheduled_messages: List[ScheduledLineMessage] = []
+        for appointment in appointments:
+            follow_up_messages = follow_ups_by_type.get(appointment.appointment_type_id)
+            line_user = appointment.patient.line_user
+            if not follow_up_messages or not line_user:
+                continue
+            scheduled_messages.extend(FollowUpMessageService._build_follow_up_messages(
+                appointment, follow_up_messages, line_user.line_user_id, current_time
+            ))
+        
+        db.add_all(scheduled_messages)
 
     @staticmethod
     def cancel_pending_follow_up_messages(db: Session, appointment_id: int) -> None:
@@ -4,6 +4,7 @@ LINE message cleanup service.
 
 This module handles periodic cleanup of old LINE message metadata using APScheduler.
 Deletes messages older than LINE_MESSAGE_RETENTION_HOURS to prevent unbounded table growth.
+Webhook deduplication records (line_webhook_events) expire on the same schedule.
 """
 
 import logging
@@ -99,6 +100,7 @@ class LineMessageCleanupService:
             deleted_count = await asyncio.to_thread(LineMessageCleanupService.cleanup_old_messages)
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} old LINE messages")
+            await asyncio.to_thread(LineMessageCleanupService.cleanup_old_webhook_events)
         except Exception as e:
             logger.exception(f"Error during LINE message cleanup: {e}")
     
@@ -150,6 +152,46 @@ class LineMessageCleanupService:
             # Don't raise - cleanup failures shouldn't break the app
             return 0
 
+    @staticmethod
+    def cleanup_old_webhook_events(max_age_hours: int = LINE_MESSAGE_RETENTION_HOURS) -> int:
+        """
+        Delete webhook deduplication records older than max_age_hours.
+
+        Only the "database" webhook dedup store writes these records; the
+        in-process store expires its entries itself.
+
+        Args:
+            max_age_hours: Maximum age in hours before deletion (default: LINE_MESSAGE_RETENTION_HOURS)
+
+        Returns:
+            int: Number of records deleted
+        """
+        try:
+            db: Session = SessionLocal()
+            try:
+                cutoff_time = taiwan_now() - timedelta(hours=max_age_hours)
+                result = db.execute(
+                    text("DELETE FROM line_webhook_events WHERE received_at < :cutoff_time"),
+                    {"cutoff_time": cutoff_time}
+                )
+                deleted_count = int(result.rowcount or 0)  # type: ignore
+                db.commit()
+
+                if deleted_count > 0:
+                    logger.info(
+                        f"Cleaned up {deleted_count} old LINE webhook events "
+                        f"(older than {max_age_hours} hours)"
+                    )
+
+                return deleted_count
+            finally:
+                db.close()
+
+        except Exception as e:
+            logger.exception(f"Error during LINE webhook event cleanup: {e}")
+            # Don't raise - cleanup failures shouldn't break the app
+            return 0
+
 
 # Global cleanup service instance
 _cleanup_service = None
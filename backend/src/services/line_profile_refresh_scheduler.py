@@ -0,0 +1,139 @@
+"""
+Background LINE profile refresh.
+
+Resolving a LINE user on a webhook event or LIFF login never calls the LINE
+API; users whose display name or picture is missing are queued instead (see
+LineUserService.get_or_create_line_user). This scheduler drains the queue every
+few seconds and fetches the profiles with LineUserService.refresh_profiles.
+"""
+
+import logging
+from typing import Optional
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
+from apscheduler.triggers.interval import IntervalTrigger  # type: ignore
+
+from core.constants import LINE_PROFILE_REFRESH_INTERVAL_SECONDS
+from core.database import get_db_context
+from services.line_user_service import LineUserService, drain_profile_refresh_requests
+from utils.datetime_utils import TAIWAN_TZ
+
+logger = logging.getLogger(__name__)
+
+# Global singleton instance
+_line_profile_refresh_scheduler: Optional['LineProfileRefreshScheduler'] = None
+
+
+class LineProfileRefreshScheduler:
+    """
+    Scheduler for queued LINE profile refreshes.
+
+    Each user's last attempt is stored in LineUser.profile_refreshed_at, so
+    repeated requests for the same user are skipped until the retry period
+    has passed.
+    """
+
+    def __init__(self):
+        """
+        Initialize the LINE profile refresh scheduler.
+
+        Note: Database sessions are created fresh for each scheduler run
+        to avoid stale session issues.
+        """
+        self.scheduler = AsyncIOScheduler(timezone=TAIWAN_TZ)
+        self._is_started = False
+
+    async def start_scheduler(self) -> None:
+        """
+        Start the background scheduler for LINE profile refreshes.
+
+        This should be called during application startup.
+        """
+        if self._is_started:
+            logger.warning("LINE profile refresh scheduler is already started")
+            return
+
+        self.scheduler.add_job(  # type: ignore
+            self._run_refresh,
+            IntervalTrigger(seconds=LINE_PROFILE_REFRESH_INTERVAL_SECONDS),
+            id="line_profile_refresh",
+            name="Refresh queued LINE profiles",
+            replace_existing=True,
+            max_instances=1,  # Prevent overlapping runs
+            coalesce=True,
+        )
+
+        self.scheduler.start()
+        self._is_started = True
+        logger.info(
+            f"LINE profile refresh scheduler started (runs every {LINE_PROFILE_REFRESH_INTERVAL_SECONDS}s)"
+        )
+
+    async def stop_scheduler(self) -> None:
+        """
+        Stop the background scheduler.
+
+        This should be called during application shutdown.
+        """
+        if self._is_started:
+            self.scheduler.shutdown(wait=True)
+            self._is_started = False
+            logger.info("LINE profile refresh scheduler stopped")
+
+    async def _run_refresh(self) -> None:
+        """
+        Drain queued profile refreshes.
+
+        LINE API calls are blocking, so the work runs in a thread pool to keep
+        the event loop responsive.
+        """
+        line_user_pks = drain_profile_refresh_requests()
+        if not line_user_pks:
+            return
+
+        import asyncio
+        await asyncio.to_thread(self._execute_refresh_logic, line_user_pks)
+
+    def _execute_refresh_logic(self, line_user_pks: list[int]) -> None:
+        """Execute the refresh logic (synchronous/blocking operations)."""
+        with get_db_context() as db:
+            try:
+                updated = LineUserService.refresh_profiles(db, line_user_pks)
+                if updated:
+                    logger.info(f"Refreshed LINE profiles for {updated} users")
+            except Exception as e:
+                logger.exception(f"❌ Error during LINE profile refresh: {e}")
+                # Don't re-raise - allow scheduler to continue
+
+
+def get_line_profile_refresh_scheduler() -> LineProfileRefreshScheduler:
+    """
+    Get the global LINE profile refresh scheduler instance.
+
+    Returns:
+        LineProfileRefreshScheduler: The global scheduler instance
+    """
+    global _line_profile_refresh_scheduler
+    if _line_profile_refresh_scheduler is None:
+        _line_profile_refresh_scheduler = LineProfileRefreshScheduler()
+    return _line_profile_refresh_scheduler
+
+
+async def start_line_profile_refresh_scheduler() -> None:
+    """
+    Start the global LINE profile refresh scheduler.
+
+    This should be called during application startup.
+    """
+    scheduler = get_line_profile_refresh_scheduler()
+    await scheduler.start_scheduler()
+
+
+async def stop_line_profile_refresh_scheduler() -> None:
+    """
+    Stop the global LINE profile refresh scheduler.
+
+    This should be called during application shutdown.
+    """
+    global _line_profile_refresh_scheduler
+    if _line_profile_refresh_scheduler:
+        await _line_profile_refresh_scheduler.stop_scheduler()
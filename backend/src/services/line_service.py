@@ -144,6 +144,34 @@ class LINEService:
             logger.exception(f"Invalid LINE payload structure: {e}")
             return None
 
+    def extract_delivery_data(self, payload: dict[str, Any]) -> Optional[Tuple[str, bool]]:
+        """
+        Extract the webhook event ID and redelivery flag from webhook payload.
+
+        Args:
+            payload: Parsed JSON payload from LINE webhook
+
+        Returns:
+            Tuple of (webhook_event_id, is_redelivery), or None if the event
+            has no webhookEventId or the payload is invalid.
+        """
+        try:
+            if 'events' not in payload or not payload['events']:
+                return None
+
+            event = payload['events'][0]
+            webhook_event_id = event.get('webhookEventId')
+            if not webhook_event_id:
+                return None
+
+            delivery_context: dict[str, Any] = event.get('deliveryContext') or {}
+            is_redelivery = bool(delivery_context.get('isRedelivery', False))
+            return (webhook_event_id, is_redelivery)
+
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            logger.exception(f"Invalid LINE payload structure: {e}")
+            return None
+
     def extract_message_data(self, payload: dict[str, Any]) -> Optional[Tuple[str, str, Optional[str], Optional[str], Optional[str]]]:
         """
         Extract LINE user ID, message text, reply token, message ID, and quoted message ID from webhook payload.
@@ -258,14 +286,8 @@ class LINEService:
             try:
                 from models.line_push_message import LinePushMessage
                 
-                push_message = LinePushMessage(
-                    line_user_id=line_user_id,
-                    clinic_id=clinic_id,
-                    line_message_id=message_id,
-                    recipient_type=labels.get('recipient_type', ''),
-                    event_type=labels.get('event_type', ''),
-                    trigger_source=labels.get('trigger_source', ''),
-                    labels=labels  # Store all labels including flexible ones
+                push_message = LinePushMessage.from_labels(
+                    line_user_id, clinic_id, message_id, labels
                 )
                 db.add(push_message)
                 db.commit()
@@ -15,6 +15,7 @@ from sqlalchemy import func, and_
 
 from models import LineUser, Patient
 from utils.datetime_utils import taiwan_now
+from utils.search_queries import fetch_page_with_total, line_user_name_condition
 
 logger = logging.getLogger(__name__)
 
@@ -259,16 +260,13 @@ def get_line_users_for_clinic(
     )
     
     # Apply search filter if provided
-    # Extract search pattern once to avoid duplication
-    search_pattern = None
     if search and search.strip():
         search_pattern = f"%{search.strip()}%"
         # Search in LINE user display names (both clinic_display_name and display_name) or patient names
         # This allows finding users by either their clinic display name or original display name
         base_query = base_query.filter(
             or_(
-                LineUser.clinic_display_name.ilike(search_pattern),
-                LineUser.display_name.ilike(search_pattern),
+                line_user_name_condition(search_pattern),
                 Patient.full_name.ilike(search_pattern)
             )
         )
@@ -286,47 +284,13 @@ def get_line_users_for_clinic(
         LineUser.line_user_id
     )
     
-    # Get total count before pagination
-    # Need to account for search filter if provided
-    if search_pattern:
-        # Count distinct LineUsers that match search criteria
-        total_query = db.query(func.count(func.distinct(LineUser.id))).filter(
-            LineUser.clinic_id == clinic_id
-        ).outerjoin(
-            Patient,
-            and_(
-                LineUser.id == Patient.line_user_id,
-                Patient.clinic_id == clinic_id,
-                Patient.is_deleted == False
-            )
-        ).filter(
-            or_(
-                LineUser.clinic_display_name.ilike(search_pattern),
-                LineUser.display_name.ilike(search_pattern),
-                Patient.full_name.ilike(search_pattern)
-            )
-        )
-        total = total_query.scalar() or 0
-    else:
-        # Simply count all LineUsers for this clinic
-        total = db.query(func.count(LineUser.id)).filter(
-            LineUser.clinic_id == clinic_id
-        ).scalar() or 0
-    
     # Convert page/page_size to offset/limit if provided
     if page is not None and page_size is not None:
         offset = (page - 1) * page_size
         limit = page_size
     
-    # Apply pagination if provided
-    query = base_query
-    if offset is not None:
-        query = query.offset(offset)
-    if limit is not None:
-        query = query.limit(limit)
-    
-    # Execute query and format results
-    results = query.all()
+    # Fetch the page and the total count (number of matching LINE users) in one query
+    results, total = fetch_page_with_total(base_query, offset=offset, limit=limit)
     
     line_users_with_status: List[LineUserWithStatus] = []
     for row in results:
@@ -3,24 +3,55 @@ LINE user service for proactive user management.
 
 This service handles creating and managing LINE user entries from webhook events,
 ensuring users are registered as soon as they interact with the clinic's official account.
+
+Resolving a LINE user is a single upsert and never calls the LINE API. Users
+whose display name or picture is missing are queued for a profile refresh,
+which the profile refresh scheduler performs in the background at most once
+per LINE_PROFILE_REFRESH_RETRY_HOURS per user.
 """
 
 import logging
-from typing import Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set
 
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy import Boolean, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import func
 
+from core.constants import LINE_PROFILE_REFRESH_RETRY_HOURS, MAX_PENDING_LINE_PROFILE_REFRESHES
 from models import LineUser
 from services.line_service import LINEService
+from utils.datetime_utils import taiwan_now
 
 logger = logging.getLogger(__name__)
 
+# LineUser ids waiting for a profile refresh (kept in process memory; a dropped
+# request is simply made again on the user's next message)
+_pending_profile_refreshes: Set[int] = set()
+_pending_lock = threading.Lock()
+
+
+def request_profile_refresh(line_user_pk: int) -> None:
+    """Queue a LineUser (by primary key) for a background profile refresh."""
+    with _pending_lock:
+        if len(_pending_profile_refreshes) < MAX_PENDING_LINE_PROFILE_REFRESHES:
+            _pending_profile_refreshes.add(line_user_pk)
+
+
+def drain_profile_refresh_requests() -> List[int]:
+    """Take all queued LineUser ids (each at most once)."""
+    with _pending_lock:
+        line_user_pks = sorted(_pending_profile_refreshes)
+        _pending_profile_refreshes.clear()
+    return line_user_pks
+
 
 class LineUserService:
     """
     Service for managing LINE user entries.
-    
+
     Handles creation and updates of LineUser records from webhook events,
     with proper race condition handling and profile fetching.
     """
@@ -30,157 +61,170 @@ class LineUserService:
         db: Session,
         line_user_id: str,
         clinic_id: int,
-        line_service: LINEService,
         display_name: Optional[str] = None,
         picture_url: Optional[str] = None
     ) -> LineUser:
         """
-        Get or create LINE user for a specific clinic, fetching profile if needed.
-        
-        This method is thread-safe and handles race conditions when multiple
-        webhook events arrive simultaneously for the same user.
-        
+        Get or create LINE user for a specific clinic.
+
+        Runs a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING, so
+        simultaneous webhook events for the same user cannot conflict. Provided
+        values overwrite stored ones; omitted values keep what is stored.
+
+        The upsert is always committed (even when nothing changed), which also
+        commits any pending changes in the caller's session. Call it before
+        making other changes, or flush and commit them first.
+
         Each clinic has its own LineUser entry for the same LINE user ID, enabling
         strict clinic isolation and per-clinic customization.
-        
+
+        The LINE profile is never fetched here: users with a missing display
+        name or picture are queued for a background refresh instead.
+
         Args:
             db: Database session
             line_user_id: LINE user ID from webhook event
             clinic_id: Clinic ID this LineUser belongs to (must not be None)
-            line_service: LINEService instance for API calls
             display_name: Optional display name (if already known from event)
             picture_url: Optional profile picture URL (if already known, e.g., from LIFF)
-        
+
         Returns:
             LineUser instance (existing or newly created) for this clinic
-        
+
         Raises:
             ValueError: If clinic_id is None or invalid
-            Exception: If database operations fail after retries
+            Exception: If the database operation fails
         """
         # Validate clinic_id is a positive integer
         if clinic_id <= 0:
             raise ValueError(f"clinic_id must be a positive integer, got: {clinic_id}")
-        
-        # First, check if user already exists for this clinic
-        line_user = db.query(LineUser).filter_by(
+
+        insert_stmt = insert(LineUser).values(
             line_user_id=line_user_id,
-            clinic_id=clinic_id
-        ).first()
-        
-        if line_user:
-            # Update display name if provided and different
-            updated = False
-            if display_name and line_user.display_name != display_name:
-                line_user.display_name = display_name
-                updated = True
-            
-            # Update picture_url if provided
-            if picture_url and line_user.picture_url != picture_url:
-                line_user.picture_url = picture_url
-                updated = True
-            
-            # Lazy update: fetch profile if picture_url is missing
-            if not line_user.picture_url and line_service:
-                try:
-                    profile = line_service.get_user_profile(line_user_id)
-                    if profile and profile.get('pictureUrl'):
-                        line_user.picture_url = profile.get('pictureUrl')
-                        updated = True
-                        logger.debug(
-                            f"Fetched and updated picture_url for existing LineUser {line_user_id[:10]}... "
-                            f"at clinic_id={clinic_id}"
-                        )
-                except Exception as e:
-                    # Log but don't fail - picture_url is optional
-                    logger.debug(
-                        f"Failed to fetch profile for existing user {line_user_id[:10]}...: {e}"
-                    )
-            
-            if updated:
-                try:
-                    db.commit()
-                    logger.debug(
-                        f"Updated LineUser {line_user_id[:10]}... "
-                        f"at clinic_id={clinic_id}"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to update LineUser {line_user_id[:10]}... "
-                        f"at clinic_id={clinic_id}: {e}"
-                    )
-                    db.rollback()
-            return line_user
-        
-        # User doesn't exist for this clinic - fetch profile from LINE API if needed
-        # Fetch profile if either display_name OR picture_url is missing (OR condition, not AND)
-        # This ensures we get complete profile data when creating new users
-        if not display_name or not picture_url:
-            try:
-                profile = line_service.get_user_profile(line_user_id)
-                if profile:
-                    if not display_name:
-                        display_name = profile.get('displayName')
-                    if not picture_url:
-                        picture_url = profile.get('pictureUrl')
-                    logger.debug(
-                        f"Fetched profile for {line_user_id[:10]}...: "
-                        f"display_name={display_name}, picture_url={'set' if picture_url else 'none'}, "
-                        f"clinic_id={clinic_id}"
-                    )
-                else:
-                    logger.debug(f"Profile fetch returned None for {line_user_id[:10]}...")
-            except Exception as e:
-                # Log but don't fail - we can create user without profile data
-                logger.debug(
-                    f"Failed to fetch profile for {line_user_id[:10]}...: {e}. "
-                    "Creating user without profile data."
-                )
-        
-        # Create new user for this clinic
-        # Handle race condition: another request might have created it between check and insert
+            clinic_id=clinic_id,
+            display_name=display_name,
+            picture_url=picture_url
+        )
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[LineUser.line_user_id, LineUser.clinic_id],
+            set_={
+                "display_name": func.coalesce(insert_stmt.excluded.display_name, LineUser.display_name),
+                "picture_url": func.coalesce(insert_stmt.excluded.picture_url, LineUser.picture_url),
+            }
+        ).returning(
+            LineUser,
+            # xmax is 0 only for rows this statement inserted
+            literal_column("(xmax = 0)", Boolean).label("inserted")
+        )
+
         try:
-            line_user = LineUser(
-                line_user_id=line_user_id,
-                clinic_id=clinic_id,
-                display_name=display_name,
-                picture_url=picture_url
-            )
-            db.add(line_user)
+            line_user, inserted = db.execute(
+                upsert_stmt, execution_options={"populate_existing": True}
+            ).one()
             db.commit()
-            db.refresh(line_user)
-            logger.info(
-                f"Created new LineUser: id={line_user.id}, "
-                f"line_user_id={line_user.line_user_id[:10]}..., "
-                f"clinic_id={clinic_id}, display_name={line_user.display_name}"
-            )
-            return line_user
-        except IntegrityError:
-            # Race condition: another request created it
-            db.rollback()
-            logger.debug(
-                f"Race condition detected for {line_user_id[:10]}... "
-                f"at clinic_id={clinic_id}, fetching existing user"
-            )
-            # Fetch the user that was just created by another request
-            line_user = db.query(LineUser).filter_by(
-                line_user_id=line_user_id,
-                clinic_id=clinic_id
-            ).first()
-            if not line_user:
-                # This shouldn't happen, but handle gracefully
-                logger.error(
-                    f"Failed to find LineUser after IntegrityError for {line_user_id[:10]}... "
-                    f"at clinic_id={clinic_id}"
-                )
-                raise
-            logger.debug(f"Found existing LineUser after race condition: id={line_user.id}")
-            return line_user
         except Exception as e:
             db.rollback()
             logger.exception(
-                f"Failed to create LineUser for {line_user_id[:10]}... "
+                f"Failed to upsert LineUser for {line_user_id[:10]}... "
                 f"at clinic_id={clinic_id}: {e}"
             )
             raise
 
+        if inserted:
+            logger.info(
+                f"Created new LineUser: id={line_user.id}, "
+                f"line_user_id={line_user.line_user_id[:10]}..., "
+                f"clinic_id={clinic_id}, display_name={line_user.display_name}"
+            )
+
+        if LineUserService.needs_profile_refresh(line_user, taiwan_now()):
+            request_profile_refresh(line_user.id)
+
+        return line_user
+
+    @staticmethod
+    def needs_profile_refresh(line_user: LineUser, now: datetime) -> bool:
+        """
+        Whether the user's LINE profile should be fetched.
+
+        True when the display name or picture is missing and no fetch was
+        attempted in the last LINE_PROFILE_REFRESH_RETRY_HOURS.
+        """
+        if line_user.display_name and line_user.picture_url:
+            return False
+        last_attempt = line_user.profile_refreshed_at
+        return last_attempt is None or last_attempt < now - timedelta(hours=LINE_PROFILE_REFRESH_RETRY_HOURS)
+
+    @staticmethod
+    def refresh_profiles(db: Session, line_user_pks: Iterable[int]) -> int:
+        """
+        Fetch LINE profiles for the given users and fill in missing data.
+
+        Users that no longer need a refresh (complete profile, or attempted
+        recently) are skipped. The attempt time is recorded and committed
+        before calling the LINE API, so a user is attempted at most once per
+        LINE_PROFILE_REFRESH_RETRY_HOURS even if the refresh fails.
+
+        Args:
+            db: Database session
+            line_user_pks: LineUser ids to refresh
+
+        Returns:
+            Number of users whose display name or picture was updated
+        """
+        line_user_pks = list(line_user_pks)
+        if not line_user_pks:
+            return 0
+
+        now = taiwan_now()
+        retry_cutoff = now - timedelta(hours=LINE_PROFILE_REFRESH_RETRY_HOURS)
+        line_users = db.query(LineUser).filter(
+            LineUser.id.in_(line_user_pks),
+            or_(LineUser.display_name.is_(None), LineUser.picture_url.is_(None)),
+            or_(LineUser.profile_refreshed_at.is_(None), LineUser.profile_refreshed_at < retry_cutoff)
+        ).options(selectinload(LineUser.clinic)).all()
+        if not line_users:
+            return 0
+
+        for line_user in line_users:
+            line_user.profile_refreshed_at = now
+        db.commit()
+
+        updated = 0
+        line_services: dict[int, Optional[LINEService]] = {}
+        for line_user in line_users:
+            clinic = line_user.clinic
+            if clinic.id not in line_services:
+                try:
+                    line_services[clinic.id] = LINEService(
+                        channel_secret=clinic.line_channel_secret or "",
+                        channel_access_token=clinic.line_channel_access_token or ""
+                    )
+                except ValueError:
+                    logger.debug(f"Clinic {clinic.id} has no LINE credentials, skipping profile refresh")
+                    line_services[clinic.id] = None
+            line_service = line_services[clinic.id]
+            if not line_service:
+                continue
+
+            try:
+                profile = line_service.get_user_profile(line_user.line_user_id)
+            except Exception as e:
+                # Log but don't fail - profile data is optional
+                logger.debug(f"Failed to fetch profile for {line_user.line_user_id[:10]}...: {e}")
+                continue
+            if not profile:
+                continue
+
+            changed = False
+            if not line_user.display_name and profile.get('displayName'):
+                line_user.display_name = profile.get('displayName')
+                changed = True
+            if profile.get('pictureUrl') and line_user.picture_url != profile.get('pictureUrl'):
+                line_user.picture_url = profile.get('pictureUrl')
+                changed = True
+            if changed:
+                updated += 1
+
+        db.commit()
+        return updated
@@ -0,0 +1,131 @@
+"""
+LINE webhook event deduplication.
+
+LINE redelivers a webhook event when our response is slow or fails (the
+redelivery carries deliveryContext.isRedelivery = true and the original
+webhookEventId). Processing it again would run the AI agent and send a reply a
+second time, so every event is claimed by (clinic_id, webhookEventId) before
+processing and later deliveries of the same event are suppressed.
+
+Two stores are available (LINE_WEBHOOK_DEDUP_STORE):
+- "memory": a bounded in-process TTL cache, for single-worker deployments
+- "database": the line_webhook_events table, shared by every worker
+
+Entries are kept for LINE_MESSAGE_RETENTION_HOURS, like LINE message metadata.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from core.config import LINE_WEBHOOK_DEDUP_STORE
+from core.constants import LINE_MESSAGE_RETENTION_HOURS
+from models.line_webhook_event import LineWebhookEvent
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Events remembered by the in-process store (oldest are evicted beyond this)
+MAX_WEBHOOK_EVENTS_IN_MEMORY = 100000
+
+WEBHOOK_DEDUP_STORES = ("memory", "database")
+
+
+class WebhookEventDeduplicator:
+    """
+    Claims webhook events so each is processed once.
+
+    Counts suppressed duplicates in `suppressed` (and redeliveries among them
+    in `suppressed_redeliveries`).
+    """
+
+    def __init__(
+        self,
+        store: str = LINE_WEBHOOK_DEDUP_STORE,
+        retention_hours: int = LINE_MESSAGE_RETENTION_HOURS
+    ):
+        if store not in WEBHOOK_DEDUP_STORES:
+            raise ValueError(f"Unknown webhook dedup store '{store}', expected one of {WEBHOOK_DEDUP_STORES}")
+        self.store = store
+        self._seen: TTLCache[tuple[int, str], bool] = TTLCache(
+            max_entries=MAX_WEBHOOK_EVENTS_IN_MEMORY,
+            ttl_seconds=retention_hours * 3600
+        )
+        self._lock = threading.Lock()
+        self.suppressed = 0
+        self.suppressed_redeliveries = 0
+
+    def claim(
+        self,
+        db: Session,
+        clinic_id: int,
+        webhook_event_id: str,
+        is_redelivery: bool = False
+    ) -> bool:
+        """
+        Claim an event for processing.
+
+        Args:
+            db: Database session (used by the database store; committed on claim)
+            clinic_id: Clinic whose official account received the event
+            webhook_event_id: LINE's webhookEventId
+            is_redelivery: deliveryContext.isRedelivery of this delivery
+
+        Returns:
+            True if the event was not seen before and should be processed,
+            False if it is a duplicate.
+        """
+        if self.store == "database":
+            claimed = self._claim_in_database(db, clinic_id, webhook_event_id)
+        else:
+            claimed = self._claim_in_memory(clinic_id, webhook_event_id)
+
+        if not claimed:
+            with self._lock:
+                self.suppressed += 1
+                if is_redelivery:
+                    self.suppressed_redeliveries += 1
+            logger.info(
+                f"Suppressed duplicate LINE webhook event {webhook_event_id} for clinic_id={clinic_id} "
+                f"(redelivery={is_redelivery}, {self.suppressed} suppressed so far)"
+            )
+        return claimed
+
+    def _claim_in_memory(self, clinic_id: int, webhook_event_id: str) -> bool:
+        key = (clinic_id, webhook_event_id)
+        with self._lock:
+            if self._seen.get(key):
+                return False
+            self._seen.set(key, True)
+            return True
+
+    def _claim_in_database(self, db: Session, clinic_id: int, webhook_event_id: str) -> bool:
+        stmt = insert(LineWebhookEvent).values(
+            clinic_id=clinic_id,
+            webhook_event_id=webhook_event_id
+        ).on_conflict_do_nothing(
+            index_elements=[LineWebhookEvent.clinic_id, LineWebhookEvent.webhook_event_id]
+        ).returning(LineWebhookEvent.id)
+        claimed = db.execute(stmt).scalar() is not None
+        db.commit()
+        return claimed
+
+
+# Global deduplicator instance
+_webhook_event_deduplicator: Optional[WebhookEventDeduplicator] = None
+
+
+def get_webhook_event_deduplicator() -> WebhookEventDeduplicator:
+    """
+    Get the global webhook event deduplicator.
+
+    Returns:
+        WebhookEventDeduplicator: Global deduplicator using LINE_WEBHOOK_DEDUP_STORE
+    """
+    global _webhook_event_deduplicator
+    if _webhook_event_deduplicator is None:
+        _webhook_event_deduplicator = WebhookEventDeduplicator()
+    return _webhook_event_deduplicator
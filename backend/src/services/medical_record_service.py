@@ -1,7 +1,7 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
-from sqlalchemy import desc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Query, Session, defer, joinedload, selectinload
 from fastapi import HTTPException
 
 
@@ -16,6 +16,7 @@ from models.clinic import Clinic
 from services.line_service import LINEService
 from services.message_template_service import MessageTemplateService
 from core.sentinels import MISSING
+from utils.dict_utils import apply_merge_patch
 
 
 class RecordVersionConflictError(Exception):
@@ -120,7 +121,7 @@ class MedicalRecordService:
             MedicalRecord.is_deleted == False
         ).options(
             joinedload(MedicalRecord.patient),
-            joinedload(MedicalRecord.photos),
+            selectinload(MedicalRecord.photos),
             joinedload(MedicalRecord.appointment).joinedload(Appointment.calendar_event),
             joinedload(MedicalRecord.appointment).joinedload(Appointment.appointment_type),
             joinedload(MedicalRecord.created_by_user),
@@ -145,29 +146,14 @@ class MedicalRecordService:
             status: Filter by record status - 'active', 'deleted', or 'all'
                    If not provided, falls back to include_deleted for backward compatibility
         """
-        query = db.query(MedicalRecord).filter(
-            MedicalRecord.clinic_id == clinic_id,
-            MedicalRecord.patient_id == patient_id
+        query = MedicalRecordService._patient_records_query(
+            db, clinic_id, patient_id, include_deleted, status
         )
         
-        # Use status parameter if provided, otherwise fall back to include_deleted
-        if status is not None:
-            if status == 'active':
-                query = query.filter(MedicalRecord.is_deleted == False)
-            elif status == 'deleted':
-                query = query.filter(MedicalRecord.is_deleted == True)
-            elif status == 'all':
-                pass  # No filter
-            else:
-                raise ValueError(f"Invalid status value: {status}. Must be 'active', 'deleted', or 'all'")
-        else:
-            # Backward compatibility: use include_deleted
-            if not include_deleted:
-                query = query.filter(MedicalRecord.is_deleted == False)
-        
         # Eagerly load relationships for metadata display
+        # Photos use selectinload: joining a collection alongside the other joins multiplies rows
         query = query.options(
-            joinedload(MedicalRecord.photos),
+            selectinload(MedicalRecord.photos),
             joinedload(MedicalRecord.appointment).joinedload(Appointment.calendar_event),
             joinedload(MedicalRecord.appointment).joinedload(Appointment.appointment_type),
             joinedload(MedicalRecord.created_by_user),
@@ -188,6 +174,76 @@ class MedicalRecordService:
         """
         Get total count of patient records with optional filtering by deletion status.
         
+        Args:
+            status: Filter by record status - 'active', 'deleted', or 'all'
+                   If not provided, falls back to include_deleted for backward compatibility
+        """
+        query = MedicalRecordService._patient_records_query(
+            db, clinic_id, patient_id, include_deleted, status
+        )
+        return query.count()
+
+    @staticmethod
+    def list_patient_record_summaries(
+        db: Session,
+        clinic_id: int,
+        patient_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_deleted: bool = False,
+        status: Optional[str] = None
+    ) -> List[Tuple[MedicalRecord, int]]:
+        """
+        List lightweight record summaries for list views.
+
+        The template_snapshot and values JSONB columns are deferred (and raise if
+        accessed) so they are only loaded when a single record is opened. Photo
+        counts come from an aggregate subquery instead of loading the photos.
+
+        Returns:
+            List of (record, photo_count) tuples, newest first.
+        """
+        photo_counts = db.query(
+            PatientPhoto.medical_record_id.label('medical_record_id'),
+            func.count(PatientPhoto.id).label('photo_count')
+        ).filter(
+            PatientPhoto.clinic_id == clinic_id,
+            PatientPhoto.patient_id == patient_id,
+            PatientPhoto.medical_record_id.isnot(None),
+            PatientPhoto.is_deleted == False
+        ).group_by(PatientPhoto.medical_record_id).subquery()
+
+        query = MedicalRecordService._patient_records_query(
+            db, clinic_id, patient_id, include_deleted, status
+        ).add_columns(
+            func.coalesce(photo_counts.c.photo_count, 0)
+        ).outerjoin(
+            photo_counts, photo_counts.c.medical_record_id == MedicalRecord.id
+        ).options(
+            defer(MedicalRecord.template_snapshot, raiseload=True),
+            defer(MedicalRecord.values, raiseload=True),
+            # Many-to-one joins only: one row per record
+            joinedload(MedicalRecord.appointment).joinedload(Appointment.calendar_event),
+            joinedload(MedicalRecord.appointment).joinedload(Appointment.appointment_type),
+            joinedload(MedicalRecord.template).load_only(
+                MedicalRecordTemplate.id, MedicalRecordTemplate.is_patient_form
+            )
+        )
+
+        rows = query.order_by(desc(MedicalRecord.created_at)).offset(skip).limit(limit).all()
+        return [(record, int(photo_count)) for record, photo_count in rows]
+
+    @staticmethod
+    def _patient_records_query(
+        db: Session,
+        clinic_id: int,
+        patient_id: int,
+        include_deleted: bool,
+        status: Optional[str]
+    ) -> Query[MedicalRecord]:
+        """
+        Base query for a patient's records, filtered by deletion status.
+
         Args:
             status: Filter by record status - 'active', 'deleted', or 'all'
                    If not provided, falls back to include_deleted for backward compatibility
@@ -212,7 +268,7 @@ class MedicalRecordService:
             if not include_deleted:
                 query = query.filter(MedicalRecord.is_deleted == False)
         
-        return query.count()
+        return query
 
     @staticmethod
     def update_record(
@@ -221,12 +277,23 @@ class MedicalRecordService:
         clinic_id: int,
         version: int,
         values: Any = MISSING,
+        values_patch: Any = MISSING,
         photo_ids: Any = MISSING,
         appointment_id: Any = MISSING,
         is_submitted: Any = MISSING,
         patient_last_edited_at: Any = MISSING,
         updated_by_user_id: Optional[int] = None
     ) -> MedicalRecord:
+        """
+        Update a record under the optimistic-lock version check.
+
+        `values` replaces the whole document, while `values_patch` is a JSON
+        Merge Patch (RFC 7396) applied to the stored values, so autosave only
+        has to send the fields that changed. Only one of the two may be given.
+        """
+        if values is not MISSING and values_patch is not MISSING:
+            raise ValueError("Provide either values or values_patch, not both")
+
         record = MedicalRecordService.get_record(db, record_id, clinic_id)
         if not record:
             raise HTTPException(
@@ -257,6 +324,13 @@ class MedicalRecordService:
 
         if values is not MISSING:
             record.values = values
+        if values_patch is not MISSING:
+            if not isinstance(values_patch, dict):
+                raise ValueError("values_patch must be an object")
+            patched_values = apply_merge_patch(record.values or {}, values_patch)
+            # Skip the JSONB rewrite entirely when the patch is a no-op
+            if patched_values != record.values:
+                record.values = patched_values
         if appointment_id is not MISSING:
             # Validate appointment if changing
             if appointment_id is not None and appointment_id != record.appointment_id:
@@ -7,7 +7,8 @@ before or after appointments based on appointment type configuration.
 
 import logging
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Dict, List, Literal, Optional, Tuple, cast as type_cast
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import cast, String
 
 from models import (
@@ -206,51 +207,10 @@ class PatientFormSchedulerService:
                     )
                     continue
                 
-                # Determine reference time based on timing_type
-                reference_time = start_datetime if config.timing_type == 'before' else end_datetime
-                
-                # Cast timing_type and timing_mode to expected literal types for type safety
-                from typing import Literal, cast as type_cast
-                timing_type = type_cast(Literal['before', 'after'], config.timing_type)
-                timing_mode = type_cast(Literal['hours', 'specific_time'], config.timing_mode)
-                
-                # Calculate scheduled time
-                scheduled_time = calculate_scheduled_time(
-                    reference_time,
-                    timing_type,
-                    timing_mode,
-                    config.hours,
-                    config.days,
-                    config.time_of_day
+                scheduled_time, should_send_immediately = PatientFormSchedulerService._plan_patient_form(
+                    appointment, config, start_datetime, end_datetime, current_time
                 )
                 
-                # Handle late booking logic for 'before' timing
-                should_send_immediately = False
-                if config.timing_type == 'before':
-                    if scheduled_time < current_time:
-                        # Check if appointment start time is also in the past (recorded walk-in)
-                        if start_datetime < current_time:
-                            logger.info(
-                                f"Skipping patient form config {config.id} - appointment {appointment.calendar_event_id} "
-                                f"start time is in past (recorded walk-in)"
-                            )
-                            continue
-                        
-                        # Handle based on on_impossible setting
-                        if config.on_impossible == 'skip':
-                            logger.info(
-                                f"Skipping patient form config {config.id} - scheduled time {scheduled_time} "
-                                f"is in past and on_impossible='skip'"
-                            )
-                            continue
-                        elif config.on_impossible == 'send_immediately':
-                            # Send immediately (synchronously)
-                            should_send_immediately = True
-                            logger.info(
-                                f"Will send patient form config {config.id} immediately "
-                                f"(scheduled time {scheduled_time} is in past)"
-                            )
-                
                 # Send immediately if needed
                 if should_send_immediately:
                     try:
@@ -266,36 +226,12 @@ class PatientFormSchedulerService:
                         )
                     continue  # Don't schedule if sent immediately
                 
-                # Validate scheduled time is not in past (for 'after' timing or adjusted 'before' timing)
-                if scheduled_time < current_time:
-                    logger.warning(
-                        f"Skipping patient form config {config.id} - scheduled time {scheduled_time} is in past"
-                    )
+                if scheduled_time is None:
                     continue
                 
-                # Get template for message
-                message_template = template.message_template or "請填寫{模板名稱}"
-                
-                # Create scheduled message record
-                scheduled = ScheduledLineMessage(
-                    recipient_type='patient',
-                    recipient_line_user_id=line_user.line_user_id,
-                    clinic_id=appointment.patient.clinic_id,
-                    message_type='patient_form',
-                    message_template=message_template,
-                    message_context={
-                        'appointment_id': appointment.calendar_event_id,
-                        'patient_form_config_id': config.id,
-                        'medical_record_template_id': config.medical_record_template_id
-                    },
-                    scheduled_send_time=scheduled_time,
-                    status='pending'
-                )
-                db.add(scheduled)
-                logger.debug(
-                    f"Scheduled patient form config {config.id} for appointment {appointment.calendar_event_id} "
-                    f"at {scheduled_time}"
-                )
+                db.add(PatientFormSchedulerService._build_patient_form_message(
+                    appointment, config, line_user.line_user_id, scheduled_time
+                ))
             except Exception as e:
                 logger.exception(
                     f"Failed to schedule patient form config {config.id} for appointment "
@@ -314,6 +250,205 @@ class PatientFormSchedulerService:
         
         return warnings
 
+    @staticmethod
+    def _plan_patient_form(
+        appointment: Appointment,
+        config: AppointmentTypePatientFormConfig,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        current_time: datetime
+    ) -> Tuple[Optional[datetime], bool]:
+        """
+        Decide when a patient form should be sent for an appointment.
+        
+        Returns:
+            (scheduled_time, send_immediately). scheduled_time is None when the
+            form should be skipped or is sent immediately.
+        """
+        # Determine reference time based on timing_type
+        reference_time = start_datetime if config.timing_type == 'before' else end_datetime
+        
+        # Cast timing_type and timing_mode to expected literal types for type safety
+        timing_type = type_cast(Literal['before', 'after'], config.timing_type)
+        timing_mode = type_cast(Literal['hours', 'specific_time'], config.timing_mode)
+        
+        # Calculate scheduled time
+        scheduled_time = calculate_scheduled_time(
+            reference_time,
+            timing_type,
+            timing_mode,
+            config.hours,
+            config.days,
+            config.time_of_day
+        )
+        
+        # Handle late booking logic for 'before' timing
+        if config.timing_type == 'before':
+            if scheduled_time < current_time:
+                # Check if appointment start time is also in the past (recorded walk-in)
+                if start_datetime < current_time:
+                    logger.info(
+                        f"Skipping patient form config {config.id} - appointment {appointment.calendar_event_id} "
+                        f"start time is in past (recorded walk-in)"
+                    )
+                    return None, False
+                
+                # Handle based on on_impossible setting
+                if config.on_impossible == 'skip':
+                    logger.info(
+                        f"Skipping patient form config {config.id} - scheduled time {scheduled_time} "
+                        f"is in past and on_impossible='skip'"
+                    )
+                    return None, False
+                elif config.on_impossible == 'send_immediately':
+                    logger.info(
+                        f"Will send patient form config {config.id} immediately "
+                        f"(scheduled time {scheduled_time} is in past)"
+                    )
+                    return None, True
+        
+        # Validate scheduled time is not in past (for 'after' timing or adjusted 'before' timing)
+        if scheduled_time < current_time:
+            logger.warning(
+                f"Skipping patient form config {config.id} - scheduled time {scheduled_time} is in past"
+            )
+            return None, False
+        
+        return scheduled_time, False
+
+    @staticmethod
+    def _build_patient_form_message(
+        appointment: Appointment,
+        config: AppointmentTypePatientFormConfig,
+        recipient_line_user_id: str,
+        scheduled_time: datetime
+    ) -> ScheduledLineMessage:
+        """Build (but do not add) the scheduled message for one patient form."""
+        # Get template for message
+        message_template = config.medical_record_template.message_template or "請填寫{模板名稱}"
+        
+        logger.debug(
+            f"Scheduled patient form config {config.id} for appointment {appointment.calendar_event_id} "
+            f"at {scheduled_time}"
+        )
+        return ScheduledLineMessage(
+            recipient_type='patient',
+            recipient_line_user_id=recipient_line_user_id,
+            clinic_id=appointment.patient.clinic_id,
+            message_type='patient_form',
+            message_template=message_template,
+            message_context={
+                'appointment_id': appointment.calendar_event_id,
+                'patient_form_config_id': config.id,
+                'medical_record_template_id': config.medical_record_template_id
+            },
+            scheduled_send_time=scheduled_time,
+            status='pending'
+        )
+
+    @staticmethod
+    def schedule_patient_forms_batch(
+        db: Session,
+        appointments: List[Appointment]
+    ) -> List[Tuple[Appointment, AppointmentTypePatientFormConfig]]:
+        """
+        Schedule patient forms for several new appointments at once.
+        
+        Configurations are loaded with one query and every scheduled message is
+        added to the session in a single batch. New appointments cannot have a
+        medical record yet, so the duplicate check is skipped. Nothing is committed, and forms
+        that must be sent immediately are not sent here: they are returned so the
+        caller can pass them to send_patient_forms_immediately after committing.
+        
+        Args:
+            db: Database session
+            appointments: Newly created appointments (calendar_event and patient loaded)
+            
+        Returns:
+            (appointment, config) pairs that should be sent immediately
+        """
+        immediate: List[Tuple[Appointment, AppointmentTypePatientFormConfig]] = []
+        if not appointments:
+            return immediate
+        
+        appointment_type_ids = {a.appointment_type_id for a in appointments}
+        configs_by_type: Dict[int, List[AppointmentTypePatientFormConfig]] = {
+            type_id: [] for type_id in appointment_type_ids
+        }
+        for config in db.query(AppointmentTypePatientFormConfig).options(
+            joinedload(AppointmentTypePatientFormConfig.medical_record_template)
+        ).filter(
+            AppointmentTypePatientFormConfig.appointment_type_id.in_(appointment_type_ids),
+            AppointmentTypePatientFormConfig.is_enabled == True
+        ).order_by(AppointmentTypePatientFormConfig.display_order).all():
+            configs_by_type[config.appointment_type_id].append(config)
+        
+        current_time = taiwan_now()
+        scheduled_messages: List[ScheduledLineMessage] = []
+        for appointment in appointments:
+            configs = configs_by_type.get(appointment.appointment_type_id)
+            line_user = appointment.patient.line_user
+            if not configs or not line_user:
+                continue
+            
+            start_datetime = ensure_taiwan(datetime.combine(
+                appointment.calendar_event.date,
+                appointment.calendar_event.start_time
+            ))
+            if start_datetime is None:
+                raise ValueError("Failed to ensure timezone for start_datetime")
+            end_datetime = start_datetime + timedelta(
+                minutes=appointment.appointment_type.duration_minutes
+            )
+            
+            for config in configs:
+                try:
+                    scheduled_time, should_send_immediately = PatientFormSchedulerService._plan_patient_form(
+                        appointment, config, start_datetime, end_datetime, current_time
+                    )
+                    if should_send_immediately:
+                        immediate.append((appointment, config))
+                    elif scheduled_time is not None:
+                        scheduled_messages.append(PatientFormSchedulerService._build_patient_form_message(
+                            appointment, config, line_user.line_user_id, scheduled_time
+                        ))
+                except Exception as e:
+                    logger.exception(
+                        f"Failed to schedule patient form config {config.id} for appointment "
+                        f"{appointment.calendar_event_id}: {e}"
+                    )
+        
+        db.add_all(scheduled_messages)
+        return immediate
+
+    @staticmethod
+    def send_patient_forms_immediately(
+        db: Session,
+        pending: List[Tuple[Appointment, AppointmentTypePatientFormConfig]]
+    ) -> list[str]:
+        """
+        Send the forms returned by schedule_patient_forms_batch.
+        
+        Must be called after the appointments are committed.
+        
+        Returns:
+            List of warning messages for forms that failed to send
+        """
+        warnings: list[str] = []
+        for appointment, config in pending:
+            template = config.medical_record_template
+            try:
+                PatientFormSchedulerService._send_patient_form_immediately(
+                    db, appointment, config, template
+                )
+            except Exception as e:
+                warnings.append(f"無法發送病患表單 '{template.name}': {str(e)}")
+                logger.warning(
+                    f"Failed to send patient form immediately for config {config.id}: {e}",
+                    exc_info=True
+                )
+        return warnings
+
     @staticmethod
     def cancel_pending_patient_forms(db: Session, appointment_id: int) -> None:
         """
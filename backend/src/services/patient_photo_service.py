@@ -1,17 +1,46 @@
 import boto3 # type: ignore
 import hashlib
 import io
-from typing import List, Optional, Tuple, Any
+import logging
+import tempfile
+import time
+import uuid
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Any
 from datetime import datetime, timezone
 from PIL import Image, ImageOps
 import pillow_heif # type: ignore
+from botocore.exceptions import ClientError # type: ignore
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
 
 from core.config import S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION
-from models.patient_photo import PatientPhoto
+from core.constants import (
+    PHOTO_UPLOAD_MAX_SIZE_BYTES,
+    PHOTO_UPLOAD_CHUNK_SIZE_BYTES,
+    PHOTO_UPLOAD_SPOOL_MAX_MEMORY_BYTES,
+    PHOTO_DIRECT_UPLOAD_URL_EXPIRY_SECONDS,
+    PHOTO_PROCESSING_BATCH_SIZE,
+    PHOTO_PROCESSING_MAX_ATTEMPTS,
+    PHOTO_URL_CACHE_MAX_ENTRIES,
+    PHOTO_URL_CACHE_BUCKET_FRACTION,
+)
+from models.patient_photo import (
+    PatientPhoto,
+    PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD,
+    PHOTO_UPLOAD_STATUS_PROCESSING,
+    PHOTO_UPLOAD_STATUS_READY,
+    PHOTO_UPLOAD_STATUS_FAILED,
+)
 from models.medical_record import MedicalRecord
 from models.patient import Patient
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Presigned GET URLs shared across requests; entries expire with their expiry bucket
+_presigned_url_cache: TTLCache[Tuple[str, str, int, int], str] = TTLCache(
+    max_entries=PHOTO_URL_CACHE_MAX_ENTRIES, ttl_seconds=60
+)
 
 # Register HEIF opener
 pillow_heif.register_heif_opener() # type: ignore
@@ -29,6 +58,84 @@ class PatientPhotoService:
     def _calculate_content_hash(self, file_content: bytes) -> str:
         return hashlib.sha256(file_content).hexdigest()
 
+    def _spool_upload(self, file: UploadFile) -> Tuple[IO[bytes], str, int]:
+        """Stream a multipart upload into a spooled temp file (see _spool_stream)."""
+        return self._spool_stream(file.file)
+
+    def _spool_stream(self, stream: Any) -> Tuple[IO[bytes], str, int]:
+        """
+        Stream bytes into a spooled temp file, hashing chunks as they arrive.
+
+        Only one chunk plus the spool's in-memory threshold is held in RAM; larger
+        uploads roll over to disk. Uploads above PHOTO_UPLOAD_MAX_SIZE_BYTES are
+        rejected as soon as the cap is crossed.
+
+        Returns:
+            Tuple of (spooled file positioned at 0, sha256 hex digest, size in bytes).
+            The caller is responsible for closing the spooled file.
+        """
+        hasher = hashlib.sha256()
+        spool = tempfile.SpooledTemporaryFile(max_size=PHOTO_UPLOAD_SPOOL_MAX_MEMORY_BYTES)
+        size_bytes = 0
+        try:
+            while True:
+                chunk = stream.read(PHOTO_UPLOAD_CHUNK_SIZE_BYTES)
+                if not chunk:
+                    break
+                size_bytes += len(chunk)
+                if size_bytes > PHOTO_UPLOAD_MAX_SIZE_BYTES:
+                    raise HTTPException(status_code=413, detail="File too large")
+                hasher.update(chunk)
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+
+        spool.seek(0)
+        return spool, hasher.hexdigest(), size_bytes
+
+    def _find_duplicate(self, db: Session, clinic_id: int, content_hash: str) -> Optional[PatientPhoto]:
+        """Find an existing photo in the clinic with the same content, whose objects can be reused."""
+        return db.query(PatientPhoto).filter(
+            PatientPhoto.clinic_id == clinic_id,
+            PatientPhoto.content_hash == content_hash,
+            PatientPhoto.is_deleted == False,
+            PatientPhoto.upload_status == PHOTO_UPLOAD_STATUS_READY
+        ).first()
+
+    def _store_processed_image(self, clinic_id: int, content_hash: str, original_content: bytes) -> Tuple[str, str, int]:
+        """
+        Process an image and upload the processed "original" plus its thumbnail.
+
+        Returns:
+            Tuple of (storage_key, thumbnail_key, stored size in bytes).
+        """
+        # We store the PROCESSED image as the "original" (to save space)
+        processed_content = self._process_image(original_content)
+
+        ext = "jpg" # We convert to JPEG
+        object_name = f"clinic_assets/{clinic_id}/{content_hash}.{ext}"
+        thumbnail_name = f"clinic_assets/{clinic_id}/thumbnails/{content_hash}.jpg"
+
+        # Upload processed "original"
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=object_name,
+            Body=processed_content,
+            ContentType='image/jpeg'
+        )
+
+        # Generate and upload thumbnail
+        thumbnail_content = self._generate_thumbnail(processed_content)
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=thumbnail_name,
+            Body=thumbnail_content,
+            ContentType='image/jpeg'
+        )
+
+        return object_name, thumbnail_name, len(processed_content)
+
     def _generate_thumbnail(self, image_content: bytes, max_size: Tuple[int, int] = (300, 300)) -> bytes:
         try:
             image = Image.open(io.BytesIO(image_content))
@@ -97,22 +204,46 @@ class PatientPhotoService:
         medical_record_id: Optional[int] = None,
         is_pending: Optional[bool] = None
     ) -> PatientPhoto:
-        original_content = file.file.read()
-        content_hash = self._calculate_content_hash(original_content)
-        
         # Verify Patient belongs to Clinic
         patient = db.query(Patient).filter(Patient.id == patient_id).first()
         if not patient:
              raise HTTPException(status_code=404, detail="Patient not found")
         if patient.clinic_id != clinic_id:
              raise HTTPException(status_code=403, detail="Patient does not belong to this clinic")
-        
+
+        # Hash while streaming so duplicates short-circuit before any image decode
+        spool, content_hash, original_size = self._spool_upload(file)
+        with spool:
+            return self._ingest_spooled_upload(
+                db=db,
+                clinic_id=clinic_id,
+                patient_id=patient_id,
+                file=file,
+                spool=spool,
+                content_hash=content_hash,
+                original_size=original_size,
+                uploaded_by_user_id=uploaded_by_user_id,
+                description=description,
+                medical_record_id=medical_record_id,
+                is_pending=is_pending
+            )
+
+    def _ingest_spooled_upload(
+        self,
+        db: Session,
+        clinic_id: int,
+        patient_id: int,
+        file: UploadFile,
+        spool: IO[bytes],
+        content_hash: str,
+        original_size: int,
+        uploaded_by_user_id: Optional[int],
+        description: Optional[str],
+        medical_record_id: Optional[int],
+        is_pending: Optional[bool]
+    ) -> PatientPhoto:
         # Check for duplicates within the same clinic
-        existing_photo = db.query(PatientPhoto).filter(
-            PatientPhoto.clinic_id == clinic_id,
-            PatientPhoto.content_hash == content_hash,
-            PatientPhoto.is_deleted == False
-        ).first()
+        existing_photo = self._find_duplicate(db, clinic_id, content_hash)
 
         # Determine pending state: Pending if linked to record is deferred (wait, if medical_record_id is provided, it's NOT pending?
         # Re-reading requirement: "If medical_record_id is provided: The photo is created with is_pending = true (Staged). It only becomes 'Active' when the record is saved."
@@ -207,7 +338,7 @@ class PatientPhotoService:
                 thumbnail_key=thumbnail_name,
                 content_hash=content_hash,
                 content_type=file.content_type or "application/octet-stream",
-                size_bytes=len(original_content), # Storing original size for record keeping
+                size_bytes=original_size, # Storing original size for record keeping
                 description=description,
                 is_pending=is_pending,
                 uploaded_by_user_id=uploaded_by_user_id
@@ -219,31 +350,10 @@ class PatientPhotoService:
             return photo
 
         # Process Image (Compress/Resize)
-        # We store the PROCESSED image as the "original" (to save space)
-        processed_content = self._process_image(original_content)
-        
-        # Generate keys
+        # Only new content is read back from the spool; size is bounded by the upload cap
         filename = file.filename or "unknown.jpg"
-        ext = "jpg" # We convert to JPEG
-        
-        object_name = f"clinic_assets/{clinic_id}/{content_hash}.{ext}"
-        thumbnail_name = f"clinic_assets/{clinic_id}/thumbnails/{content_hash}.jpg"
-
-        # Upload processed "original"
-        self.s3_client.put_object(
-            Bucket=self.bucket,
-            Key=object_name,
-            Body=processed_content,
-            ContentType='image/jpeg'
-        )
-
-        # Generate and upload thumbnail
-        thumbnail_content = self._generate_thumbnail(processed_content)
-        self.s3_client.put_object(
-            Bucket=self.bucket,
-            Key=thumbnail_name,
-            Body=thumbnail_content,
-            ContentType='image/jpeg'
+        object_name, thumbnail_name, stored_size = self._store_processed_image(
+            clinic_id, content_hash, spool.read()
         )
 
         photo = PatientPhoto(
@@ -255,7 +365,7 @@ class PatientPhotoService:
             thumbnail_key=thumbnail_name,
             content_hash=content_hash,
             content_type='image/jpeg',
-            size_bytes=len(processed_content), # Stored size
+            size_bytes=stored_size, # Stored size
             description=description,
             is_pending=is_pending,
             uploaded_by_user_id=uploaded_by_user_id
@@ -266,6 +376,206 @@ class PatientPhotoService:
         db.refresh(photo)
         return photo
 
+    def create_direct_upload(
+        self,
+        db: Session,
+        clinic_id: int,
+        patient_id: int,
+        filename: str,
+        content_type: str,
+        uploaded_by_user_id: Optional[int] = None,
+        description: Optional[str] = None,
+        medical_record_id: Optional[int] = None,
+        is_pending: Optional[bool] = None
+    ) -> Tuple[PatientPhoto, str]:
+        """
+        Phase 1 of a direct upload: create the photo row and a presigned PUT URL.
+
+        The client PUTs the raw bytes to the staging key, then calls
+        complete_direct_upload. The processing worker generates the stored image
+        and thumbnail; the photo is hidden from galleries until it is ready.
+
+        Returns:
+            Tuple of (photo, presigned PUT URL).
+        """
+        patient = db.query(Patient).filter(Patient.id == patient_id).first()
+        if not patient:
+             raise HTTPException(status_code=404, detail="Patient not found")
+        if patient.clinic_id != clinic_id:
+             raise HTTPException(status_code=403, detail="Patient does not belong to this clinic")
+
+        # Same pending rule as upload_photo
+        if is_pending is None:
+            is_pending = True if medical_record_id else False
+
+        staging_key = f"clinic_assets/{clinic_id}/staging/{uuid.uuid4().hex}"
+
+        photo = PatientPhoto(
+            clinic_id=clinic_id,
+            patient_id=patient_id,
+            medical_record_id=medical_record_id,
+            filename=filename or "unknown.jpg",
+            # Points at the raw object until processing replaces it
+            storage_key=staging_key,
+            staging_key=staging_key,
+            content_type=content_type or "application/octet-stream",
+            size_bytes=0,
+            description=description,
+            is_pending=is_pending,
+            upload_status=PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD,
+            uploaded_by_user_id=uploaded_by_user_id
+        )
+        db.add(photo)
+        db.commit()
+        db.refresh(photo)
+
+        upload_url = self.s3_client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket, 'Key': staging_key, 'ContentType': photo.content_type},
+            ExpiresIn=PHOTO_DIRECT_UPLOAD_URL_EXPIRY_SECONDS
+        )
+        return photo, upload_url
+
+    def complete_direct_upload(self, db: Session, photo_id: int, clinic_id: int) -> PatientPhoto:
+        """
+        Phase 2 of a direct upload: confirm the staged object and queue it for processing.
+
+        Idempotent for photos that are already queued or processed.
+        """
+        photo = db.query(PatientPhoto).filter(
+            PatientPhoto.id == photo_id,
+            PatientPhoto.clinic_id == clinic_id,
+            PatientPhoto.is_deleted == False
+        ).first()
+        if not photo:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        if photo.upload_status != PHOTO_UPLOAD_STATUS_AWAITING_UPLOAD:
+            return photo
+
+        try:
+            head: Any = self.s3_client.head_object(Bucket=self.bucket, Key=photo.staging_key)
+        except ClientError:
+            raise HTTPException(status_code=400, detail="Uploaded file not found")
+
+        size_bytes = int(head.get('ContentLength', 0))
+        if size_bytes > PHOTO_UPLOAD_MAX_SIZE_BYTES:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=photo.staging_key)
+            photo.upload_status = PHOTO_UPLOAD_STATUS_FAILED
+            db.commit()
+            raise HTTPException(status_code=413, detail="File too large")
+
+        photo.size_bytes = size_bytes
+        photo.upload_status = PHOTO_UPLOAD_STATUS_PROCESSING
+        db.commit()
+        db.refresh(photo)
+        return photo
+
+    def process_staged_upload(self, db: Session, photo_id: int) -> Optional[PatientPhoto]:
+        """
+        Generate the stored image and thumbnail for a staged direct upload.
+
+        Locks the row with SKIP LOCKED so concurrent workers never process the
+        same upload twice. Duplicates of existing clinic content reuse the
+        existing objects. The staging object is removed once processed.
+
+        Returns:
+            The processed photo, or None if it was not queued (or is locked by another worker).
+        """
+        photo = db.query(PatientPhoto).filter(
+            PatientPhoto.id == photo_id,
+            PatientPhoto.upload_status == PHOTO_UPLOAD_STATUS_PROCESSING
+        ).with_for_update(skip_locked=True).first()
+        if not photo:
+            return None
+
+        staging_key = photo.staging_key
+        try:
+            obj: Any = self.s3_client.get_object(Bucket=self.bucket, Key=staging_key)
+            spool, content_hash, original_size = self._spool_stream(obj['Body'])
+        except (ClientError, HTTPException) as e:
+            logger.warning(f"Direct upload {photo.id} could not be read from staging: {e}")
+            photo.upload_status = PHOTO_UPLOAD_STATUS_FAILED
+            db.commit()
+            return photo
+
+        with spool:
+            existing_photo = self._find_duplicate(db, photo.clinic_id, content_hash)
+            if existing_photo:
+                photo.storage_key = existing_photo.storage_key
+                photo.thumbnail_key = existing_photo.thumbnail_key
+                photo.size_bytes = original_size # Storing original size for record keeping
+            else:
+                object_name, thumbnail_name, stored_size = self._store_processed_image(
+                    photo.clinic_id, content_hash, spool.read()
+                )
+                photo.storage_key = object_name
+                photo.thumbnail_key = thumbnail_name
+                photo.content_type = 'image/jpeg'
+                photo.size_bytes = stored_size
+
+        photo.content_hash = content_hash
+        photo.staging_key = None
+        photo.upload_status = PHOTO_UPLOAD_STATUS_READY
+        db.commit()
+
+        # Best effort: an orphaned staging object is later removed by S3 garbage collection
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=staging_key)
+        except ClientError as e:
+            logger.warning(f"Failed to delete staging object {staging_key}: {e}")
+
+        db.refresh(photo)
+        return photo
+
+    def process_queued_uploads(self, db: Session, limit: int = PHOTO_PROCESSING_BATCH_SIZE) -> int:
+        """
+        Drain up to `limit` queued direct uploads, oldest first.
+
+        An upload whose processing raises is retried on later runs, and marked
+        failed (for the retention cleanup to remove) after
+        PHOTO_PROCESSING_MAX_ATTEMPTS failed attempts.
+
+        Returns:
+            Number of uploads processed.
+        """
+        queued_ids = [
+            photo_id for (photo_id,) in db.query(PatientPhoto.id).filter(
+                PatientPhoto.upload_status == PHOTO_UPLOAD_STATUS_PROCESSING
+            ).order_by(PatientPhoto.id).limit(limit).all()
+        ]
+
+        processed = 0
+        for photo_id in queued_ids:
+            try:
+                if self.process_staged_upload(db, photo_id):
+                    processed += 1
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Failed to process direct upload {photo_id}: {e}")
+                self._record_failed_processing_attempt(db, photo_id)
+        return processed
+
+    def _record_failed_processing_attempt(self, db: Session, photo_id: int) -> None:
+        """Count a failed processing attempt and give up after PHOTO_PROCESSING_MAX_ATTEMPTS."""
+        try:
+            photo = db.query(PatientPhoto).filter(
+                PatientPhoto.id == photo_id,
+                PatientPhoto.upload_status == PHOTO_UPLOAD_STATUS_PROCESSING
+            ).with_for_update(skip_locked=True).first()
+            if not photo:
+                return
+
+            photo.processing_attempts += 1
+            if photo.processing_attempts >= PHOTO_PROCESSING_MAX_ATTEMPTS:
+                photo.upload_status = PHOTO_UPLOAD_STATUS_FAILED
+                logger.warning(
+                    f"Direct upload {photo_id} failed processing {photo.processing_attempts} times, marking it failed"
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Failed to record processing attempt for direct upload {photo_id}: {e}")
+
     def update_photo(
         self,
         db: Session,
@@ -333,12 +643,39 @@ class PatientPhotoService:
         return photos
 
     def get_photo_url(self, storage_key: str, expiration: int = 3600) -> str:
-        """Generate presigned URL for accessing the photo"""
-        return self.s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': self.bucket, 'Key': storage_key},
-            ExpiresIn=expiration
-        )
+        """Generate presigned URL for accessing the photo (served from the URL cache when possible)"""
+        return self.get_photo_urls([storage_key], expiration)[storage_key]
+
+    def get_photo_urls(self, storage_keys: Iterable[Optional[str]], expiration: int = 3600) -> Dict[str, str]:
+        """
+        Batch-sign presigned GET URLs, keyed by storage key.
+
+        Keys are deduplicated, and signatures are reused from a process-wide
+        cache keyed by (storage_key, expiration, expiry bucket). An expiry bucket
+        is PHOTO_URL_CACHE_BUCKET_FRACTION of `expiration`, so a cached URL always
+        has most of its validity left while repeated gallery loads get identical
+        (browser-cacheable) URLs. None keys are ignored.
+        """
+        bucket_seconds = max(1, expiration // PHOTO_URL_CACHE_BUCKET_FRACTION)
+        now = time.time()
+        expiry_bucket = int(now // bucket_seconds)
+        bucket_remaining = bucket_seconds - (now % bucket_seconds)
+
+        urls: Dict[str, str] = {}
+        for storage_key in storage_keys:
+            if not storage_key or storage_key in urls:
+                continue
+            cache_key = (self.bucket, storage_key, expiration, expiry_bucket)
+            url = _presigned_url_cache.get(cache_key)
+            if url is None:
+                url = self.s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': self.bucket, 'Key': storage_key},
+                    ExpiresIn=expiration
+                )
+                _presigned_url_cache.set(cache_key, url, ttl_seconds=bucket_remaining)
+            urls[storage_key] = url
+        return urls
 
     def get_photo(self, db: Session, photo_id: int, clinic_id: int) -> Optional[PatientPhoto]:
         return db.query(PatientPhoto).filter(
@@ -384,7 +721,9 @@ class PatientPhotoService:
         query = db.query(PatientPhoto).filter(
             PatientPhoto.clinic_id == clinic_id,
             PatientPhoto.patient_id == patient_id,
-            PatientPhoto.is_deleted == False
+            PatientPhoto.is_deleted == False,
+            # Direct uploads stay hidden until the processing worker has finished
+            PatientPhoto.upload_status == PHOTO_UPLOAD_STATUS_READY
         )
         
         if medical_record_id:
@@ -0,0 +1,254 @@
+"""
+Worker pool for rendering receipt PDFs.
+
+WeasyPrint layout is CPU-bound and holds the GIL, so rendering on the API
+worker stalls every other request on that worker. Renders are instead handed
+to a small pool of long-lived processes. Each process builds one PDFService at
+startup (Jinja environment, compiled receipt template, WeasyPrint font
+configuration) and warms it with a throwaway render, so requests only pay for
+the layout of their own receipt.
+
+The pool admits at most PDF_RENDER_WORKERS + PDF_RENDER_MAX_QUEUE renders at a
+time; beyond that callers get PDFRenderQueueFullError instead of piling up.
+Each render is awaited for at most PDF_RENDER_TIMEOUT_SECONDS.
+
+With PDF_RENDER_WORKERS set to 0 renders run on a single thread in the API
+process (still reusing one PDFService), which suits tests and local development.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from core.config import PDF_RENDER_MAX_QUEUE, PDF_RENDER_TIMEOUT_SECONDS, PDF_RENDER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Minimal receipt used to warm a worker (loads fonts and compiles the template)
+WARMUP_RECEIPT_DATA: Dict[str, Any] = {
+    "receipt_number": "0000-00000",
+    "issue_date": "2000-01-01T00:00:00+08:00",
+    "visit_date": "2000-01-01T00:00:00+08:00",
+    "clinic": {"display_name": "診所"},
+    "patient": {"name": "病患"},
+    "items": [{"item_type": "other", "item_name": "項目", "amount": 0, "quantity": 1}],
+    "totals": {"total_amount": 0},
+    "payment_method": "cash",
+}
+
+
+class PDFRenderQueueFullError(Exception):
+    """Raised when the render pool already has the maximum number of pending renders."""
+    pass
+
+
+class PDFRenderTimeoutError(Exception):
+    """Raised when a render does not finish within the configured timeout."""
+    pass
+
+
+# PDFService of the current process: one per worker process, or the
+# in-process instance when the pool is disabled
+_local_pdf_service: Optional[Any] = None
+_local_pdf_service_lock = threading.Lock()
+
+
+def _get_local_pdf_service() -> Any:
+    global _local_pdf_service
+    if _local_pdf_service is None:
+        with _local_pdf_service_lock:
+            if _local_pdf_service is None:
+                from services.pdf_service import PDFService
+                _local_pdf_service = PDFService()
+    return _local_pdf_service
+
+
+def _init_worker() -> None:
+    """Process initializer: build the PDFService and do one warm-up render."""
+    pdf_service = _get_local_pdf_service()
+    try:
+        pdf_service.generate_receipt_pdf(receipt_data=WARMUP_RECEIPT_DATA)
+    except Exception as e:
+        # The worker is still usable; the first real render just pays the warm-up cost
+        logger.warning(f"PDF render worker warm-up failed: {e}")
+
+
+def _render_receipt_pdf(receipt_data: Dict[str, Any], void_info: Optional[Dict[str, Any]]) -> bytes:
+    return _get_local_pdf_service().generate_receipt_pdf(receipt_data=receipt_data, void_info=void_info)
+
+
+class PDFRenderPool:
+    """
+    Bounded pool of warmed WeasyPrint worker processes.
+
+    Worker processes are started lazily on the first render. If a worker dies
+    (e.g. out of memory), the executor is recreated on the next render.
+    """
+
+    def __init__(self, workers: int, max_queue: int, timeout_seconds: float):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        # One slot per running or queued render; released when the render
+        # actually finishes, so a timed-out render still holds its slot
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None and self.workers <= 0:
+                # One thread: the shared PDFService's font configuration is not thread-safe
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render")
+            elif self._executor is None:
+                # spawn: workers must not inherit the API process's DB connections and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+                logger.info(f"Started PDF render pool with {self.workers} workers")
+            return self._executor
+
+    def _reset_executor(self, broken: Executor) -> None:
+        with self._executor_lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, receipt_data: Dict[str, Any], void_info: Optional[Dict[str, Any]]) -> "Future[bytes]":
+        executor = self._get_executor()
+        try:
+            return executor.submit(_render_receipt_pdf, receipt_data, void_info)
+        except BrokenProcessPool:
+            logger.warning("PDF render pool is broken, restarting workers")
+            self._reset_executor(executor)
+            return self._get_executor().submit(_render_receipt_pdf, receipt_data, void_info)
+
+    def submit_receipt_pdf(
+        self,
+        receipt_data: Dict[str, Any],
+        void_info: Optional[Dict[str, Any]] = None,
+        block: bool = False
+    ) -> "Future[bytes]":
+        """
+        Queue a receipt PDF render and return its future.
+
+        Args:
+            receipt_data: Receipt data from JSONB field (immutable snapshot)
+            void_info: Void information from database columns
+            block: Wait for a free slot instead of raising when the pool is
+                full (for background jobs; request handlers should not block)
+
+        Raises:
+            PDFRenderQueueFullError: If not blocking and too many renders are pending
+        """
+        if not self._slots.acquire(blocking=block):
+            raise PDFRenderQueueFullError("Too many receipt PDFs are being rendered")
+
+        try:
+            future = self._submit(receipt_data, void_info)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def render_receipt_pdf(
+        self,
+        receipt_data: Dict[str, Any],
+        void_info: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        Render a receipt PDF on the pool.
+
+        Args:
+            receipt_data: Receipt data from JSONB field (immutable snapshot)
+            void_info: Void information from database columns
+
+        Returns:
+            PDF file content as bytes
+
+        Raises:
+            PDFRenderQueueFullError: If too many renders are already pending
+            PDFRenderTimeoutError: If the render takes longer than the timeout
+            Exception: If PDF generation fails
+        """
+        future = self.submit_receipt_pdf(receipt_data, void_info)
+
+        try:
+            # shield: a timed-out render keeps running (and holding its slot)
+            # instead of being cancelled while a worker is busy with it
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            raise PDFRenderTimeoutError(
+                f"Receipt PDF render exceeded {self.timeout_seconds} seconds"
+            ) from None
+
+    def wait_for_render(self, future: "Future[bytes]") -> bytes:
+        """
+        Block until a render submitted with submit_receipt_pdf finishes.
+
+        Raises:
+            PDFRenderTimeoutError: If the render takes longer than the timeout
+            Exception: If PDF generation fails
+        """
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            raise PDFRenderTimeoutError(
+                f"Receipt PDF render exceeded {self.timeout_seconds} seconds"
+            ) from None
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (pending renders are cancelled)."""
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("PDF render pool stopped")
+
+
+_pool: Optional[PDFRenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_render_pool() -> PDFRenderPool:
+    """Get the process-wide PDF render pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PDFRenderPool(
+                    workers=PDF_RENDER_WORKERS,
+                    max_queue=PDF_RENDER_MAX_QUEUE,
+                    timeout_seconds=PDF_RENDER_TIMEOUT_SECONDS
+                )
+    return _pool
+
+
+def shutdown_pdf_render_pool() -> None:
+    """Stop the process-wide PDF render pool if it was started."""
+    if _pool is not None:
+        _pool.shutdown()
+
+
+def render_receipt_html(
+    receipt_data: Dict[str, Any],
+    void_info: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Render receipt HTML in-process with the shared PDFService.
+
+    Template rendering is cheap compared to PDF layout, so it does not go
+    through the worker pool; it only reuses the compiled template.
+    """
+    return _get_local_pdf_service().generate_receipt_html(receipt_data=receipt_data, void_info=void_info)
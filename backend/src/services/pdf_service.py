@@ -11,6 +11,7 @@ from typing import Dict, Any, Optional
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from weasyprint import HTML  # type: ignore
+from weasyprint.text.fonts import FontConfiguration  # type: ignore
 
 from utils.datetime_utils import parse_datetime_string_to_taiwan
 
@@ -23,6 +24,10 @@ class PDFService:
     
     Uses WeasyPrint to convert HTML templates to PDF, ensuring
     consistency between HTML display and PDF download.
+    
+    An instance holds the Jinja environment (with compiled templates) and the
+    WeasyPrint font configuration, so reusing one instance across renders
+    avoids re-parsing templates and re-loading the @font-face fonts.
     """
     
     def __init__(self):
@@ -65,6 +70,9 @@ class PDFService:
         
         # Get base directory for resolving relative paths (fonts, images)
         self.base_dir = Path(__file__).parent.parent.parent
+        
+        # Fonts loaded through @font-face are registered here and reused by later renders
+        self.font_config = FontConfiguration()
     
     def generate_receipt_pdf(
         self,
@@ -131,7 +139,7 @@ class PDFService:
             pdf_bytes = HTML(
                 string=html_content,
                 base_url=str(self.base_dir)
-            ).write_pdf(metadata=metadata)  # type: ignore[reportUnknownMemberType]
+            ).write_pdf(metadata=metadata, font_config=self.font_config)  # type: ignore[reportUnknownMemberType]
             
             if pdf_bytes is None:
                 raise Exception("PDF generation returned None")
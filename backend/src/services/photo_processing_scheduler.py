@@ -0,0 +1,132 @@
+"""
+Processing worker for direct-to-storage photo uploads.
+
+Clients PUT raw photo bytes straight to a presigned staging key, so API
+workers never handle image data. This scheduler drains the queue of staged
+uploads every few seconds, generating the stored image and thumbnail with
+PatientPhotoService and marking each photo ready.
+"""
+
+import logging
+from typing import Optional
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
+from apscheduler.triggers.interval import IntervalTrigger  # type: ignore
+
+from core.constants import PHOTO_PROCESSING_INTERVAL_SECONDS
+from core.database import get_db_context
+from services.patient_photo_service import PatientPhotoService
+from utils.datetime_utils import TAIWAN_TZ
+
+logger = logging.getLogger(__name__)
+
+# Global singleton instance
+_photo_processing_scheduler: Optional['PhotoProcessingScheduler'] = None
+
+
+class PhotoProcessingScheduler:
+    """
+    Scheduler for processing staged direct uploads.
+
+    Row-level SKIP LOCKED in PatientPhotoService.process_staged_upload keeps
+    multiple API instances from processing the same upload.
+    """
+
+    def __init__(self):
+        """
+        Initialize the photo processing scheduler.
+
+        Note: Database sessions are created fresh for each scheduler run
+        to avoid stale session issues.
+        """
+        self.scheduler = AsyncIOScheduler(timezone=TAIWAN_TZ)
+        self._is_started = False
+
+    async def start_scheduler(self) -> None:
+        """
+        Start the background scheduler for photo processing.
+
+        This should be called during application startup.
+        """
+        if self._is_started:
+            logger.warning("Photo processing scheduler is already started")
+            return
+
+        self.scheduler.add_job(  # type: ignore
+            self._run_processing,
+            IntervalTrigger(seconds=PHOTO_PROCESSING_INTERVAL_SECONDS),
+            id="photo_processing",
+            name="Process staged photo uploads",
+            replace_existing=True,
+            max_instances=1,  # Prevent overlapping runs
+            coalesce=True,
+        )
+
+        self.scheduler.start()
+        self._is_started = True
+        logger.info(f"Photo processing scheduler started (runs every {PHOTO_PROCESSING_INTERVAL_SECONDS}s)")
+
+    async def stop_scheduler(self) -> None:
+        """
+        Stop the background scheduler.
+
+        This should be called during application shutdown.
+        """
+        if self._is_started:
+            self.scheduler.shutdown(wait=True)
+            self._is_started = False
+            logger.info("Photo processing scheduler stopped")
+
+    async def _run_processing(self) -> None:
+        """
+        Drain queued uploads.
+
+        Image decoding and S3 transfers are blocking, so the work runs in a
+        thread pool to keep the event loop responsive.
+        """
+        import asyncio
+        await asyncio.to_thread(self._execute_processing_logic)
+
+    def _execute_processing_logic(self) -> None:
+        """Execute the processing logic (synchronous/blocking operations)."""
+        with get_db_context() as db:
+            try:
+                processed = PatientPhotoService().process_queued_uploads(db)
+                if processed:
+                    logger.info(f"Processed {processed} staged photo uploads")
+            except Exception as e:
+                logger.exception(f"❌ Error during photo processing: {e}")
+                # Don't re-raise - allow scheduler to continue
+
+
+def get_photo_processing_scheduler() -> PhotoProcessingScheduler:
+    """
+    Get the global photo processing scheduler instance.
+
+    Returns:
+        PhotoProcessingScheduler: The global scheduler instance
+    """
+    global _photo_processing_scheduler
+    if _photo_processing_scheduler is None:
+        _photo_processing_scheduler = PhotoProcessingScheduler()
+    return _photo_processing_scheduler
+
+
+async def start_photo_processing_scheduler() -> None:
+    """
+    Start the global photo processing scheduler.
+
+    This should be called during application startup.
+    """
+    scheduler = get_photo_processing_scheduler()
+    await scheduler.start_scheduler()
+
+
+async def stop_photo_processing_scheduler() -> None:
+    """
+    Stop the global photo processing scheduler.
+
+    This should be called during application shutdown.
+    """
+    global _photo_processing_scheduler
+    if _photo_processing_scheduler:
+        await _photo_processing_scheduler.stop_scheduler()
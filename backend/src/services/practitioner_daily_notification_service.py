@@ -6,27 +6,67 @@ appointments for the next day. Notifications are sent via LINE messaging
 and scheduled using APScheduler.
 """
 
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 from apscheduler.triggers.cron import CronTrigger  # type: ignore
-from sqlalchemy import or_
+from sqlalchemy import Date, Integer, and_, column, or_, values
 from sqlalchemy.orm import Session, joinedload
 
+from core.config import DAILY_NOTIFICATION_CONCURRENCY, LINE_PUSH_RATE_LIMIT_PER_CHANNEL
 from core.database import get_db_context
 from models.appointment import Appointment
 from models.appointment_type import AppointmentType
 from models.calendar_event import CalendarEvent
+from models.line_push_message import LinePushMessage
 from models.user_clinic_association import UserClinicAssociation
+from services.admin_daily_reminder_service import LINE_MESSAGE_TARGET_CHARS
 from services.line_service import LINEService
+from utils.clinic_directory import ClinicDirectory
 from utils.datetime_utils import taiwan_now, TAIWAN_TZ
 from utils.daily_notification_message_builder import DailyNotificationMessageBuilder
+from utils.daily_notification_schedule import (
+    get_next_day_notification_config,
+    next_day_notification_hour_condition,
+)
+from utils.rate_limiter import KeyedRateLimiter
 from core.constants import MISFIRE_GRACE_TIME_SECONDS
 
 logger = logging.getLogger(__name__)
 
+PRACTITIONER_DAILY_NOTIFICATION_LABELS = {
+    'recipient_type': 'practitioner',
+    'event_type': 'daily_appointment_reminder',
+    'trigger_source': 'system_triggered',
+    'notification_context': 'daily_summary'
+}
+
+
+@dataclass
+class DailyNotificationRunStats:
+    """Counts and timings of one hourly notification run."""
+    due: int = 0
+    sent: int = 0
+    messages: int = 0
+    no_appointments: int = 0
+    skipped: int = 0
+    failed: int = 0
+    query_seconds: float = 0.0
+    send_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.due} due, {self.sent} sent ({self.messages} messages), "
+            f"{self.no_appointments} without appointments, {self.skipped} skipped, {self.failed} failed; "
+            f"query {self.query_seconds:.2f}s, send {self.send_seconds:.2f}s, total {self.total_seconds:.2f}s"
+        )
+
 
 class PractitionerDailyNotificationService:
     """
@@ -51,6 +91,7 @@ class PractitionerDailyNotificationService:
         # All notification times are interpreted as Taiwan time
         self.scheduler = AsyncIOScheduler(timezone=TAIWAN_TZ)
         self._is_started = False
+        self.last_run_stats: Optional[DailyNotificationRunStats] = None
 
     async def start_scheduler(self) -> None:
         """
@@ -99,121 +140,231 @@ class PractitionerDailyNotificationService:
         practitioners who should receive notifications at this time.
         Uses real-time aggregation (hourly check) instead of pre-scheduling.
         
+        The practitioners due this hour are selected with one query and all
+        of their appointments fetched with another. Messages are then built
+        and pushed on worker threads, DAILY_NOTIFICATION_CONCURRENCY
+        practitioners at a time and at most LINE_PUSH_RATE_LIMIT_PER_CHANNEL
+        pushes per second on each clinic's channel. Counts and timings of
+        every run are logged and kept in last_run_stats.
+        
         Uses a fresh database session for each run to avoid stale session issues.
         """
+        stats = DailyNotificationRunStats()
+        run_started = time.perf_counter()
+
         # Use fresh database session for each scheduler run
         with get_db_context() as db:
             try:
                 # Get current time in Taiwan timezone (UTC+8)
                 # All time comparisons are done in Taiwan time
                 current_time = taiwan_now()
-                current_hour = current_time.hour
                 today = current_time.date()
+                start_date = today + timedelta(days=1)
                 
                 logger.info(
                     f"Checking for practitioners needing daily notifications at "
                     f"{current_time.strftime('%H:%M')}"
                 )
 
-                # Get all active practitioner associations
-                # We need to check each practitioner's notification time setting
-                associations = db.query(UserClinicAssociation).filter(
-                    UserClinicAssociation.is_active == True
-                ).options(
-                    joinedload(UserClinicAssociation.user),
-                    joinedload(UserClinicAssociation.clinic)
-                ).all()
-
-                total_sent = 0
-                total_skipped = 0
-
-                for association in associations:
-                    # Check if user is a practitioner
-                    if 'practitioner' not in (association.roles or []):
-                        continue
-                    
-                    # Deduplication: Skip if practitioner is also an admin
-                    # Admin-practitioners receive clinic-wide admin notification instead of personal practitioner reminder
-                    # This prevents duplicate notifications (clinic-wide + personal)
-                    if 'admin' in (association.roles or []):
-                        logger.debug(
-                            f"Practitioner {association.user_id} is also an admin in clinic {association.clinic_id}, "
-                            f"skipping personal practitioner reminder (will receive clinic-wide admin reminder instead)"
-                        )
-                        continue
-
-                    # Parse notification time (interpreted as Taiwan time, e.g., "21:00" = 9 PM)
-                    try:
-                        settings = association.get_validated_settings()
-                        notification_time_str = settings.next_day_notification_time
-                        reminder_days_ahead = settings.reminder_days_ahead
-                    except Exception as e:
-                        logger.warning(f"Error getting settings for association {association.id}: {e}, using defaults (21:00, 1 day)")
-                        notification_time_str = "21:00"
-                        reminder_days_ahead = 1
-
-                    # Parse notification hour
-                    try:
-                        notification_hour, _ = map(int, notification_time_str.split(':'))
-                    except (ValueError, AttributeError):
-                        logger.warning(
-                            f"Invalid notification time format '{notification_time_str}' for association {association.id}, "
-                            f"using default 21:00"
-                        )
-                        notification_hour = 21
-
-                    # Check if it's time to send notification for this practitioner
-                    # Compare current Taiwan time hour with notification hour (both in Taiwan timezone)
-                    # Send if current hour matches notification hour (within the hour window)
-                    if current_hour != notification_hour:
-                        continue
-                    
-                    logger.debug(
-                        f"Practitioner {association.user_id} notification time matches: "
-                        f"{notification_hour}:00 (current: {current_hour}:00)"
-                    )
+                due_practitioners = self._get_due_practitioners(db, current_time.hour)
+                stats.due = len(due_practitioners)
 
+                # (association, its LINE user ID, end of its date range) for practitioners we can message
+                recipients: List[Tuple[UserClinicAssociation, str, date]] = []
+                for association, reminder_days_ahead in due_practitioners:
                     # Check if practitioner has LINE account linked for this clinic
-                    if not association.line_user_id:
+                    line_user_id = association.line_user_id
+                    if not line_user_id:
                         logger.debug(f"Practitioner {association.user_id} has no LINE account linked for clinic {association.clinic_id}, skipping")
-                        total_skipped += 1
+                        stats.skipped += 1
                         continue
 
                     # Check if clinic has LINE credentials
                     if not association.clinic.line_channel_secret or not association.clinic.line_channel_access_token:
                         logger.warning(f"Clinic {association.clinic_id} has no LINE credentials, skipping")
-                        total_skipped += 1
+                        stats.skipped += 1
                         continue
 
-                    # Get appointments for this practitioner for the date range
-                    start_date = today + timedelta(days=1)
-                    end_date = today + timedelta(days=reminder_days_ahead)
-                    
-                    appointments = self._get_practitioner_appointments_for_date_range(
-                        db, association.user_id, association.clinic_id, start_date, end_date
-                    )
+                    recipients.append((association, line_user_id, today + timedelta(days=reminder_days_ahead)))
+
+                appointments_by_practitioner = self._get_appointments_for_practitioners(
+                    db, start_date, [
+                        (association.clinic_id, association.user_id, end_date)
+                        for association, _, end_date in recipients
+                    ]
+                )
+                directories = ClinicDirectory.for_clinics(
+                    db, {clinic_id for clinic_id, _ in appointments_by_practitioner}
+                )
+                stats.query_seconds = time.perf_counter() - run_started
 
+                semaphore = asyncio.Semaphore(DAILY_NOTIFICATION_CONCURRENCY)
+                rate_limiter = KeyedRateLimiter(LINE_PUSH_RATE_LIMIT_PER_CHANNEL)
+                line_services: Dict[int, LINEService] = {}
+                push_records: List[LinePushMessage] = []
+
+                async def notify(association: UserClinicAssociation, line_user_id: str, end_date: date) -> None:
+                    appointments = appointments_by_practitioner.get((association.clinic_id, association.user_id))
                     if not appointments:
                         logger.debug(f"No appointments found for practitioner {association.user_id} from {start_date} to {end_date}")
-                        total_skipped += 1
-                        continue
+                        stats.no_appointments += 1
+                        return
+
+                    clinic = association.clinic
+                    line_service = line_services.get(clinic.id)
+                    if line_service is None:
+                        line_service = LINEService(
+                            channel_secret=clinic.line_channel_secret,
+                            channel_access_token=clinic.line_channel_access_token
+                        )
+                        line_services[clinic.id] = line_service
+
+                    async with semaphore:
+                        message_ids, succeeded = await asyncio.to_thread(
+                            self._send_practitioner_digest,
+                            association, line_user_id, line_service, rate_limiter, directories[clinic.id],
+                            appointments, start_date, end_date
+                        )
 
-                    # Send notification
-                    if await self._send_notification_for_practitioner(
-                        db, association, appointments, start_date, end_date
-                    ):
-                        total_sent += 1
+                    push_records.extend(
+                        LinePushMessage.from_labels(
+                            line_user_id, clinic.id, message_id, PRACTITIONER_DAILY_NOTIFICATION_LABELS
+                        )
+                        for message_id in message_ids
+                    )
+                    stats.messages += len(message_ids)
+                    if succeeded:
+                        stats.sent += 1
                     else:
-                        total_skipped += 1
+                        stats.failed += 1
+
+                send_started = time.perf_counter()
+                await asyncio.gather(*(
+                    notify(association, line_user_id, end_date)
+                    for association, line_user_id, end_date in recipients
+                ))
+                stats.send_seconds = time.perf_counter() - send_started
 
-                if total_sent == 0 and total_skipped == 0:
-                    logger.debug("No practitioners found needing daily notifications at this time")
-                else:
-                    logger.info(f"Successfully sent {total_sent} daily notification(s), skipped {total_skipped}")
+                # Track all pushes of the run with one commit (best effort, like LINEService)
+                if push_records:
+                    try:
+                        db.add_all(push_records)
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        logger.warning(f"Failed to track {len(push_records)} daily notification push message(s): {e}")
 
             except Exception as e:
                 logger.exception(f"Error sending daily notifications: {e}")
 
+        stats.total_seconds = time.perf_counter() - run_started
+        self.last_run_stats = stats
+
+        if stats.sent == 0 and stats.failed == 0 and stats.skipped == 0 and stats.no_appointments == 0:
+            logger.debug("No practitioners found needing daily notifications at this time")
+        else:
+            logger.info(f"Practitioner daily notification run: {stats.summary()}")
+
+    def _get_due_practitioners(
+        self,
+        db: Session,
+        current_hour: int
+    ) -> List[Tuple[UserClinicAssociation, int]]:
+        """
+        Get the practitioners whose notification time falls in the current hour.
+        
+        Practitioners who are also admins are excluded: they receive the
+        clinic-wide admin notification instead of a personal reminder.
+        
+        Args:
+            db: Database session
+            current_hour: Current hour in Taiwan time
+            
+        Returns:
+            List of (association, reminder_days_ahead), with user and clinic loaded
+        """
+        candidates = db.query(UserClinicAssociation).filter(
+            UserClinicAssociation.is_active == True,
+            UserClinicAssociation.roles.contains(['practitioner']),
+            ~UserClinicAssociation.roles.contains(['admin']),
+            next_day_notification_hour_condition(current_hour)
+        ).options(
+            joinedload(UserClinicAssociation.user),
+            joinedload(UserClinicAssociation.clinic)
+        ).order_by(UserClinicAssociation.clinic_id, UserClinicAssociation.id).all()
+
+        due_practitioners: List[Tuple[UserClinicAssociation, int]] = []
+        for association in candidates:
+            notification_hour, reminder_days_ahead = get_next_day_notification_config(association)
+            if notification_hour != current_hour:
+                continue
+            logger.debug(
+                f"Practitioner {association.user_id} notification time matches: "
+                f"{notification_hour}:00 (current: {current_hour}:00)"
+            )
+            due_practitioners.append((association, reminder_days_ahead))
+
+        return due_practitioners
+
+    def _get_appointments_for_practitioners(
+        self,
+        db: Session,
+        start_date: date,
+        ranges: List[Tuple[int, int, date]]
+    ) -> Dict[Tuple[int, int], List[Appointment]]:
+        """
+        Get confirmed appointments for many practitioners with one joined query.
+        
+        Same filtering as _get_practitioner_appointments_for_date_range.
+        
+        Args:
+            db: Database session
+            start_date: Start date shared by all ranges
+            ranges: (clinic_id, practitioner_id, end_date) for each practitioner
+            
+        Returns:
+            Dictionary mapping (clinic_id, practitioner_id) to appointments,
+            ordered by date and start time
+        """
+        if not ranges:
+            return {}
+
+        practitioner_ranges = values(
+            column('clinic_id', Integer),
+            column('user_id', Integer),
+            column('end_date', Date),
+            name='practitioner_ranges'
+        ).data(ranges)
+
+        appointments = db.query(Appointment).join(CalendarEvent).join(
+            practitioner_ranges,
+            and_(
+                CalendarEvent.clinic_id == practitioner_ranges.c.clinic_id,
+                CalendarEvent.user_id == practitioner_ranges.c.user_id
+            )
+        ).outerjoin(
+            AppointmentType, Appointment.appointment_type_id == AppointmentType.id
+        ).filter(
+            Appointment.status == "confirmed",
+            Appointment.is_auto_assigned == False,  # Practitioners don't see auto-assigned appointments
+            CalendarEvent.date >= start_date,
+            CalendarEvent.date <= practitioner_ranges.c.end_date,
+            or_(
+                Appointment.appointment_type_id.is_(None),
+                AppointmentType.is_deleted == False
+            )
+        ).options(
+            joinedload(Appointment.patient),
+            joinedload(Appointment.appointment_type),
+            joinedload(Appointment.calendar_event)
+        ).order_by(CalendarEvent.date, CalendarEvent.start_time).all()
+
+        appointments_by_practitioner: Dict[Tuple[int, int], List[Appointment]] = {}
+        for appointment in appointments:
+            key = (appointment.calendar_event.clinic_id, appointment.calendar_event.user_id)
+            appointments_by_practitioner.setdefault(key, []).append(appointment)
+        return appointments_by_practitioner
+
     def _get_practitioner_appointments_for_date_range(
         self,
         db: Session,
@@ -260,168 +411,171 @@ class PractitionerDailyNotificationService:
         
         return appointments
 
-    async def _send_notification_for_practitioner(
+    def _send_practitioner_digest(
         self,
-        db: Session,
         association: UserClinicAssociation,
+        line_user_id: str,
+        line_service: LINEService,
+        rate_limiter: KeyedRateLimiter,
+        directory: ClinicDirectory,
         appointments: List[Appointment],
         start_date: date,
         end_date: date
-    ) -> bool:
+    ) -> Tuple[List[Optional[str]], bool]:
         """
-        Send daily notification to a practitioner about their appointments.
+        Build and push a practitioner's daily notification (runs on a worker thread).
+        
+        Appointments and practitioner names are preloaded, so this does not
+        touch the database; the caller tracks the pushed messages.
         
         Args:
-            db: Database session
             association: UserClinicAssociation for the practitioner
-            appointments: List of appointments for the range
+            line_user_id: The practitioner's LINE user ID for this clinic
+            line_service: LINE service of the practitioner's clinic
+            rate_limiter: Per-channel push rate limiter (keyed by clinic ID)
+            directory: Preloaded directory of the practitioner's clinic
+            appointments: List of appointments for the range, ordered by date
             start_date: Start date of the range
             end_date: End date of the range
             
         Returns:
-            True if notification was sent successfully, False otherwise
+            (LINE message IDs of the parts pushed, whether all parts were pushed)
         """
+        message_ids: List[Optional[str]] = []
         try:
-            clinic = association.clinic
-            practitioner = association.user
-
-            # Build notification message using shared utilities
-            # Get practitioner name for section header
-            from utils.practitioner_helpers import get_practitioner_display_name_with_title
-            practitioner_name = get_practitioner_display_name_with_title(
-                db, practitioner.id, clinic.id
+            practitioner_name = directory.practitioner_display_name_with_title(association.user_id)
+            messages = self._build_practitioner_messages(
+                practitioner_name, appointments, start_date, end_date
+            )
+
+            for message in messages:
+                rate_limiter.acquire(association.clinic_id)
+                message_ids.append(line_service.send_text_message(line_user_id, message))
+
+            logger.info(
+                f"Sent daily notification to practitioner {association.user_id} "
+                f"for {len(appointments)} appointment(s) from {start_date} to {end_date}"
+            )
+            return message_ids, True
+
+        except Exception as e:
+            logger.exception(
+                f"Failed to send daily notification to practitioner {association.user_id}: {e}"
             )
+            return message_ids, False
+
+    def _build_practitioner_messages(
+        self,
+        practitioner_name: str,
+        appointments: List[Appointment],
+        start_date: date,
+        end_date: date
+    ) -> List[str]:
+        """
+        Build a practitioner's notification message(s) with splitting if needed.
+        
+        Args:
+            practitioner_name: Practitioner display name with title
+            appointments: List of appointments for the range, ordered by date
+            start_date: Start date of the range
+            end_date: End date of the range
             
-            # Group appointments by date
-            from itertools import groupby
-            # Ensure appointments are sorted by date for groupby
-            appointments.sort(key=lambda a: a.calendar_event.date)
-            appointments_by_date = {
-                d: list(g) for d, g in groupby(appointments, key=lambda a: a.calendar_event.date)
-            }
+        Returns:
+            List of message strings (may be multiple if splitting occurred)
+        """
+        # Group appointments by date
+        appointments_by_date: Dict[date, List[Appointment]] = {}
+        for appointment in appointments:
+            appointments_by_date.setdefault(appointment.calendar_event.date, []).append(appointment)
+
+        # Sort dates for consistent ordering
+        sorted_dates = sorted(appointments_by_date.keys())
+        
+        messages: List[str] = []
+        current_message_parts: List[str] = []
+        current_length = 0
+        
+        for target_date in sorted_dates:
+            date_appointments = appointments_by_date[target_date]
             
-            # Sort dates for consistent ordering
-            sorted_dates = sorted(appointments_by_date.keys())
+            # Build date section header
+            date_header = DailyNotificationMessageBuilder.build_date_section_header(target_date)
             
-            from services.admin_daily_reminder_service import LINE_MESSAGE_TARGET_CHARS
+            # Check if adding date header exceeds limit
+            if current_length + len(date_header) > LINE_MESSAGE_TARGET_CHARS and current_message_parts:
+                messages.append("".join(current_message_parts))
+                current_message_parts = []
+                current_length = 0
+                date_header = DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True)
             
-            messages: List[str] = []
-            current_message_parts: List[str] = []
-            current_length = 0
+            current_message_parts.append(date_header)
+            current_length += len(date_header)
             
-            for target_date in sorted_dates:
-                date_appointments = appointments_by_date[target_date]
-                
-                # Build date section header
-                date_header = DailyNotificationMessageBuilder.build_date_section_header(target_date)
-                
-                # Check if adding date header exceeds limit
-                if current_length + len(date_header) > LINE_MESSAGE_TARGET_CHARS and current_message_parts:
+            # Build practitioner section
+            practitioner_header = DailyNotificationMessageBuilder.build_practitioner_section(
+                practitioner_name, date_appointments, is_clinic_wide=False
+            )
+            
+            appointment_lines: List[str] = []
+            for i, appointment in enumerate(date_appointments, 1):
+                line = DailyNotificationMessageBuilder.build_appointment_line(appointment, i)
+                appointment_lines.append(line)
+            
+            practitioner_text = practitioner_header + "".join(appointment_lines)
+            
+            # Check if adding this practitioner section exceeds limit
+            if current_length + len(practitioner_text) > LINE_MESSAGE_TARGET_CHARS and current_message_parts:
+                # If we already have content, save it and start new message
+                if len(current_message_parts) > 1: # More than just the date header
                     messages.append("".join(current_message_parts))
-                    current_message_parts = []
-                    current_length = 0
-                    date_header = DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True)
-                
-                current_message_parts.append(date_header)
-                current_length += len(date_header)
-                
-                # Build practitioner section
-                practitioner_header = DailyNotificationMessageBuilder.build_practitioner_section(
-                    practitioner_name, date_appointments, is_clinic_wide=False
-                )
+                    current_message_parts = [
+                        DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True)
+                    ]
+                    current_length = sum(len(p) for p in current_message_parts)
                 
-                appointment_lines: List[str] = []
-                for i, appointment in enumerate(date_appointments, 1):
-                    line = DailyNotificationMessageBuilder.build_appointment_line(appointment, i)
-                    appointment_lines.append(line)
+                # Split appointment lines if needed
+                current_message_parts.append(practitioner_header)
+                current_length += len(practitioner_header)
                 
-                practitioner_text = practitioner_header + "".join(appointment_lines)
-                
-                # Check if adding this practitioner section exceeds limit
-                if current_length + len(practitioner_text) > LINE_MESSAGE_TARGET_CHARS and current_message_parts:
-                    # If we already have content, save it and start new message
-                    if len(current_message_parts) > 1: # More than just the date header
+                for line in appointment_lines:
+                    if current_length + len(line) > LINE_MESSAGE_TARGET_CHARS:
                         messages.append("".join(current_message_parts))
                         current_message_parts = [
-                            DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True)
+                            DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True),
+                            f"治療師：{practitioner_name} (續上頁)\n",
+                            f"您有 {len(date_appointments)} 個預約：\n\n"
                         ]
                         current_length = sum(len(p) for p in current_message_parts)
-                    
-                    # Split appointment lines if needed
-                    current_message_parts.append(practitioner_header)
-                    current_length += len(practitioner_header)
-                    
-                    for line in appointment_lines:
-                        if current_length + len(line) > LINE_MESSAGE_TARGET_CHARS:
-                            messages.append("".join(current_message_parts))
-                            current_message_parts = [
-                                DailyNotificationMessageBuilder.build_date_section_header(target_date, is_continuation=True),
-                                f"治療師：{practitioner_name} (續上頁)\n",
-                                f"您有 {len(date_appointments)} 個預約：\n\n"
-                            ]
-                            current_length = sum(len(p) for p in current_message_parts)
-                        current_message_parts.append(line)
-                        current_length += len(line)
-                else:
-                    current_message_parts.append(practitioner_text)
-                    current_length += len(practitioner_text)
-                
-                # Add a separator between days if not the last day
-                if target_date != sorted_dates[-1]:
-                    separator = "--------------------\n\n"
-                    if current_length + len(separator) < LINE_MESSAGE_TARGET_CHARS:
-                        current_message_parts.append(separator)
-                        current_length += len(separator)
-
-            # Add final message
-            if current_message_parts:
-                messages.append("".join(current_message_parts))
-
-            # Add headers to all messages
-            total_parts = len(messages)
-            final_messages: List[str] = []
-            for i, msg in enumerate(messages, 1):
-                header = DailyNotificationMessageBuilder.build_message_header(
-                    start_date, end_date,
-                    is_clinic_wide=False,
-                    part_number=i if total_parts > 1 else None,
-                    total_parts=total_parts if total_parts > 1 else None
-                )
-                final_messages.append(header + msg)
-
-            # Send notification via LINE with labels for tracking
-            line_service = LINEService(
-                channel_secret=clinic.line_channel_secret,
-                channel_access_token=clinic.line_channel_access_token
-            )
-            labels = {
-                'recipient_type': 'practitioner',
-                'event_type': 'daily_appointment_reminder',
-                'trigger_source': 'system_triggered',
-                'notification_context': 'daily_summary'
-            }
+                    current_message_parts.append(line)
+                    current_length += len(line)
+            else:
+                current_message_parts.append(practitioner_text)
+                current_length += len(practitioner_text)
             
-            if association.line_user_id:
-                for message in final_messages:
-                    line_service.send_text_message(
-                        association.line_user_id, 
-                        message,
-                        db=db,
-                        clinic_id=clinic.id,
-                        labels=labels
-                    )
-
-            logger.info(
-                f"Sent daily notification to practitioner {practitioner.id} "
-                f"for {len(appointments)} appointment(s) from {start_date} to {end_date}"
+            # Add a separator between days if not the last day
+            if target_date != sorted_dates[-1]:
+                separator = "--------------------\n\n"
+                if current_length + len(separator) < LINE_MESSAGE_TARGET_CHARS:
+                    current_message_parts.append(separator)
+                    current_length += len(separator)
+
+        # Add final message
+        if current_message_parts:
+            messages.append("".join(current_message_parts))
+
+        # Add headers to all messages
+        total_parts = len(messages)
+        final_messages: List[str] = []
+        for i, msg in enumerate(messages, 1):
+            header = DailyNotificationMessageBuilder.build_message_header(
+                start_date, end_date,
+                is_clinic_wide=False,
+                part_number=i if total_parts > 1 else None,
+                total_parts=total_parts if total_parts > 1 else None
             )
-            return True
+            final_messages.append(header + msg)
 
-        except Exception as e:
-            logger.exception(
-                f"Failed to send daily notification to practitioner {association.user_id}: {e}"
-            )
-            return False
+        return final_messages
 
 
 # Global service instance
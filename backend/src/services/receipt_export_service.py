@@ -0,0 +1,253 @@
+"""
+Bulk receipt export.
+
+Clinics export receipts in bulk (e.g. a month's receipts for their
+accountant) as a ZIP of receipt PDFs. An export runs as a background job:
+
+- Receipts are streamed from the database with yield_per, so only one batch
+  of receipt_data snapshots is held in memory at a time.
+- PDFs come from the render cache when present and are otherwise rendered on
+  the shared PDF render pool, with at most one render in flight per worker.
+- Each PDF is written into a ZIP file on disk as soon as it is rendered.
+
+Memory use is therefore bounded by the batch size and the number of workers,
+not by the number of receipts. Job state (progress, result file) is kept in
+process memory; finished exports are deleted after
+RECEIPT_EXPORT_RETENTION_HOURS.
+"""
+
+import logging
+import shutil
+import threading
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Deque, Dict, List, Literal, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import RECEIPT_EXPORT_DIR, RECEIPT_EXPORT_RETENTION_HOURS
+from core.database import get_db_context
+from models.receipt import Receipt
+from services.pdf_render_pool import get_pdf_render_pool
+from services.receipt_render_cache import get_receipt_render_cache, receipt_render_key
+from services.receipt_service import ReceiptService
+from utils.datetime_utils import TAIWAN_TZ, taiwan_now
+
+logger = logging.getLogger(__name__)
+
+ExportStatus = Literal['pending', 'running', 'completed', 'failed']
+
+# Receipts fetched per database round trip while streaming
+EXPORT_BATCH_SIZE = 50
+
+
+@dataclass
+class ReceiptExportJob:
+    """State of one bulk receipt export."""
+    id: str
+    clinic_id: int
+    requested_by_user_id: int
+    start_date: Optional[date]
+    end_date: Optional[date]
+    receipt_ids: Optional[List[int]]
+    include_voided: bool
+    created_at: datetime
+    status: ExportStatus = 'pending'
+    total: int = 0
+    processed: int = 0
+    failed_receipt_numbers: List[str] = field(default_factory=lambda: [])
+    error: Optional[str] = None
+    finished_at: Optional[datetime] = None
+    file_path: Optional[Path] = None
+
+    @property
+    def download_filename(self) -> str:
+        if self.start_date and self.end_date:
+            return f"receipts_{self.start_date.isoformat()}_{self.end_date.isoformat()}.zip"
+        return f"receipts_{self.created_at.strftime('%Y%m%d%H%M%S')}.zip"
+
+
+_jobs: Dict[str, ReceiptExportJob] = {}
+_jobs_lock = threading.Lock()
+
+
+class ReceiptExportService:
+    """Service for bulk receipt export jobs."""
+
+    @staticmethod
+    def create_job(
+        clinic_id: int,
+        requested_by_user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        receipt_ids: Optional[List[int]] = None,
+        include_voided: bool = True
+    ) -> ReceiptExportJob:
+        """
+        Register a new export job for a clinic.
+
+        Either receipt_ids or both start_date and end_date select the receipts.
+
+        Raises:
+            ValueError: If the selection is invalid or the clinic already has an
+                export in progress
+        """
+        if receipt_ids is None and (start_date is None or end_date is None):
+            raise ValueError("Either receipt_ids or start_date and end_date are required")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+
+        ReceiptExportService.prune_expired_jobs()
+
+        with _jobs_lock:
+            if any(
+                job.clinic_id == clinic_id and job.status in ('pending', 'running')
+                for job in _jobs.values()
+            ):
+                raise ValueError("An export is already in progress for this clinic")
+
+            job = ReceiptExportJob(
+                id=uuid.uuid4().hex,
+                clinic_id=clinic_id,
+                requested_by_user_id=requested_by_user_id,
+                start_date=start_date,
+                end_date=end_date,
+                receipt_ids=receipt_ids,
+                include_voided=include_voided,
+                created_at=taiwan_now()
+            )
+            _jobs[job.id] = job
+        return job
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[ReceiptExportJob]:
+        """Get an export job by ID (None if unknown or expired)."""
+        with _jobs_lock:
+            return _jobs.get(job_id)
+
+    @staticmethod
+    def prune_expired_jobs() -> None:
+        """Forget finished jobs past the retention period and delete their files."""
+        cutoff = taiwan_now() - timedelta(hours=RECEIPT_EXPORT_RETENTION_HOURS)
+        with _jobs_lock:
+            expired = [
+                job for job in _jobs.values()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job in expired:
+                del _jobs[job.id]
+
+        for job in expired:
+            if job.file_path is not None:
+                job.file_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _build_query(db: Session, job: ReceiptExportJob):
+        query = db.query(Receipt).filter(Receipt.clinic_id == job.clinic_id)
+
+        if job.receipt_ids is not None:
+            query = query.filter(Receipt.id.in_(job.receipt_ids))
+        if job.start_date is not None and job.end_date is not None:
+            # Whole days in Taiwan time, by receipt issue date
+            start = datetime.combine(job.start_date, time.min, tzinfo=TAIWAN_TZ)
+            end = datetime.combine(job.end_date + timedelta(days=1), time.min, tzinfo=TAIWAN_TZ)
+            query = query.filter(Receipt.issue_date >= start, Receipt.issue_date < end)
+        if not job.include_voided:
+            query = query.filter(Receipt.is_voided == False)
+
+        return query
+
+    @staticmethod
+    def run_export(db: Session, job: ReceiptExportJob) -> None:
+        """
+        Render the job's receipts into a ZIP file on disk.
+
+        Updates the job's progress as receipts are written. A receipt that
+        fails to render is recorded in failed_receipt_numbers and skipped;
+        anything else fails the whole job.
+        """
+        job.status = 'running'
+        export_dir = Path(RECEIPT_EXPORT_DIR)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        file_path = export_dir / f"{job.id}.zip"
+        partial_path = export_dir / f"{job.id}.zip.partial"
+
+        pool = get_pdf_render_pool()
+        cache = get_receipt_render_cache()
+        max_in_flight = max(pool.workers, 1)
+
+        try:
+            query = ReceiptExportService._build_query(db, job)
+            job.total = query.order_by(None).count()
+
+            # (zip entry name, receipt number, future) in receipt order
+            in_flight: Deque[Tuple[str, str, "Future[bytes]"]] = deque()
+
+            with zipfile.ZipFile(partial_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+
+                def write_oldest() -> None:
+                    entry_name, receipt_number, future = in_flight.popleft()
+                    try:
+                        zf.writestr(entry_name, pool.wait_for_render(future))
+                    except Exception as e:
+                        logger.warning(f"Failed to render receipt {receipt_number} for export {job.id}: {e}")
+                        job.failed_receipt_numbers.append(receipt_number)
+                    job.processed += 1
+
+                receipts = query.order_by(Receipt.issue_date, Receipt.id).yield_per(EXPORT_BATCH_SIZE)
+                for receipt in receipts:
+                    receipt_data = receipt.receipt_data
+                    void_info = ReceiptService.build_render_void_info(db, receipt)
+                    entry_name = f"receipt_{receipt.receipt_number}.pdf"
+
+                    cached = cache.get(receipt_render_key(receipt_data, void_info, 'pdf')) if cache else None
+                    if cached is not None and not in_flight:
+                        zf.writestr(entry_name, cached)
+                        job.processed += 1
+                        continue
+
+                    future: "Future[bytes]"
+                    if cached is not None:
+                        # Keep ZIP entries in receipt order behind pending renders
+                        future = Future()
+                        future.set_result(cached)
+                    else:
+                        future = pool.submit_receipt_pdf(receipt_data, void_info, block=True)
+                    in_flight.append((entry_name, receipt.receipt_number, future))
+
+                    if len(in_flight) >= max_in_flight:
+                        write_oldest()
+
+                while in_flight:
+                    write_oldest()
+
+            shutil.move(str(partial_path), str(file_path))
+            job.file_path = file_path
+            job.status = 'completed'
+            logger.info(
+                f"Receipt export {job.id} for clinic {job.clinic_id} completed: "
+                f"{job.processed} receipts, {len(job.failed_receipt_numbers)} failed"
+            )
+        except Exception as e:
+            logger.exception(f"Receipt export {job.id} for clinic {job.clinic_id} failed: {e}")
+            partial_path.unlink(missing_ok=True)
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = taiwan_now()
+
+    @staticmethod
+    def run_export_job(job_id: str) -> None:
+        """Run an export job with its own database session (background task entry point)."""
+        job = ReceiptExportService.get_job(job_id)
+        if job is None:
+            logger.warning(f"Receipt export {job_id} not found")
+            return
+
+        with get_db_context() as db:
+            ReceiptExportService.run_export(db, job)
@@ -0,0 +1,274 @@
+"""
+Render cache for receipt PDFs and HTML.
+
+receipt_data is an immutable snapshot, so a receipt's rendered output only
+changes when its void status changes or the receipt template is edited. Renders
+are therefore content-addressed: the cache key is a hash of receipt_data,
+void_info, the template version and the output kind. Repeat downloads become a
+file read instead of a Jinja + WeasyPrint layout pass.
+
+Entries live on local disk under RECEIPT_RENDER_CACHE_DIR. The directory is
+bounded by RECEIPT_RENDER_CACHE_MAX_MB; when a write pushes it over the limit,
+the least recently read entries are evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from core.config import RECEIPT_RENDER_CACHE_DIR, RECEIPT_RENDER_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+RenderKind = Literal['pdf', 'html']
+
+# Templates that affect receipt rendering (hashed into every cache key)
+RECEIPT_TEMPLATE_DIR = Path(__file__).parent.parent.parent / "templates" / "receipts"
+
+# Void info used for receipts that are not voided (same shape the endpoints build)
+NOT_VOIDED_INFO: Dict[str, Any] = {"voided": False, "voided_at": None, "voided_by": None, "reason": None}
+
+# After eviction the cache is trimmed to this fraction of its limit, so a burst
+# of writes does not trigger a directory scan on every put
+EVICTION_TARGET_RATIO = 0.9
+
+_template_version: Optional[str] = None
+
+
+def get_receipt_template_version() -> str:
+    """Hash of the receipt template files; editing a template changes every key."""
+    global _template_version
+    if _template_version is None:
+        digest = hashlib.sha256()
+        for path in sorted(RECEIPT_TEMPLATE_DIR.rglob('*')):
+            if path.is_file():
+                digest.update(path.relative_to(RECEIPT_TEMPLATE_DIR).as_posix().encode())
+                digest.update(path.read_bytes())
+        _template_version = digest.hexdigest()[:16]
+    return _template_version
+
+
+def receipt_render_key(
+    receipt_data: Dict[str, Any],
+    void_info: Optional[Dict[str, Any]],
+    kind: RenderKind
+) -> str:
+    """
+    Build the content-addressed cache key for a receipt render.
+
+    Args:
+        receipt_data: Receipt snapshot (receipt.receipt_data)
+        void_info: Void information merged into the template (None means not voided)
+        kind: Output kind ('pdf' or 'html')
+    """
+    payload = json.dumps(
+        {
+            "receipt_data": receipt_data,
+            "void_info": void_info if void_info is not None else NOT_VOIDED_INFO,
+            "template_version": get_receipt_template_version(),
+            "kind": kind,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiskRenderCache:
+    """
+    Size-bounded, content-addressed file cache.
+
+    Writes are atomic (temp file + rename), so concurrent readers never see a
+    partial entry and several API workers can share one directory. Reads touch
+    the entry's mtime, which eviction uses as the recency order.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read receipt render cache entry {key}: {e}")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Evicted concurrently; the data we read is still valid
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store data under key, then evict old entries if over the size limit."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            logger.warning(f"Failed to write receipt render cache entry {key}: {e}")
+            return
+        self._evict_if_needed()
+
+    def delete(self, key: str) -> None:
+        """Remove the entry for key if present."""
+        try:
+            self._path(key).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to delete receipt render cache entry {key}: {e}")
+
+    def _evict_if_needed(self) -> None:
+        with self._evict_lock:
+            entries: List[Tuple[float, int, Path]] = []
+            total = 0
+            for shard in self.directory.iterdir():
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard):
+                    if entry.name.startswith('.tmp-'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+            entries.sort()
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+            logger.info(f"Evicted {evicted} receipt render cache entries ({total} bytes remain)")
+
+
+_cache: Optional[DiskRenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_receipt_render_cache() -> Optional[DiskRenderCache]:
+    """Get the process-wide render cache, or None when caching is disabled."""
+    global _cache
+    if not RECEIPT_RENDER_CACHE_DIR:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskRenderCache(
+                    Path(RECEIPT_RENDER_CACHE_DIR),
+                    RECEIPT_RENDER_CACHE_MAX_MB * 1024 * 1024
+                )
+    return _cache
+
+
+async def get_receipt_pdf(
+    receipt_data: Dict[str, Any],
+    void_info: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Get a receipt PDF, rendering (and caching) it only on a cache miss.
+
+    Misses are rendered on the PDF render pool.
+
+    Raises:
+        PDFRenderQueueFullError: If the render pool is saturated
+        PDFRenderTimeoutError: If the render times out
+        Exception: If PDF generation fails
+    """
+    from services.pdf_render_pool import get_pdf_render_pool
+
+    cache = get_receipt_render_cache()
+    key = receipt_render_key(receipt_data, void_info, 'pdf')
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    pdf_bytes = await get_pdf_render_pool().render_receipt_pdf(receipt_data=receipt_data, void_info=void_info)
+    if cache is not None:
+        cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+def get_receipt_html(
+    receipt_data: Dict[str, Any],
+    void_info: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Get receipt HTML, rendering (and caching) it only on a cache miss.
+
+    Raises:
+        Exception: If HTML generation fails
+    """
+    from services.pdf_render_pool import render_receipt_html
+
+    cache = get_receipt_render_cache()
+    key = receipt_render_key(receipt_data, void_info, 'html')
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached.decode('utf-8')
+
+    html_content = render_receipt_html(receipt_data=receipt_data, void_info=void_info)
+    if cache is not None:
+        cache.put(key, html_content.encode('utf-8'))
+    return html_content
+
+
+async def warm_receipt_render_cache(receipt_id: int, receipt_data: Dict[str, Any]) -> None:
+    """
+    Render a newly created receipt into the cache.
+
+    Meant to run as a background task after checkout so the first download is
+    already a cache hit. Failures are logged and otherwise ignored.
+    """
+    if get_receipt_render_cache() is None:
+        return
+    try:
+        await get_receipt_pdf(receipt_data)
+        get_receipt_html(receipt_data)
+    except Exception as e:
+        logger.warning(f"Failed to pre-render receipt {receipt_id}: {e}")
+
+
+def invalidate_receipt_renders(receipt_data: Dict[str, Any]) -> None:
+    """
+    Drop the cached not-voided renders of a receipt.
+
+    Called when a receipt is voided: the voided renders use different keys, so
+    this only frees space and guarantees the old output is never served.
+    """
+    cache = get_receipt_render_cache()
+    if cache is None:
+        return
+    for kind in ('pdf', 'html'):
+        cache.delete(receipt_render_key(receipt_data, None, kind))
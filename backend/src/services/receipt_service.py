@@ -563,3 +563,43 @@ class ReceiptService:
         return receipt
 
 
+
+    @staticmethod
+    def build_render_void_info(db: Session, receipt: Receipt) -> Dict[str, Any]:
+        """
+        Build the void_info passed to the receipt template.
+        
+        Void information is not stored in receipt_data JSONB; it is merged from
+        the receipt's columns. The voided-by name is the user's clinic display
+        name, falling back to their email.
+        
+        Args:
+            db: Database session
+            receipt: Receipt to render
+            
+        Returns:
+            Dict with voided, voided_at, voided_by and reason
+        """
+        if not receipt.is_voided:
+            return {"voided": False, "voided_at": None, "voided_by": None, "reason": None}
+        
+        voided_by: Optional[Dict[str, Any]] = None
+        if receipt.voided_by_user_id:
+            voided_by_user = db.query(User).filter(User.id == receipt.voided_by_user_id).first()
+            if voided_by_user:
+                association = db.query(UserClinicAssociation).filter(
+                    UserClinicAssociation.user_id == receipt.voided_by_user_id,
+                    UserClinicAssociation.clinic_id == receipt.clinic_id
+                ).first()
+                voided_by = {
+                    "id": voided_by_user.id,
+                    "name": association.full_name if association else voided_by_user.email,
+                    "email": voided_by_user.email
+                }
+        
+        return {
+            "voided": True,
+            "voided_at": receipt.voided_at.isoformat() if receipt.voided_at else None,
+            "voided_by": voided_by,
+            "reason": receipt.void_reason
+        }
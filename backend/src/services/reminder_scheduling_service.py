@@ -11,6 +11,7 @@ This service follows a "schedule-on-event" strategy (Pre-Scheduling Model):
 
 import logging
 from datetime import datetime, timedelta
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from models import Appointment, ScheduledLineMessage, Clinic, CalendarEvent
@@ -60,41 +61,38 @@ class ReminderSchedulingService:
     """Service for scheduling appointment reminders."""
 
     @staticmethod
-    def schedule_reminder(db: Session, appointment: Appointment) -> None:
+    def _build_reminder(appointment: Appointment, current_time: datetime) -> Optional[ScheduledLineMessage]:
         """
-        Schedule a reminder for an appointment.
-        
-        This is called when an appointment is created and confirmed.
-        It creates a ScheduledLineMessage record for the reminder.
+        Build (but do not add) the reminder message for one appointment.
         
-        Args:
-            db: Database session
-            appointment: Appointment to schedule reminder for
+        Returns None when no reminder should be sent (not confirmed, auto-assigned,
+        disabled for the type, no LINE user, no template, or send time already past).
+        Does not check for an existing pending reminder.
         """
         # Only schedule reminders for confirmed, non-auto-assigned appointments
         if appointment.status != 'confirmed':
             logger.debug(f"Appointment {appointment.calendar_event_id} is not confirmed, skipping reminder scheduling")
-            return
+            return None
         
         if appointment.is_auto_assigned:
             logger.debug(f"Appointment {appointment.calendar_event_id} is auto-assigned, skipping reminder scheduling")
-            return
+            return None
         
         # Check if reminder is enabled for this appointment type
         appointment_type = appointment.appointment_type
         if not appointment_type:
             logger.warning(f"Appointment {appointment.calendar_event_id} has no appointment type")
-            return
+            return None
         
         if not appointment_type.send_reminder:
             logger.debug(f"Reminder disabled for appointment type {appointment_type.id}, skipping")
-            return
+            return None
         
         # Get clinic and reminder configuration
         clinic = appointment.patient.clinic
         if not clinic:
             logger.warning(f"Appointment {appointment.calendar_event_id} has no clinic")
-            return
+            return None
 
         # Calculate reminder send time based on timing mode
         reminder_hours_before = clinic.reminder_hours_before  # Always define for later use
@@ -123,21 +121,49 @@ class ReminderSchedulingService:
         
         if not line_user:
             logger.debug(f"Patient {patient.id} has no LINE user, skipping reminder scheduling")
-            return
+            return None
         
         # Validate reminder send time is not in past
-        current_time = taiwan_now()
         if reminder_send_time < current_time:
             logger.warning(
                 f"Skipping reminder for appointment {appointment.calendar_event_id} - "
                 f"reminder send time {reminder_send_time} is in past"
             )
-            return
+            return None
         
         # Get reminder message template
         reminder_template = appointment_type.reminder_message
         if not reminder_template:
             logger.warning(f"Appointment type {appointment_type.id} has no reminder message template")
+            return None
+        
+        return ScheduledLineMessage(
+            recipient_type='patient',
+            recipient_line_user_id=line_user.line_user_id,
+            clinic_id=appointment.patient.clinic_id,
+            message_type='appointment_reminder',
+            message_template=reminder_template,
+            message_context={
+                'appointment_id': appointment.calendar_event_id
+            },
+            scheduled_send_time=reminder_send_time,
+            status='pending'
+        )
+
+    @staticmethod
+    def schedule_reminder(db: Session, appointment: Appointment) -> None:
+        """
+        Schedule a reminder for an appointment.
+        
+        This is called when an appointment is created and confirmed.
+        It creates a ScheduledLineMessage record for the reminder.
+        
+        Args:
+            db: Database session
+            appointment: Appointment to schedule reminder for
+        """
+        scheduled = ReminderSchedulingService._build_reminder(appointment, taiwan_now())
+        if scheduled is None:
             return
         
         # Check if reminder already scheduled (avoid duplicates)
@@ -152,22 +178,10 @@ class ReminderSchedulingService:
             return
         
         # Create scheduled message record
-        scheduled = ScheduledLineMessage(
-            recipient_type='patient',
-            recipient_line_user_id=line_user.line_user_id,
-            clinic_id=appointment.patient.clinic_id,
-            message_type='appointment_reminder',
-            message_template=reminder_template,
-            message_context={
-                'appointment_id': appointment.calendar_event_id
-            },
-            scheduled_send_time=reminder_send_time,
-            status='pending'
-        )
         db.add(scheduled)
         logger.debug(
             f"Scheduled reminder for appointment {appointment.calendar_event_id} "
-            f"at {reminder_send_time}"
+            f"at {scheduled.scheduled_send_time}"
         )
         
         # Commit (but don't fail appointment creation if this fails)
@@ -177,6 +191,28 @@ class ReminderSchedulingService:
             logger.exception(f"Failed to commit scheduled reminder for appointment {appointment.calendar_event_id}: {e}")
             db.rollback()
 
+    @staticmethod
+    def schedule_reminders_batch(db: Session, appointments: List[Appointment]) -> None:
+        """
+        Schedule reminders for several new appointments at once.
+        
+        Intended for appointments created in the current transaction, which cannot
+        have a pending reminder yet, so the per-appointment duplicate check is skipped.
+        Reminder rows are added to the session in one batch; the caller commits.
+        
+        Args:
+            db: Database session
+            appointments: Newly created appointments (calendar_event and patient loaded)
+        """
+        current_time = taiwan_now()
+        scheduled_messages: List[ScheduledLineMessage] = []
+        for appointment in appointments:
+            scheduled = ReminderSchedulingService._build_reminder(appointment, current_time)
+            if scheduled is not None:
+                scheduled_messages.append(scheduled)
+        
+        db.add_all(scheduled_messages)
+
     @staticmethod
     def cancel_pending_reminder(db: Session, appointment_id: int) -> None:
         """
@@ -8,8 +8,8 @@ This service handles:
 """
 
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import datetime, date as date_type
+from typing import List, Dict, Any, Optional, Set, Tuple
 
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
@@ -60,6 +60,42 @@ class ResourceService:
                 'unavailable_resource_ids': List[int]
             }
         """
+        return ResourceService.check_resource_availability_batch(
+            db=db,
+            appointment_type_id=appointment_type_id,
+            clinic_id=clinic_id,
+            time_slots=[(start_time, end_time)],
+            selected_resource_ids=selected_resource_ids,
+            exclude_calendar_event_id=exclude_calendar_event_id
+        )[0]
+
+    @staticmethod
+    def check_resource_availability_batch(
+        db: Session,
+        appointment_type_id: int,
+        clinic_id: int,
+        time_slots: List[Tuple[datetime, datetime]],
+        selected_resource_ids: Optional[List[int]] = None,
+        exclude_calendar_event_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Check resource availability for several time slots of the same appointment type.
+
+        Requirements, resources and allocations for every slot date are loaded
+        once (a fixed number of queries regardless of the number of slots), and
+        each slot is evaluated in memory.
+
+        Args:
+            db: Database session
+            appointment_type_id: Appointment type ID
+            clinic_id: Clinic ID
+            time_slots: List of (start datetime, end datetime) pairs
+            selected_resource_ids: Optional list of selected resource IDs to check for specific conflicts
+            exclude_calendar_event_id: Optional calendar event ID to exclude
+
+        Returns:
+            One result per slot, in order, each shaped like check_resource_availability's result
+        """
         # 1. Get resource requirements for appointment type
         requirements = db.query(AppointmentResourceRequirement).filter(
             AppointmentResourceRequirement.appointment_type_id == appointment_type_id
@@ -85,7 +121,91 @@ class ResourceService:
                 if res.resource_type_id not in selected_resources_by_type:
                     selected_resources_by_type[res.resource_type_id] = []
                 selected_resources_by_type[res.resource_type_id].append(res.id)
-        
+
+        # 3. Load resource types and their active resources in bulk
+        resource_type_names: Dict[int, str] = {}
+        resources_by_type: Dict[int, List[Resource]] = {rt_id: [] for rt_id in resource_types_to_check}
+        allocations: List[Any] = []
+
+        if resource_types_to_check:
+            resource_type_names = {
+                rt.id: rt.name for rt in db.query(ResourceType).filter(
+                    ResourceType.id.in_(resource_types_to_check)
+                ).all()
+            }
+
+            all_resources = db.query(Resource).filter(
+                Resource.resource_type_id.in_(resource_types_to_check),
+                Resource.clinic_id == clinic_id,
+                Resource.is_deleted == False
+            ).all()
+            for res in all_resources:
+                resources_by_type[res.resource_type_id].append(res)
+
+            # Find allocated resources on every slot date; overlap is checked per slot below
+            # Note: Exclude soft-deleted calendar events and only count confirmed appointments
+            all_resource_ids = [r.id for r in all_resources]
+            slot_dates = {start.date() for start, _ in time_slots}
+            if all_resource_ids and slot_dates:
+                allocated_query = db.query(
+                    AppointmentResourceAllocation.resource_id,
+                    CalendarEvent,
+                    UserClinicAssociation.full_name.label('practitioner_name')
+                ).join(
+                    CalendarEvent, AppointmentResourceAllocation.appointment_id == CalendarEvent.id
+                ).join(
+                    Appointment, CalendarEvent.id == Appointment.calendar_event_id
+                ).join(
+                    UserClinicAssociation, and_(CalendarEvent.user_id == UserClinicAssociation.user_id, CalendarEvent.clinic_id == UserClinicAssociation.clinic_id)
+                ).filter(
+                    AppointmentResourceAllocation.resource_id.in_(all_resource_ids),
+                    CalendarEvent.clinic_id == clinic_id,
+                    CalendarEvent.date.in_(slot_dates),
+                    Appointment.status == 'confirmed',
+                    UserClinicAssociation.is_active == True
+                )
+
+                if exclude_calendar_event_id:
+                    allocated_query = allocated_query.filter(
+                        CalendarEvent.id != exclude_calendar_event_id
+                    )
+
+                allocations = allocated_query.all()
+
+        allocations_by_date: Dict[date_type, List[Any]] = {}
+        for allocation in allocations:
+            allocations_by_date.setdefault(allocation.CalendarEvent.date, []).append(allocation)
+
+        results: List[Dict[str, Any]] = []
+        for start_time, end_time in time_slots:
+            slot_allocations = [
+                a for a in allocations_by_date.get(start_time.date(), [])
+                if a.CalendarEvent.start_time < end_time.time()
+                and a.CalendarEvent.end_time > start_time.time()
+            ]
+            results.append(ResourceService._evaluate_resource_availability(
+                req_map=req_map,
+                resource_types_to_check=resource_types_to_check,
+                resource_type_names=resource_type_names,
+                resources_by_type=resources_by_type,
+                selected_resources_by_type=selected_resources_by_type,
+                selection_is_provided=selected_resource_ids is not None,
+                allocations=slot_allocations
+            ))
+
+        return results
+
+    @staticmethod
+    def _evaluate_resource_availability(
+        req_map: Dict[int, int],
+        resource_types_to_check: Set[int],
+        resource_type_names: Dict[int, str],
+        resources_by_type: Dict[int, List[Resource]],
+        selected_resources_by_type: Dict[int, List[int]],
+        selection_is_provided: bool,
+        allocations: List[Any]
+    ) -> Dict[str, Any]:
+        """Evaluate one time slot against pre-loaded resources and its overlapping allocations."""
         selection_insufficient_warnings: List[Dict[str, Any]] = []
         resource_conflict_warnings: List[Dict[str, Any]] = []
         global_unavailable_resource_ids: List[int] = []
@@ -93,49 +213,14 @@ class ResourceService:
 
         for resource_type_id in resource_types_to_check:
             required_qty = req_map.get(resource_type_id, 0)
-            
-            # Get resource type details
-            resource_type = db.query(ResourceType).filter(ResourceType.id == resource_type_id).first()
-            resource_type_name = resource_type.name if resource_type else "未知資源類型"
+            resource_type_name = resource_type_names.get(resource_type_id, "未知資源類型")
 
-            # Get all active resources of this type in the clinic
-            all_resources = db.query(Resource).filter(
-                Resource.resource_type_id == resource_type_id,
-                Resource.clinic_id == clinic_id,
-                Resource.is_deleted == False
-            ).all()
+            all_resources = resources_by_type.get(resource_type_id, [])
             all_resource_ids = [r.id for r in all_resources]
             resource_map = {r.id: r.name for r in all_resources}
 
-            # Find allocated resources during this time slot
-            # Note: Exclude soft-deleted calendar events and only count confirmed appointments
-            allocated_query = db.query(
-                AppointmentResourceAllocation.resource_id,
-                CalendarEvent,
-                UserClinicAssociation.full_name.label('practitioner_name')
-            ).join(
-                CalendarEvent, AppointmentResourceAllocation.appointment_id == CalendarEvent.id
-            ).join(
-                Appointment, CalendarEvent.id == Appointment.calendar_event_id
-            ).join(
-                UserClinicAssociation, and_(CalendarEvent.user_id == UserClinicAssociation.user_id, CalendarEvent.clinic_id == UserClinicAssociation.clinic_id)
-            ).filter(
-                AppointmentResourceAllocation.resource_id.in_(all_resource_ids),
-                CalendarEvent.clinic_id == clinic_id,
-                CalendarEvent.date == start_time.date(),
-                CalendarEvent.start_time < end_time.time(),
-                CalendarEvent.end_time > start_time.time(),
-                Appointment.status == 'confirmed',
-                UserClinicAssociation.is_active == True
-            )
-
-            if exclude_calendar_event_id:
-                allocated_query = allocated_query.filter(
-                    CalendarEvent.id != exclude_calendar_event_id
-                )
-
-            allocations = allocated_query.all()
-            allocated_resource_ids = {a.resource_id for a in allocations}
+            type_allocations = [a for a in allocations if a.resource_id in resource_map]
+            allocated_resource_ids = {a.resource_id for a in type_allocations}
             global_unavailable_resource_ids.extend(list(allocated_resource_ids))
 
             # Determine which validation mode to use:
@@ -143,8 +228,6 @@ class ResourceService:
             #    We validate if THIS selection meets the requirements.
             # 2. Slot Availability Mode: User provided no selection (None).
             #    We validate if the clinic has ANY available resources to satisfy the requirements.
-            
-            selection_is_provided = selected_resource_ids is not None
 
             if selection_is_provided:
                 # Case A: Selection Mode - User explicitly picked (or skipped) these resources
@@ -161,7 +244,7 @@ class ResourceService:
                     })
 
                 # 2. Conflict Validation: Check for double bookings on selected resources
-                for allocation in allocations:
+                for allocation in type_allocations:
                     if allocation.resource_id in selected_for_this_type:
                         is_available = False
                         resource_conflict_warnings.append({
@@ -322,6 +405,121 @@ class ResourceService:
 
         return allocated_resource_ids
 
+    @staticmethod
+    def plan_resource_allocations_batch(
+        db: Session,
+        appointment_type_id: int,
+        clinic_id: int,
+        time_slots: List[Tuple[datetime, datetime]],
+        selected_resource_ids: List[Optional[List[int]]]
+    ) -> List[Optional[List[int]]]:
+        """
+        Choose resources for several new appointments without inserting anything.
+
+        Applies allocate_resources' rules to every slot (manual mode when the
+        slot's selection is a list, auto mode when it is None), but loads
+        requirements, resources and existing allocations once for all slots.
+        Resources picked for an earlier slot count as allocated for later
+        overlapping slots in the same batch.
+
+        Args:
+            db: Database session
+            appointment_type_id: Appointment type ID
+            clinic_id: Clinic ID
+            time_slots: List of (start datetime, end datetime) pairs
+            selected_resource_ids: Per-slot selection, or None for auto-allocation
+
+        Returns:
+            One entry per slot: the resource IDs to allocate, or None if the
+            slot's requirements cannot be met
+        """
+        plans: List[Optional[List[int]]] = []
+
+        # Manual mode: validate every selected resource in one query
+        all_selected_ids = {rid for ids in selected_resource_ids if ids for rid in ids}
+        valid_selected_ids: Set[int] = set()
+        if all_selected_ids:
+            valid_selected_ids = {
+                r.id for r in db.query(Resource.id).filter(
+                    Resource.id.in_(all_selected_ids),
+                    Resource.clinic_id == clinic_id,
+                    Resource.is_deleted == False
+                ).all()
+            }
+
+        # Auto mode: load requirements, candidate resources and allocations once
+        auto_slots = [slot for slot, ids in zip(time_slots, selected_resource_ids) if ids is None]
+        requirements: List[AppointmentResourceRequirement] = []
+        resource_ids_by_type: Dict[int, List[int]] = {}
+        booked: Dict[date_type, List[Tuple[int, Any, Any]]] = {}
+        if auto_slots:
+            requirements = db.query(AppointmentResourceRequirement).filter(
+                AppointmentResourceRequirement.appointment_type_id == appointment_type_id
+            ).all()
+
+        if requirements:
+            resource_ids_by_type = {req.resource_type_id: [] for req in requirements}
+            for res in db.query(Resource).filter(
+                Resource.resource_type_id.in_(resource_ids_by_type.keys()),
+                Resource.clinic_id == clinic_id,
+                Resource.is_deleted == False
+            ).order_by(Resource.id).all():
+                resource_ids_by_type[res.resource_type_id].append(res.id)
+
+            all_resource_ids = [rid for ids in resource_ids_by_type.values() for rid in ids]
+            if all_resource_ids:
+                existing = db.query(
+                    AppointmentResourceAllocation.resource_id,
+                    CalendarEvent.date,
+                    CalendarEvent.start_time,
+                    CalendarEvent.end_time
+                ).join(
+                    CalendarEvent, AppointmentResourceAllocation.appointment_id == CalendarEvent.id
+                ).join(
+                    Appointment, CalendarEvent.id == Appointment.calendar_event_id
+                ).filter(
+                    AppointmentResourceAllocation.resource_id.in_(all_resource_ids),
+                    CalendarEvent.clinic_id == clinic_id,
+                    CalendarEvent.date.in_({start.date() for start, _ in auto_slots}),
+                    Appointment.status == 'confirmed'
+                ).all()
+                for resource_id, event_date, event_start, event_end in existing:
+                    booked.setdefault(event_date, []).append((resource_id, event_start, event_end))
+
+        for (start_time, end_time), selection in zip(time_slots, selected_resource_ids):
+            if selection is not None:
+                plans.append([rid for rid in dict.fromkeys(selection) if rid in valid_selected_ids])
+                continue
+
+            slot_booked = {
+                resource_id for resource_id, event_start, event_end in booked.get(start_time.date(), [])
+                if event_start < end_time.time() and event_end > start_time.time()
+            }
+            chosen: List[int] = []
+            satisfied = True
+            for req in requirements:
+                available = [rid for rid in resource_ids_by_type[req.resource_type_id] if rid not in slot_booked]
+                if len(available) < req.quantity:
+                    logger.info(
+                        f"Insufficient resources for type {req.resource_type_id} at {start_time}. "
+                        f"Required: {req.quantity}, Available: {len(available)}"
+                    )
+                    satisfied = False
+                    break
+                chosen.extend(available[:req.quantity])
+
+            if not satisfied:
+                plans.append(None)
+                continue
+
+            # Later slots in this batch must see these resources as taken
+            booked.setdefault(start_time.date(), []).extend(
+                (rid, start_time.time(), end_time.time()) for rid in chosen
+            )
+            plans.append(chosen)
+
+        return plans
+
 
     @staticmethod
     def get_resource_availability_for_slot(
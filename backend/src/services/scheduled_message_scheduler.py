@@ -12,7 +12,7 @@ from apscheduler.triggers.cron import CronTrigger  # type: ignore
 
 from core.constants import REMINDER_SCHEDULER_MAX_INSTANCES, MISFIRE_GRACE_TIME_SECONDS
 from core.database import get_db_context
-from services.scheduled_message_service import ScheduledMessageService
+from services.scheduled_message_service import ScheduledMessageRunStats, ScheduledMessageService
 from utils.datetime_utils import TAIWAN_TZ
 
 logger = logging.getLogger(__name__)
@@ -37,6 +37,7 @@ class ScheduledMessageScheduler:
         # Configure scheduler to use Taiwan timezone to ensure correct timing
         self.scheduler = AsyncIOScheduler(timezone=TAIWAN_TZ)
         self._is_started = False
+        self.last_run_stats: Optional[ScheduledMessageRunStats] = None
 
     async def start_scheduler(self) -> None:
         """
@@ -90,8 +91,9 @@ class ScheduledMessageScheduler:
         with get_db_context() as db:
             try:
                 logger.info("Checking for pending scheduled messages...")
-                ScheduledMessageService.send_pending_messages(db)
-                logger.info("Finished processing pending scheduled messages")
+                stats = ScheduledMessageService.send_pending_messages(db)
+                self.last_run_stats = stats
+                logger.info(f"Finished processing pending scheduled messages: {stats.summary()}")
             except Exception as e:
                 logger.exception(f"Error sending pending scheduled messages: {e}")
 
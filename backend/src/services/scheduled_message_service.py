@@ -6,9 +6,11 @@ via a cron job that runs hourly.
 """
 
 import logging
+import time
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session, joinedload
 
 from models import (
     Appointment, FollowUpMessage, ScheduledLineMessage,
@@ -17,11 +19,41 @@ from models import (
 from services.message_template_service import MessageTemplateService
 from services.line_service import LINEService
 from utils.datetime_utils import taiwan_now
-from utils.practitioner_helpers import get_practitioner_display_name_with_title
+from utils.clinic_directory import ClinicDirectory, get_clinic_directory
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ScheduledMessageRunStats:
+    """Counts and timings of one scheduled message run."""
+    batches: int = 0
+    sent: int = 0
+    skipped: int = 0
+    retried: int = 0
+    failed: int = 0
+    query_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    def count(self, status: str) -> None:
+        """Count a processed message by its resulting status."""
+        if status == 'sent':
+            self.sent += 1
+        elif status == 'skipped':
+            self.skipped += 1
+        elif status == 'pending':
+            self.retried += 1
+        else:
+            self.failed += 1
+
+    def summary(self) -> str:
+        return (
+            f"{self.sent} sent, {self.skipped} skipped, {self.retried} rescheduled for retry, "
+            f"{self.failed} failed in {self.batches} batch(es); "
+            f"query {self.query_seconds:.2f}s, total {self.total_seconds:.2f}s"
+        )
+
+
 class ScheduledMessageService:
     """Service for sending scheduled LINE messages."""
 
@@ -470,7 +502,8 @@ class ScheduledMessageService:
     @staticmethod
     def build_message_context(
         db: Session,
-        scheduled: ScheduledLineMessage
+        scheduled: ScheduledLineMessage,
+        directory: Optional[ClinicDirectory] = None
     ) -> Dict[str, Any]:
         """
         Build context for rendering message template.
@@ -478,6 +511,8 @@ class ScheduledMessageService:
         Args:
             db: Database session
             scheduled: Scheduled message
+            directory: Optional directory for the message's clinic, shared across a
+                batch so practitioner names are not looked up per message
             
         Returns:
             Context dictionary for MessageTemplateService
@@ -502,9 +537,9 @@ class ScheduledMessageService:
                 practitioner_name = "不指定"
             else:
                 user = appointment.calendar_event.user
-                practitioner_name = get_practitioner_display_name_with_title(
-                    db, user.id, clinic.id
-                )
+                if directory is None or directory.clinic_id != clinic.id:
+                    directory = ClinicDirectory(db, clinic.id)
+                practitioner_name = directory.practitioner_display_name_with_title(user.id)
             
             # Build context using MessageTemplateService
             context = MessageTemplateService.build_confirmation_context(
@@ -573,9 +608,9 @@ class ScheduledMessageService:
                 therapist_name = "不指定"
             else:
                 user = appointment.calendar_event.user
-                therapist_name = get_practitioner_display_name_with_title(
-                    db, user.id, clinic.id
-                )
+                if directory is None or directory.clinic_id != clinic.id:
+                    directory = ClinicDirectory(db, clinic.id)
+                therapist_name = directory.practitioner_display_name_with_title(user.id)
             
             # Build context using MessageTemplateService
             context = MessageTemplateService.build_reminder_context(
@@ -602,6 +637,10 @@ class ScheduledMessageService:
             appointments = db.query(Appointment).filter(
                 Appointment.calendar_event_id.in_(appointment_ids),
                 Appointment.status == 'confirmed'
+            ).options(
+                joinedload(Appointment.calendar_event),
+                joinedload(Appointment.patient),
+                joinedload(Appointment.appointment_type)
             ).all()
             
             if not appointments:
@@ -656,7 +695,7 @@ class ScheduledMessageService:
         raise ValueError(f"Unsupported message_type: {scheduled.message_type}")
 
     @staticmethod
-    def send_pending_messages(db: Session, batch_size: int = 100) -> None:
+    def send_pending_messages(db: Session, batch_size: int = 100) -> ScheduledMessageRunStats:
         """
         Send all pending scheduled messages.
         
@@ -673,13 +712,26 @@ class ScheduledMessageService:
         - Note: Monitor production logs for 429 errors. If frequent, consider adding
           per-clinic rate limiting or increasing batch processing delays
         
+        Each batch's clinics are loaded with one query, and one LINEService per
+        clinic is reused for the whole run.
+        
         Args:
             db: Database session
             batch_size: Number of messages to process per batch
+            
+        Returns:
+            Counts and timings of the run
         """
+        run_started = time.perf_counter()
+        stats = ScheduledMessageRunStats()
         current_time = taiwan_now()
         
+        # One directory and LINE service per clinic for this run
+        directories: Dict[int, ClinicDirectory] = {}
+        line_services: Dict[int, LINEService] = {}
+        
         while True:
+            query_started = time.perf_counter()
             # Use SELECT FOR UPDATE SKIP LOCKED for concurrent scheduler support
             pending = db.query(ScheduledLineMessage).filter(
                 ScheduledLineMessage.status == 'pending',
@@ -687,8 +739,18 @@ class ScheduledMessageService:
             ).with_for_update(skip_locked=True).limit(batch_size).all()
             
             if not pending:
+                stats.query_seconds += time.perf_counter() - query_started
                 break
             
+            clinics: Dict[int, Clinic] = {
+                clinic.id: clinic
+                for clinic in db.query(Clinic).filter(
+                    Clinic.id.in_({scheduled.clinic_id for scheduled in pending})
+                ).all()
+            }
+            stats.query_seconds += time.perf_counter() - query_started
+            stats.batches += 1
+            
             logger.info(f"Processing {len(pending)} pending scheduled messages")
             
             for scheduled in pending:
@@ -713,7 +775,9 @@ class ScheduledMessageService:
                         continue
                     
                     # Build context and render message
-                    context = ScheduledMessageService.build_message_context(db, scheduled)
+                    context = ScheduledMessageService.build_message_context(
+                        db, scheduled, get_clinic_directory(directories, db, scheduled.clinic_id)
+                    )
                     
                     # For practitioner_daily, use the built message directly
                     if scheduled.message_type == 'practitioner_daily':
@@ -731,9 +795,7 @@ class ScheduledMessageService:
                     )
                     
                     # Get clinic and LINE service
-                    clinic = db.query(Clinic).filter(
-                        Clinic.id == scheduled.clinic_id
-                    ).first()
+                    clinic = clinics.get(scheduled.clinic_id)
                     
                     if not clinic or not clinic.line_channel_secret or not clinic.line_channel_access_token:
                         logger.warning(
@@ -752,10 +814,13 @@ class ScheduledMessageService:
                     # message sending, especially when scaling to many clinics and appointments.
                     # Reference: https://developers.line.biz/en/reference/messaging-api/
                     
-                    line_service = LINEService(
-                        channel_secret=clinic.line_channel_secret,
-                        channel_access_token=clinic.line_channel_access_token
-                    )
+                    line_service = line_services.get(clinic.id)
+                    if line_service is None:
+                        line_service = LINEService(
+                            channel_secret=clinic.line_channel_secret,
+                            channel_access_token=clinic.line_channel_access_token
+                        )
+                        line_services[clinic.id] = line_service
                     
                     # Send message (creates LinePushMessage record)
                     line_service.send_text_message(
@@ -792,4 +857,10 @@ class ScheduledMessageService:
                         )
                 
                 db.commit()
+            
+            for scheduled in pending:
+                stats.count(scheduled.status)
+        
+        stats.total_seconds = time.perf_counter() - run_started
+        return stats
 
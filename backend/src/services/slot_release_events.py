@@ -0,0 +1,79 @@
+"""
+Slots-freed events.
+
+When an appointment is cancelled or moved, or a practitioner's availability
+grows, slots open up that waitlisted patients (availability notifications) may
+be waiting for. Code that commits such a change publishes a SlotsFreedEvent;
+the availability notification service drains the events every few seconds and
+evaluates only the notifications watching the affected clinic, practitioner
+and date.
+
+Events are published when an appointment is cancelled or rescheduled, when a
+practitioner's default weekly schedule is updated, and when an availability
+exception is deleted. Other changes that can free slots do not publish:
+availability exceptions cannot be edited in place (only created or deleted),
+non-appointment calendar events can only be renamed, and edits to an
+appointment's resource allocation or a practitioner's appointment types are
+not tracked. Any new path that shrinks an exception or moves or deletes a
+calendar event should publish here after its commit; until then such changes
+are picked up by the scheduled sweep.
+
+Events are kept in process memory (the API runs as a single process) and are
+best effort: an event that is lost or dropped is still caught by the
+scheduled availability sweep.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from typing import Deque, List, Optional
+
+# Oldest events are dropped beyond this (the scheduled sweep covers them)
+MAX_PENDING_SLOTS_FREED_EVENTS = 10000
+
+
+@dataclass(frozen=True)
+class SlotsFreedEvent:
+    """Slots were released for a practitioner (or the whole clinic) on a date."""
+    clinic_id: int
+    practitioner_id: Optional[int]  # None: any practitioner in the clinic
+    appointment_type_id: Optional[int]  # Type of the released appointment, if any
+    date: Optional[date]  # None: any date (e.g. the weekly schedule changed)
+
+
+_pending: Deque[SlotsFreedEvent] = deque(maxlen=MAX_PENDING_SLOTS_FREED_EVENTS)
+_pending_lock = threading.Lock()
+
+
+def publish_slots_freed(
+    clinic_id: int,
+    practitioner_id: Optional[int],
+    appointment_type_id: Optional[int] = None,
+    on: Optional[date] = None
+) -> None:
+    """
+    Record that slots were freed. Call after the change is committed.
+
+    Args:
+        clinic_id: Clinic whose slots were freed
+        practitioner_id: Practitioner whose time was freed (None for any)
+        appointment_type_id: Type of the cancelled or moved appointment, if any
+        on: Date of the freed slots (None if every date may be affected)
+    """
+    event = SlotsFreedEvent(
+        clinic_id=clinic_id,
+        practitioner_id=practitioner_id,
+        appointment_type_id=appointment_type_id,
+        date=on
+    )
+    with _pending_lock:
+        _pending.append(event)
+
+
+def drain_slots_freed_events() -> List[SlotsFreedEvent]:
+    """Take all pending events (duplicates removed, in publication order)."""
+    with _pending_lock:
+        events = list(dict.fromkeys(_pending))
+        _pending.clear()
+    return events
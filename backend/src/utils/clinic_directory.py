@@ -0,0 +1,143 @@
+"""
+Request- or job-scoped directory of clinic lookups.
+
+Listing and notification paths render many appointments per clinic, and each
+one needs a practitioner display name and an appointment type name. Looking
+those up one row at a time makes the query count grow with the number of
+appointments. ClinicDirectory bulk-loads a clinic's active practitioner
+associations and appointment types on first use and serves every later lookup
+from memory.
+
+Create one per request (or per job run) and let it go out of scope afterwards;
+it is a snapshot and does not observe later changes.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from models import AppointmentType, UserClinicAssociation
+from models.appointment import Appointment
+from utils.practitioner_helpers import (
+    AUTO_ASSIGNED_PRACTITIONER_DISPLAY_NAME,
+    DEFAULT_PRACTITIONER_DISPLAY_NAME,
+    format_practitioner_display_name_with_title,
+)
+
+# Fallback names for appointment types (patient- and staff-facing)
+DELETED_APPOINTMENT_TYPE_NAME = "已刪除服務類型"
+UNKNOWN_APPOINTMENT_TYPE_NAME = "未知服務類型"
+
+
+class ClinicDirectory:
+    """
+    In-memory directory of a clinic's practitioners and appointment types.
+
+    Each table is loaded with a single query the first time it is needed.
+    """
+
+    def __init__(self, db: Session, clinic_id: int):
+        self.db = db
+        self.clinic_id = clinic_id
+        self._associations: Optional[Dict[int, UserClinicAssociation]] = None
+        self._appointment_types: Optional[Dict[int, Optional[AppointmentType]]] = None
+
+    @classmethod
+    def for_clinics(cls, db: Session, clinic_ids: Iterable[int]) -> Dict[int, "ClinicDirectory"]:
+        """
+        Build directories for several clinics, loading their practitioners with one query.
+
+        For jobs that render messages for many clinics in one run.
+        """
+        directories = {clinic_id: ClinicDirectory(db, clinic_id) for clinic_id in clinic_ids}
+        if not directories:
+            return directories
+
+        associations_by_clinic: Dict[int, Dict[int, UserClinicAssociation]] = {
+            clinic_id: {} for clinic_id in directories
+        }
+        associations = db.query(UserClinicAssociation).filter(
+            UserClinicAssociation.clinic_id.in_(list(directories)),
+            UserClinicAssociation.is_active == True
+        ).options(joinedload(UserClinicAssociation.user)).all()
+        for association in associations:
+            associations_by_clinic[association.clinic_id][association.user_id] = association
+
+        for clinic_id, directory in directories.items():
+            directory._associations = associations_by_clinic[clinic_id]
+        return directories
+
+    def _get_associations(self) -> Dict[int, UserClinicAssociation]:
+        if self._associations is None:
+            associations = self.db.query(UserClinicAssociation).filter(
+                UserClinicAssociation.clinic_id == self.clinic_id,
+                UserClinicAssociation.is_active == True
+            ).options(joinedload(UserClinicAssociation.user)).all()
+            self._associations = {a.user_id: a for a in associations}
+        return self._associations
+
+    def _get_appointment_types(self) -> Dict[int, Optional[AppointmentType]]:
+        if self._appointment_types is None:
+            # Include soft-deleted types: past appointments still reference them
+            appointment_types = self.db.query(AppointmentType).filter(
+                AppointmentType.clinic_id == self.clinic_id
+            ).all()
+            self._appointment_types = {t.id: t for t in appointment_types}
+        return self._appointment_types
+
+    def practitioner_display_name_with_title(self, user_id: int) -> str:
+        """
+        Same result as get_practitioner_display_name_with_title, served from memory.
+        """
+        association = self._get_associations().get(user_id)
+        if not association:
+            return DEFAULT_PRACTITIONER_DISPLAY_NAME
+        return format_practitioner_display_name_with_title(association)
+
+    def practitioner_display_name_for_appointment(self, appointment: Appointment) -> str:
+        """
+        Same result as get_practitioner_display_name_for_appointment, served from memory.
+        """
+        if appointment.is_auto_assigned:
+            return AUTO_ASSIGNED_PRACTITIONER_DISPLAY_NAME
+
+        if appointment.calendar_event and appointment.calendar_event.user_id:
+            return self.practitioner_display_name_with_title(appointment.calendar_event.user_id)
+
+        return AUTO_ASSIGNED_PRACTITIONER_DISPLAY_NAME
+
+    def appointment_type_name(self, appointment_type_id: int) -> str:
+        """
+        Same result as get_appointment_type_name_safe, served from memory.
+
+        Types outside this clinic are looked up individually and memoized.
+        """
+        appointment_types = self._get_appointment_types()
+        if appointment_type_id not in appointment_types:
+            appointment_types[appointment_type_id] = self.db.query(AppointmentType).filter(
+                AppointmentType.id == appointment_type_id
+            ).first()
+
+        appointment_type = appointment_types[appointment_type_id]
+        if appointment_type is None:
+            return UNKNOWN_APPOINTMENT_TYPE_NAME
+        if appointment_type.is_deleted:
+            return DELETED_APPOINTMENT_TYPE_NAME
+        return appointment_type.name
+
+
+def get_clinic_directory(
+    directories: Dict[int, ClinicDirectory],
+    db: Session,
+    clinic_id: int
+) -> ClinicDirectory:
+    """
+    Get (or create) the directory for a clinic from a job-scoped registry.
+
+    Jobs that span several clinics keep one dict for the duration of a run.
+    """
+    directory = directories.get(clinic_id)
+    if directory is None:
+        directory = ClinicDirectory(db, clinic_id)
+        directories[clinic_id] = directory
+    return directory
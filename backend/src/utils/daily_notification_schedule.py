@@ -0,0 +1,76 @@
+"""
+Shared selection helpers for the hourly daily-schedule notification jobs.
+
+Admins and practitioners choose when their next-day notification is sent
+(next_day_notification_time, a Taiwan-time "HH:MM" string in the association's
+settings JSONB) and how many days ahead it covers (reminder_days_ahead). The
+hourly jobs only need the associations whose time falls in the current hour,
+so the hour is matched in SQL instead of loading every association and
+checking it in Python.
+"""
+
+import logging
+from typing import Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.user_clinic_association import UserClinicAssociation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NOTIFICATION_HOUR = 21
+DEFAULT_REMINDER_DAYS_AHEAD = 1
+
+# "H:MM" / "HH:MM"; anything else falls back to the default hour
+_NOTIFICATION_TIME_PATTERN = r'^[0-9]{1,2}:[0-9]{1,2}$'
+
+
+def get_next_day_notification_config(association: UserClinicAssociation) -> Tuple[int, int]:
+    """
+    Get (notification_hour, reminder_days_ahead) for an association.
+
+    Invalid settings fall back to 21:00 and 1 day, as the jobs always have.
+    """
+    try:
+        settings = association.get_validated_settings()
+        notification_time_str = settings.next_day_notification_time
+        reminder_days_ahead = settings.reminder_days_ahead
+    except Exception as e:
+        logger.warning(
+            f"Error getting notification settings for association {association.id}: {e}, "
+            f"using defaults (21:00, 1 day)"
+        )
+        return DEFAULT_NOTIFICATION_HOUR, DEFAULT_REMINDER_DAYS_AHEAD
+
+    try:
+        notification_hour, _ = map(int, notification_time_str.split(':'))
+    except (ValueError, AttributeError):
+        logger.warning(
+            f"Invalid notification time format '{notification_time_str}' for association "
+            f"{association.id}, using default 21:00"
+        )
+        notification_hour = DEFAULT_NOTIFICATION_HOUR
+
+    return notification_hour, reminder_days_ahead
+
+
+def next_day_notification_hour_condition(hour: int) -> ColumnElement[bool]:
+    """
+    Match associations whose next-day notification time falls in the given hour.
+
+    Missing or malformed times count as the default hour. Settings are
+    validated when written, so callers only re-check the (few) matched rows
+    with get_next_day_notification_config.
+    """
+    notification_time = func.coalesce(
+        UserClinicAssociation.settings['next_day_notification_time'].astext,
+        f"{DEFAULT_NOTIFICATION_HOUR}:00"
+    )
+    hour_matches = and_(
+        notification_time.op('~')(_NOTIFICATION_TIME_PATTERN),
+        func.split_part(notification_time, ':', 1).in_([str(hour), f"{hour:02d}"])
+    )
+    if hour != DEFAULT_NOTIFICATION_HOUR:
+        return hour_matches
+    return or_(hour_matches, ~notification_time.op('~')(_NOTIFICATION_TIME_PATTERN))
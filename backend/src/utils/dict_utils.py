@@ -30,3 +30,30 @@ def deep_merge(target: Dict[str, Any], source: Dict[str, Any]) -> Dict[str, Any]
             result[key] = copy.deepcopy(value)
             
     return result
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """
+    Applies a JSON Merge Patch (RFC 7396) to a COPY of target.
+
+    Logic:
+    - If patch is not a dict -> It replaces target entirely.
+    - If a patch value is None -> The key is removed from the result.
+    - If a patch value is a dict -> Recurse (a non-dict target is treated as {}).
+    - Otherwise -> Overwrite or add the key.
+    - NOTE: Lists are atomic, as with deep_merge.
+
+    Unlike deep_merge, None is a deletion marker rather than a value.
+    Returns a NEW value; target is never mutated.
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+
+    result: Dict[str, Any] = copy.deepcopy(cast(Dict[str, Any], target)) if isinstance(target, dict) else {}
+
+    for key, value in cast(Dict[str, Any], patch).items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+
+    return result
@@ -5,12 +5,11 @@ This module contains reusable query functions that ensure soft delete filtering
 is applied consistently across all services and APIs.
 """
 
-import re
 from typing import List, Optional
 from sqlalchemy.orm import Session, Query
-from sqlalchemy import func
 
 from models import Patient, LineUser
+from utils.search_queries import fetch_page_with_total, patient_search_condition
 
 
 def filter_active_patients(query: Query[Patient]) -> Query[Patient]:
@@ -77,7 +76,6 @@ def get_active_patients_for_clinic(
         Tuple of (List of Patient objects with line_user relationship eagerly loaded, total count)
     """
     from sqlalchemy.orm import joinedload
-    from sqlalchemy import or_
 
     # Eagerly load line_user relationship to avoid N+1 queries
     # This is critical for the clinic patients endpoint which accesses
@@ -95,40 +93,14 @@ def get_active_patients_for_clinic(
         query = base_query
     
     # Apply search filter if provided
+    # Each patient has at most one LINE user, so the outer join cannot duplicate rows
     if search and search.strip():
-        search_pattern = f"%{search.strip()}%"
-        
-        # Normalize phone number search: strip non-digits from search query
-        # This allows searching for "0912-345-678" to match "0912345678" in database
-        # Use regexp_replace to normalize database phone numbers for comparison
-        normalized_search = re.sub(r'\D', '', search.strip())
-        phone_search_pattern = f"%{normalized_search}%" if normalized_search else None
-        
-        # Build search conditions
-        # Search both clinic_display_name and display_name to allow finding by either
-        search_conditions = [
-            Patient.full_name.ilike(search_pattern),
-            LineUser.clinic_display_name.ilike(search_pattern),
-            LineUser.display_name.ilike(search_pattern)
-        ]
-        
-        # Add phone number search with normalization
-        # Use PostgreSQL's regexp_replace to strip non-digits from phone_number for comparison
-        if phone_search_pattern:
-            # Normalize database phone_number by removing non-digits, then search
-            normalized_phone = func.regexp_replace(Patient.phone_number, r'[^\d]', '', 'g')
-            search_conditions.append(normalized_phone.ilike(phone_search_pattern))
-        else:
-            # If search doesn't contain digits, still search raw phone_number (might match formatting)
-            search_conditions.append(Patient.phone_number.ilike(search_pattern))
-        
-        # Search in patient name, phone number, or LINE user display name
-        # Use outerjoin to include LINE user in search
         query = query.outerjoin(LineUser, Patient.line_user_id == LineUser.id).filter(
-            or_(*search_conditions)
-        ).distinct()
+            patient_search_condition(search.strip())
+        )
     
     # Filter by practitioner if provided
+    # (one assignment per patient-practitioner-clinic, so the join cannot duplicate rows)
     if practitioner_id is not None:
         from models import PatientPractitionerAssignment
         query = query.join(
@@ -137,17 +109,17 @@ def get_active_patients_for_clinic(
         ).filter(
             PatientPractitionerAssignment.user_id == practitioner_id,
             PatientPractitionerAssignment.clinic_id == clinic_id
-        ).distinct()
+        )
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Apply pagination if provided
+    # Fetch the page and the total count in one query
+    offset: Optional[int] = None
+    limit: Optional[int] = None
     if page is not None and page_size is not None:
         offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+        limit = page_size
     
-    patients = query.all()
+    rows, total = fetch_page_with_total(query, offset=offset, limit=limit)
+    patients = [row[0] for row in rows]
     return patients, total
 
 
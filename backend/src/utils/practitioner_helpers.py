@@ -302,6 +302,11 @@ def get_practitioner_display_name_with_title(
     if not association:
         return DEFAULT_PRACTITIONER_DISPLAY_NAME
     
+    return format_practitioner_display_name_with_title(association)
+
+
+def format_practitioner_display_name_with_title(association: UserClinicAssociation) -> str:
+    """Format "name title" for an association, falling back to email for the name."""
     # Get name (full_name or email fallback)
     name = association.full_name if association.full_name else (
         association.user.email if association.user else DEFAULT_PRACTITIONER_DISPLAY_NAME
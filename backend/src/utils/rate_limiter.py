@@ -0,0 +1,45 @@
+"""
+In-process keyed rate limiter.
+
+Spaces out calls that share a key (e.g. pushes on one LINE channel) to at most
+a fixed number per second, while calls under different keys proceed
+independently. Used by jobs that push many messages from worker threads.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Hashable
+
+
+class KeyedRateLimiter:
+    """
+    Thread-safe limiter allowing at most rate_per_second acquisitions per key.
+
+    Each acquisition reserves the key's next free slot and sleeps until it,
+    so waiting callers are served in the order they arrived.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> None:
+        """Block until a call under this key is allowed."""
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+
+        if slot > now:
+            self._sleep(slot - now)
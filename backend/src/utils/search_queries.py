@@ -0,0 +1,102 @@
+"""
+Shared search and pagination helpers for clinic list endpoints.
+
+Patient and LINE user searches match case-insensitive substrings of names and
+digit substrings of phone numbers (ignoring formatting such as dashes). The
+name columns and patients.phone_number_digits are covered by pg_trgm GIN
+indexes, so '%term%' filters can use an index instead of scanning the clinic's
+rows. Paged results and their total come from a single query using a
+COUNT(*) OVER () window column instead of a separate count query.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from models import LineUser, Patient
+
+TOTAL_COUNT_LABEL = "total_count"
+
+
+def normalize_phone_digits(value: str) -> str:
+    """
+    Strip everything but digits from a phone number or search term.
+
+    Matches the expression behind Patient.phone_number_digits, so
+    "0912-345-678" and "0912345678" normalize to the same value.
+    """
+    return re.sub(r'\D', '', value)
+
+
+def line_user_name_condition(pattern: str) -> ColumnElement[bool]:
+    """Match a LIKE pattern against both LINE user display names."""
+    return or_(
+        LineUser.clinic_display_name.ilike(pattern),
+        LineUser.display_name.ilike(pattern)
+    )
+
+
+def patient_search_condition(search: str) -> ColumnElement[bool]:
+    """
+    Build the filter for the clinic patient search.
+
+    Matches patient name, phone number (digits only) and the linked LINE
+    user's display names. The query must outer join LineUser.
+
+    Args:
+        search: Non-empty, stripped search term
+    """
+    search_pattern = f"%{search}%"
+    conditions = [
+        Patient.full_name.ilike(search_pattern),
+        line_user_name_condition(search_pattern)
+    ]
+
+    normalized_search = normalize_phone_digits(search)
+    if normalized_search:
+        # "0912-345" finds "0912345678" via the stored digits column
+        conditions.append(Patient.phone_number_digits.like(f"%{normalized_search}%"))
+    else:
+        # If search doesn't contain digits, still search raw phone_number (might match formatting)
+        conditions.append(Patient.phone_number.ilike(search_pattern))
+
+    return or_(*conditions)
+
+
+def fetch_page_with_total(
+    query: Query[Any],
+    offset: Optional[int] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Any], int]:
+    """
+    Fetch one page of a query together with the total number of matching rows.
+
+    The total is computed by the database in the same statement as a
+    COUNT(*) OVER () column (available on each row as TOTAL_COUNT_LABEL), so
+    filters are evaluated once. Only when the requested page is past the end
+    (no rows returned) is a separate count query issued.
+
+    Args:
+        query: Fully filtered and ordered query (GROUP BY is fine: the window
+            counts groups)
+        offset: Optional number of rows to skip
+        limit: Optional maximum number of rows to return
+
+    Returns:
+        Tuple of (rows with the extra total column, total count)
+    """
+    paged = query.add_columns(func.count().over().label(TOTAL_COUNT_LABEL))
+    if offset is not None:
+        paged = paged.offset(offset)
+    if limit is not None:
+        paged = paged.limit(limit)
+
+    rows = paged.all()
+    if rows:
+        return rows, getattr(rows[0], TOTAL_COUNT_LABEL)
+    if not offset:
+        return rows, 0
+    return rows, query.order_by(None).count()
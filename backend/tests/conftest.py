@@ -192,6 +192,14 @@ def setup_test_database(db_engine):
     Base.metadata.drop_all(bind=db_engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_auth_context_cache():
+    """Start every test without auth contexts cached by earlier tests (IDs are reused after rollback)."""
+    from auth.dependencies import clear_auth_context_cache
+    clear_auth_context_cache()
+    yield
+
+
 @pytest.fixture(scope="function")
 def db_session(db_engine) -> Generator[Session, None, None]:
     """
@@ -10,6 +10,7 @@ Tests the complete appointment service functionality including:
 
 import pytest
 from datetime import datetime, timedelta, time, timezone
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from models import (
@@ -346,6 +347,87 @@ class TestAppointmentServiceIntegration:
         )
         assert len(all_appointments) == 2
 
+    def test_appointment_listing_query_count_does_not_grow_with_appointments(
+        self, db_session: Session
+    ):
+        """Practitioner and appointment type names come from one bulk load, not per appointment."""
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        practitioners = []
+        for i in range(3):
+            practitioner, association = create_user_with_clinic_association(
+                db_session,
+                clinic=clinic,
+                email=f"practitioner{i}@test.com",
+                google_subject_id=f"practitioner_{i}",
+                full_name=f"Dr. {i}",
+                roles=["practitioner"]
+            )
+            association.title = "治療師"
+            practitioners.append(practitioner)
+        appt_types = [
+            AppointmentType(clinic_id=clinic.id, name=f"Type {i}", duration_minutes=30)
+            for i in range(3)
+        ]
+        db_session.add_all(appt_types)
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        db_session.add(patient)
+        db_session.commit()
+
+        def add_appointment(day_offset: int, index: int) -> None:
+            calendar_event = create_calendar_event_with_clinic(
+                db_session, practitioners[index], clinic,
+                event_type="appointment",
+                event_date=(taiwan_now() + timedelta(days=day_offset)).date(),
+                start_time=time(10, 0),
+                end_time=time(10, 30)
+            )
+            db_session.flush()
+            db_session.add(Appointment(
+                calendar_event_id=calendar_event.id,
+                patient_id=patient.id,
+                appointment_type_id=appt_types[index].id,
+                status="confirmed"
+            ))
+            db_session.commit()
+
+        def count_list_queries() -> tuple[list, int]:
+            statements: list[str] = []
+
+            def count_statement(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            bind = db_session.get_bind()
+            db_session.expire_all()
+            event.listen(bind, "before_cursor_execute", count_statement)
+            try:
+                result = AppointmentService.list_appointments_for_patient(db_session, patient.id, clinic.id)
+            finally:
+                event.remove(bind, "before_cursor_execute", count_statement)
+            return result, len(statements)
+
+        add_appointment(1, 0)
+        _, few_queries = count_list_queries()
+
+        for day_offset in range(2, 8):
+            add_appointment(day_offset, day_offset % 3)
+        appt_types[2].is_deleted = True
+        db_session.commit()
+        appointments, many_queries = count_list_queries()
+
+        assert len(appointments) == 7
+        assert many_queries == few_queries
+        names = {(a["practitioner_id"], a["appointment_type_name"], a["practitioner_name"]) for a in appointments}
+        assert (practitioners[0].id, "Type 0", "Dr. 0 治療師") in names
+        assert (practitioners[2].id, "已刪除服務類型", "Dr. 2 治療師") in names
+
     def test_appointment_cancellation_by_patient(
         self, db_session: Session
     ):
@@ -1085,3 +1167,209 @@ class TestAppointmentServiceIntegration:
         ).all()
         assert len(appointments) == 2
 
+
+    def test_create_recurring_appointments_in_bulk(self, db_session: Session):
+        """Bulk series creation uses a fixed number of queries and reports failed occurrences."""
+        from models import (
+            AppointmentResourceAllocation, AppointmentResourceRequirement,
+            FollowUpMessage, Resource, ResourceType, ScheduledLineMessage
+        )
+
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        practitioner, _ = create_user_with_clinic_association(
+            db_session,
+            clinic=clinic,
+            email="practitioner@test.com",
+            google_subject_id="practitioner_123",
+            full_name="Dr. Test",
+            roles=["practitioner"]
+        )
+        appt_type = AppointmentType(clinic_id=clinic.id, name="Consultation", duration_minutes=30)
+        db_session.add(appt_type)
+        line_user = LineUser(line_user_id="U_series", clinic_id=clinic.id, display_name="Series User")
+        db_session.add(line_user)
+        db_session.flush()
+        patient = Patient(
+            clinic_id=clinic.id, full_name="Test Patient",
+            phone_number="0912345678", line_user_id=line_user.id
+        )
+        db_session.add(patient)
+        db_session.add(FollowUpMessage(
+            appointment_type_id=appt_type.id,
+            clinic_id=clinic.id,
+            timing_mode='hours_after',
+            hours_after=2,
+            message_template="{病患姓名}，感謝您今天的預約！",
+            is_enabled=True,
+            display_order=0
+        ))
+
+        # One room required, and the clinic only has one
+        resource_type = ResourceType(clinic_id=clinic.id, name="Room")
+        db_session.add(resource_type)
+        db_session.flush()
+        room = Resource(resource_type_id=resource_type.id, clinic_id=clinic.id, name="Room 1")
+        db_session.add(room)
+        db_session.add(AppointmentResourceRequirement(
+            appointment_type_id=appt_type.id,
+            resource_type_id=resource_type.id,
+            quantity=1
+        ))
+        db_session.flush()
+
+        # Room is already taken on the second week at 10:00
+        first_day = (taiwan_now() + timedelta(days=7)).replace(second=0, microsecond=0)
+        blocked_start = (first_day + timedelta(weeks=1)).replace(hour=10, minute=0)
+        blocking_event = create_calendar_event_with_clinic(
+            db_session, practitioner, clinic,
+            event_type="appointment",
+            event_date=blocked_start.date(),
+            start_time=time(10, 0),
+            end_time=time(10, 30)
+        )
+        db_session.flush()
+        db_session.add(Appointment(
+            calendar_event_id=blocking_event.id,
+            patient_id=patient.id,
+            appointment_type_id=appt_type.id,
+            status="confirmed"
+        ))
+        db_session.flush()
+        db_session.add(AppointmentResourceAllocation(appointment_id=blocking_event.id, resource_id=room.id))
+        db_session.commit()
+
+        def create_series(hour: int, weeks: int):
+            occurrences = [
+                ((first_day + timedelta(weeks=w)).replace(hour=hour, minute=0), None)
+                for w in range(weeks)
+            ]
+            statements: list[str] = []
+
+            def count_statement(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            bind = db_session.get_bind()
+            event.listen(bind, "before_cursor_execute", count_statement)
+            try:
+                created, failed = AppointmentService.create_recurring_appointments(
+                    db=db_session,
+                    clinic_id=clinic.id,
+                    patient_id=patient.id,
+                    appointment_type_id=appt_type.id,
+                    practitioner_id=practitioner.id,
+                    occurrences=occurrences,
+                    clinic_notes="Weekly"
+                )
+            finally:
+                event.remove(bind, "before_cursor_execute", count_statement)
+            return created, failed, len(statements)
+
+        db_session.expire_on_commit = False  # As configured for application sessions
+        create_series(8, 1)  # Warm up the session's identity map
+        _, _, few_queries = create_series(14, 4)
+        created, failed, many_queries = create_series(10, 12)
+        assert many_queries == few_queries
+
+        # Only the occurrence whose room is taken fails
+        assert failed == [(1, "所需資源不足")]
+        assert [c["index"] for c in created] == [0] + list(range(2, 12))
+
+        appointment_ids = [c["appointment_id"] for c in created]
+        appointments = db_session.query(Appointment).filter(
+            Appointment.calendar_event_id.in_(appointment_ids)
+        ).all()
+        assert len(appointments) == 11
+        assert all(a.clinic_notes == "Weekly" and a.calendar_event.user_id == practitioner.id for a in appointments)
+        assert db_session.query(AppointmentResourceAllocation).filter(
+            AppointmentResourceAllocation.appointment_id.in_(appointment_ids)
+        ).count() == 11
+
+        # Reminder and follow-up scheduled for every created appointment
+        scheduled = db_session.query(ScheduledLineMessage).filter(
+            ScheduledLineMessage.clinic_id == clinic.id,
+            ScheduledLineMessage.message_context['appointment_id'].astext.in_([str(i) for i in appointment_ids])
+        ).all()
+        assert sorted(m.message_type for m in scheduled) == ['appointment_reminder'] * 11 + ['follow_up'] * 11
+
+    def test_recurring_appointments_survive_scheduling_failure(self, db_session: Session):
+        """A scheduler batch failing in the database keeps the series and the other batches."""
+        from unittest.mock import patch
+        from sqlalchemy import text
+        from models import FollowUpMessage, ScheduledLineMessage
+
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        practitioner, _ = create_user_with_clinic_association(
+            db_session,
+            clinic=clinic,
+            email="practitioner@test.com",
+            google_subject_id="practitioner_123",
+            full_name="Dr. Test",
+            roles=["practitioner"]
+        )
+        appt_type = AppointmentType(clinic_id=clinic.id, name="Consultation", duration_minutes=30)
+        db_session.add(appt_type)
+        line_user = LineUser(line_user_id="U_series", clinic_id=clinic.id, display_name="Series User")
+        db_session.add(line_user)
+        db_session.flush()
+        patient = Patient(
+            clinic_id=clinic.id, full_name="Test Patient",
+            phone_number="0912345678", line_user_id=line_user.id
+        )
+        db_session.add(patient)
+        db_session.add(FollowUpMessage(
+            appointment_type_id=appt_type.id,
+            clinic_id=clinic.id,
+            timing_mode='hours_after',
+            hours_after=2,
+            message_template="{病患姓名}，感謝您今天的預約！",
+            is_enabled=True,
+            display_order=0
+        ))
+        db_session.commit()
+
+        def failing_reminders(db, appointments):
+            # Aborts the surrounding transaction, like a failed scheduler query
+            db.execute(text("SELECT * FROM table_that_does_not_exist"))
+
+        first_day = (taiwan_now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+        with patch(
+            "services.reminder_scheduling_service.ReminderSchedulingService.schedule_reminders_batch",
+            side_effect=failing_reminders
+        ):
+            created, failed = AppointmentService.create_recurring_appointments(
+                db=db_session,
+                clinic_id=clinic.id,
+                patient_id=patient.id,
+                appointment_type_id=appt_type.id,
+                practitioner_id=practitioner.id,
+                occurrences=[(first_day + timedelta(weeks=w), None) for w in range(3)],
+                clinic_notes=None
+            )
+
+        assert failed == []
+        appointment_ids = [c["appointment_id"] for c in created]
+        assert db_session.query(Appointment).filter(
+            Appointment.calendar_event_id.in_(appointment_ids)
+        ).count() == 3
+
+        # Follow-ups are kept; only the failed reminder batch is missing
+        scheduled = db_session.query(ScheduledLineMessage).filter(
+            ScheduledLineMessage.clinic_id == clinic.id
+        ).all()
+        assert sorted(m.message_type for m in scheduled) == ['follow_up'] * 3
@@ -162,6 +162,37 @@ def test_update_medical_record_conflict(client, liff_test_setup, db_session):
     assert resp.status_code == 409
     assert resp.json()["detail"]["error_code"] == "RECORD_MODIFIED"
 
+def test_patch_medical_record_merges_values(client, liff_test_setup, db_session):
+    clinic, line_user1, _, _, _, record = liff_test_setup
+    record.values = {"q1": "original", "q2": "keep", "q3": "drop"}
+    db_session.commit()
+    
+    app.dependency_overrides[get_current_line_user_with_clinic] = lambda: (line_user1, clinic)
+    
+    payload = {
+        "values_patch": {"q1": "changed", "q3": None},
+        "version": record.version
+    }
+    
+    resp = client.patch(f"/api/liff/medical-records/{record.id}", json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["values"] == {"q1": "changed", "q2": "keep"}
+    assert data["is_submitted"] is False  # Untouched when omitted
+    assert data["patient_last_edited_at"] is not None
+    assert data["version"] == 2
+
+def test_patch_medical_record_conflict(client, liff_test_setup, db_session):
+    clinic, line_user1, _, _, _, record = liff_test_setup
+    
+    app.dependency_overrides[get_current_line_user_with_clinic] = lambda: (line_user1, clinic)
+    
+    payload = {"values_patch": {"q1": "Conflict!"}, "version": 99}
+    
+    resp = client.patch(f"/api/liff/medical-records/{record.id}", json=payload)
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["error_code"] == "RECORD_MODIFIED"
+
 @patch("services.patient_photo_service.PatientPhotoService.upload_photo")
 def test_upload_patient_photo_success(mock_upload, client, liff_test_setup, db_session):
     clinic, line_user1, _, patient1, _, record = liff_test_setup
@@ -13,6 +13,7 @@ from fastapi.testclient import TestClient
 from models import Clinic, LineUser
 from main import app
 from core.database import get_db
+from services.line_user_service import LineUserService, drain_profile_refresh_requests
 
 
 @pytest.fixture
@@ -120,6 +121,9 @@ class TestFollowEventUserCreation:
                     "Content-Type": "application/json"
                 }
             )
+            
+            # Profile is fetched by the background refresher
+            LineUserService.refresh_profiles(db_session, drain_profile_refresh_requests())
         
         # Verify response
         assert response.status_code == 200
@@ -261,6 +265,9 @@ class TestMessageEventUserCreation:
                         "Content-Type": "application/json"
                     }
                 )
+            
+            # Profile is fetched by the background refresher
+            LineUserService.refresh_profiles(db_session, drain_profile_refresh_requests())
         
         # Verify response
         assert response.status_code == 200
@@ -313,6 +320,9 @@ class TestMessageEventUserCreation:
                     "Content-Type": "application/json"
                 }
             )
+            
+            # Profile is fetched by the background refresher
+            LineUserService.refresh_profiles(db_session, drain_profile_refresh_requests())
         
         # Verify response (should be OK even though chat is disabled)
         assert response.status_code == 200
@@ -382,3 +392,36 @@ class TestMessageEventUserCreation:
         # This is intentional to avoid unnecessary API calls on every message
         assert existing_user.display_name == "Old Name"
 
+
+
+class TestWebhookRedelivery:
+    """Test that redelivered webhook events are processed once."""
+
+    def test_redelivered_event_is_processed_once(self, client, db_session, test_clinic_with_webhook):
+        """Test that a redelivery with the same webhookEventId is suppressed."""
+        import uuid
+        from services.line_webhook_dedup import get_webhook_event_deduplicator
+
+        clinic = test_clinic_with_webhook
+        payload = create_webhook_payload("follow", "U_redelivered_follower_123")
+        payload["events"][0]["webhookEventId"] = uuid.uuid4().hex
+        suppressed_before = get_webhook_event_deduplicator().suppressed
+
+        with patch('api.line_webhook.LineUserService.get_or_create_line_user') as mock_get_or_create:
+            responses = []
+            for is_redelivery in (False, True):
+                payload["events"][0]["deliveryContext"] = {"isRedelivery": is_redelivery}
+                body = json.dumps(payload)
+                responses.append(client.post(
+                    "/api/line/webhook",
+                    content=body,
+                    headers={
+                        "X-Line-Signature": create_webhook_signature(body, clinic.line_channel_secret),
+                        "Content-Type": "application/json"
+                    }
+                ))
+
+        assert [response.status_code for response in responses] == [200, 200]
+        assert responses[1].json()["message"] == "Event ignored (duplicate delivery)"
+        mock_get_or_create.assert_called_once()
+        assert get_webhook_event_deduplicator().suppressed == suppressed_before + 1
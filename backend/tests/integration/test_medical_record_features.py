@@ -383,6 +383,79 @@ def test_optimistic_locking_conflict_response(client, test_clinic_setup, db_sess
     assert resp.json()["values"]["Notes"] == "Updated by User B (force save)"
 
 
+def test_medical_record_merge_patch(client, test_clinic_setup, db_session):
+    """
+    Verifies PATCH applies a JSON Merge Patch to values under the version check.
+    """
+    clinic, patient, headers = test_clinic_setup
+
+    template_data = {"name": "Patch Test", "fields": [{"name": "Notes", "type": "text"}]}
+    resp = client.post("/api/clinic/medical-record-templates", json=template_data, headers=headers)
+    template_id = resp.json()["id"]
+
+    record_data = {
+        "template_id": template_id,
+        "values": {"Notes": "Initial", "Pain": {"level": 3, "area": "neck"}, "Extra": "x"}
+    }
+    resp = client.post(f"/api/clinic/patients/{patient.id}/medical-records", json=record_data, headers=headers)
+    record_id = resp.json()["id"]
+
+    patch_data = {"version": 1, "values_patch": {"Pain": {"level": 5}, "Extra": None}}
+    resp = client.patch(f"/api/clinic/medical-records/{record_id}", json=patch_data, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    assert resp.json()["values"] == {"Notes": "Initial", "Pain": {"level": 5, "area": "neck"}}
+
+    # Stale version is rejected with the current record state
+    resp = client.patch(f"/api/clinic/medical-records/{record_id}", json=patch_data, headers=headers)
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["current_record"]["version"] == 2
+
+def test_medical_record_summary_listing(client, test_clinic_setup, db_session):
+    """
+    Verifies the summary listing returns metadata and photo counts without
+    the JSONB payloads (values / template_snapshot).
+    """
+    clinic, patient, headers = test_clinic_setup
+
+    template_data = {"name": "Summary Test", "fields": [{"name": "Notes", "type": "text"}]}
+    resp = client.post("/api/clinic/medical-record-templates", json=template_data, headers=headers)
+    template_id = resp.json()["id"]
+
+    resp = client.post(
+        f"/api/clinic/patients/{patient.id}/medical-records",
+        json={"template_id": template_id, "values": {"Notes": "x" * 500}},
+        headers=headers
+    )
+    assert resp.status_code == 200
+    record_id = resp.json()["id"]
+
+    for i, is_deleted in enumerate([False, False, True]):
+        db_session.add(PatientPhoto(
+            clinic_id=clinic.id,
+            patient_id=patient.id,
+            medical_record_id=record_id,
+            filename=f"{i}.jpg",
+            storage_key=f"test/summary/{i}.jpg",
+            content_type="image/jpeg",
+            size_bytes=1,
+            is_pending=False,
+            is_deleted=is_deleted
+        ))
+    db_session.commit()
+
+    resp = client.get(f"/api/clinic/patients/{patient.id}/medical-records/summary", headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 1
+    summary = data["records"][0]
+    assert summary["id"] == record_id
+    assert summary["template_name"] == "Summary Test"
+    assert summary["photo_count"] == 2
+    assert "values" not in summary
+    assert "template_snapshot" not in summary
+
+
 @mock_aws
 def test_abandoned_upload_cleanup(client, test_clinic_setup, db_session):
     """
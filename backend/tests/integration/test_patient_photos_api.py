@@ -1,18 +1,26 @@
 """
 Integration tests for patient photos API endpoints.
 """
+import io
+import boto3
 import pytest
 from typing import Optional
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from moto import mock_aws
+from PIL import Image
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from main import app
+from core.constants import PHOTO_PROCESSING_MAX_ATTEMPTS
 from core.database import get_db
 from models.clinic import Clinic
 from models.patient import Patient
 from models.patient_photo import PatientPhoto
 from models.medical_record_template import MedicalRecordTemplate
 from models.medical_record import MedicalRecord
+from services.patient_photo_service import PatientPhotoService
 from tests.conftest import create_user_with_clinic_association
 
 
@@ -293,6 +301,46 @@ class TestListPhotosAPI:
         assert data["items"][2]["id"] == photo1.id
 
 
+class TestThumbnailListAPI:
+    """Test GET /clinic/patient-photos/thumbnails and on-demand full-size URLs."""
+
+    def test_lists_thumbnails_without_full_urls(
+        self,
+        client: TestClient,
+        db_session: Session,
+        setup_data: dict,
+        auth_headers: dict
+    ):
+        """Verify only thumbnail URLs are signed, and full URLs are fetched on demand."""
+        clinic = setup_data["clinic"]
+        patient = setup_data["patient"]
+        photo = create_photo(db_session, clinic, patient)
+
+        response = client.get(
+            "/api/clinic/patient-photos/thumbnails",
+            params={"patient_id": patient.id},
+            headers=auth_headers
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["total"] == 1
+        assert data["items"][0]["url"] is None
+        assert photo.thumbnail_key in data["items"][0]["thumbnail_url"]
+
+        response = client.get(f"/api/clinic/patient-photos/{photo.id}/url", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        assert photo.storage_key in response.json()["url"]
+
+    def test_full_url_for_missing_photo_returns_404(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        response = client.get("/api/clinic/patient-photos/999999/url", headers=auth_headers)
+        assert response.status_code == 404
+
+
 class TestCountRecordPhotosAPI:
     """Test GET /clinic/patient-photos/count endpoint."""
 
@@ -371,3 +419,138 @@ class TestCountRecordPhotosAPI:
         assert response.status_code == 200
         data = response.json()
         assert data["count"] == 0
+
+
+@mock_aws
+class TestDirectUploadAPI:
+    """Test the presigned direct-upload flow and background processing."""
+
+    def _create_bucket(self):
+        s3 = boto3.client("s3", region_name="ap-northeast-1")
+        s3.create_bucket(Bucket="clinic-bot-dev", CreateBucketConfiguration={'LocationConstraint': 'ap-northeast-1'})
+        return s3
+
+    def _image_bytes(self) -> bytes:
+        img = Image.new('RGB', (3000, 1500), color='blue')
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def test_direct_upload_is_processed_by_worker(
+        self,
+        client: TestClient,
+        db_session: Session,
+        setup_data: dict,
+        auth_headers: dict
+    ):
+        """Verify a staged upload is hidden until processed, then becomes a normal photo."""
+        s3 = self._create_bucket()
+        clinic = setup_data["clinic"]
+        patient = setup_data["patient"]
+
+        response = client.post(
+            "/api/clinic/patient-photos/direct-uploads",
+            json={"patient_id": patient.id, "filename": "scan.png", "content_type": "image/png"},
+            headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["upload_url"]
+        assert data["photo"]["upload_status"] == "awaiting_upload"
+        photo_id = data["photo"]["id"]
+
+        # Simulate the client's PUT to the presigned staging key
+        photo = db_session.query(PatientPhoto).get(photo_id)
+        staging_key = photo.staging_key
+        assert staging_key.startswith(f"clinic_assets/{clinic.id}/staging/")
+        s3.put_object(Bucket="clinic-bot-dev", Key=staging_key, Body=self._image_bytes())
+
+        response = client.post(f"/api/clinic/patient-photos/{photo_id}/complete", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["upload_status"] == "processing"
+
+        # Not visible in the gallery until processed
+        response = client.get("/api/clinic/patient-photos", params={"patient_id": patient.id}, headers=auth_headers)
+        assert response.json()["total"] == 0
+
+        assert PatientPhotoService().process_queued_uploads(db_session) == 1
+
+        db_session.refresh(photo)
+        assert photo.upload_status == "ready"
+        assert photo.staging_key is None
+        assert photo.content_type == "image/jpeg"
+        assert photo.storage_key == f"clinic_assets/{clinic.id}/{photo.content_hash}.jpg"
+        assert s3.get_object(Bucket="clinic-bot-dev", Key=photo.thumbnail_key)
+        stored = Image.open(io.BytesIO(s3.get_object(Bucket="clinic-bot-dev", Key=photo.storage_key)["Body"].read()))
+        assert max(stored.size) == 2048
+        with pytest.raises(ClientError):
+            s3.head_object(Bucket="clinic-bot-dev", Key=staging_key)
+
+        response = client.get("/api/clinic/patient-photos", params={"patient_id": patient.id}, headers=auth_headers)
+        assert response.json()["total"] == 1
+
+    def test_complete_without_staged_object_fails(
+        self,
+        client: TestClient,
+        db_session: Session,
+        setup_data: dict,
+        auth_headers: dict
+    ):
+        """Verify completing an upload that never reached storage is rejected."""
+        self._create_bucket()
+        patient = setup_data["patient"]
+
+        response = client.post(
+            "/api/clinic/patient-photos/direct-uploads",
+            json={"patient_id": patient.id, "filename": "scan.jpg", "content_type": "image/jpeg"},
+            headers=auth_headers
+        )
+        photo_id = response.json()["photo"]["id"]
+
+        response = client.post(f"/api/clinic/patient-photos/{photo_id}/complete", headers=auth_headers)
+        assert response.status_code == 400
+        assert db_session.query(PatientPhoto).get(photo_id).upload_status == "awaiting_upload"
+
+    def test_upload_failing_processing_is_marked_failed_after_max_attempts(
+        self,
+        db_session: Session,
+        setup_data: dict
+    ):
+        """Verify an upload whose processing keeps failing stops being retried."""
+        s3 = self._create_bucket()
+        clinic = setup_data["clinic"]
+        patient = setup_data["patient"]
+        service = PatientPhotoService()
+
+        photo, _ = service.create_direct_upload(
+            db_session, clinic_id=clinic.id, patient_id=patient.id,
+            filename="scan.png", content_type="image/png"
+        )
+        s3.put_object(Bucket="clinic-bot-dev", Key=photo.staging_key, Body=self._image_bytes())
+        service.complete_direct_upload(db_session, photo.id, clinic.id)
+
+        with patch.object(PatientPhotoService, "_store_processed_image", side_effect=RuntimeError("S3 put failed")):
+            for attempt in range(1, PHOTO_PROCESSING_MAX_ATTEMPTS + 1):
+                assert service.process_queued_uploads(db_session) == 0
+                db_session.refresh(photo)
+                assert photo.processing_attempts == attempt
+
+        assert photo.upload_status == "failed"
+        # No longer queued, so the worker stops retrying it
+        with patch.object(PatientPhotoService, "_store_processed_image") as mock_store:
+            assert service.process_queued_uploads(db_session) == 0
+        mock_store.assert_not_called()
+
+    def test_liff_photo_responses_only_include_ready_photos(self, db_session: Session, setup_data: dict):
+        """Verify LIFF record views hide direct uploads that are not processed yet."""
+        from api.liff import _build_liff_photo_responses
+
+        self._create_bucket()
+        ready = create_photo(db_session, setup_data["clinic"], setup_data["patient"])
+        processing = create_photo(db_session, setup_data["clinic"], setup_data["patient"])
+        processing.upload_status = "processing"
+        db_session.commit()
+
+        responses = _build_liff_photo_responses([ready, processing])
+
+        assert [response.id for response in responses] == [ready.id]
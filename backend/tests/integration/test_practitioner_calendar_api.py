@@ -11,6 +11,7 @@ Tests the new calendar management functionality including:
 import pytest
 from datetime import date, time, datetime, timedelta
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from main import app
@@ -1358,6 +1359,77 @@ class TestPractitionerCalendarAPI:
         
         # Verify all results have default_schedule
 
+    def test_batch_calendar_default_schedule_query_count(self, client: TestClient, db_session: Session, test_clinic_and_practitioner):
+        """Batch calendar loads weekly templates once, so query count does not grow with the date range."""
+        clinic, practitioner1 = test_clinic_and_practitioner
+        
+        practitioner2, _ = create_user_with_clinic_association(
+            db_session=db_session,
+            clinic=clinic,
+            full_name="Dr. Test 2",
+            email="practitioner2@example.com",
+            google_subject_id="practitioner2_subject",
+            roles=["practitioner"],
+            is_active=True
+        )
+        
+        # Morning + afternoon on weekdays for practitioner1, mornings only on Monday for practitioner2
+        for day_of_week in range(5):
+            create_practitioner_availability_with_clinic(db_session, practitioner1, clinic, day_of_week, time(14, 0), time(18, 0))
+            create_practitioner_availability_with_clinic(db_session, practitioner1, clinic, day_of_week, time(9, 0), time(12, 0))
+        create_practitioner_availability_with_clinic(db_session, practitioner2, clinic, 0, time(9, 0), time(12, 0))
+        db_session.commit()
+        
+        token = get_auth_token(client, practitioner1.email)
+        
+        start_date = date(2030, 1, 7)  # A Monday
+        bind = db_session.get_bind()
+        
+        def fetch(num_days: int):
+            statements: list[str] = []
+            
+            def count_statement(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            
+            event.listen(bind, "before_cursor_execute", count_statement)
+            try:
+                response = client.post(
+                    "/api/clinic/practitioners/calendar/batch",
+                    headers={"Authorization": f"Bearer {token}"},
+                    json={
+                        "practitioner_ids": [practitioner1.id, practitioner2.id],
+                        "start_date": start_date.strftime('%Y-%m-%d'),
+                        "end_date": (start_date + timedelta(days=num_days - 1)).strftime('%Y-%m-%d')
+                    }
+                )
+            finally:
+                event.remove(bind, "before_cursor_execute", count_statement)
+            assert response.status_code == 200
+            return response.json()["results"], statements
+        
+        fetch(1)  # Warm up per-session auth work so only the calendar queries are compared
+        short_results, short_statements = fetch(2)
+        long_results, long_statements = fetch(28)
+        
+        assert len(long_results) == 56  # 2 practitioners × 28 days
+        assert len(long_statements) == len(short_statements)
+        availability_queries = [s for s in long_statements if "FROM practitioner_availability" in s]
+        assert len(availability_queries) == 1
+        
+        # Template is expanded per date in memory
+        result_dict = {(r["user_id"], r["date"]): r for r in long_results}
+        monday = start_date.strftime('%Y-%m-%d')
+        saturday = (start_date + timedelta(days=5)).strftime('%Y-%m-%d')
+        assert result_dict[(practitioner1.id, monday)]["default_schedule"] == [
+            {"start_time": "09:00", "end_time": "12:00"},
+            {"start_time": "14:00", "end_time": "18:00"}
+        ]
+        assert result_dict[(practitioner2.id, monday)]["default_schedule"] == [
+            {"start_time": "09:00", "end_time": "12:00"}
+        ]
+        assert result_dict[(practitioner1.id, saturday)]["default_schedule"] == []
+        assert result_dict[(practitioner2.id, (start_date + timedelta(days=1)).strftime('%Y-%m-%d'))]["default_schedule"] == []
+
     def test_batch_available_slots_endpoint(self, client: TestClient, db_session: Session, test_clinic_and_practitioner):
         """Test batch available slots endpoint for multiple dates."""
         clinic, practitioner = test_clinic_and_practitioner
@@ -3,14 +3,23 @@ Integration tests for receipt and billing endpoints.
 """
 
 import pytest
+import zipfile
 from decimal import Decimal
 from datetime import datetime, date, time, timezone
+from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from unittest.mock import patch
 
+from main import app
+from auth.dependencies import get_current_user, UserContext
+from core.database import get_db
 from models import Clinic, User, Patient, AppointmentType, Appointment, CalendarEvent, PractitionerAppointmentTypes, Receipt
 from models.user_clinic_association import UserClinicAssociation
+from services.pdf_render_pool import PDFRenderPool
+from services.receipt_export_service import ReceiptExportService
 from services.receipt_service import ReceiptService
 from services.billing_scenario_service import BillingScenarioService
+from utils.datetime_utils import TAIWAN_TZ
 
 
 class TestCheckoutEndpoint:
@@ -628,6 +637,110 @@ class TestReceiptViewing:
         assert retrieved_receipt.id == receipt.id
         assert retrieved_receipt.receipt_number == receipt.receipt_number
 
+    def test_get_receipt_html_endpoint(self, db_session: Session):
+        """Test that the HTML endpoint renders the receipt for the clinic that owns it."""
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.commit()
+
+        admin_user = User(
+            email="admin@test.com",
+            google_subject_id="google_admin_123"
+        )
+        db_session.add(admin_user)
+        db_session.flush()
+        db_session.add(UserClinicAssociation(
+            user_id=admin_user.id,
+            clinic_id=clinic.id,
+            full_name="Admin User",
+            roles=["admin"],
+            is_active=True
+        ))
+
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        apt_type = AppointmentType(clinic_id=clinic.id, name="初診評估", duration_minutes=60)
+        db_session.add_all([patient, apt_type])
+        db_session.commit()
+
+        calendar_event = CalendarEvent(
+            user_id=admin_user.id,
+            clinic_id=clinic.id,
+            event_type='appointment',
+            date=date.today(),
+            start_time=time(10, 0),
+            end_time=time(11, 0)
+        )
+        db_session.add(calendar_event)
+        db_session.flush()
+        db_session.add(Appointment(
+            calendar_event_id=calendar_event.id,
+            patient_id=patient.id,
+            appointment_type_id=apt_type.id,
+            status="confirmed"
+        ))
+        db_session.flush()
+        receipt = ReceiptService.create_receipt(
+            db=db_session,
+            appointment_id=calendar_event.id,
+            clinic_id=clinic.id,
+            checked_out_by_user_id=admin_user.id,
+            items=[{
+                "item_type": "service_item",
+                "service_item_id": apt_type.id,
+                "practitioner_id": None,
+                "billing_scenario_id": None,
+                "amount": 1000.00,
+                "revenue_share": 300.00,
+                "display_order": 0
+            }],
+            payment_method="cash"
+        )
+        db_session.commit()
+
+        admin_context = UserContext(
+            user_type="clinic_user",
+            email=admin_user.email,
+            roles=["admin"],
+            active_clinic_id=clinic.id,
+            google_subject_id=admin_user.google_subject_id,
+            name="Admin User",
+            user_id=admin_user.id
+        )
+        other_clinic_context = UserContext(
+            user_type="clinic_user",
+            email=admin_user.email,
+            roles=["admin"],
+            active_clinic_id=clinic.id + 1000,
+            google_subject_id=admin_user.google_subject_id,
+            name="Admin User",
+            user_id=admin_user.id
+        )
+
+        app.dependency_overrides[get_db] = lambda: db_session
+        try:
+            client = TestClient(app)
+            with patch("services.receipt_render_cache.get_receipt_render_cache", return_value=None):
+                app.dependency_overrides[get_current_user] = lambda: admin_context
+                response = client.get(f"/api/receipts/{receipt.id}/html")
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/html")
+                assert receipt.receipt_number in response.text
+
+                response = client.get(f"/api/receipts/{receipt.id + 1000}/html")
+                assert response.status_code == 404
+
+                app.dependency_overrides[get_current_user] = lambda: other_clinic_context
+                response = client.get(f"/api/receipts/{receipt.id}/html")
+                assert response.status_code == 403
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_current_user, None)
+
 
 class TestReceiptVoiding:
     """Test receipt voiding."""
@@ -1144,3 +1257,163 @@ class TestBillingScenarioEndpoints:
         assert item2["practitioner"]["title"] == ""
 
 
+
+
+class TestReceiptExport:
+    """Test bulk receipt export jobs."""
+
+    def _create_receipts(self, db_session: Session, count: int):
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.commit()
+
+        admin_user = User(
+            email="admin@test.com",
+            google_subject_id="google_admin_123"
+        )
+        db_session.add(admin_user)
+        db_session.flush()
+        db_session.add(UserClinicAssociation(
+            user_id=admin_user.id,
+            clinic_id=clinic.id,
+            full_name="Admin User",
+            roles=["admin"],
+            is_active=True
+        ))
+
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        apt_type = AppointmentType(clinic_id=clinic.id, name="初診評估", duration_minutes=60)
+        db_session.add_all([patient, apt_type])
+        db_session.commit()
+
+        receipts = []
+        for i in range(count):
+            calendar_event = CalendarEvent(
+                user_id=admin_user.id,
+                clinic_id=clinic.id,
+                event_type='appointment',
+                date=date.today(),
+                start_time=time(9 + i, 0),
+                end_time=time(10 + i, 0)
+            )
+            db_session.add(calendar_event)
+            db_session.flush()
+            db_session.add(Appointment(
+                calendar_event_id=calendar_event.id,
+                patient_id=patient.id,
+                appointment_type_id=apt_type.id,
+                status="confirmed"
+            ))
+            db_session.flush()
+            receipts.append(ReceiptService.create_receipt(
+                db=db_session,
+                appointment_id=calendar_event.id,
+                clinic_id=clinic.id,
+                checked_out_by_user_id=admin_user.id,
+                items=[{
+                    "item_type": "service_item",
+                    "service_item_id": apt_type.id,
+                    "practitioner_id": None,
+                    "billing_scenario_id": None,
+                    "amount": 1000.00,
+                    "revenue_share": 300.00,
+                    "display_order": 0
+                }],
+                payment_method="cash"
+            ))
+            db_session.commit()
+
+        return clinic, admin_user, receipts
+
+    def _run_export(self, db_session: Session, tmp_path, **job_kwargs):
+        failing_numbers = job_kwargs.pop("failing_numbers", ())
+
+        def render(receipt_data, void_info):
+            if receipt_data["receipt_number"] in failing_numbers:
+                raise ValueError("render failed")
+            return f"PDF {receipt_data['receipt_number']} voided={void_info['voided']}".encode()
+
+        pool = PDFRenderPool(workers=0, max_queue=4, timeout_seconds=5)
+        try:
+            with patch("services.receipt_export_service.RECEIPT_EXPORT_DIR", str(tmp_path)), \
+                 patch("services.receipt_export_service.get_receipt_render_cache", return_value=None), \
+                 patch("services.receipt_export_service.get_pdf_render_pool", return_value=pool), \
+                 patch("services.pdf_render_pool._render_receipt_pdf", side_effect=render):
+                job = ReceiptExportService.create_job(**job_kwargs)
+                ReceiptExportService.run_export(db_session, job)
+        finally:
+            pool.shutdown()
+
+        contents = {}
+        if job.file_path is not None:
+            with zipfile.ZipFile(job.file_path) as zf:
+                contents = {name: zf.read(name).decode() for name in zf.namelist()}
+        return job, contents
+
+    def test_export_by_date_range(self, db_session: Session, tmp_path):
+        clinic, admin_user, receipts = self._create_receipts(db_session, 3)
+        ReceiptService.void_receipt(db_session, receipts[1].id, admin_user.id, reason="錯誤")
+        db_session.commit()
+        issue_date = receipts[0].issue_date.astimezone(TAIWAN_TZ).date()
+
+        job, contents = self._run_export(
+            db_session, tmp_path,
+            clinic_id=clinic.id,
+            requested_by_user_id=admin_user.id,
+            start_date=issue_date,
+            end_date=issue_date
+        )
+
+        assert job.status == 'completed'
+        assert job.total == 3
+        assert job.processed == 3
+        assert contents == {
+            f"receipt_{receipts[0].receipt_number}.pdf": f"PDF {receipts[0].receipt_number} voided=False",
+            f"receipt_{receipts[1].receipt_number}.pdf": f"PDF {receipts[1].receipt_number} voided=True",
+            f"receipt_{receipts[2].receipt_number}.pdf": f"PDF {receipts[2].receipt_number} voided=False",
+        }
+
+    def test_export_by_ids_skips_failed_renders(self, db_session: Session, tmp_path):
+        clinic, admin_user, receipts = self._create_receipts(db_session, 3)
+
+        job, contents = self._run_export(
+            db_session, tmp_path,
+            clinic_id=clinic.id,
+            requested_by_user_id=admin_user.id,
+            receipt_ids=[receipts[0].id, receipts[2].id],
+            failing_numbers=(receipts[2].receipt_number,)
+        )
+
+        assert job.status == 'completed'
+        assert job.total == 2
+        assert job.processed == 2
+        assert job.failed_receipt_numbers == [receipts[2].receipt_number]
+        assert list(contents) == [f"receipt_{receipts[0].receipt_number}.pdf"]
+
+    def test_export_excludes_voided_and_other_clinics(self, db_session: Session, tmp_path):
+        clinic, admin_user, receipts = self._create_receipts(db_session, 2)
+        ReceiptService.void_receipt(db_session, receipts[0].id, admin_user.id, reason="錯誤")
+        db_session.commit()
+
+        job, contents = self._run_export(
+            db_session, tmp_path,
+            clinic_id=clinic.id + 1000,
+            requested_by_user_id=admin_user.id,
+            receipt_ids=[r.id for r in receipts]
+        )
+        assert job.status == 'completed'
+        assert contents == {}
+
+        job, contents = self._run_export(
+            db_session, tmp_path,
+            clinic_id=clinic.id,
+            requested_by_user_id=admin_user.id,
+            receipt_ids=[r.id for r in receipts],
+            include_voided=False
+        )
+        assert list(contents) == [f"receipt_{receipts[1].receipt_number}.pdf"]
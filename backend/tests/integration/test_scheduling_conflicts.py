@@ -1229,6 +1229,149 @@ class TestRecurringConflicts:
         assert data["occurrences"][2]["conflict_type"] is None
 
 
+    def test_check_recurring_conflicts_batch_matches_single_checks(self, client: TestClient, db_session: Session, test_clinic_and_practitioner):
+        """Weekly series: batch results equal per-occurrence checks and query count does not grow with occurrences."""
+        from datetime import datetime
+        from sqlalchemy import event
+        from models import ResourceType, Resource, AppointmentResourceRequirement, AppointmentResourceAllocation
+        from services.availability_service import AvailabilityService
+        from utils.datetime_utils import TAIWAN_TZ
+
+        clinic, practitioner = test_clinic_and_practitioner
+
+        appointment_type = AppointmentType(
+            clinic_id=clinic.id,
+            name="Test Appointment",
+            duration_minutes=30,
+            scheduling_buffer_minutes=0
+        )
+        db_session.add(appointment_type)
+        db_session.flush()
+        db_session.add(PractitionerAppointmentTypes(
+            user_id=practitioner.id,
+            appointment_type_id=appointment_type.id,
+            clinic_id=clinic.id
+        ))
+
+        # One room required, and the clinic only has one
+        resource_type = ResourceType(clinic_id=clinic.id, name="Room")
+        db_session.add(resource_type)
+        db_session.flush()
+        room = Resource(resource_type_id=resource_type.id, clinic_id=clinic.id, name="Room 1")
+        db_session.add(room)
+        db_session.add(AppointmentResourceRequirement(
+            appointment_type_id=appointment_type.id,
+            resource_type_id=resource_type.id,
+            quantity=1
+        ))
+
+        first_date = (taiwan_now() + timedelta(days=7)).date()
+        create_practitioner_availability_with_clinic(
+            db_session, practitioner, clinic,
+            day_of_week=first_date.weekday(),
+            start_time=time(9, 0),
+            end_time=time(17, 0)
+        )
+
+        patient = Patient(clinic_id=clinic.id, full_name="Existing Patient", phone_number="1234567890")
+        db_session.add(patient)
+        db_session.flush()
+
+        # Week 2: practitioner already booked. Week 3: room taken by another practitioner.
+        other_practitioner, _ = create_user_with_clinic_association(
+            db_session=db_session,
+            clinic=clinic,
+            full_name="Dr. Other",
+            email="other@example.com",
+            google_subject_id="other_subject",
+            roles=["practitioner"],
+            is_active=True
+        )
+        for owner, week in [(practitioner, 1), (other_practitioner, 2)]:
+            existing_event = create_calendar_event_with_clinic(
+                db_session, owner, clinic,
+                event_type="appointment",
+                event_date=first_date + timedelta(weeks=week),
+                start_time=time(10, 0),
+                end_time=time(10, 30)
+            )
+            db_session.flush()
+            db_session.add(Appointment(
+                calendar_event_id=existing_event.id,
+                patient_id=patient.id,
+                appointment_type_id=appointment_type.id,
+                status="confirmed"
+            ))
+            db_session.flush()
+            if owner is other_practitioner:
+                db_session.add(AppointmentResourceAllocation(appointment_id=existing_event.id, resource_id=room.id))
+        db_session.commit()
+
+        def check(weeks: int):
+            occurrences = [(first_date + timedelta(weeks=w), time(10, 0)) for w in range(weeks)]
+            statements: list[str] = []
+
+            def count_statement(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            bind = db_session.get_bind()
+            event.listen(bind, "before_cursor_execute", count_statement)
+            try:
+                results = AvailabilityService.check_recurring_scheduling_conflicts(
+                    db=db_session,
+                    practitioner_id=practitioner.id,
+                    occurrences=occurrences,
+                    appointment_type_id=appointment_type.id,
+                    clinic_id=clinic.id
+                )
+            finally:
+                event.remove(bind, "before_cursor_execute", count_statement)
+            return occurrences, results, len(statements)
+
+        check(1)  # Warm up the session's identity map
+        _, _, few_queries = check(4)
+        occurrences, results, many_queries = check(12)
+        assert many_queries == few_queries
+
+        # Same answers as the single-occurrence check
+        for (occ_date, occ_start), result in zip(occurrences, results):
+            single = AvailabilityService.check_scheduling_conflicts(
+                db=db_session,
+                practitioner_id=practitioner.id,
+                date=occ_date,
+                start_time=occ_start,
+                appointment_type_id=appointment_type.id,
+                clinic_id=clinic.id
+            )
+            assert result == single
+
+        assert results[0]["has_conflict"] is False
+        assert results[1]["conflict_type"] == "appointment"
+        assert results[2]["conflict_type"] == "resource"
+        assert results[2]["unavailable_resource_ids"] == [room.id]
+
+        # Endpoint returns the batch results in order, with duplicates flagged
+        token = get_auth_token(client, practitioner.email)
+        occurrence_strings = [
+            datetime.combine(occ_date, occ_start).replace(tzinfo=TAIWAN_TZ).isoformat()
+            for occ_date, occ_start in occurrences[:3]
+        ]
+        response = client.post(
+            "/api/clinic/appointments/check-recurring-conflicts",
+            json={
+                "practitioner_id": practitioner.id,
+                "appointment_type_id": appointment_type.id,
+                "occurrences": occurrence_strings + [occurrence_strings[0]]
+            },
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        data = response.json()["occurrences"]
+        assert [o["conflict_type"] for o in data] == ["duplicate", "appointment", "resource", "duplicate"]
+        assert data[0]["duplicate_index"] == 3
+        assert data[3]["duplicate_index"] == 0
+
+
 class TestBatchSchedulingConflicts:
     """Integration tests for batch scheduling conflict detection endpoint."""
 
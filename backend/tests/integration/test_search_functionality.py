@@ -320,6 +320,61 @@ class TestPatientSearch:
         assert response_lower.json()["total"] == response_upper.json()["total"]
         # Search matches both patient name and LINE user display name, so may return multiple results
         assert response_lower.json()["total"] >= 1
+    
+    def test_search_by_formatted_phone_number(self, db_session, test_clinic, test_patients):
+        """Phone search ignores formatting on both the search term and the stored number."""
+        from utils.patient_queries import get_active_patients_for_clinic
+        
+        formatted = Patient(
+            clinic_id=test_clinic.id,
+            full_name="趙六",
+            phone_number="0978-123-456",
+            is_deleted=False
+        )
+        db_session.add(formatted)
+        db_session.commit()
+        db_session.refresh(formatted)
+        assert formatted.phone_number_digits == "0978123456"
+        
+        patients, total = get_active_patients_for_clinic(db_session, test_clinic.id, search="0912-345")
+        assert total == 1
+        assert patients[0].phone_number == "0912345678"
+        
+        patients, total = get_active_patients_for_clinic(db_session, test_clinic.id, search="0978123")
+        assert total == 1
+        assert patients[0].id == formatted.id
+    
+    def test_search_page_and_total_in_one_query(self, db_session, test_clinic, test_patients):
+        """A searched page and its total come from a single statement."""
+        from sqlalchemy import event
+        from utils.patient_queries import get_active_patients_for_clinic
+        
+        clinic_id = test_clinic.id
+        statements: list[str] = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", count_statement)
+        try:
+            patients, total = get_active_patients_for_clinic(
+                db_session, clinic_id, page=1, page_size=1, search="張"
+            )
+        finally:
+            event.remove(bind, "before_cursor_execute", count_statement)
+        
+        assert len([s for s in statements if s.startswith("SELECT")]) == 1
+        assert total == 2  # 張三 and 張小明 (both also match the LINE user name 張三)
+        assert len(patients) == 1
+        assert patients[0].line_user is not None  # Eagerly loaded in the same statement
+        
+        # Past the last page there are no rows to carry the total
+        patients, total = get_active_patients_for_clinic(
+            db_session, clinic_id, page=5, page_size=1, search="張"
+        )
+        assert patients == []
+        assert total == 2
 
 
 class TestLineUserSearch:
@@ -9,6 +9,8 @@ from datetime import datetime, date, time, timedelta
 from unittest.mock import Mock, patch, AsyncMock
 from typing import Dict, Optional, List
 
+from sqlalchemy import event
+
 from models.appointment import Appointment
 from models.calendar_event import CalendarEvent
 from models.clinic import Clinic
@@ -996,3 +998,120 @@ class TestAdminDailyNotificationService:
             assert len(msg) <= LINE_MESSAGE_MAX_CHARS, \
                 f"Message {i}/{len(messages)} exceeds limit: {len(msg)} chars (limit: {LINE_MESSAGE_MAX_CHARS})"
 
+
+
+class TestSetBasedAdminDigest:
+    """Admin digest selection across all clinics in a fixed number of queries."""
+
+    def _create_clinic(self, db_session, name, has_credentials=True):
+        clinic = Clinic(
+            name=name,
+            line_channel_id=f"{name}_channel",
+            line_channel_secret="test_secret" if has_credentials else "",
+            line_channel_access_token="test_token" if has_credentials else "",
+            subscription_status="trial"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+        return clinic
+
+    def _create_admin(self, db_session, clinic, key, settings):
+        _, association = create_user_with_clinic_association(
+            db_session, clinic,
+            full_name=f"Admin {key}",
+            email=f"{key}@test.com",
+            google_subject_id=f"{key}_sub",
+            roles=["admin"]
+        )
+        association.line_user_id = f"{key}_line_id"
+        association.settings = settings
+        db_session.flush()
+        return association
+
+    def _create_appointment(self, db_session, clinic, practitioner, on):
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        db_session.add_all([patient, appointment_type])
+        db_session.flush()
+        calendar_event = create_calendar_event_with_clinic(
+            db_session, practitioner, clinic, "appointment", on, time(10, 0), time(11, 0)
+        )
+        db_session.flush()
+        db_session.add(Appointment(
+            calendar_event_id=calendar_event.id,
+            patient_id=patient.id,
+            appointment_type_id=appointment_type.id,
+            status="confirmed"
+        ))
+        db_session.flush()
+
+    def test_due_admins_match_hour_in_query(self, db_session):
+        clinic = self._create_clinic(db_session, "clinic")
+        no_credentials = self._create_clinic(db_session, "no_credentials", has_credentials=False)
+
+        nine_padded = self._create_admin(db_session, clinic, "nine_padded", {"next_day_notification_time": "09:00"})
+        nine = self._create_admin(db_session, clinic, "nine", {"next_day_notification_time": "9:30", "reminder_days_ahead": 3})
+        default_time = self._create_admin(db_session, clinic, "default_time", {})
+        self._create_admin(db_session, clinic, "nineteen", {"next_day_notification_time": "19:00"})
+        self._create_admin(db_session, no_credentials, "no_credentials", {"next_day_notification_time": "09:00"})
+        db_session.commit()
+
+        service = AdminDailyNotificationService()
+
+        due_at_nine = service._get_due_admins_by_config(db_session, 9)
+        assert {key: [a.id for a in admins] for key, admins in due_at_nine.items()} == {
+            (clinic.id, 1): [nine_padded.id],
+            (clinic.id, 3): [nine.id],
+        }
+
+        due_at_default = service._get_due_admins_by_config(db_session, 21)
+        assert {key: [a.id for a in admins] for key, admins in due_at_default.items()} == {
+            (clinic.id, 1): [default_time.id],
+        }
+
+    async def test_run_query_count_does_not_grow_with_clinics(self, db_session):
+        tomorrow = (taiwan_now() + timedelta(days=1)).date()
+        clinics = []
+        for i in range(3):
+            clinic = self._create_clinic(db_session, f"clinic_{i}")
+            practitioner, _ = create_user_with_clinic_association(
+                db_session, clinic, f"Practitioner {i}", f"p{i}@test.com", f"p{i}_sub", ["practitioner"]
+            )
+            self._create_admin(db_session, clinic, f"admin_{i}", {"next_day_notification_time": "21:00"})
+            self._create_appointment(db_session, clinic, practitioner, tomorrow)
+            clinics.append(clinic)
+        # Clinic with nobody due this hour
+        idle_clinic = self._create_clinic(db_session, "idle")
+        self._create_admin(db_session, idle_clinic, "idle_admin", {"next_day_notification_time": "08:00"})
+        db_session.commit()
+        clinic_ids = [clinic.id for clinic in clinics]
+
+        from contextlib import contextmanager
+
+        @contextmanager
+        def mock_db_context():
+            yield db_session
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        current_time = taiwan_now().replace(hour=21, minute=0, second=0, microsecond=0)
+        with patch('services.admin_daily_reminder_service.taiwan_now', return_value=current_time), \
+             patch('services.admin_daily_reminder_service.get_db_context', mock_db_context), \
+             patch('services.admin_daily_reminder_service.NotificationService._send_notification_to_recipients',
+                   return_value=1) as mock_send:
+            event.listen(db_session.get_bind(), "before_cursor_execute", count_statements)
+            try:
+                await AdminDailyNotificationService()._send_admin_reminders()
+            finally:
+                event.remove(db_session.get_bind(), "before_cursor_execute", count_statements)
+
+        # Due admins, appointments, practitioner names
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 3
+        assert sorted(call.args[1].id for call in mock_send.call_args_list) == sorted(clinic_ids)
+        for call in mock_send.call_args_list:
+            recipients = call.args[3]
+            assert [r.clinic_id for r in recipients] == [call.args[1].id]
+            assert "Test Patient" in call.args[2]
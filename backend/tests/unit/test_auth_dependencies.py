@@ -10,7 +10,8 @@ from fastapi.security import HTTPAuthorizationCredentials
 from auth.dependencies import (
     UserContext, get_token_payload, get_current_user,
     require_system_admin, require_admin_role,
-    require_clinic_user, require_authenticated, require_clinic_access
+    require_clinic_user, require_authenticated, require_clinic_access,
+    invalidate_auth_context
 )
 from services.jwt_service import TokenPayload
 
@@ -381,6 +382,100 @@ class TestGetCurrentUser:
         assert "Authentication credentials not provided" in exc_info.value.detail
 
 
+class TestAuthContextCache:
+    """Test caching of resolved user contexts."""
+
+    def _clinic_user_db(self, roles):
+        from models import User, UserClinicAssociation, Clinic
+
+        mock_user = Mock(spec=User)
+        mock_user.id = 1
+        mock_user.email = "user@example.com"
+        mock_user.google_subject_id = "user_sub"
+
+        mock_association = Mock(spec=UserClinicAssociation)
+        mock_association.roles = roles
+        mock_association.full_name = "Clinic User"
+
+        mock_clinic = Mock(spec=Clinic)
+
+        def query_side_effect(model):
+            mock_query = Mock()
+            result = {User: mock_user, UserClinicAssociation: mock_association, Clinic: mock_clinic}[model]
+            mock_query.filter.return_value.first.return_value = result
+            return mock_query
+
+        mock_db = Mock()
+        mock_db.query.side_effect = query_side_effect
+        return mock_db
+
+    def _payload(self, active_clinic_id=1, iat=1700000000):
+        return TokenPayload(
+            sub="user_sub",
+            user_id=1,
+            email="user@example.com",
+            user_type="clinic_user",
+            roles=["admin"],
+            active_clinic_id=active_clinic_id,
+            name="Clinic User",
+            iat=iat
+        )
+
+    def test_repeat_request_skips_queries(self):
+        mock_db = self._clinic_user_db(["admin"])
+        get_current_user(self._payload(), mock_db)
+        queries = mock_db.query.call_count
+
+        result = get_current_user(self._payload(), mock_db)
+
+        assert mock_db.query.call_count == queries
+        assert result.roles == ["admin"]
+        assert result.user_id == 1
+
+    def test_cache_is_keyed_by_token(self):
+        mock_db = self._clinic_user_db(["admin"])
+        get_current_user(self._payload(), mock_db)
+        queries = mock_db.query.call_count
+
+        get_current_user(self._payload(iat=1700000100), mock_db)
+        get_current_user(self._payload(active_clinic_id=2), mock_db)
+
+        assert mock_db.query.call_count == queries * 3
+
+    def test_invalidation_reloads_roles(self):
+        get_current_user(self._payload(), self._clinic_user_db(["admin"]))
+
+        invalidate_auth_context(user_id=1, clinic_id=1)
+        result = get_current_user(self._payload(), self._clinic_user_db(["practitioner"]))
+
+        assert result.roles == ["practitioner"]
+
+    def test_invalidation_is_scoped_to_clinic(self):
+        mock_db = self._clinic_user_db(["admin"])
+        get_current_user(self._payload(), mock_db)
+        queries = mock_db.query.call_count
+
+        invalidate_auth_context(user_id=1, clinic_id=2)
+        get_current_user(self._payload(), mock_db)
+
+        assert mock_db.query.call_count == queries
+
+    def test_failures_are_not_cached(self):
+        mock_db = Mock()
+        mock_db.query.return_value.filter.return_value.first.return_value = None
+        with pytest.raises(HTTPException):
+            get_current_user(self._payload(), mock_db)
+
+        result = get_current_user(self._payload(), self._clinic_user_db(["admin"]))
+        assert result.roles == ["admin"]
+
+    def test_cached_roles_cannot_be_mutated_by_caller(self):
+        mock_db = self._clinic_user_db(["admin"])
+        get_current_user(self._payload(), mock_db).roles.append("practitioner")
+
+        assert get_current_user(self._payload(), mock_db).roles == ["admin"]
+
+
 class TestRoleRequirements:
     """Test role-based authorization dependencies."""
 
@@ -0,0 +1,199 @@
+"""
+Unit tests for the auto-assignment visibility job.
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, text
+
+from models.appointment import Appointment
+from models.appointment_type import AppointmentType
+from models.clinic import BookingRestrictionSettings, Clinic
+from models.patient import Patient
+from services.auto_assignment_service import AutoAssignmentService
+from utils.datetime_utils import TAIWAN_TZ
+from tests.conftest import create_calendar_event_with_clinic, create_user_with_clinic_association
+
+NOW = datetime(2026, 3, 10, 10, 0, tzinfo=TAIWAN_TZ)
+
+
+class TestVisibilityCutoff:
+    """Test per-clinic cutoff computation."""
+
+    def test_minimum_hours_mode(self):
+        settings = BookingRestrictionSettings(
+            booking_restriction_type="minimum_hours_required",
+            minimum_booking_hours_ahead=24
+        )
+        assert AutoAssignmentService.get_visibility_cutoff(settings, NOW) == (date(2026, 3, 11), time(10, 0))
+
+    def test_deadline_day_before_after_deadline(self):
+        settings = BookingRestrictionSettings(
+            booking_restriction_type="deadline_time_day_before",
+            deadline_time_day_before="08:00"
+        )
+        # 10:00 is past today's 08:00 deadline, so tomorrow's appointments are due
+        assert AutoAssignmentService.get_visibility_cutoff(settings, NOW) == (date(2026, 3, 11), time.max)
+
+    def test_deadline_day_before_before_deadline(self):
+        settings = BookingRestrictionSettings(
+            booking_restriction_type="deadline_time_day_before",
+            deadline_time_day_before="12:00"
+        )
+        assert AutoAssignmentService.get_visibility_cutoff(settings, NOW) == (date(2026, 3, 10), time.max)
+
+    def test_deadline_same_day(self):
+        settings = BookingRestrictionSettings(
+            booking_restriction_type="deadline_time_day_before",
+            deadline_time_day_before="08:00",
+            deadline_on_same_day=True
+        )
+        assert AutoAssignmentService.get_visibility_cutoff(settings, NOW) == (date(2026, 3, 10), time.max)
+
+
+class TestMakeDueAppointmentsVisible:
+    """Test the set-based visibility update."""
+
+    def _create_clinic(self, db_session, name, booking_settings):
+        clinic = Clinic(
+            name=name,
+            line_channel_id=f"{name}_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token",
+            settings={"booking_restriction_settings": booking_settings}
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        db_session.add_all([patient, appointment_type])
+        db_session.flush()
+        return clinic, patient, appointment_type
+
+    def _create_auto_assigned(self, db_session, clinic, practitioner, patient, appointment_type, on: date, at: time):
+        calendar_event = create_calendar_event_with_clinic(
+            db_session, practitioner, clinic, "appointment", on, at, time(at.hour + 1, at.minute)
+        )
+        db_session.flush()
+        appointment = Appointment(
+            calendar_event_id=calendar_event.id,
+            patient_id=patient.id,
+            appointment_type_id=appointment_type.id,
+            status="confirmed",
+            is_auto_assigned=True,
+            originally_auto_assigned=True
+        )
+        db_session.add(appointment)
+        db_session.flush()
+        return appointment
+
+    @pytest.fixture
+    def two_clinics(self, db_session):
+        hours_clinic, hours_patient, hours_type = self._create_clinic(db_session, "hours", {
+            "booking_restriction_type": "minimum_hours_required",
+            "minimum_booking_hours_ahead": 24
+        })
+        deadline_clinic, deadline_patient, deadline_type = self._create_clinic(db_session, "deadline", {
+            "booking_restriction_type": "deadline_time_day_before",
+            "deadline_time_day_before": "08:00"
+        })
+        practitioner, _ = create_user_with_clinic_association(
+            db_session, hours_clinic, "Practitioner", "p@test.com", "p_sub", ["practitioner"]
+        )
+        inactive_practitioner, _ = create_user_with_clinic_association(
+            db_session, hours_clinic, "Inactive", "i@test.com", "i_sub", ["practitioner"], is_active=False
+        )
+        deadline_practitioner, _ = create_user_with_clinic_association(
+            db_session, deadline_clinic, "Deadline Practitioner", "d@test.com", "d_sub", ["practitioner"]
+        )
+
+        appointments = {
+            # Within 24 hours of NOW
+            "hours_due": self._create_auto_assigned(
+                db_session, hours_clinic, practitioner, hours_patient, hours_type, date(2026, 3, 11), time(9, 0)),
+            "hours_boundary": self._create_auto_assigned(
+                db_session, hours_clinic, practitioner, hours_patient, hours_type, date(2026, 3, 11), time(10, 0)),
+            "hours_not_due": self._create_auto_assigned(
+                db_session, hours_clinic, practitioner, hours_patient, hours_type, date(2026, 3, 11), time(11, 0)),
+            "hours_inactive_practitioner": self._create_auto_assigned(
+                db_session, hours_clinic, inactive_practitioner, hours_patient, hours_type, date(2026, 3, 11), time(9, 0)),
+            # Tomorrow's deadline (today 08:00) has passed; the day after's has not
+            "deadline_due": self._create_auto_assigned(
+                db_session, deadline_clinic, deadline_practitioner, deadline_patient, deadline_type, date(2026, 3, 11), time(18, 0)),
+            "deadline_not_due": self._create_auto_assigned(
+                db_session, deadline_clinic, deadline_practitioner, deadline_patient, deadline_type, date(2026, 3, 12), time(9, 0)),
+        }
+        db_session.commit()
+        return [hours_clinic, deadline_clinic], appointments
+
+    def test_updates_due_appointments_across_clinics_in_one_statement(self, db_session, two_clinics):
+        clinics, appointments = two_clinics
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", count_statements)
+        try:
+            made_visible = AutoAssignmentService.make_due_appointments_visible(db_session, clinics, now=NOW)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", count_statements)
+        db_session.commit()
+
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) == 1
+        assert sorted(made_visible) == sorted(
+            appointments[key].calendar_event_id for key in ("hours_due", "hours_boundary", "deadline_due")
+        )
+
+        for key, appointment in appointments.items():
+            db_session.refresh(appointment)
+            assert appointment.is_auto_assigned is (key not in ("hours_due", "hours_boundary", "deadline_due"))
+
+    async def test_job_notifies_for_each_visible_appointment(self, db_session, two_clinics):
+        clinics, appointments = two_clinics
+
+        @contextmanager
+        def test_db_context():
+            yield db_session
+
+        with patch("services.auto_assignment_service.get_db_context", test_db_context), \
+             patch("services.auto_assignment_service.taiwan_now", return_value=NOW), \
+             patch("services.auto_assignment_service.NotificationService.send_unified_appointment_notification") as mock_notify:
+            await AutoAssignmentService()._process_auto_assigned_appointments()
+
+        notified = {call.args[1].calendar_event_id: call.args[3].id for call in mock_notify.call_args_list}
+        assert notified == {
+            appointments["hours_due"].calendar_event_id: appointments["hours_due"].calendar_event.user_id,
+            appointments["hours_boundary"].calendar_event_id: appointments["hours_boundary"].calendar_event.user_id,
+            appointments["deadline_due"].calendar_event_id: appointments["deadline_due"].calendar_event.user_id,
+        }
+
+    async def test_job_continues_after_failed_notification_breaks_transaction(self, db_session, two_clinics):
+        clinics, appointments = two_clinics
+
+        @contextmanager
+        def test_db_context():
+            yield db_session
+
+        notified = []
+
+        def notify(db, appointment, clinic, practitioner, **kwargs):
+            if not notified:
+                notified.append(None)
+                db.execute(text("SELECT 1 / 0"))  # Aborts the transaction
+            db.execute(text("SELECT 1"))
+            notified.append(appointment.calendar_event_id)
+
+        with patch("services.auto_assignment_service.get_db_context", test_db_context), \
+             patch("services.auto_assignment_service.taiwan_now", return_value=NOW), \
+             patch("services.auto_assignment_service.NotificationService.send_unified_appointment_notification",
+                   side_effect=notify):
+            await AutoAssignmentService()._process_auto_assigned_appointments()
+
+        # The first notification failed; the other two were still sent
+        assert len([n for n in notified if n is not None]) == 2
@@ -5,23 +5,34 @@ Tests the core logic of the notification service including:
 - Time window filtering
 - Message formatting
 - URL generation
-- Deduplication logic
+- Expiry and deduplication
+- Slots-freed event matching
 """
 
 import pytest
-from datetime import date, datetime
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from unittest.mock import Mock, AsyncMock, patch
 
+from sqlalchemy import event
+
 from services.availability_notification_service import (
+    AvailabilityNotificationIndex,
     AvailabilityNotificationService,
     TimeWindowEntry,
     AvailabilityCacheKey,
     NotificationProcessingResult,
 )
+from services.slot_release_events import (
+    SlotsFreedEvent,
+    drain_slots_freed_events,
+    publish_slots_freed,
+)
 from shared_types.availability import SlotData
 from models.availability_notification import AvailabilityNotification
 from models.clinic import Clinic
 from models.appointment_type import AppointmentType
+from models.line_user import LineUser
 
 
 class TestTimeWindowFiltering:
@@ -287,50 +298,93 @@ class TestURLGeneration:
         assert "clinic_token" not in url  # Should not have clinic_token when liff_id is present
 
 
-class TestDeduplication:
-    """Test deduplication logic."""
-
-    def test_has_future_dates(self):
-        """Test checking if notification has future dates."""
-        service = AvailabilityNotificationService()
-
-        today = date(2024, 1, 15)
+class TestExpiryAndDeduplication:
+    """Test last_date syncing, eligibility filtering and nightly expiry."""
+
+    TODAY = date(2024, 1, 15)
+
+    @pytest.fixture
+    def notifications(self, db_session):
+        clinic = Clinic(
+            name="Notification Clinic",
+            line_channel_id="notification_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        line_user = LineUser(line_user_id="U_expiry_test", clinic_id=clinic.id)
+        db_session.add_all([appointment_type, line_user])
+        db_session.flush()
+
+        def create(dates, **kwargs):
+            notification = AvailabilityNotification(
+                line_user_id=line_user.id,
+                clinic_id=clinic.id,
+                appointment_type_id=appointment_type.id,
+                time_windows=[{"date": d.isoformat(), "time_window": "morning"} for d in dates],
+                **kwargs
+            )
+            db_session.add(notification)
+            return notification
+
+        day = timedelta(days=1)
+        notifications = {
+            "future": create([self.TODAY - day, self.TODAY + day]),
+            "today": create([self.TODAY]),
+            "past": create([self.TODAY - 2 * day, self.TODAY - day]),
+            "empty": create([]),
+            "notified_today": create([self.TODAY + day], last_notified_date=self.TODAY),
+            "inactive": create([self.TODAY - day], is_active=False),
+        }
+        db_session.commit()
+        return notifications
 
-        notification = Mock(spec=AvailabilityNotification)
-        notification.time_windows = [
-            {"date": "2024-01-14", "time_window": "morning"},  # Past
-            {"date": "2024-01-15", "time_window": "afternoon"},  # Today
-            {"date": "2024-01-16", "time_window": "evening"},  # Future
-        ]
+    def test_last_date_follows_time_windows(self, notifications):
+        assert notifications["future"].last_date == self.TODAY + timedelta(days=1)
+        assert notifications["empty"].last_date is None
 
-        assert service._has_future_dates(notification, today) is True
+        notification = notifications["past"]
+        notification.time_windows = [{"date": "2024-02-01", "time_window": "evening"}]
+        assert notification.last_date == date(2024, 2, 1)
 
-    def test_has_future_dates_all_past(self):
-        """Test when all dates are in the past."""
+    def test_fetch_filters_past_and_notified_in_sql(self, db_session, notifications):
         service = AvailabilityNotificationService()
 
-        today = date(2024, 1, 15)
-
-        notification = Mock(spec=AvailabilityNotification)
-        notification.time_windows = [
-            {"date": "2024-01-13", "time_window": "morning"},
-            {"date": "2024-01-14", "time_window": "afternoon"},
-        ]
+        eligible = service._fetch_and_filter_notifications(db_session, self.TODAY)
 
-        assert service._has_future_dates(notification, today) is False
+        assert {n.id for n in eligible} == {notifications["future"].id, notifications["today"].id}
+        # The index only holds notifications that still have dates ahead
+        assert set(service.index._entries) == {
+            notifications["future"].id, notifications["today"].id, notifications["notified_today"].id
+        }
 
-    def test_has_future_dates_today_included(self):
-        """Test when today is included (should count as future)."""
+    async def test_cleanup_expires_in_one_update(self, db_session, notifications):
         service = AvailabilityNotificationService()
 
-        today = date(2024, 1, 15)
+        @contextmanager
+        def test_db_context():
+            yield db_session
 
-        notification = Mock(spec=AvailabilityNotification)
-        notification.time_windows = [
-            {"date": "2024-01-15", "time_window": "morning"},  # Today
-        ]
+        statements = []
 
-        assert service._has_future_dates(notification, today) is True
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", count_statements)
+        try:
+            with patch("services.availability_notification_service.get_db_context", test_db_context), \
+                 patch("services.availability_notification_service.taiwan_now",
+                       return_value=datetime(2024, 1, 15, 3, 0)):
+                await service._cleanup_expired_notifications()
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", count_statements)
+
+        assert [s.lstrip().split()[0].upper() for s in statements if "availability_notifications" in s] == ["UPDATE"]
+        for key, notification in notifications.items():
+            db_session.refresh(notification)
+            assert notification.is_active is (key in ("future", "today", "notified_today"))
 
 
 class TestAvailabilityCacheKey:
@@ -350,3 +404,181 @@ class TestAvailabilityCacheKey:
         assert key2 in cache
         assert key3 not in cache
 
+
+
+def _indexed_notification(notification_id, clinic_id, practitioner_id, dates):
+    notification = Mock(spec=AvailabilityNotification)
+    notification.id = notification_id
+    notification.clinic_id = clinic_id
+    notification.practitioner_id = practitioner_id
+    notification.time_windows = [{"date": d, "time_window": "morning"} for d in dates]
+    return notification
+
+
+class TestSlotsFreedEvents:
+    """Test the in-process slots-freed event queue."""
+
+    def test_drain_returns_unique_events_in_order(self):
+        drain_slots_freed_events()
+
+        publish_slots_freed(1, 10, 5, date(2024, 1, 16))
+        publish_slots_freed(1, None)
+        publish_slots_freed(1, 10, 5, date(2024, 1, 16))
+
+        assert drain_slots_freed_events() == [
+            SlotsFreedEvent(1, 10, 5, date(2024, 1, 16)),
+            SlotsFreedEvent(1, None, None, None),
+        ]
+        assert drain_slots_freed_events() == []
+
+
+class TestAvailabilityNotificationIndex:
+    """Test matching slots-freed events to notifications."""
+
+    @pytest.fixture
+    def index(self):
+        index = AvailabilityNotificationIndex()
+        index.rebuild([
+            _indexed_notification(1, 1, 10, ["2024-01-16", "2024-01-17"]),
+            _indexed_notification(2, 1, None, ["2024-01-16"]),  # Any practitioner
+            _indexed_notification(3, 1, 20, ["2024-01-16"]),
+            _indexed_notification(4, 2, 10, ["2024-01-16"]),  # Other clinic
+            _indexed_notification(5, 1, 10, ["2024-01-14", "2024-01-18"]),
+        ])
+        return index
+
+    def test_match_practitioner_and_date(self, index):
+        event = SlotsFreedEvent(1, 10, 5, date(2024, 1, 16))
+
+        assert index.match(event, date(2024, 1, 15)) == {
+            1: {"2024-01-16"},
+            2: {"2024-01-16"},
+        }
+
+    def test_match_any_practitioner(self, index):
+        event = SlotsFreedEvent(1, None, None, date(2024, 1, 16))
+
+        assert set(index.match(event, date(2024, 1, 15))) == {1, 2, 3}
+
+    def test_match_any_date_skips_past_dates(self, index):
+        event = SlotsFreedEvent(1, 10, None, None)
+
+        assert index.match(event, date(2024, 1, 15)) == {
+            1: {"2024-01-16", "2024-01-17"},
+            2: {"2024-01-16"},
+            5: {"2024-01-18"},
+        }
+
+    def test_past_event_date_matches_nothing(self, index):
+        event = SlotsFreedEvent(1, 10, None, date(2024, 1, 14))
+
+        assert index.match(event, date(2024, 1, 15)) == {}
+
+    def test_add_and_remove(self, index):
+        event = SlotsFreedEvent(1, 20, None, date(2024, 1, 17))
+        assert index.match(event, date(2024, 1, 15)) == {}
+
+        index.add(_indexed_notification(3, 1, 20, ["2024-01-17"]))
+        assert index.match(event, date(2024, 1, 15)) == {3: {"2024-01-17"}}
+        # Re-adding replaces the old dates
+        assert 3 not in index.match(SlotsFreedEvent(1, 20, None, date(2024, 1, 16)), date(2024, 1, 15))
+
+        index.remove(3)
+        index.remove(3)  # Removing twice is harmless
+        assert index.match(event, date(2024, 1, 15)) == {}
+
+
+class TestProcessSlotsFreedEvents:
+    """Test the slots-freed interval job."""
+
+    async def test_evaluates_only_matched_notifications_and_dates(self):
+        service = AvailabilityNotificationService()
+        service.index.rebuild([
+            _indexed_notification(1, 1, 10, ["2024-01-16", "2024-01-17"]),
+            _indexed_notification(2, 1, 20, ["2024-01-16"]),
+        ])
+        matched = _indexed_notification(1, 1, 10, ["2024-01-16", "2024-01-17"])
+
+        drain_slots_freed_events()
+        publish_slots_freed(1, 10, None, date(2024, 1, 17))
+
+        with patch("services.availability_notification_service.get_db_context"), \
+             patch("services.availability_notification_service.taiwan_now",
+                   return_value=datetime(2024, 1, 15, 10, 0)), \
+             patch.object(service, "_fetch_and_filter_notifications", return_value=[matched]) as mock_fetch, \
+             patch.object(service, "_build_availability_cache", new_callable=AsyncMock,
+                          return_value={}) as mock_cache, \
+             patch.object(service, "_process_notification", new_callable=AsyncMock,
+                          return_value=NotificationProcessingResult(1, True, {}, True)) as mock_process:
+            await service._process_slots_freed_events()
+
+        assert mock_fetch.call_args.kwargs["notification_ids"] == [1]
+        assert mock_cache.call_args.args[3] == {1: {"2024-01-17"}}
+        assert mock_process.call_args.kwargs["dates"] == {"2024-01-17"}
+
+    async def test_no_events_does_nothing(self):
+        service = AvailabilityNotificationService()
+        drain_slots_freed_events()
+
+        with patch("services.availability_notification_service.get_db_context") as mock_db:
+            await service._process_slots_freed_events()
+
+        mock_db.assert_not_called()
+
+    def test_collect_slots_limited_to_dates(self):
+        service = AvailabilityNotificationService()
+        notification = _indexed_notification(1, 1, 10, ["2024-01-16", "2024-01-17"])
+        notification.appointment_type_id = 5
+        slot = SlotData("09:00", "10:00", 10, "Dr. A")
+        cache = {
+            AvailabilityCacheKey(1, 5, 10, "2024-01-16"): [slot],
+            AvailabilityCacheKey(1, 5, 10, "2024-01-17"): [slot],
+        }
+
+        slots = service._collect_slots_for_notification(
+            notification, date(2024, 1, 15), cache, {"2024-01-17"}
+        )
+
+        assert list(slots) == ["2024-01-17"]
+
+
+class TestBatchedAvailabilityCache:
+    """Test collapsing availability keys into batch calls."""
+
+    async def test_keys_collapse_into_one_batch_per_practitioner_and_type(self):
+        service = AvailabilityNotificationService()
+        first = _indexed_notification(1, 1, 10, ["2024-01-16", "2024-01-17"])
+        second = _indexed_notification(2, 1, 10, ["2024-01-14", "2024-01-17", "2024-01-18"])
+        anyone = _indexed_notification(3, 1, None, ["2024-01-16"])
+        for notification in (first, second, anyone):
+            notification.appointment_type_id = 5
+
+        def fetch_batch(batch_key, date_strs):
+            clinic_id, appointment_type_id, practitioner_id = batch_key
+            return {
+                AvailabilityCacheKey(clinic_id, appointment_type_id, practitioner_id, d): []
+                for d in date_strs
+            }
+
+        with patch.object(service, "_fetch_availability_batch", side_effect=fetch_batch) as mock_fetch:
+            cache = await service._build_availability_cache(
+                Mock(), [first, second, anyone], date(2024, 1, 15)
+            )
+
+        calls = {call.args[0]: call.args[1] for call in mock_fetch.call_args_list}
+        assert calls == {
+            (1, 5, 10): ["2024-01-16", "2024-01-17", "2024-01-18"],
+            (1, 5, None): ["2024-01-16"],
+        }
+        assert mock_fetch.call_count == 2
+        assert len(cache) == 4
+
+    async def test_failed_batch_is_skipped(self):
+        service = AvailabilityNotificationService()
+        notification = _indexed_notification(1, 1, 10, ["2024-01-16"])
+        notification.appointment_type_id = 5
+
+        with patch.object(service, "_fetch_availability_batch", side_effect=Exception("boom")):
+            cache = await service._build_availability_cache(Mock(), [notification], date(2024, 1, 15))
+
+        assert cache == {}
@@ -608,3 +608,67 @@ class TestBatchSchedulingConflicts:
                     assert result[0]["is_type_mismatch"] is True
                     assert result[0]["conflict_type"] == "practitioner_type_mismatch"
 
+
+
+class TestBatchClinicAvailability:
+    """Test the clinic-wide multi-date availability batch."""
+
+    def test_matches_single_date_results(self, db_session):
+        from models import Appointment, AppointmentType, Patient, PractitionerAppointmentTypes
+        from tests.conftest import (
+            create_calendar_event_with_clinic,
+            create_practitioner_availability_with_clinic,
+            create_user_with_clinic_association,
+        )
+
+        clinic = Clinic(
+            name="Batch Clinic",
+            line_channel_id="batch_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        db_session.add_all([appointment_type, patient])
+        db_session.flush()
+
+        today = taiwan_now().date()
+        dates = [today - timedelta(days=1)] + [today + timedelta(days=i) for i in range(2, 5)]
+        for i, email in enumerate(["a@test.com", "b@test.com"]):
+            practitioner, _ = create_user_with_clinic_association(
+                db_session, clinic, f"Practitioner {i}", email, f"sub_{i}", ["practitioner"]
+            )
+            db_session.add(PractitionerAppointmentTypes(
+                user_id=practitioner.id, clinic_id=clinic.id, appointment_type_id=appointment_type.id
+            ))
+            for d in dates:
+                create_practitioner_availability_with_clinic(
+                    db_session, practitioner, clinic, d.weekday(), time(9 + i, 0), time(12 + i, 0)
+                )
+            calendar_event = create_calendar_event_with_clinic(
+                db_session, practitioner, clinic, "appointment", dates[1], time(10, 0), time(11, 0)
+            )
+            db_session.flush()
+            db_session.add(Appointment(
+                calendar_event_id=calendar_event.id, patient_id=patient.id,
+                appointment_type_id=appointment_type.id, status="confirmed"
+            ))
+        db_session.commit()
+
+        date_strs = [d.strftime('%Y-%m-%d') for d in dates]
+        batch = AvailabilityService.get_batch_available_slots_for_clinic(
+            db_session, clinic.id, date_strs, appointment_type.id,
+            apply_booking_restrictions=False
+        )
+
+        assert [r['date'] for r in batch] == date_strs
+        assert batch[0]['slots'] == []  # Past date
+        for result in batch[1:]:
+            expected = AvailabilityService.get_available_slots_for_clinic(
+                db_session, clinic.id, result['date'], appointment_type.id,
+                apply_booking_restrictions=False
+            )
+            assert expected
+            assert result['slots'] == expected
@@ -0,0 +1,212 @@
+"""
+Unit tests for the chunked retention cleanup and the S3 garbage collector.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+from sqlalchemy import event
+
+from core.config import S3_BUCKET
+from models.clinic import Clinic
+from models.medical_record import MedicalRecord
+from models.medical_record_template import MedicalRecordTemplate
+from models.patient import Patient
+from models.patient_photo import PatientPhoto
+from services.cleanup_service import CleanupService
+
+OLD = datetime.now(timezone.utc) - timedelta(days=40)
+
+
+class TestChunkedCleanup:
+    """Test chunked hard-deletion of expired rows."""
+
+    @pytest.fixture
+    def expired_data(self, db_session):
+        clinic = Clinic(
+            name="Cleanup Clinic",
+            line_channel_id="cleanup_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        template = MedicalRecordTemplate(clinic_id=clinic.id, name="Template", fields=[])
+        db_session.add_all([patient, template])
+        db_session.flush()
+
+        def photo(key, is_pending=False, **kwargs):
+            return PatientPhoto(
+                clinic_id=clinic.id, patient_id=patient.id, filename=f"{key}.jpg",
+                storage_key=f"clinic_assets/{key}.jpg", thumbnail_key=f"clinic_assets/thumbnails/{key}.jpg",
+                content_type="image/jpeg", size_bytes=100, is_pending=is_pending, **kwargs
+            )
+
+        records = []
+        for i, deleted in enumerate([True, True, True, False]):
+            record = MedicalRecord(
+                clinic_id=clinic.id, patient_id=patient.id, template_id=template.id,
+                template_name="Template", template_snapshot={}, values={},
+                is_deleted=deleted, deleted_at=OLD if deleted else None
+            )
+            db_session.add(record)
+            db_session.flush()
+            db_session.add(photo(f"record_{i}", medical_record_id=record.id))
+            records.append(record)
+
+        photos = {
+            "deleted": photo("deleted", is_deleted=True, deleted_at=OLD),
+            "recently_deleted": photo("recent", is_deleted=True, deleted_at=datetime.now(timezone.utc)),
+            "abandoned": photo("abandoned", is_pending=True, created_at=OLD),
+            "stalled": photo("stalled", upload_status="failed", created_at=OLD),
+            # Shares its object with an expired photo (deduplicated upload)
+            "shared": photo("deleted"),
+        }
+        db_session.add_all(photos.values())
+        db_session.commit()
+        return records, photos
+
+    def test_deletes_in_chunks_and_collects_keys(self, db_session, expired_data):
+        records, photos = expired_data
+        service = CleanupService(db_session)
+        service.s3_client = Mock()
+        service.s3_client.head_object.return_value = {"LastModified": OLD}
+        service.s3_client.delete_objects.return_value = {}
+
+        commits = []
+
+        def count_commits(session):
+            commits.append(session)
+
+        event.listen(db_session, "after_commit", count_commits)
+        try:
+            deleted = service.cleanup_soft_deleted_data(retention_days=30, chunk_size=2, pause_seconds=0)
+        finally:
+            event.remove(db_session, "after_commit", count_commits)
+
+        # 3 records + their 3 photos, then 3 expired photos
+        assert deleted == 9
+        # Records: chunks of 2 and 1; photos: chunks of 2 and 1, plus the empty final one
+        assert len(commits) == 5
+
+        db_session.expire_all()
+        remaining_records = {r.id for r in db_session.query(MedicalRecord).all()}
+        assert remaining_records == {records[3].id}
+        remaining_photos = {p.filename for p in db_session.query(PatientPhoto).all()}
+        assert remaining_photos == {"record_3.jpg", "recent.jpg", "deleted.jpg"}
+
+        assert "clinic_assets/record_0.jpg" in service.released_keys
+        assert "clinic_assets/thumbnails/stalled.jpg" in service.released_keys
+
+        # The object still used by the deduplicated photo is kept
+        deleted_keys = {
+            obj["Key"]
+            for call in service.s3_client.delete_objects.call_args_list
+            for obj in call.kwargs["Delete"]["Objects"]
+        }
+        assert deleted_keys == service.released_keys - {
+            "clinic_assets/deleted.jpg", "clinic_assets/thumbnails/deleted.jpg"
+        }
+
+    def test_recent_objects_are_left_for_gc(self, db_session, expired_data):
+        service = CleanupService(db_session)
+        service.s3_client = Mock()
+        service.s3_client.head_object.return_value = {"LastModified": datetime.now(timezone.utc)}
+
+        service.cleanup_soft_deleted_data(retention_days=30, pause_seconds=0)
+
+        service.s3_client.delete_objects.assert_not_called()
+
+
+class TestStreamingGarbageCollection:
+    """Test the merge-based S3 garbage collector against a local S3 stand-in."""
+
+    @pytest.fixture
+    def bucket(self, db_session):
+        clinic = Clinic(
+            name="GC Clinic",
+            line_channel_id="gc_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="0912345678")
+        db_session.add(patient)
+        db_session.flush()
+
+        with mock_aws():
+            s3 = boto3.client("s3", region_name="ap-northeast-1")
+            s3.create_bucket(Bucket=S3_BUCKET, CreateBucketConfiguration={"LocationConstraint": "ap-northeast-1"})
+
+            def put(key, size=10):
+                s3.put_object(Bucket=S3_BUCKET, Key=key, Body=b"x" * size)
+
+            base = f"clinic_assets/{clinic.id}"
+            put(f"{base}/")  # Folder placeholder
+            put(f"{base}/a.jpg")
+            put(f"{base}/thumbnails/a.jpg")
+            put(f"{base}/staging/pending")
+            put(f"{base}/orphan1.jpg", size=100)
+            put(f"{base}/z_orphan2.jpg", size=200)
+            put(f"clinic_assets/{clinic.id + 1}/other.jpg")
+            put("other_assets/logo.png")
+
+            db_session.add_all([
+                PatientPhoto(
+                    clinic_id=clinic.id, patient_id=patient.id, filename="a.jpg",
+                    storage_key=f"{base}/a.jpg", thumbnail_key=f"{base}/thumbnails/a.jpg",
+                    content_type="image/jpeg", size_bytes=10, is_pending=False,
+                    is_deleted=True, deleted_at=datetime.now(timezone.utc)
+                ),
+                PatientPhoto(
+                    clinic_id=clinic.id, patient_id=patient.id, filename="pending",
+                    storage_key=f"{base}/staging/pending", staging_key=f"{base}/staging/pending",
+                    content_type="image/jpeg", size_bytes=0, upload_status="awaiting_upload"
+                ),
+            ])
+            db_session.commit()
+            yield s3, clinic
+
+    def _keys(self, s3):
+        return {obj["Key"] for obj in s3.list_objects_v2(Bucket=S3_BUCKET).get("Contents", [])}
+
+    def test_deletes_only_unreferenced_objects_in_batches(self, db_session, bucket):
+        s3, clinic = bucket
+        service = CleanupService(db_session)
+        before = self._keys(s3)
+
+        with patch("services.cleanup_service.S3_DELETE_BATCH_SIZE", 1), \
+             patch.object(service.s3_client, "delete_objects", wraps=service.s3_client.delete_objects) as spy:
+            deleted = service.garbage_collect_s3(grace_days=0)
+
+        base = f"clinic_assets/{clinic.id}"
+        assert deleted == 3
+        assert before - self._keys(s3) == {
+            f"{base}/orphan1.jpg", f"{base}/z_orphan2.jpg", f"clinic_assets/{clinic.id + 1}/other.jpg"
+        }
+        assert spy.call_count == 3
+        assert service.last_gc_stats.referenced == 3
+        assert service.last_gc_stats.bytes_reclaimed == 310
+
+    def test_scoped_to_clinic_and_dry_run(self, db_session, bucket):
+        s3, clinic = bucket
+        service = CleanupService(db_session)
+        before = self._keys(s3)
+
+        found = service.garbage_collect_s3(dry_run=True, clinic_id=clinic.id, grace_days=0)
+
+        assert found == 2
+        assert service.last_gc_stats.bytes_reclaimed == 300
+        assert self._keys(s3) == before
+
+    def test_grace_period_keeps_recent_orphans(self, db_session, bucket):
+        s3, clinic = bucket
+        service = CleanupService(db_session)
+
+        assert service.garbage_collect_s3(clinic_id=clinic.id) == 0
+        assert service.last_gc_stats.too_recent == 2
@@ -161,6 +161,51 @@ class TestExtractEventData:
         assert reply_token is None
 
 
+class TestExtractDeliveryData:
+    """Test extracting webhook event ID and redelivery flag from webhook payloads."""
+
+    def test_extracts_webhook_event_id_and_redelivery(self):
+        """Test that webhookEventId and deliveryContext.isRedelivery are extracted."""
+        service = LINEService(
+            channel_secret="test_secret",
+            channel_access_token="test_token"
+        )
+
+        payload = {
+            "events": [
+                {
+                    "type": "message",
+                    "webhookEventId": "01FZ74A0TDDPYRVKNK77XKC3ZR",
+                    "deliveryContext": {"isRedelivery": True},
+                    "source": {"type": "user", "userId": "U_test_user_123"}
+                }
+            ]
+        }
+
+        assert service.extract_delivery_data(payload) == ("01FZ74A0TDDPYRVKNK77XKC3ZR", True)
+
+    def test_defaults_to_first_delivery(self):
+        """Test that a missing deliveryContext counts as a first delivery."""
+        service = LINEService(
+            channel_secret="test_secret",
+            channel_access_token="test_token"
+        )
+
+        payload = {"events": [{"type": "follow", "webhookEventId": "01FZ74A0TDDPYRVKNK77XKC3ZR"}]}
+
+        assert service.extract_delivery_data(payload) == ("01FZ74A0TDDPYRVKNK77XKC3ZR", False)
+
+    def test_returns_none_without_webhook_event_id(self):
+        """Test that events without webhookEventId (and empty payloads) return None."""
+        service = LINEService(
+            channel_secret="test_secret",
+            channel_access_token="test_token"
+        )
+
+        assert service.extract_delivery_data({"events": [{"type": "follow"}]}) is None
+        assert service.extract_delivery_data({"events": []}) is None
+
+
 class TestGetUserProfile:
     """Test fetching user profile from LINE API."""
     
@@ -2,448 +2,290 @@
 Unit tests for LINE user service.
 
 Tests the service functions for proactive LINE user management,
-including creating users from webhook events and fetching profiles.
+including creating users from webhook events and refreshing profiles.
 """
 
 import pytest
-from unittest.mock import Mock, patch
-from sqlalchemy.exc import IntegrityError
+from datetime import timedelta
+from unittest.mock import patch
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from models import LineUser, Clinic
-from services.line_user_service import LineUserService
-from services.line_service import LINEService
+from services.line_user_service import (
+    LineUserService,
+    drain_profile_refresh_requests,
+    request_profile_refresh,
+)
+from utils.datetime_utils import taiwan_now
+
+
+@pytest.fixture(autouse=True)
+def empty_refresh_queue():
+    """Start and end each test with an empty profile refresh queue."""
+    drain_profile_refresh_requests()
+    yield
+    drain_profile_refresh_requests()
+
+
+@pytest.fixture
+def clinic(db_session: Session, sample_clinic_data):
+    clinic = Clinic(**sample_clinic_data)
+    db_session.add(clinic)
+    db_session.commit()
+    return clinic
+
+
+def _add_line_user(db_session: Session, clinic: Clinic, **kwargs) -> LineUser:
+    line_user = LineUser(line_user_id="U_test_user_123", clinic_id=clinic.id, **kwargs)
+    db_session.add(line_user)
+    db_session.commit()
+    return line_user
 
 
 class TestGetOrCreateLineUser:
     """Test getting or creating LINE users."""
-    
-    def test_creates_new_user_when_not_exists(self, db_session: Session, sample_clinic_data):
+
+    def test_creates_new_user_when_not_exists(self, db_session: Session, clinic):
         """Test that a new LineUser is created when it doesn't exist."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        
-        # Mock LINEService - when display_name is provided, profile won't be fetched
-        # But we still need to mock it in case picture_url is missing
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = None
-        
-        # Create user
         line_user = LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
+            line_user_id="U_test_user_123",
             clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name
+            display_name="Test User",
+            picture_url="https://example.com/picture.jpg"
         )
-        
-        assert line_user is not None
-        assert line_user.line_user_id == line_user_id
+
+        assert line_user.id is not None
+        assert line_user.line_user_id == "U_test_user_123"
         assert line_user.clinic_id == clinic.id
-        assert line_user.display_name == display_name
-        
-        # Verify it's in database
+        assert line_user.display_name == "Test User"
+        assert line_user.picture_url == "https://example.com/picture.jpg"
+
         db_user = db_session.query(LineUser).filter_by(
-            line_user_id=line_user_id,
+            line_user_id="U_test_user_123",
             clinic_id=clinic.id
-        ).first()
-        assert db_user is not None
+        ).one()
         assert db_user.id == line_user.id
-    
-    def test_returns_existing_user_when_exists(self, db_session: Session, sample_clinic_data):
+
+    def test_returns_existing_user_when_exists(self, db_session: Session, clinic):
         """Test that existing LineUser is returned when it already exists."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        
-        # Create existing user
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=display_name
-        )
-        db_session.add(existing_user)
-        db_session.commit()
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Get or create (should return existing)
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name
-        )
-        
-        assert line_user.id == existing_user.id
-        assert line_user.line_user_id == line_user_id
-        assert line_user.display_name == display_name
-    
-    def test_updates_display_name_when_different(self, db_session: Session, sample_clinic_data):
-        """Test that display name is updated when provided and different."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        old_display_name = "Old Name"
-        new_display_name = "New Name"
-        
-        # Create existing user with old name (and no picture_url to trigger lazy update)
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=old_display_name,
-            picture_url=None
-        )
-        db_session.add(existing_user)
-        db_session.commit()
-        
-        # Mock LINEService - return None for profile fetch (no picture_url available)
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = None
-        
-        # Get or create with new name
+        existing_user = _add_line_user(db_session, clinic, display_name="Existing User")
+
         line_user = LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=new_display_name
+            line_user_id="U_test_user_123",
+            clinic_id=clinic.id
         )
-        
+
         assert line_user.id == existing_user.id
-        assert line_user.display_name == new_display_name
-        
-        # Verify update in database
-        db_session.refresh(line_user)
-        assert line_user.display_name == new_display_name
-    
-    def test_stores_picture_url_when_provided(self, db_session: Session, sample_clinic_data):
-        """Test that picture_url is stored when provided."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        picture_url = "https://example.com/pic.jpg"
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Create user with picture_url
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name,
-            picture_url=picture_url
-        )
-        
-        assert line_user.picture_url == picture_url
-        db_session.refresh(line_user)
-        assert line_user.picture_url == picture_url
-    
-    def test_lazy_updates_picture_url_when_missing(self, db_session: Session, sample_clinic_data):
-        """Test that picture_url is fetched for existing users when missing (lazy update)."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        picture_url = "https://example.com/pic.jpg"
-        
-        # Create existing user without picture_url
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=display_name,
-            picture_url=None
+        assert line_user.display_name == "Existing User"
+        assert db_session.query(LineUser).count() == 1
+
+    def test_updates_provided_values(self, db_session: Session, clinic):
+        """Test that provided display name and picture overwrite stored ones."""
+        existing_user = _add_line_user(
+            db_session, clinic, display_name="Old Name", picture_url="https://example.com/old.jpg"
         )
-        db_session.add(existing_user)
-        db_session.commit()
-        
-        # Mock LINEService with profile response
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = {
-            "displayName": display_name,
-            "userId": line_user_id,
-            "pictureUrl": picture_url
-        }
-        
-        # Get or create (should trigger lazy update)
+
         line_user = LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
+            line_user_id="U_test_user_123",
             clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name
+            display_name="New Name",
+            picture_url="https://example.com/new.jpg"
         )
-        
+
         assert line_user.id == existing_user.id
-        assert line_user.picture_url == picture_url
-        mock_line_service.get_user_profile.assert_called_once_with(line_user_id)
-    
-    def test_fetches_profile_when_display_name_not_provided(self, db_session: Session, sample_clinic_data):
-        """Test that user profile is fetched when display_name is not provided."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        fetched_display_name = "Fetched Name"
-        picture_url = "https://example.com/pic.jpg"
-        
-        # Mock LINEService with profile response
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = {
-            "displayName": fetched_display_name,
-            "userId": line_user_id,
-            "pictureUrl": picture_url
-        }
-        
-        # Create user without display name
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=None
+        db_session.expire_all()
+        assert existing_user.display_name == "New Name"
+        assert existing_user.picture_url == "https://example.com/new.jpg"
+
+    def test_keeps_stored_values_when_not_provided(self, db_session: Session, clinic):
+        """Test that omitted values don't clear what is stored."""
+        _add_line_user(
+            db_session, clinic, display_name="Stored Name", picture_url="https://example.com/stored.jpg"
         )
-        
-        assert line_user.display_name == fetched_display_name
-        assert line_user.picture_url == picture_url
-        mock_line_service.get_user_profile.assert_called_once_with(line_user_id)
-    
-    def test_fetches_profile_when_display_name_provided_but_picture_url_not(self, db_session: Session, sample_clinic_data):
-        """Test that profile is fetched when display_name is provided but picture_url is not."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        picture_url = "https://example.com/pic.jpg"
-        
-        # Mock LINEService with profile response
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = {
-            "displayName": display_name,
-            "userId": line_user_id,
-            "pictureUrl": picture_url
-        }
-        
-        # Create user with display_name but without picture_url
+
         line_user = LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
+            line_user_id="U_test_user_123",
             clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name,
+            display_name=None,
             picture_url=None
         )
-        
-        assert line_user.display_name == display_name
-        assert line_user.picture_url == picture_url
-        mock_line_service.get_user_profile.assert_called_once_with(line_user_id)
-    
-    def test_does_not_fetch_profile_when_both_provided(self, db_session: Session, sample_clinic_data):
-        """Test that profile is NOT fetched when both display_name and picture_url are provided."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
+
+        assert line_user.display_name == "Stored Name"
+        assert line_user.picture_url == "https://example.com/stored.jpg"
+
+    def test_separate_users_per_clinic(self, db_session: Session, clinic, sample_clinic_data):
+        """Test that the same LINE user gets one entry per clinic."""
+        other_clinic = Clinic(**{**sample_clinic_data, "line_channel_id": "other_channel"})
+        db_session.add(other_clinic)
         db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        picture_url = "https://example.com/pic.jpg"
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Create user with both display_name and picture_url
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name,
-            picture_url=picture_url
+
+        first = LineUserService.get_or_create_line_user(
+            db=db_session, line_user_id="U_test_user_123", clinic_id=clinic.id
         )
-        
-        assert line_user.display_name == display_name
-        assert line_user.picture_url == picture_url
-        # Should not fetch profile when both are provided
-        mock_line_service.get_user_profile.assert_not_called()
-    
-    def test_updates_picture_url_when_different_value_provided(self, db_session: Session, sample_clinic_data):
-        """Test that picture_url is updated when a different value is provided to existing user."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        old_picture_url = "https://example.com/old.jpg"
-        new_picture_url = "https://example.com/new.jpg"
-        
-        # Create existing user with old picture_url
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=display_name,
-            picture_url=old_picture_url
+        second = LineUserService.get_or_create_line_user(
+            db=db_session, line_user_id="U_test_user_123", clinic_id=other_clinic.id
         )
-        db_session.add(existing_user)
-        db_session.commit()
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Get or create with new picture_url
-        line_user = LineUserService.get_or_create_line_user(
+
+        assert first.id != second.id
+        assert second.clinic_id == other_clinic.id
+
+    def test_single_statement_without_line_api_call(self, db_session: Session, clinic):
+        """Test that resolving an existing user is one upsert and never calls LINE."""
+        _add_line_user(db_session, clinic, display_name="Existing User")
+        db_session.expire_on_commit = False  # As configured for application sessions
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            if "line_users" in statement:
+                statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            with patch("services.line_service.httpx.get") as mock_get:
+                LineUserService.get_or_create_line_user(
+                    db=db_session,
+                    line_user_id="U_test_user_123",
+                    clinic_id=clinic.id
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        mock_get.assert_not_called()
+        assert len(statements) == 1
+        assert "ON CONFLICT" in statements[0]
+
+    def test_queues_refresh_when_profile_incomplete(self, db_session: Session, clinic):
+        """Test that users missing a display name or picture are queued once."""
+        for _ in range(3):
+            line_user = LineUserService.get_or_create_line_user(
+                db=db_session,
+                line_user_id="U_test_user_123",
+                clinic_id=clinic.id,
+                display_name="Test User"
+            )
+
+        assert drain_profile_refresh_requests() == [line_user.id]
+
+    def test_does_not_queue_complete_or_recently_attempted_users(self, db_session: Session, clinic):
+        """Test that complete profiles and recent attempts are not queued."""
+        LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
+            line_user_id="U_complete_user",
             clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name,
-            picture_url=new_picture_url
+            display_name="Complete User",
+            picture_url="https://example.com/picture.jpg"
         )
-        
-        assert line_user.id == existing_user.id
-        assert line_user.picture_url == new_picture_url
-        
-        # Verify update in database
-        db_session.refresh(line_user)
-        assert line_user.picture_url == new_picture_url
-    
-    def test_creates_user_without_display_name_when_profile_fetch_fails(self, db_session: Session, sample_clinic_data):
-        """Test that user is created without display name when profile fetch fails."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        
-        # Mock LINEService with failed profile fetch
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.return_value = None
-        
-        # Create user without display name
-        line_user = LineUserService.get_or_create_line_user(
+        _add_line_user(db_session, clinic, profile_refreshed_at=taiwan_now() - timedelta(hours=1))
+        LineUserService.get_or_create_line_user(
             db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=None
-        )
-        
-        assert line_user.line_user_id == line_user_id
-        assert line_user.display_name is None
-    
-    def test_handles_race_condition_gracefully(self, db_session: Session, sample_clinic_data):
-        """Test that race condition (duplicate creation) is handled gracefully."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        
-        # Create existing user (simulating another request creating it)
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=display_name
+            line_user_id="U_test_user_123",
+            clinic_id=clinic.id
         )
-        db_session.add(existing_user)
-        db_session.commit()
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Simulate IntegrityError (race condition)
-        with patch.object(db_session, 'add') as mock_add:
-            with patch.object(db_session, 'commit', side_effect=IntegrityError("", "", "")):
-                # Should handle the error and fetch existing user
-                line_user = LineUserService.get_or_create_line_user(
-                    db=db_session,
-                    line_user_id=line_user_id,
-                    clinic_id=clinic.id,
-                    line_service=mock_line_service,
-                    display_name=display_name
-                )
-                
-                # Should rollback and return existing user
-                assert line_user.id == existing_user.id
-    
-    def test_handles_profile_fetch_exception_gracefully(self, db_session: Session, sample_clinic_data):
-        """Test that exceptions during profile fetch don't prevent user creation."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        
-        # Mock LINEService with exception
-        mock_line_service = Mock(spec=LINEService)
-        mock_line_service.get_user_profile.side_effect = Exception("API Error")
-        
-        # Should still create user without display name
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=None
+
+        assert drain_profile_refresh_requests() == []
+
+    def test_rejects_invalid_clinic_id(self, db_session: Session):
+        """Test that a non-positive clinic_id is rejected."""
+        with pytest.raises(ValueError):
+            LineUserService.get_or_create_line_user(
+                db=db_session,
+                line_user_id="U_test_user_123",
+                clinic_id=0
+            )
+
+
+class TestRefreshProfiles:
+    """Test the background profile refresh."""
+
+    def test_fills_missing_profile_data(self, db_session: Session, clinic):
+        """Test that a missing display name and picture are filled from LINE."""
+        line_user = _add_line_user(db_session, clinic)
+
+        with patch("services.line_user_service.LINEService.get_user_profile") as mock_profile:
+            mock_profile.return_value = {
+                "displayName": "LINE Name",
+                "pictureUrl": "https://profile.line-scdn.net/picture"
+            }
+            updated = LineUserService.refresh_profiles(db_session, [line_user.id])
+
+        assert updated == 1
+        mock_profile.assert_called_once_with("U_test_user_123")
+        db_session.expire_all()
+        assert line_user.display_name == "LINE Name"
+        assert line_user.picture_url == "https://profile.line-scdn.net/picture"
+        assert line_user.profile_refreshed_at is not None
+
+    def test_keeps_existing_display_name(self, db_session: Session, clinic):
+        """Test that only the picture is taken when a display name is stored."""
+        line_user = _add_line_user(db_session, clinic, display_name="Clinic Known Name")
+
+        with patch("services.line_user_service.LINEService.get_user_profile") as mock_profile:
+            mock_profile.return_value = {
+                "displayName": "LINE Name",
+                "pictureUrl": "https://profile.line-scdn.net/picture"
+            }
+            LineUserService.refresh_profiles(db_session, [line_user.id])
+
+        db_session.expire_all()
+        assert line_user.display_name == "Clinic Known Name"
+        assert line_user.picture_url == "https://profile.line-scdn.net/picture"
+
+    def test_user_without_picture_is_attempted_once_per_retry_period(self, db_session: Session, clinic):
+        """Test that a user without a LINE picture doesn't cause repeated API calls."""
+        line_user = _add_line_user(db_session, clinic, display_name="No Picture")
+
+        with patch("services.line_user_service.LINEService.get_user_profile") as mock_profile:
+            mock_profile.return_value = {"displayName": "No Picture"}
+            assert LineUserService.refresh_profiles(db_session, [line_user.id]) == 0
+            assert LineUserService.refresh_profiles(db_session, [line_user.id]) == 0
+
+        mock_profile.assert_called_once()
+        db_session.expire_all()
+        assert line_user.picture_url is None
+        assert line_user.profile_refreshed_at is not None
+
+        # Later messages don't queue the user again until the retry period passes
+        LineUserService.get_or_create_line_user(
+            db=db_session, line_user_id="U_test_user_123", clinic_id=clinic.id
         )
-        
-        assert line_user.line_user_id == line_user_id
+        assert drain_profile_refresh_requests() == []
+
+    def test_failed_fetch_is_recorded(self, db_session: Session, clinic):
+        """Test that an API error still counts as an attempt."""
+        line_user = _add_line_user(db_session, clinic)
+
+        with patch("services.line_user_service.LINEService.get_user_profile") as mock_profile:
+            mock_profile.side_effect = Exception("API Error")
+            assert LineUserService.refresh_profiles(db_session, [line_user.id]) == 0
+
+        db_session.expire_all()
         assert line_user.display_name is None
-    
-    def test_does_not_update_display_name_when_same(self, db_session: Session, sample_clinic_data):
-        """Test that display name is not updated when it's the same."""
-        clinic = Clinic(**sample_clinic_data)
-        db_session.add(clinic)
-        db_session.commit()
-        
-        line_user_id = "U_test_user_123"
-        display_name = "Test User"
-        
-        # Create existing user
-        existing_user = LineUser(
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            display_name=display_name
-        )
-        db_session.add(existing_user)
-        db_session.commit()
-        original_updated_at = existing_user.updated_at if hasattr(existing_user, 'updated_at') else None
-        
-        # Mock LINEService
-        mock_line_service = Mock(spec=LINEService)
-        
-        # Get or create with same name
-        line_user = LineUserService.get_or_create_line_user(
-            db=db_session,
-            line_user_id=line_user_id,
-            clinic_id=clinic.id,
-            line_service=mock_line_service,
-            display_name=display_name
+        assert line_user.profile_refreshed_at is not None
+
+    def test_refetches_after_retry_period(self, db_session: Session, clinic):
+        """Test that an old attempt no longer blocks a refresh."""
+        line_user = _add_line_user(
+            db_session, clinic, display_name="Test User",
+            profile_refreshed_at=taiwan_now() - timedelta(days=2)
         )
-        
-        assert line_user.id == existing_user.id
-        assert line_user.display_name == display_name
 
+        with patch("services.line_user_service.LINEService.get_user_profile") as mock_profile:
+            mock_profile.return_value = {"pictureUrl": "https://profile.line-scdn.net/new"}
+            assert LineUserService.refresh_profiles(db_session, [line_user.id]) == 1
+
+
+class TestProfileRefreshQueue:
+    """Test the in-process profile refresh queue."""
+
+    def test_deduplicates_requests(self):
+        for line_user_pk in [3, 1, 3, 2, 1]:
+            request_profile_refresh(line_user_pk)
 
+        assert drain_profile_refresh_requests() == [1, 2, 3]
+        assert drain_profile_refresh_requests() == []
@@ -0,0 +1,58 @@
+"""
+Unit tests for LINE webhook event deduplication.
+"""
+
+import pytest
+
+from models import Clinic, LineWebhookEvent
+from services.line_webhook_dedup import WebhookEventDeduplicator
+
+
+@pytest.fixture
+def clinic(db_session, sample_clinic_data):
+    clinic = Clinic(**sample_clinic_data)
+    db_session.add(clinic)
+    db_session.commit()
+    return clinic
+
+
+class TestWebhookEventDeduplicator:
+    """Test claiming webhook events with both stores."""
+
+    @pytest.mark.parametrize("store", ["memory", "database"])
+    def test_suppresses_duplicates_per_clinic(self, db_session, clinic, sample_clinic_data, store):
+        other_clinic = Clinic(**{**sample_clinic_data, "line_channel_id": "other_channel"})
+        db_session.add(other_clinic)
+        db_session.commit()
+        deduplicator = WebhookEventDeduplicator(store=store)
+
+        assert deduplicator.claim(db_session, clinic.id, "event_1") is True
+        assert deduplicator.claim(db_session, clinic.id, "event_1", is_redelivery=True) is False
+        assert deduplicator.claim(db_session, clinic.id, "event_1") is False
+        # The same ID at another clinic and another ID at this clinic are new
+        assert deduplicator.claim(db_session, other_clinic.id, "event_1") is True
+        assert deduplicator.claim(db_session, clinic.id, "event_2") is True
+
+        assert deduplicator.suppressed == 2
+        assert deduplicator.suppressed_redeliveries == 1
+
+    def test_database_store_is_shared_between_instances(self, db_session, clinic):
+        """Test that workers with their own deduplicator see each other's claims."""
+        worker_1 = WebhookEventDeduplicator(store="database")
+        worker_2 = WebhookEventDeduplicator(store="database")
+
+        assert worker_1.claim(db_session, clinic.id, "event_1") is True
+        assert worker_2.claim(db_session, clinic.id, "event_1", is_redelivery=True) is False
+        assert db_session.query(LineWebhookEvent).filter_by(clinic_id=clinic.id).count() == 1
+
+    def test_memory_store_entries_expire(self, db_session, clinic):
+        """Test that in-process entries are only kept for the retention period."""
+        deduplicator = WebhookEventDeduplicator(store="memory", retention_hours=0)
+
+        assert deduplicator.claim(db_session, clinic.id, "event_1") is True
+        assert deduplicator.claim(db_session, clinic.id, "event_1") is True
+        assert deduplicator.suppressed == 0
+
+    def test_rejects_unknown_store(self):
+        with pytest.raises(ValueError):
+            WebhookEventDeduplicator(store="redis")
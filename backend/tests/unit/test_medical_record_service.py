@@ -1,12 +1,14 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from fastapi import HTTPException
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm import Session
 from services.medical_record_service import MedicalRecordService
 from models.clinic import Clinic
 from models.patient import Patient
 from models.medical_record import MedicalRecord
 from models.medical_record_template import MedicalRecordTemplate
+from models.patient_photo import PatientPhoto
 from models.line_user import LineUser
 from models.user import User
 
@@ -219,3 +221,76 @@ def test_send_patient_form_respects_message_override(db_session):
             mock_line_instance.send_template_message_with_button.assert_called_once()
             args, kwargs = mock_line_instance.send_template_message_with_button.call_args
             assert kwargs["text"] == override_msg
+
+def _create_records_with_photos(db_session):
+    clinic = Clinic(name="Test", line_channel_id="c", line_channel_secret="s", line_channel_access_token="t")
+    db_session.add(clinic)
+    db_session.commit()
+
+    patient = Patient(clinic_id=clinic.id, full_name="John")
+    template = MedicalRecordTemplate(clinic_id=clinic.id, name="Initial Visit", fields=[], version=1)
+    db_session.add_all([patient, template])
+    db_session.commit()
+
+    records = []
+    for photo_count in (0, 3):
+        record = MedicalRecord(
+            clinic_id=clinic.id,
+            patient_id=patient.id,
+            template_id=template.id,
+            template_name=template.name,
+            template_snapshot={"name": template.name, "fields": [{"id": "f", "label": "x" * 1000}]},
+            values={"f": "y" * 1000},
+            version=1
+        )
+        db_session.add(record)
+        db_session.flush()
+        for i in range(photo_count):
+            db_session.add(PatientPhoto(
+                clinic_id=clinic.id,
+                patient_id=patient.id,
+                medical_record_id=record.id,
+                filename=f"{i}.jpg",
+                storage_key=f"test/{record.id}/{i}.jpg",
+                content_type="image/jpeg",
+                size_bytes=1,
+                is_pending=False,
+                is_deleted=(i == 0)
+            ))
+        records.append(record)
+    db_session.commit()
+    db_session.expire_all()
+    return clinic, patient, records
+
+def test_list_patient_record_summaries_counts_photos(db_session):
+    clinic, patient, records = _create_records_with_photos(db_session)
+
+    rows = MedicalRecordService.list_patient_record_summaries(db_session, clinic.id, patient.id)
+
+    counts = {record.id: photo_count for record, photo_count in rows}
+    assert counts == {records[0].id: 0, records[1].id: 2}  # Deleted photo excluded
+    assert all(record.template_name == "Initial Visit" for record, _ in rows)
+
+def test_list_patient_record_summaries_defers_jsonb(db_session):
+    clinic, patient, _ = _create_records_with_photos(db_session)
+    clinic_id, patient_id = clinic.id, patient.id
+    db_session.expunge_all()  # Load fresh instances rather than refreshing expired ones
+
+    rows = MedicalRecordService.list_patient_record_summaries(db_session, clinic_id, patient_id)
+
+    record, _ = rows[0]
+    with pytest.raises(InvalidRequestError):
+        _ = record.values
+    with pytest.raises(InvalidRequestError):
+        _ = record.template_snapshot
+
+def test_list_patient_record_summaries_respects_status(db_session):
+    clinic, patient, records = _create_records_with_photos(db_session)
+    records[0].is_deleted = True
+    db_session.commit()
+
+    active = MedicalRecordService.list_patient_record_summaries(db_session, clinic.id, patient.id, status='active')
+    deleted = MedicalRecordService.list_patient_record_summaries(db_session, clinic.id, patient.id, status='deleted')
+
+    assert [record.id for record, _ in active] == [records[1].id]
+    assert [record.id for record, _ in deleted] == [records[0].id]
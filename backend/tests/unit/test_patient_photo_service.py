@@ -1,17 +1,22 @@
 """
 Unit tests for PatientPhotoService with focus on pagination and ordering.
 """
+import io
 import pytest
 from typing import Optional
+from unittest.mock import Mock, patch
 from datetime import datetime, timezone, timedelta
+from fastapi import HTTPException, UploadFile
 from sqlalchemy.orm import Session
 
+from core.constants import PHOTO_UPLOAD_CHUNK_SIZE_BYTES
+
 from models.clinic import Clinic
 from models.patient import Patient
 from models.patient_photo import PatientPhoto
 from models.medical_record import MedicalRecord
 from models.medical_record_template import MedicalRecordTemplate
-from services.patient_photo_service import PatientPhotoService
+from services.patient_photo_service import PatientPhotoService, _presigned_url_cache
 
 
 @pytest.fixture
@@ -376,3 +381,104 @@ class TestFilteringBehavior:
         assert unlinked_photo.id in ids
         assert linked_photo.id not in ids
         assert total == 1
+
+
+class TestStreamingUpload:
+    """Test hash-while-upload ingestion and early deduplication."""
+
+    def _upload_file(self, content: bytes, filename: str = "photo.jpg") -> UploadFile:
+        return UploadFile(file=io.BytesIO(content), filename=filename)
+
+    def test_spool_upload_hashes_in_chunks(self):
+        """Verify the streamed hash matches a whole-content hash."""
+        content = b"x" * (PHOTO_UPLOAD_CHUNK_SIZE_BYTES * 3 + 17)
+        service = PatientPhotoService()
+
+        spool, content_hash, size_bytes = service._spool_upload(self._upload_file(content))
+        with spool:
+            assert content_hash == service._calculate_content_hash(content)
+            assert size_bytes == len(content)
+            assert spool.read() == content
+
+    def test_spool_upload_rejects_oversized_file(self):
+        """Verify uploads above the hard cap are rejected with 413."""
+        service = PatientPhotoService()
+
+        with patch("services.patient_photo_service.PHOTO_UPLOAD_MAX_SIZE_BYTES", 1024):
+            with pytest.raises(HTTPException) as exc_info:
+                service._spool_upload(self._upload_file(b"x" * 2048))
+
+        assert exc_info.value.status_code == 413
+
+    def test_duplicate_upload_skips_decode_and_storage(
+        self,
+        db_session: Session,
+        clinic: Clinic,
+        patient: Patient
+    ):
+        """Verify a duplicate upload reuses storage keys without processing the image."""
+        content = b"duplicate image bytes"
+        service = PatientPhotoService()
+        existing = create_test_photo(db_session, clinic, patient)
+        existing.content_hash = service._calculate_content_hash(content)
+        existing.thumbnail_key = "test/thumb.jpg"
+        db_session.commit()
+
+        service.s3_client = Mock()
+        with patch.object(service, "_process_image") as mock_process:
+            photo = service.upload_photo(
+                db=db_session,
+                clinic_id=clinic.id,
+                patient_id=patient.id,
+                file=self._upload_file(content, filename="copy.jpg")
+            )
+
+        mock_process.assert_not_called()
+        service.s3_client.put_object.assert_not_called()
+        assert photo.id != existing.id
+        assert photo.storage_key == existing.storage_key
+        assert photo.thumbnail_key == existing.thumbnail_key
+        assert photo.size_bytes == len(content)
+
+
+class TestBatchedPhotoUrls:
+    """Test batched, cached presigned URL signing."""
+
+    def setup_method(self):
+        _presigned_url_cache.clear()
+
+    def _service(self) -> PatientPhotoService:
+        service = PatientPhotoService()
+        service.s3_client = Mock()
+        service.s3_client.generate_presigned_url.side_effect = (
+            lambda op, Params, ExpiresIn: f"https://signed/{Params['Key']}"
+        )
+        return service
+
+    def test_batch_signs_each_key_once(self):
+        """Verify duplicate and empty keys are collapsed into one signature per key."""
+        service = self._service()
+
+        urls = service.get_photo_urls(["a.jpg", "b.jpg", "a.jpg", None])
+
+        assert urls == {"a.jpg": "https://signed/a.jpg", "b.jpg": "https://signed/b.jpg"}
+        assert service.s3_client.generate_presigned_url.call_count == 2
+
+    def test_repeated_loads_reuse_cached_signatures(self):
+        """Verify a second gallery load in the same expiry bucket signs nothing."""
+        service = self._service()
+        service.get_photo_urls(["a.jpg", "b.jpg"])
+
+        other_request_service = self._service()
+        urls = other_request_service.get_photo_urls(["a.jpg", "b.jpg"])
+
+        assert urls["a.jpg"] == "https://signed/a.jpg"
+        other_request_service.s3_client.generate_presigned_url.assert_not_called()
+
+    def test_different_expiration_is_signed_separately(self):
+        """Verify the cache is keyed by expiration as well as storage key."""
+        service = self._service()
+        service.get_photo_url("a.jpg", expiration=3600)
+        service.get_photo_url("a.jpg", expiration=600)
+
+        assert service.s3_client.generate_presigned_url.call_count == 2
@@ -0,0 +1,91 @@
+"""
+Unit tests for the receipt PDF render pool.
+
+These run the pool in its in-process mode (0 workers) with the render
+function patched, so they do not need WeasyPrint or worker processes.
+"""
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from services.pdf_render_pool import (
+    PDFRenderPool,
+    PDFRenderQueueFullError,
+    PDFRenderTimeoutError,
+)
+
+RECEIPT_DATA = {"receipt_number": "2026-00001"}
+
+
+@pytest.fixture
+def blocked_render():
+    """Patch the render function to block until the returned event is set."""
+    release = threading.Event()
+
+    def render(receipt_data, void_info):
+        release.wait(timeout=5)
+        return b"%PDF-blocked"
+
+    with patch("services.pdf_render_pool._render_receipt_pdf", side_effect=render):
+        yield release
+    release.set()
+
+
+class TestPDFRenderPool:
+    async def test_renders_pdf(self):
+        pool = PDFRenderPool(workers=0, max_queue=1, timeout_seconds=5)
+        try:
+            with patch("services.pdf_render_pool._render_receipt_pdf", return_value=b"%PDF-1") as mock_render:
+                assert await pool.render_receipt_pdf(RECEIPT_DATA) == b"%PDF-1"
+                mock_render.assert_called_once_with(RECEIPT_DATA, None)
+        finally:
+            pool.shutdown()
+
+    async def test_propagates_render_errors(self):
+        pool = PDFRenderPool(workers=0, max_queue=1, timeout_seconds=5)
+        try:
+            with patch("services.pdf_render_pool._render_receipt_pdf", side_effect=ValueError("bad template")):
+                with pytest.raises(ValueError, match="bad template"):
+                    await pool.render_receipt_pdf(RECEIPT_DATA)
+        finally:
+            pool.shutdown()
+
+    async def test_times_out(self, blocked_render):
+        pool = PDFRenderPool(workers=0, max_queue=1, timeout_seconds=0.05)
+        try:
+            with pytest.raises(PDFRenderTimeoutError):
+                await pool.render_receipt_pdf(RECEIPT_DATA)
+        finally:
+            blocked_render.set()
+            pool.shutdown()
+
+    async def test_rejects_when_queue_full(self, blocked_render):
+        # One running + one queued render fill the pool
+        pool = PDFRenderPool(workers=0, max_queue=1, timeout_seconds=0.05)
+        try:
+            for _ in range(2):
+                with pytest.raises(PDFRenderTimeoutError):
+                    await pool.render_receipt_pdf(RECEIPT_DATA)
+
+            with pytest.raises(PDFRenderQueueFullError):
+                await pool.render_receipt_pdf(RECEIPT_DATA)
+        finally:
+            blocked_render.set()
+            pool.shutdown()
+
+    async def test_slot_released_after_render_finishes(self, blocked_render):
+        pool = PDFRenderPool(workers=0, max_queue=0, timeout_seconds=0.05)
+        try:
+            with pytest.raises(PDFRenderTimeoutError):
+                await pool.render_receipt_pdf(RECEIPT_DATA)
+            with pytest.raises(PDFRenderQueueFullError):
+                await pool.render_receipt_pdf(RECEIPT_DATA)
+
+            blocked_render.set()
+            pool._get_executor().submit(lambda: None).result(timeout=5)  # Drain the render thread
+
+            pool.timeout_seconds = 5
+            assert await pool.render_receipt_pdf(RECEIPT_DATA) == b"%PDF-blocked"
+        finally:
+            pool.shutdown()
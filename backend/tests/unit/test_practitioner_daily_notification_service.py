@@ -8,9 +8,12 @@ import pytest
 from datetime import datetime, date, time, timedelta
 from unittest.mock import Mock, patch, MagicMock
 
+from sqlalchemy import event
+
 from models.appointment import Appointment
 from models.calendar_event import CalendarEvent
 from models.clinic import Clinic
+from models.line_push_message import LinePushMessage
 from models.patient import Patient
 from models.user import User
 from models.appointment_type import AppointmentType
@@ -724,3 +727,88 @@ class TestPractitionerDailyNotificationService:
         from utils.datetime_utils import TAIWAN_TZ
         assert service.scheduler.timezone == TAIWAN_TZ
 
+
+
+class TestBatchedPractitionerNotifications:
+    """The hourly run selects and fetches for all practitioners in a fixed number of queries."""
+
+    def _create_practitioner_with_appointment(self, db_session, index, notification_time, roles=("practitioner",)):
+        clinic = Clinic(
+            name=f"Clinic {index}",
+            line_channel_id=f"channel_{index}",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token",
+            subscription_status="trial"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        user, association = create_user_with_clinic_association(
+            db_session, clinic, f"Therapist {index}", f"t{index}@test.com", f"t{index}_sub", list(roles)
+        )
+        association.set_validated_settings(PractitionerSettings(next_day_notification_time=notification_time))
+        association.line_user_id = f"line_user_{index}"
+
+        patient = Patient(clinic_id=clinic.id, full_name=f"Patient {index}", phone_number="0912345678")
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        db_session.add_all([patient, appointment_type])
+        db_session.flush()
+
+        next_day = (taiwan_now() + timedelta(days=1)).date()
+        calendar_event = create_calendar_event_with_clinic(
+            db_session, user, clinic, "appointment", next_day, time(10, 0), time(11, 0)
+        )
+        db_session.flush()
+        db_session.add(Appointment(
+            calendar_event_id=calendar_event.id,
+            patient_id=patient.id,
+            appointment_type_id=appointment_type.id,
+            status="confirmed"
+        ))
+        db_session.flush()
+        return clinic, association
+
+    async def test_run_uses_fixed_queries_and_tracks_pushes(self, db_session):
+        due = [self._create_practitioner_with_appointment(db_session, i, "21:00") for i in range(3)]
+        self._create_practitioner_with_appointment(db_session, 3, "08:00")
+        self._create_practitioner_with_appointment(db_session, 4, "21:00", roles=("practitioner", "admin"))
+        db_session.commit()
+        due_line_users = {association.line_user_id for _, association in due}
+        due_clinic_ids = {clinic.id for clinic, _ in due}
+
+        from contextlib import contextmanager
+
+        @contextmanager
+        def mock_db_context():
+            yield db_session
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        service = PractitionerDailyNotificationService()
+        with patch('services.practitioner_daily_notification_service.LINEService') as mock_line_service_class, \
+             patch('services.practitioner_daily_notification_service.get_db_context', mock_db_context), \
+             patch('services.practitioner_daily_notification_service.taiwan_now') as mock_taiwan_now:
+            mock_taiwan_now.return_value = datetime.combine(taiwan_now().date(), time(21, 0))
+            mock_line_service_class.return_value.send_text_message.return_value = "message_id"
+
+            event.listen(db_session.get_bind(), "before_cursor_execute", count_statements)
+            try:
+                await service._send_daily_notifications()
+            finally:
+                event.remove(db_session.get_bind(), "before_cursor_execute", count_statements)
+
+            sent_to = {c.args[0] for c in mock_line_service_class.return_value.send_text_message.call_args_list}
+
+        # Due practitioners, their appointments, practitioner names
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 3
+        assert sent_to == due_line_users
+
+        tracked = db_session.query(LinePushMessage).filter(LinePushMessage.clinic_id.in_(due_clinic_ids)).all()
+        assert {t.line_user_id for t in tracked} == due_line_users
+        assert all(t.recipient_type == "practitioner" and t.line_message_id == "message_id" for t in tracked)
+
+        stats = service.last_run_stats
+        assert (stats.due, stats.sent, stats.messages, stats.failed) == (3, 3, 3, 0)
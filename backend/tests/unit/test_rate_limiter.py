@@ -0,0 +1,56 @@
+"""
+Unit tests for the keyed rate limiter.
+"""
+
+from utils.rate_limiter import KeyedRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+class TestKeyedRateLimiter:
+    def test_spaces_calls_on_same_key(self):
+        clock = FakeClock()
+        limiter = KeyedRateLimiter(rate_per_second=10, clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            limiter.acquire("channel")
+
+        assert clock.sleeps == [0.1, 0.2]
+
+    def test_keys_are_independent(self):
+        clock = FakeClock()
+        limiter = KeyedRateLimiter(rate_per_second=10, clock=clock, sleep=clock.sleep)
+
+        limiter.acquire("a")
+        limiter.acquire("b")
+
+        assert clock.sleeps == []
+
+    def test_no_wait_once_interval_has_passed(self):
+        clock = FakeClock()
+        limiter = KeyedRateLimiter(rate_per_second=10, clock=clock, sleep=clock.sleep)
+
+        limiter.acquire("channel")
+        clock.now = 0.5
+        limiter.acquire("channel")
+
+        assert clock.sleeps == []
+
+    def test_zero_rate_disables_limit(self):
+        clock = FakeClock()
+        limiter = KeyedRateLimiter(rate_per_second=0, clock=clock, sleep=clock.sleep)
+
+        for _ in range(5):
+            limiter.acquire("channel")
+
+        assert clock.sleeps == []
@@ -0,0 +1,90 @@
+"""
+Unit tests for the receipt render cache.
+"""
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services import receipt_render_cache
+from services.receipt_render_cache import (
+    DiskRenderCache,
+    get_receipt_pdf,
+    invalidate_receipt_renders,
+    receipt_render_key,
+)
+
+RECEIPT_DATA = {"receipt_number": "2026-00001", "total_amount": 1000, "items": [{"name": "初診", "amount": 1000}]}
+VOID_INFO = {"voided": True, "voided_at": "2026-01-01T10:00:00", "voided_by": None, "reason": "錯誤"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskRenderCache(tmp_path, max_bytes=1024 * 1024)
+    with patch.object(receipt_render_cache, "get_receipt_render_cache", return_value=cache):
+        yield cache
+
+
+class TestReceiptRenderKey:
+    def test_key_ignores_dict_ordering(self):
+        reordered = dict(reversed(list(RECEIPT_DATA.items())))
+        assert receipt_render_key(RECEIPT_DATA, None, 'pdf') == receipt_render_key(reordered, None, 'pdf')
+
+    def test_key_depends_on_void_info_and_kind(self):
+        base = receipt_render_key(RECEIPT_DATA, None, 'pdf')
+        assert receipt_render_key(RECEIPT_DATA, VOID_INFO, 'pdf') != base
+        assert receipt_render_key(RECEIPT_DATA, None, 'html') != base
+
+    def test_none_void_info_matches_not_voided_info(self):
+        not_voided = {"voided": False, "voided_at": None, "voided_by": None, "reason": None}
+        assert receipt_render_key(RECEIPT_DATA, None, 'pdf') == receipt_render_key(RECEIPT_DATA, not_voided, 'pdf')
+
+
+class TestDiskRenderCache:
+    def test_put_and_get(self, tmp_path):
+        cache = DiskRenderCache(tmp_path, max_bytes=1024)
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, b"pdf")
+        assert cache.get("ab" * 32) == b"pdf"
+
+    def test_evicts_least_recently_read_when_over_limit(self, tmp_path):
+        cache = DiskRenderCache(tmp_path, max_bytes=250)
+        keys = [f"{i:02d}" * 32 for i in range(3)]
+        for age, key in enumerate(keys[:2]):
+            cache.put(key, b"x" * 100)
+            # Distinct mtimes regardless of filesystem timestamp resolution
+            os.utime(cache._path(key), (1000 + age, 1000 + age))
+        cache.get(keys[0])  # keys[1] is now least recently read
+
+        cache.put(keys[2], b"x" * 100)
+
+        assert cache.get(keys[0]) == b"x" * 100
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == b"x" * 100
+
+
+class TestCachedRendering:
+    async def test_hit_skips_rendering(self, cache):
+        with patch("services.pdf_render_pool.get_pdf_render_pool") as mock_get_pool:
+            render = mock_get_pool.return_value.render_receipt_pdf = AsyncMock(return_value=b"%PDF-1")
+
+            assert await get_receipt_pdf(RECEIPT_DATA) == b"%PDF-1"
+            assert await get_receipt_pdf(RECEIPT_DATA) == b"%PDF-1"
+
+            assert render.await_count == 1
+
+    async def test_voided_render_is_separate_entry(self, cache):
+        with patch("services.pdf_render_pool.get_pdf_render_pool") as mock_get_pool:
+            mock_get_pool.return_value.render_receipt_pdf = AsyncMock(side_effect=[b"active", b"voided"])
+
+            assert await get_receipt_pdf(RECEIPT_DATA) == b"active"
+            assert await get_receipt_pdf(RECEIPT_DATA, VOID_INFO) == b"voided"
+
+    async def test_invalidate_drops_not_voided_renders(self, cache):
+        with patch("services.pdf_render_pool.get_pdf_render_pool") as mock_get_pool:
+            mock_get_pool.return_value.render_receipt_pdf = AsyncMock(return_value=b"%PDF-1")
+            await get_receipt_pdf(RECEIPT_DATA)
+
+            invalidate_receipt_renders(RECEIPT_DATA)
+
+            assert cache.get(receipt_render_key(RECEIPT_DATA, None, 'pdf')) is None
@@ -414,7 +414,7 @@ class TestScheduledMessageService:
         }
 
         # Send pending messages
-        ScheduledMessageService.send_pending_messages(db_session, batch_size=10)
+        stats = ScheduledMessageService.send_pending_messages(db_session, batch_size=10)
         db_session.commit()
 
         # Verify message was sent
@@ -422,6 +422,106 @@ class TestScheduledMessageService:
         assert scheduled.status == 'sent'
         assert scheduled.actual_send_time is not None
         mock_line_service.send_text_message.assert_called_once()
+        assert stats.sent == 1
+        assert stats.batches == 1
+
+    @patch('services.scheduled_message_service.LINEService')
+    @patch('services.scheduled_message_service.MessageTemplateService')
+    def test_send_pending_messages_reuses_clinic_line_service(self, mock_template_service, mock_line_service_class, db_session):
+        """Test that one run builds one LINE service per clinic and counts outcomes."""
+        clinic = Clinic(
+            name="Test Clinic",
+            line_channel_id="test_channel",
+            line_channel_secret="test_secret",
+            line_channel_access_token="test_token",
+            subscription_status="trial"
+        )
+        db_session.add(clinic)
+        db_session.flush()
+
+        user, _ = create_user_with_clinic_association(
+            db_session, clinic,
+            full_name="Test Therapist",
+            email="therapist@test.com",
+            google_subject_id="therapist_subject_123",
+            roles=["practitioner"],
+            is_active=True
+        )
+        patient = Patient(clinic_id=clinic.id, full_name="Test Patient", phone_number="1234567890")
+        appointment_type = AppointmentType(clinic_id=clinic.id, name="Test Type", duration_minutes=60)
+        db_session.add_all([patient, appointment_type])
+        db_session.flush()
+
+        follow_up = FollowUpMessage(
+            appointment_type_id=appointment_type.id,
+            clinic_id=clinic.id,
+            timing_mode='hours_after',
+            hours_after=2,
+            message_template="{病患姓名}，感謝您今天的預約！",
+            is_enabled=True,
+            display_order=0
+        )
+        db_session.add(follow_up)
+        db_session.flush()
+
+        scheduled_messages = []
+        for hour in (9, 11):
+            calendar_event = create_calendar_event_with_clinic(
+                db_session, user, clinic,
+                event_type="appointment",
+                event_date=(taiwan_now() + timedelta(days=1)).date(),
+                start_time=datetime.strptime(f"{hour}:00", "%H:%M").time(),
+                end_time=datetime.strptime(f"{hour + 1}:00", "%H:%M").time()
+            )
+            db_session.flush()
+            appointment = Appointment(
+                calendar_event_id=calendar_event.id,
+                patient_id=patient.id,
+                appointment_type_id=appointment_type.id,
+                status="confirmed"
+            )
+            db_session.add(appointment)
+            scheduled_messages.append(ScheduledLineMessage(
+                recipient_type='patient',
+                recipient_line_user_id='test_line_user_id',
+                clinic_id=clinic.id,
+                message_type='follow_up',
+                message_template="{病患姓名}，感謝您今天的預約！",
+                message_context={
+                    'appointment_id': calendar_event.id,
+                    'follow_up_message_id': follow_up.id
+                },
+                scheduled_send_time=taiwan_now() - timedelta(minutes=1),
+                status='pending'
+            ))
+        # A message whose appointment no longer exists is skipped
+        scheduled_messages.append(ScheduledLineMessage(
+            recipient_type='patient',
+            recipient_line_user_id='test_line_user_id',
+            clinic_id=clinic.id,
+            message_type='follow_up',
+            message_template="{病患姓名}，感謝您今天的預約！",
+            message_context={'appointment_id': 999999, 'follow_up_message_id': follow_up.id},
+            scheduled_send_time=taiwan_now() - timedelta(minutes=1),
+            status='pending'
+        ))
+        db_session.add_all(scheduled_messages)
+        db_session.flush()
+
+        mock_line_service = Mock()
+        mock_line_service_class.return_value = mock_line_service
+        mock_line_service.send_text_message.return_value = "test_message_id"
+        mock_template_service.render_message.return_value = "Test Patient，感謝您今天的預約！"
+        mock_template_service.build_confirmation_context.return_value = {
+            '病患姓名': 'Test Patient',
+            'recipient_type': 'patient'
+        }
+
+        stats = ScheduledMessageService.send_pending_messages(db_session, batch_size=10)
+
+        assert mock_line_service_class.call_count == 1
+        assert mock_line_service.send_text_message.call_count == 2
+        assert (stats.sent, stats.skipped, stats.retried, stats.failed) == (2, 1, 0, 0)
 
     def test_validate_appointment_for_message_reminder_valid(self, db_session):
         """Test validation for reminder messages when appointment is valid."""
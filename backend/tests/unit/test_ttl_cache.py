@@ -0,0 +1,67 @@
+"""
+Unit tests for the in-process TTL cache.
+"""
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    def test_returns_value_until_expiry(self):
+        clock = FakeClock()
+        cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 29
+        assert cache.get("a") == 1
+
+        clock.now = 30
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_per_entry_ttl_override(self):
+        clock = FakeClock()
+        cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+        cache.set("a", 1, ttl_seconds=5)
+
+        clock.now = 6
+        assert cache.get("a") is None
+
+    def test_evicts_least_recently_used(self):
+        cache: TTLCache[str, int] = TTLCache(max_entries=2, ttl_seconds=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_delete_and_clear(self):
+        cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl_seconds=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.delete("a")
+        assert cache.get("a") is None
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_delete_where(self):
+        cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl_seconds=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert cache.delete_where(lambda key, value: value % 2 == 1) == 2
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") is None